@@ -0,0 +1,113 @@
+"""Compare JSON backends on representative MCP payloads.
+
+Usage:
+    uv run --with orjson --with msgspec python scripts/bench_json.py
+
+Each payload is decoded and re-encoded the way the bridge handles a reply
+(``jsoncodec.loads`` then ``jsoncodec.dumps``). Backends that are not
+installed are skipped.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from mcp_agentcore_proxy.jsoncodec import BACKENDS, load_codec
+
+
+def _tools_list(count: int = 60) -> dict:
+    tools = [
+        {
+            "name": f"tool_{index}",
+            "description": "Look up records in the catalog. " * 4,
+            "inputSchema": {
+                "type": "object",
+                "properties": {
+                    "query": {"type": "string", "description": "Search text"},
+                    "limit": {"type": "integer", "minimum": 1, "maximum": 100},
+                    "filters": {
+                        "type": "array",
+                        "items": {"type": "string", "enum": ["a", "b", "c"]},
+                    },
+                },
+                "required": ["query"],
+            },
+        }
+        for index in range(count)
+    ]
+    return {"jsonrpc": "2.0", "id": 1, "result": {"tools": tools}}
+
+
+def _text_result(size: int = 2 * 1024 * 1024) -> dict:
+    line = "2025-10-21T12:00:00Z INFO request served in 12ms — ok ✓\n"
+    text = line * (size // len(line.encode("utf-8")))
+    return {
+        "jsonrpc": "2.0",
+        "id": 2,
+        "result": {"content": [{"type": "text", "text": text}], "isError": False},
+    }
+
+
+def _structured_result(rows: int = 20_000) -> dict:
+    records = [
+        {"id": index, "name": f"item-{index}", "price": index * 0.25, "tags": ["x"]}
+        for index in range(rows)
+    ]
+    return {
+        "jsonrpc": "2.0",
+        "id": 3,
+        "result": {
+            "content": [{"type": "text", "text": "see structuredContent"}],
+            "structuredContent": {"records": records},
+        },
+    }
+
+
+PAYLOADS = {
+    "tools/list (60 tools)": _tools_list,
+    "text result (2 MiB)": _text_result,
+    "structured result (20k rows)": _structured_result,
+}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    codecs = []
+    for name in BACKENDS:
+        try:
+            codecs.append(load_codec(name))
+        except ImportError:
+            print(f"{name}: not installed, skipped")
+
+    print(f"{'payload':<30} {'size':>10} " + " ".join(f"{c.name:>16}" for c in codecs))
+    for label, build in PAYLOADS.items():
+        raw = json.dumps(build())
+        timings = []
+        for codec in codecs:
+            best = min(
+                timeit.repeat(
+                    lambda codec=codec, raw=raw: codec.dumps(codec.loads(raw)),
+                    number=1,
+                    repeat=args.repeat,
+                )
+            )
+            timings.append(best)
+        baseline = timings[-1] if codecs[-1].name == "json" else None
+        cells = []
+        for best in timings:
+            speedup = f" ({baseline / best:.1f}x)" if baseline else ""
+            cells.append(f"{f'{best * 1000:.1f}ms{speedup}':>16}")
+        print(f"{label:<30} {len(raw):>10} " + " ".join(cells))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+"""Front several AgentCore runtimes as one MCP server.
+
+``AGENTCORE_AGENT_ARNS`` lists the runtimes, comma-separated. Each entry may
+carry a namespace, as in ``docs=arn:...,tickets=arn:...``. Without one, the
+runtime id at the end of the ARN is used.
+
+In this mode the proxy answers the IDE itself instead of relaying a single
+runtime's session. ``initialize`` and the ``*/list`` calls are sent to every
+runtime in parallel, so startup takes as long as the slowest runtime rather
+than the sum of all of them, and the results are merged. Tool and prompt
+names are namespaced as ``<namespace>__<name>``. Resource URIs are left
+alone. ``tools/call``, ``prompts/get`` and ``resources/read`` are routed to
+the owning runtime through an index built from the last listing.
+"""
+
+from __future__ import annotations
+
+import itertools
+import json
+import queue
+import re
+import threading
+from collections.abc import Callable, Iterator
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+from mcp_agentcore_proxy import jsoncodec
+from mcp_agentcore_proxy.aws_session import AssumeRoleError
+from mcp_agentcore_proxy.client import Output, RuntimeClient
+from mcp_agentcore_proxy.routing import (
+    LIST_FIELDS,
+    MAX_PAGES,
+    NAMESPACE_SEPARATOR,
+    RouteIndex,
+    UnknownTarget,
+    error_reply,
+    merge_initialize,
+    result_reply,
+)
+from mcp_agentcore_proxy.session_manager import (
+    RuntimeSessionConfig,
+    RuntimeSessionManager,
+)
+
+__all__ = ["Aggregator", "Member", "parse_members"]
+
+_INVALID_NAMESPACE = re.compile(r"[^A-Za-z0-9_-]")
+
+
+@dataclass(frozen=True)
+class Member:
+    """One runtime behind the aggregating proxy."""
+
+    namespace: str
+    agent_arn: str
+
+
+def parse_members(value: str) -> list[Member]:
+    """Parse ``AGENTCORE_AGENT_ARNS``; raises ValueError on a bad list."""
+    members: list[Member] = []
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        namespace, separator, agent_arn = item.partition("=")
+        if not separator:
+            agent_arn = item
+            namespace = item.rsplit("/", 1)[-1]
+        namespace = _INVALID_NAMESPACE.sub("_", namespace.strip())
+        agent_arn = agent_arn.strip()
+        if not namespace or not agent_arn.startswith("arn:"):
+            raise ValueError(f"Invalid AGENTCORE_AGENT_ARNS entry: {item!r}")
+        if any(member.namespace == namespace for member in members):
+            raise ValueError(
+                f"Duplicate namespace in AGENTCORE_AGENT_ARNS: {namespace}"
+            )
+        members.append(Member(namespace, agent_arn))
+    if not members:
+        raise ValueError("AGENTCORE_AGENT_ARNS lists no runtimes")
+    return members
+
+
+def _iter_messages(body_stream: Any, content_type: str) -> Iterator[Any]:
+    """Yield each JSON-RPC message in a JSON or SSE body as it arrives."""
+    if "text/event-stream" in content_type.lower():
+        data: list[str] = []
+        for raw_line in itertools.chain(body_stream.iter_lines(), [b""]):
+            line = raw_line.decode("utf-8", errors="replace")
+            if line.startswith("data:"):
+                data.append(line[5:].lstrip())
+            elif not line and data:
+                try:
+                    message = jsoncodec.loads("".join(data))
+                except json.JSONDecodeError:
+                    message = None  # Skip malformed events, as the relay does
+                data = []
+                if message is not None:
+                    yield message
+        return
+    body = body_stream.read()
+    if not body.strip():
+        return
+    parsed = jsoncodec.loads(body)
+    yield from parsed if isinstance(parsed, list) else [parsed]
+
+
+class Aggregator:
+    """Serve the IDE's MCP session from several runtimes at once."""
+
+    def __init__(
+        self,
+        members: list[Member],
+        runtime: RuntimeClient,
+        session_config: RuntimeSessionConfig,
+        out: Output,
+        max_concurrency: int,
+    ):
+        self._members = members
+        self._runtime = runtime
+        self._out = out
+        self._max_concurrency = max_concurrency
+        # Raises RuntimeSessionError, e.g. when identity mode cannot call STS
+        self._sessions = {
+            member.namespace: RuntimeSessionManager(session_config)
+            for member in members
+        }
+        self._fan_out_pool = ThreadPoolExecutor(
+            max_workers=len(members), thread_name_prefix="agentcore-fanout"
+        )
+        self._lock = threading.Lock()
+        self._initialize: dict[str, Any] | None = None
+        self._replayed: set[str] = set()
+        self._index: RouteIndex[Member] = RouteIndex(members)
+        # Server-initiated request ids as sent to the IDE -> (member, original id)
+        self._server_requests: dict[str, tuple[Member, Any]] = {}
+
+    def close(self) -> None:
+        self._fan_out_pool.shutdown(wait=False, cancel_futures=True)
+
+    def serve(self, lines: queue.Queue[str | None]) -> None:
+        """Answer messages from ``lines`` until ``None``."""
+        with ThreadPoolExecutor(
+            max_workers=self._max_concurrency, thread_name_prefix="agentcore-invoke"
+        ) as pool:
+            while (raw_line := lines.get()) is not None:
+                line = raw_line.strip()
+                if not line:
+                    continue
+                try:
+                    message = jsoncodec.loads(line)
+                except json.JSONDecodeError as exc:
+                    self._out.print_error(None, -32700, f"Parse error: {exc}")
+                    continue
+                if isinstance(message, list):
+                    pool.submit(self._answer_batch, message)
+                elif not isinstance(message, dict):
+                    self._out.print_error(None, -32600, "Invalid Request")
+                elif message.get("method") == "initialize":
+                    # The handshake must complete before anything else is sent
+                    self._write(self._handle(message))
+                elif message.get("method") is None:
+                    self._deliver_reply(message)
+                elif message.get("id") is None:
+                    self._notify(message)
+                else:
+                    pool.submit(self._answer, message)
+
+    def _write(self, reply: dict[str, Any] | list[Any] | None) -> None:
+        if reply is not None:
+            self._out.write_line(jsoncodec.dumps_str(reply))
+
+    def _answer(self, message: dict[str, Any]) -> None:
+        self._write(self._handle(message))
+
+    def _answer_batch(self, batch: list[Any]) -> None:
+        if not batch:
+            self._write(error_reply(None, -32600, "Invalid Request: empty batch"))
+            return
+        replies = []
+        for item in batch:
+            if not isinstance(item, dict):
+                replies.append(error_reply(None, -32600, "Invalid Request"))
+            elif item.get("method") is None:
+                self._deliver_reply(item)
+            elif item.get("id") is None:
+                self._notify(item)
+            else:
+                replies.append(self._handle(item))
+        if replies:
+            self._write(replies)
+
+    def _handle(self, message: dict[str, Any]) -> dict[str, Any]:
+        method = message["method"]
+        request_id = message.get("id")
+        if method == "initialize":
+            return self._initialize_all(message)
+        if method == "ping":
+            return result_reply(request_id, {})
+        if method in LIST_FIELDS:
+            return self._list(message)
+        if method == "logging/setLevel":
+            self._fan_out(lambda member: self._call(member, message))
+            return result_reply(request_id, {})
+        if not RouteIndex.routes(method):
+            return error_reply(request_id, -32601, f"Method not found: {method}")
+
+        list_method = self._index.listing_for(message)
+        if list_method is not None:
+            # The IDE called before listing; build the index once
+            self._list(
+                {"jsonrpc": "2.0", "id": "aggregate-index", "method": list_method}
+            )
+        try:
+            member, forwarded = self._index.route(message)
+        except UnknownTarget as exc:
+            return error_reply(request_id, -32602, str(exc))
+        return self._call(member, forwarded)
+
+    def _fan_out(
+        self, call: Callable[[Member], dict[str, Any]]
+    ) -> list[tuple[Member, dict[str, Any]]]:
+        return list(zip(self._members, self._fan_out_pool.map(call, self._members)))
+
+    def _initialize_all(self, message: dict[str, Any]) -> dict[str, Any]:
+        with self._lock:
+            self._initialize = message
+        results = []
+        first_error: dict[str, Any] | None = None
+        for member, reply in self._fan_out(lambda member: self._call(member, message)):
+            if isinstance(reply.get("result"), dict):
+                results.append((member.namespace, reply["result"]))
+                continue
+            first_error = first_error or reply
+            self._warn(member, "initialize", reply)
+        if not results:
+            assert first_error is not None
+            return {**first_error, "id": message.get("id")}
+        return result_reply(message.get("id"), merge_initialize(results))
+
+    def _list(self, message: dict[str, Any]) -> dict[str, Any]:
+        method = message["method"]
+        field = LIST_FIELDS[method]
+        listings = []
+        first_error: dict[str, Any] | None = None
+        for member, reply in self._fan_out(
+            lambda member: self._list_all(member, message, field)
+        ):
+            if "error" in reply:
+                first_error = first_error or reply
+                self._warn(member, method, reply)
+                continue
+            listings.append((member.namespace, member, reply["result"]))
+        if not listings:
+            assert first_error is not None
+            return {**first_error, "id": message.get("id")}
+        entries = self._index.merge(field, listings)
+        return result_reply(message.get("id"), {field: entries})
+
+    def _list_all(
+        self, member: Member, message: dict[str, Any], field: str
+    ) -> dict[str, Any]:
+        """Fetch every page of a listing from one runtime."""
+        params = {
+            key: value
+            for key, value in (message.get("params") or {}).items()
+            if key != "cursor"
+        }
+        entries: list[Any] = []
+        for _ in range(MAX_PAGES):
+            reply = self._call(member, {**message, "params": params})
+            result = reply.get("result")
+            if not isinstance(result, dict):
+                return (
+                    reply
+                    if "error" in reply
+                    else error_reply(message.get("id"), -32603, "Invalid list result")
+                )
+            entries.extend(result.get(field) or [])
+            cursor = result.get("nextCursor")
+            if not cursor:
+                break
+            params = {**params, "cursor": cursor}
+        return result_reply(message.get("id"), entries)
+
+    def _warn(self, member: Member, method: str, reply: dict[str, Any]) -> None:
+        error = reply.get("error") or {}
+        self._out.emit_log(
+            "warning",
+            f"Runtime {member.namespace} failed {method}: {error.get('message')}",
+        )
+
+    def _notify(self, message: dict[str, Any]) -> None:
+        # Like the relay, only the handshake notification needs to reach servers
+        if message.get("method") == "notifications/initialized":
+            payload = jsoncodec.dumps_str(message)
+            self._fan_out(lambda member: self._send(member, payload, None))
+
+    def _deliver_reply(self, message: dict[str, Any]) -> None:
+        """Return the IDE's reply to a server request to the runtime that sent it."""
+        with self._lock:
+            origin = self._server_requests.pop(json.dumps(message.get("id")), None)
+        if origin is None:
+            return
+        member, original_id = origin
+        self._send(member, jsoncodec.dumps_str({**message, "id": original_id}), None)
+
+    def _call(self, member: Member, message: dict[str, Any]) -> dict[str, Any]:
+        """Send one request to ``member`` and return its reply."""
+        payload = jsoncodec.dumps_str(message)
+        reply = self._send(member, payload, message.get("id"))
+        error = reply.get("error") if isinstance(reply, dict) else None
+        if (
+            message.get("method") != "initialize"
+            and isinstance(error, dict)
+            and error.get("code") == -32602
+        ):
+            # Uninitialized server (e.g. a restarted container): replay once
+            with self._lock:
+                initialize = self._initialize
+                replay = (
+                    initialize is not None and member.namespace not in self._replayed
+                )
+                if replay:
+                    self._replayed.add(member.namespace)
+            if replay:
+                self._send(
+                    member, jsoncodec.dumps_str(initialize), initialize.get("id")
+                )
+                self._send(
+                    member,
+                    json.dumps(
+                        {"jsonrpc": "2.0", "method": "notifications/initialized"}
+                    ),
+                    None,
+                )
+                reply = self._send(member, payload, message.get("id"))
+        return reply
+
+    def _send(self, member: Member, payload: str, request_id: Any) -> dict[str, Any]:
+        """Invoke ``member``; server messages on the way are passed to the IDE."""
+        try:
+            response = self._runtime.invoke(
+                member.agent_arn,
+                payload,
+                self._sessions[member.namespace].next_session_id(),
+                self._out,
+            )
+            body_stream = response.get("response")
+            reply: dict[str, Any] | None = None
+            if body_stream is not None:
+                # Server requests are relayed at once: the runtime holds the
+                # stream open until the IDE has answered them
+                for item in _iter_messages(
+                    body_stream, response.get("contentType", "")
+                ):
+                    if not isinstance(item, dict):
+                        continue
+                    if item.get("method") is None and item.get("id") == request_id:
+                        reply = item
+                    else:
+                        self._relay_server_message(member, item)
+        except AssumeRoleError as exc:
+            return error_reply(request_id, -32000, f"Credential refresh failed: {exc}")
+        except (BotoCoreError, ClientError) as exc:
+            detail = getattr(exc, "response", None)
+            if (
+                request_id is None
+                and isinstance(detail, dict)
+                and detail.get("ResponseMetadata", {}).get("HTTPStatusCode") == 204
+            ):
+                return {}
+            return error_reply(request_id, -32000, f"InvokeAgentRuntime error: {exc}")
+        except json.JSONDecodeError as exc:
+            return error_reply(
+                request_id, -32002, f"Failed to process response body: {exc}"
+            )
+
+        if reply is None:
+            if request_id is None:
+                return {}
+            return error_reply(request_id, -32001, "Missing response from runtime")
+        return reply
+
+    def _relay_server_message(self, member: Member, message: dict[str, Any]) -> None:
+        if message.get("method") is not None and message.get("id") is not None:
+            # Ids from different runtimes could collide; namespace them
+            relayed_id = f"{member.namespace}{NAMESPACE_SEPARATOR}{message['id']}"
+            with self._lock:
+                self._server_requests[json.dumps(relayed_id)] = (member, message["id"])
+            message = {**message, "id": relayed_id}
+        self._write(message)
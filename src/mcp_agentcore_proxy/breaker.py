@@ -0,0 +1,151 @@
+"""Fail fast while a runtime is down instead of waiting out every timeout.
+
+Each runtime ARN has a circuit breaker. After ``AGENTCORE_BREAKER_FAILURES``
+consecutive failed calls (default 5) it opens, and calls fail at once with
+:class:`CircuitOpen`. Failures are errors that say the runtime itself is
+unhealthy: connection failures, timeouts, 5xx errors, and denied or missing
+runtimes. Errors about one request, and throttling, do not count.
+
+After ``AGENTCORE_BREAKER_COOLDOWN`` seconds (default 30) the breaker is
+half-open. The next caller sends the runtime a ``ping``, and while that
+probe runs, other calls keep failing fast. If the runtime answers, the
+breaker closes. Otherwise it opens for another cooldown.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from botocore.exceptions import (
+    BotoCoreError,
+    ClientError,
+    ConnectionClosedError,
+    ConnectionError,
+    ReadTimeoutError,
+)
+
+__all__ = [
+    "DEFAULT_COOLDOWN",
+    "DEFAULT_FAILURES",
+    "BreakerPolicy",
+    "CircuitBreaker",
+    "CircuitOpen",
+    "is_failure",
+]
+
+DEFAULT_FAILURES = 5
+DEFAULT_COOLDOWN = 30.0
+
+# Errors meaning the runtime is unusable rather than this request wrong
+_FAILURE_CODES = frozenset({"AccessDeniedException", "ResourceNotFoundException"})
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half-open"
+
+
+class CircuitOpen(BotoCoreError):
+    """Raised instead of calling a runtime whose breaker is open."""
+
+    fmt = (
+        "AgentCore runtime {agent_arn} is unavailable after {failures} "
+        "consecutive failures (last: {reason}); failing fast, next check "
+        "in {retry_in:.0f}s"
+    )
+
+
+def is_failure(exc: Exception) -> bool:
+    """Whether ``exc`` says the runtime, not the request, is broken."""
+    if isinstance(exc, (ConnectionError, ReadTimeoutError, ConnectionClosedError)):
+        return True
+    if isinstance(exc, ClientError):
+        status = exc.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+        code = exc.response.get("Error", {}).get("Code")
+        return (isinstance(status, int) and status >= 500) or code in _FAILURE_CODES
+    return False
+
+
+@dataclass(frozen=True)
+class BreakerPolicy:
+    """When a runtime's breaker opens, and for how long."""
+
+    # Consecutive failures that open the breaker; 0 disables it
+    failures: int = DEFAULT_FAILURES
+    cooldown: float = DEFAULT_COOLDOWN
+
+
+class CircuitBreaker:
+    """The health of one runtime, as seen from its recent calls."""
+
+    def __init__(
+        self,
+        agent_arn: str,
+        policy: BreakerPolicy,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._agent_arn = agent_arn
+        self._policy = policy
+        self._clock = clock
+        self._lock = threading.Lock()
+        self.state = CLOSED
+        self._failures = 0
+        self._reason = ""
+        self._opened_at = 0.0
+
+    def before_call(self) -> bool:
+        """Check the breaker before a call; True if the caller must probe first.
+
+        Raises CircuitOpen while the breaker is open, or while another
+        caller's probe is running.
+        """
+        with self._lock:
+            if self.state == CLOSED or not self._policy.failures:
+                return False
+            retry_in = self._opened_at + self._policy.cooldown - self._clock()
+            if self.state == OPEN and retry_in <= 0:
+                self.state = HALF_OPEN
+                return True
+            raise self._error(max(0.0, retry_in))
+
+    def record(self, exc: Exception | None) -> str | None:
+        """Count a call's outcome; return ``"opened"``/``"closed"`` on a change."""
+        if not self._policy.failures:
+            return None
+        with self._lock:
+            if exc is None or not is_failure(exc):
+                previous, self.state, self._failures = self.state, CLOSED, 0
+                return "closed" if previous != CLOSED else None
+            self._failures += 1
+            self._reason = str(exc)
+            if self.state == HALF_OPEN or (
+                self.state == CLOSED and self._failures >= self._policy.failures
+            ):
+                previous, self.state = self.state, OPEN
+                self._opened_at = self._clock()
+                return "opened" if previous == CLOSED else None
+            return None
+
+    def abandon_probe(self) -> None:
+        """Reopen a half-open breaker whose probe never reached the runtime.
+
+        The cooldown has already passed, so the next call probes again.
+        """
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self.state = OPEN
+
+    def error(self) -> CircuitOpen:
+        """The error for a call refused while the breaker is open."""
+        with self._lock:
+            return self._error(self._policy.cooldown)
+
+    def _error(self, retry_in: float) -> CircuitOpen:
+        return CircuitOpen(
+            agent_arn=self._agent_arn,
+            failures=self._failures,
+            reason=self._reason,
+            retry_in=retry_in,
+        )
@@ -0,0 +1,172 @@
+"""Long-lived WebSocket channel between the proxy and the bridge's ``/ws``.
+
+Over HTTP every MCP message is its own ``InvokeAgentRuntime`` call with its
+own SigV4 signature, request setup and response framing, and the server can
+only speak while a call is open. With ``AGENTCORE_TRANSPORT=websocket`` the
+proxy instead keeps one socket per runtime session. JSON-RPC messages travel
+as text frames in both directions, replies arrive in whatever order the
+server produces them, and server notifications and requests are delivered as
+soon as they are written.
+
+The socket is opened lazily and reopened on the next message after it drops.
+A reopened socket replays the cached ``initialize`` handshake first, because
+the runtime behind it may be a fresh container. Requests still waiting for a
+reply when the socket drops are reported through ``on_lost`` so the caller
+can fail them; they are never re-sent, since the server may already have
+acted on them.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import threading
+from collections.abc import Callable
+from typing import Any
+
+from mcp_agentcore_proxy.envelope import Envelope, scan, scan_batch
+
+__all__ = ["ChannelError", "WebSocketChannel"]
+
+logger = logging.getLogger("mcp_agentcore_proxy.channel")
+
+# What a dropped or broken socket raises from recv() and close()
+_SOCKET_ERRORS: tuple[type[Exception], ...]
+try:  # pragma: no cover - depends on the environment
+    from websockets.exceptions import WebSocketException
+except ImportError:  # pragma: no cover - depends on the environment
+    _SOCKET_ERRORS = (OSError,)
+else:  # pragma: no cover - depends on the environment
+    _SOCKET_ERRORS = (OSError, WebSocketException)
+
+_INITIALIZED = json.dumps({"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+
+class ChannelError(Exception):
+    """Raised when the WebSocket channel cannot be opened or written to."""
+
+
+def _envelopes(message: str) -> list[Envelope]:
+    envelope = scan(message)
+    if envelope is not None:
+        return [envelope]
+    return scan_batch(message) or []
+
+
+class WebSocketChannel:
+    """Carry JSON-RPC messages over one reconnecting WebSocket.
+
+    ``connect`` returns an open connection with blocking ``send(str)``,
+    ``recv()`` and ``close()`` methods (``websockets.sync.client`` style).
+    Every frame received is passed to ``on_message`` from a reader thread.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        on_message: Callable[[str], None],
+        on_lost: Callable[[list[Any]], None],
+    ):
+        self._connect = connect
+        self._on_message = on_message
+        self._on_lost = on_lost
+        # Re-entrant: a failed send drops the connection while holding it
+        self._lock = threading.RLock()
+        self._connection: Any = None
+        self._connected_before = False
+        self._initialize: str | None = None
+        # Requests awaiting a reply, keyed so that 1 and "1" stay distinct
+        self._pending: dict[str, Any] = {}
+        self._replayed: set[str] = set()
+
+    def send(self, message: str) -> None:
+        """Send one message, opening (or reopening) the socket if needed."""
+        envelopes = _envelopes(message)
+        with self._lock:
+            if self._connection is None:
+                self._open()
+            try:
+                self._connection.send(message)
+            except Exception as exc:
+                self._drop(self._connection)
+                raise ChannelError(f"WebSocket send failed: {exc}") from exc
+            # The reader settles replies under the same lock, so this cannot race
+            for envelope in envelopes:
+                if envelope.method == "initialize":
+                    self._initialize = message
+                if envelope.is_request:
+                    self._pending[json.dumps(envelope.id)] = envelope.id
+
+    def close(self) -> None:
+        with self._lock:
+            connection, self._connection = self._connection, None
+        if connection is not None:
+            connection.close()
+
+    def _open(self) -> None:
+        try:
+            connection = self._connect()
+        except ChannelError:
+            raise
+        except Exception as exc:
+            raise ChannelError(f"Unable to open WebSocket: {exc}") from exc
+        if self._connected_before and self._initialize is not None:
+            # The runtime behind a new socket may be a fresh container
+            for envelope in _envelopes(self._initialize):
+                if envelope.is_request:
+                    self._replayed.add(json.dumps(envelope.id))
+            try:
+                connection.send(self._initialize)
+                connection.send(_INITIALIZED)
+            except Exception as exc:
+                connection.close()
+                raise ChannelError(f"Handshake replay failed: {exc}") from exc
+        self._connection = connection
+        self._connected_before = True
+        threading.Thread(
+            target=self._read, args=(connection,), name="websocket-reader", daemon=True
+        ).start()
+
+    def _read(self, connection: Any) -> None:
+        while True:
+            try:
+                frame = connection.recv()
+            except _SOCKET_ERRORS as exc:
+                logger.debug("WebSocket closed: %s", exc)
+                self._drop(connection)
+                return
+            text = (
+                frame.decode("utf-8", "replace") if isinstance(frame, bytes) else frame
+            )
+            if self._settle(text):
+                self._on_message(text)
+
+    def _settle(self, message: str) -> bool:
+        """Mark replies as answered; return False for swallowed replay replies."""
+        keep = True
+        with self._lock:
+            for envelope in _envelopes(message):
+                if envelope.method is not None or not envelope.has_id:
+                    continue
+                key = json.dumps(envelope.id)
+                if key in self._replayed:
+                    self._replayed.discard(key)
+                    keep = False
+                    continue
+                self._pending.pop(key, None)
+        return keep
+
+    def _drop(self, connection: Any) -> None:
+        with self._lock:
+            if self._connection is not connection:
+                return
+            self._connection = None
+            lost = list(self._pending.values())
+            self._pending.clear()
+            self._replayed.clear()
+        try:
+            connection.close()
+        except _SOCKET_ERRORS as exc:
+            logger.debug("Error closing dropped WebSocket: %s", exc)
+        if lost:
+            self._on_lost(lost)
@@ -5,32 +5,112 @@
 #     "aws-assume-role-lib",
 # ]
 # ///
+import codecs
+import itertools
 import json
 import os
+import queue
+import re
 import sys
+import threading
+import time
+import traceback
+import uuid
+from collections.abc import Callable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any
+from urllib.parse import quote
 
 # Add parent directory to path for absolute imports when run as script
 if __name__ == "__main__":
     sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from botocore.auth import SigV4Auth
+from botocore.awsrequest import AWSRequest
 from botocore.config import Config
 from botocore.exceptions import BotoCoreError, ClientError, UnauthorizedSSOTokenError
 
+from mcp_agentcore_proxy import jsoncodec
 from mcp_agentcore_proxy.aws_session import (
     AssumeRoleError,
     format_sso_login_message,
     resolve_aws_session,
 )
+from mcp_agentcore_proxy.breaker import (
+    DEFAULT_COOLDOWN,
+    DEFAULT_FAILURES,
+    BreakerPolicy,
+    CircuitBreaker,
+)
+from mcp_agentcore_proxy.channel import ChannelError, WebSocketChannel
+from mcp_agentcore_proxy.compression import DEFAULT_MIN_SIZE, ClientCompression
+from mcp_agentcore_proxy.envelope import Envelope, scan, scan_batch, split_array
+from mcp_agentcore_proxy.limiter import (
+    DEFAULT_QUEUE_TIMEOUT,
+    LimitPolicy,
+    QueueTimeout,
+    RuntimeLimiter,
+    is_throttling,
+)
+from mcp_agentcore_proxy.retry import (
+    DEFAULT_ATTEMPTS,
+    LatencyTracker,
+    RetryPolicy,
+    hedged,
+    should_retry,
+)
+from mcp_agentcore_proxy.routing import LIST_FIELDS, MAX_PAGES, advertised_lists
 from mcp_agentcore_proxy.session_manager import (
     RuntimeSessionConfig,
     RuntimeSessionError,
     RuntimeSessionManager,
 )
+from mcp_agentcore_proxy.transport import Http2Sender
+from mcp_agentcore_proxy.warmstart import (
+    LIST_CHANGED,
+    DiscoveryCache,
+    resolve_cache_dir,
+)
 
 DEFAULT_CONTENT_TYPE = "application/json"
 DEFAULT_ACCEPT = "application/json, text/event-stream"
+DEFAULT_MAX_CONCURRENCY = 8
+# Coalescing is opt-in: a batch's replies wait for its slowest request
+DEFAULT_MAX_BATCH = 1
+RUNTIME_SESSION_HEADER = "X-Amzn-Bedrock-AgentCore-Runtime-Session-Id"
+# JSON bodies are copied to stdout in chunks of this size; only the first chunk
+# is inspected for the handshake-replay trigger
+JSON_CHUNK_SIZE = 64 * 1024
+# How long a warm-started handshake waits for the IDE's notifications/initialized
+WARM_HANDSHAKE_TIMEOUT = 30.0
+# Ids of the proxy's own breaker pings; their replies are never forwarded
+PROBE_ID_PREFIX = "agentcore-proxy-probe-"
+
+
+def _debug(msg: str) -> None:
+    lvl = (os.getenv("LOG_LEVEL") or "").upper()
+    if lvl == "DEBUG" or os.getenv("MCP_PROXY_DEBUG") == "1":
+        print(f"[mcp-agentcore-proxy] {msg}", file=sys.stderr, flush=True)
+
+
+def _positive_int_env(name: str, default: int) -> int:
+    raw = (os.getenv(name) or "").strip()
+    if not raw:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        value = 0
+    if value < 1:
+        print(
+            f"Warning: ignoring invalid {name}={raw!r}",
+            file=sys.stderr,
+            flush=True,
+        )
+        return default
+    return value
 
 
 def _resolve_runtime_session_config() -> RuntimeSessionConfig:
@@ -40,6 +120,94 @@ def _resolve_runtime_session_config() -> RuntimeSessionConfig:
     return RuntimeSessionConfig(mode="session")
 
 
+@dataclass(frozen=True)
+class ProxySettings:
+    """Proxy tuning read from the environment once per process."""
+
+    max_concurrency: int
+    max_batch: int
+    batch_window: float
+    transport: str
+    endpoint_url: str | None
+    connect_timeout: int
+    read_timeout: int
+    # None when AGENTCORE_COMPRESSION=off
+    compression_min_bytes: int | None
+    # Fetch advertised */list results right after the handshake
+    prefetch: bool = False
+    retry: RetryPolicy = field(default_factory=RetryPolicy)
+    limits: LimitPolicy = field(default_factory=LimitPolicy)
+    breaker: BreakerPolicy = field(default_factory=BreakerPolicy)
+
+
+def resolve_settings() -> ProxySettings:
+    compression_min_bytes: int | None = None
+    # gzip/zstd for large bodies; see mcp_agentcore_proxy.compression
+    if (os.getenv("AGENTCORE_COMPRESSION") or "auto").strip().lower() != "off":
+        compression_min_bytes = _positive_int_env(
+            "AGENTCORE_COMPRESSION_MIN_BYTES", DEFAULT_MIN_SIZE
+        )
+    transport = (os.getenv("AGENTCORE_TRANSPORT") or "http").strip().lower()
+    if transport not in {"http", "http2", "websocket"}:
+        print(
+            f"Warning: ignoring invalid AGENTCORE_TRANSPORT={transport!r}",
+            file=sys.stderr,
+            flush=True,
+        )
+        transport = "http"
+    return ProxySettings(
+        max_concurrency=_positive_int_env(
+            "AGENTCORE_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY
+        ),
+        # Requests already queued on stdin are coalesced into one JSON-RPC batch
+        max_batch=_positive_int_env("AGENTCORE_MAX_BATCH", DEFAULT_MAX_BATCH),
+        # Optional wait for more requests before sending a burst (0 = only what's queued)
+        batch_window=_positive_int_env("AGENTCORE_BATCH_WINDOW_MS", 0) / 1000,
+        transport=transport,
+        # e.g. http://localhost:8080 to run against a local bridge
+        endpoint_url=os.getenv("AGENTCORE_ENDPOINT_URL") or None,
+        connect_timeout=int(os.getenv("AGENTCORE_CONNECT_TIMEOUT", "10")),
+        read_timeout=int(os.getenv("AGENTCORE_READ_TIMEOUT", "300")),
+        compression_min_bytes=compression_min_bytes,
+        # Opt-in: it lists everything the runtime advertises, used or not
+        prefetch=(os.getenv("AGENTCORE_PREFETCH") or "").strip().lower()
+        in {"1", "on", "true"},
+        # Which calls may be sent twice; see mcp_agentcore_proxy.retry
+        retry=RetryPolicy(
+            attempts=_positive_int_env("AGENTCORE_RETRY_ATTEMPTS", DEFAULT_ATTEMPTS),
+            hedge=(os.getenv("AGENTCORE_HEDGE") or "").strip().lower()
+            in {"1", "on", "true"},
+            retry_tools=frozenset(
+                name.strip()
+                for name in (os.getenv("AGENTCORE_RETRY_TOOLS") or "").split(",")
+                if name.strip()
+            ),
+        ),
+        # Pacing per runtime ARN; see mcp_agentcore_proxy.limiter
+        limits=LimitPolicy(
+            adaptive=(os.getenv("AGENTCORE_ADAPTIVE_CONCURRENCY") or "on")
+            .strip()
+            .lower()
+            not in {"0", "off", "false"},
+            rate=_positive_int_env("AGENTCORE_RATE_LIMIT", 0) or None,
+            burst=_positive_int_env("AGENTCORE_RATE_BURST", 0) or None,
+            queue_timeout=_positive_int_env(
+                "AGENTCORE_QUEUE_TIMEOUT", int(DEFAULT_QUEUE_TIMEOUT)
+            ),
+        ),
+        # Fail fast while a runtime is down; see mcp_agentcore_proxy.breaker
+        breaker=BreakerPolicy(
+            failures=0
+            if (os.getenv("AGENTCORE_BREAKER_FAILURES") or "").strip().lower()
+            in {"0", "off"}
+            else _positive_int_env("AGENTCORE_BREAKER_FAILURES", DEFAULT_FAILURES),
+            cooldown=_positive_int_env(
+                "AGENTCORE_BREAKER_COOLDOWN", int(DEFAULT_COOLDOWN)
+            ),
+        ),
+    )
+
+
 def _error_response(request_id: Any, code: int, message: str) -> str:
     return json.dumps(
         {
@@ -50,99 +218,148 @@ def _error_response(request_id: Any, code: int, message: str) -> str:
     )
 
 
-def _print_error(request_id: Any, code: int, message: str) -> None:
-    """Print JSON-RPC error response to stdout, skipping notifications."""
-    # Per JSON-RPC spec: notifications (requests without id) should not receive responses
-    # Exception: parse errors must send error response with id=null per spec
-    if request_id is None and code != -32700:
-        return
-    print(_error_response(request_id, code, message), flush=True)
-
-
-def _emit_event_stream(body_stream: Any) -> None:
-    """Stream Server-Sent Events from AgentCore back to STDOUT."""
-    event_data = []
-
-    for raw_line in body_stream.iter_lines():
-        if not raw_line:
-            # Empty line marks end of an SSE event
-            if event_data:
-                complete_json = "".join(event_data)
-                try:
-                    json.loads(complete_json)  # Validate JSON
-                    print(complete_json, flush=True)
-                except json.JSONDecodeError:
-                    pass  # Skip malformed JSON
-                event_data = []
-            continue
-
-        line = raw_line.decode("utf-8", errors="replace")
-        if line.startswith("data:"):
-            event_data.append(line[5:].lstrip())
-
-    # Handle any remaining data
-    if event_data:
-        complete_json = "".join(event_data)
-        try:
-            json.loads(complete_json)
-            print(complete_json, flush=True)
-        except json.JSONDecodeError:
-            pass
+def _read_prefix(body_stream: Any, size: int) -> bytes:
+    """Read up to ``size`` bytes, stopping early only at end of stream."""
+    chunks = []
+    remaining = size
+    while remaining > 0:
+        chunk = body_stream.read(remaining)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        remaining -= len(chunk)
+    return b"".join(chunks)
 
 
-def main() -> None:
-    agent_arn = os.getenv("AGENTCORE_AGENT_ARN") or os.getenv("AGENT_ARN")
-    if not agent_arn:
-        print(
-            "Error: Set AGENTCORE_AGENT_ARN (or AGENT_ARN)", file=sys.stderr, flush=True
-        )
-        sys.exit(2)
+def _body_chunks(prefix: bytes, body_stream: Any) -> Iterator[bytes]:
+    """Yield a JSON body in chunks, without its trailing whitespace."""
+    # Trailing whitespace is held back so the body can end in a single newline
+    pending = b""
+    chunk = prefix
+    while chunk:
+        content = chunk.rstrip(b" \t\r\n")
+        if content:
+            yield pending + content
+            pending = chunk[len(content) :]
+        else:
+            pending += chunk
+        chunk = body_stream.read(JSON_CHUNK_SIZE)
 
-    config = _resolve_runtime_session_config()
 
-    try:
-        session_manager = RuntimeSessionManager(config)
-    except RuntimeSessionError as exc:
-        print(f"Error: {exc}", file=sys.stderr, flush=True)
-        sys.exit(2)
+class Output:
+    """Writes messages for the IDE to STDOUT, one JSON-RPC message per line.
 
-    client_config = Config(
-        read_timeout=int(os.getenv("AGENTCORE_READ_TIMEOUT", "300")),
-        connect_timeout=int(os.getenv("AGENTCORE_CONNECT_TIMEOUT", "10")),
-        retries={"max_attempts": 2},
-    )
+    Requests finish on worker threads, so every line is written atomically.
+    The daemon substitutes a subclass per attached shim.
+    """
 
-    def _create_client() -> tuple[Any, Any]:
-        """Create a fresh AgentCore client from a newly resolved AWS session."""
-        session_local = resolve_aws_session()
-        try:
-            client_local = session_local.client(
-                "bedrock-agentcore", config=client_config
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+
+    def write_line(self, text: str) -> None:
+        with self._lock:
+            print(text, flush=True)
+
+    def stream_body(self, prefix: bytes, body_stream: Any) -> None:
+        """Copy a JSON body to stdout in chunks, ending with exactly one newline.
+
+        Memory stays at one chunk regardless of body size. The lock is held
+        for the whole copy so other responses cannot land mid-line.
+        """
+        with self._lock:
+            sys.stdout.flush()
+            binary = getattr(sys.stdout, "buffer", None)
+            decoder = codecs.getincrementaldecoder("utf-8")("replace")
+
+            def write(data: bytes) -> None:
+                if binary is not None:
+                    binary.write(data)
+                else:
+                    sys.stdout.write(decoder.decode(data))
+
+            try:
+                for data in _body_chunks(prefix, body_stream):
+                    write(data)
+            finally:
+                write(b"\n")
+                (binary if binary is not None else sys.stdout).flush()
+
+    def print_error(self, request_id: Any, code: int, message: str) -> None:
+        """Write a JSON-RPC error response, skipping notifications."""
+        # Per JSON-RPC spec: notifications (requests without id) should not receive responses
+        # Exception: parse errors must send error response with id=null per spec
+        if request_id is None and code != -32700:
+            return
+        self.write_line(_error_response(request_id, code, message))
+
+    def print_batch_error(
+        self, batch: list[Envelope], code: int, message: str, split_batch: bool
+    ) -> None:
+        """Write an error for every request in ``batch`` (notifications get none)."""
+        ids = [item.id for item in batch if item.id is not None]
+        if split_batch:
+            for request_id in ids:
+                self.print_error(request_id, code, message)
+        elif ids:
+            errors = ",".join(
+                _error_response(request_id, code, message) for request_id in ids
             )
-        except UnauthorizedSSOTokenError as exc:
-            raise AssumeRoleError(format_sso_login_message()) from exc
-        return session_local, client_local
+            self.write_line(f"[{errors}]")
 
-    try:
-        session, client = _create_client()
-    except AssumeRoleError as exc:
-        print(f"Error: {exc}", file=sys.stderr, flush=True)
-        sys.exit(2)
+    def write_body(self, body: str, split_batch: bool = False) -> None:
+        """Write a response body; replies to a coalesced batch get one line each."""
+        if split_batch:
+            elements = split_array(body)
+            if elements is not None:
+                for element in elements:
+                    self.write_line(element)
+                return
+        self.write_line(body)
 
-    # Cache last initialize payload for potential handshake replay
-    last_initialize_payload: str | None = None
-    # Guard to avoid infinite retry loops per process lifetime
-    replay_attempted: bool = False
+    def emit_json_body(self, body_stream: Any, split_batch: bool = False) -> None:
+        """Write a JSON response body, streaming it when it is large."""
+        prefix = _read_prefix(body_stream, JSON_CHUNK_SIZE)
+        if len(prefix) < JSON_CHUNK_SIZE or split_batch:
+            body = (prefix + body_stream.read()).decode("utf-8", errors="replace")
+            if body.strip():
+                self.write_body(body, split_batch)
+            return
+        self.stream_body(prefix, body_stream)
 
-    def _debug(msg: str) -> None:
-        lvl = (os.getenv("LOG_LEVEL") or "").upper()
-        if lvl == "DEBUG" or os.getenv("MCP_PROXY_DEBUG") == "1":
-            print(f"[mcp-agentcore-proxy] {msg}", file=sys.stderr, flush=True)
+    def emit_event_stream(self, body_stream: Any, split_batch: bool = False) -> None:
+        """Stream Server-Sent Events from AgentCore back to the IDE."""
+        event_data = []
+
+        for raw_line in body_stream.iter_lines():
+            if not raw_line:
+                # Empty line marks end of an SSE event
+                if event_data:
+                    complete_json = "".join(event_data)
+                    try:
+                        jsoncodec.loads(complete_json)  # Validate JSON
+                        self.write_body(complete_json, split_batch)
+                    except json.JSONDecodeError:
+                        pass  # Skip malformed JSON
+                    event_data = []
+                continue
+
+            line = raw_line.decode("utf-8", errors="replace")
+            if line.startswith("data:"):
+                event_data.append(line[5:].lstrip())
+
+        # Handle any remaining data
+        if event_data:
+            complete_json = "".join(event_data)
+            try:
+                jsoncodec.loads(complete_json)
+                self.write_body(complete_json, split_batch)
+            except json.JSONDecodeError:
+                pass
 
-    def _emit_mcp_log(
-        level: str, data: Any, logger: str | None = "mcp-agentcore-proxy"
+    def emit_log(
+        self, level: str, data: Any, logger: str | None = "mcp-agentcore-proxy"
     ) -> None:
-        """Emit an MCP logging notification to the IDE (client) via stdout.
+        """Emit an MCP logging notification to the IDE (client).
 
         Always emits; intended to be low-volume (container restarts are rare).
         """
@@ -156,94 +373,950 @@ def main() -> None:
         }
         if logger:
             payload["params"]["logger"] = logger
-        print(json.dumps(payload), flush=True)
+        self.write_line(json.dumps(payload))
 
-    def _is_expired_token_error(exc: ClientError) -> bool:
-        error = exc.response if isinstance(getattr(exc, "response", None), dict) else {}
-        if not isinstance(error, dict):
-            return False
-        code = error.get("Error", {}).get("Code")
-        if not isinstance(code, str):
-            return False
-        return code in {
-            "ExpiredToken",
-            "ExpiredTokenException",
-            "InvalidClientTokenId",
-            "RequestExpired",
-            "UnrecognizedClientException",
-        }
 
-    def _invoke_raw(payload: str) -> dict[str, Any]:
+# Requests run on worker threads; keep each JSON-RPC line atomic on stdout
+_STDOUT = Output()
+
+
+class _CapturedOutput(Output):
+    """Collects what a call would write, for replies the IDE must not see."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.lines: list[str] = []
+
+    def write_line(self, text: str) -> None:
+        with self._lock:
+            self.lines.append(text)
+
+    def stream_body(self, prefix: bytes, body_stream: Any) -> None:
+        body = b"".join(_body_chunks(prefix, body_stream))
+        self.write_line(body.decode("utf-8", errors="replace"))
+
+    def result(self, request_id: Any) -> Any:
+        """The ``result`` of the captured reply to ``request_id``, if any."""
+        for text in self.lines:
+            try:
+                message = jsoncodec.loads(text)
+            except json.JSONDecodeError:
+                continue
+            if isinstance(message, dict) and message.get("id") == request_id:
+                return message.get("result")
+        return None
+
+
+class _PrefetchedLists:
+    """``*/list`` pages fetched before the IDE asked, keyed by method and cursor."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._pages: dict[tuple[str, str | None], Future[Any]] = {}
+        self._taken: set[tuple[str, str | None]] = set()
+
+    def expect(self, method: str, cursor: str | None) -> None:
+        with self._lock:
+            self._pages.setdefault((method, cursor), Future())
+
+    def resolve(self, method: str, cursor: str | None, result: Any) -> None:
+        """Settle a page; None means the IDE's own call must go to the runtime."""
+        with self._lock:
+            page = self._pages.setdefault((method, cursor), Future())
+        if not page.done():
+            page.set_result(result if isinstance(result, dict) else None)
+
+    def abandon(self, method: str) -> None:
+        """Settle every page of ``method`` still pending with None."""
+        with self._lock:
+            pending = [
+                page
+                for (listed, _), page in self._pages.items()
+                if listed == method and not page.done()
+            ]
+        for page in pending:
+            page.set_result(None)
+
+    def take(self, method: str, cursor: str | None) -> Future[Any] | None:
+        """The page for the IDE's call; each page is handed out once."""
+        with self._lock:
+            key = (method, cursor)
+            if key in self._taken or key not in self._pages:
+                return None
+            self._taken.add(key)
+            return self._pages[key]
+
+    def peek(self, method: str, cursor: str | None) -> Future[Any] | None:
+        with self._lock:
+            return self._pages.get((method, cursor))
+
+
+class _RestoredId:
+    """The reply to a hedged duplicate, under the id of the IDE's request.
+
+    The body, JSON or SSE, is passed through as it streams; only the first
+    ``"id"`` member naming the hedge is rewritten in a JSON body, and in each
+    SSE ``data:`` line.
+    """
+
+    def __init__(self, body: Any, hedge_id: str, request_id: Any):
+        self._body = body
+        encoded = json.dumps(hedge_id).encode("utf-8")
+        self._pattern = re.compile(rb'"id"\s*:\s*' + re.escape(encoded))
+        self._replacement = b'"id": ' + json.dumps(request_id).encode("utf-8")
+        # Held back until the id is found, in case it straddles two chunks
+        self._window = len(encoded) + 64
+        self._chunks = self._restored_chunks()
+        self._buffer = bytearray()
+
+    def read(self, amt: int | None = None) -> bytes:
+        while amt is None or len(self._buffer) < amt:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            self._buffer += chunk
+        size = len(self._buffer) if amt is None else amt
+        data = bytes(self._buffer[:size])
+        del self._buffer[:size]
+        return data
+
+    def iter_lines(self, *args: Any, **kwargs: Any) -> Iterator[bytes]:
+        for line in self._body.iter_lines(*args, **kwargs):
+            if line.startswith(b"data:"):
+                line = self._pattern.sub(self._replacement, line, count=1)
+            yield line
+
+    def close(self) -> None:
+        self._body.close()
+
+    def _restored_chunks(self) -> Iterator[bytes]:
+        carry = b""
+        restored = False
+        while True:
+            chunk = self._body.read(JSON_CHUNK_SIZE)
+            data = carry + chunk
+            if not restored:
+                data, count = self._pattern.subn(self._replacement, data, count=1)
+                restored = count > 0
+            if not chunk:
+                if data:
+                    yield data
+                return
+            if restored:
+                carry = b""
+                yield data
+                continue
+            keep = min(len(data), self._window)
+            carry = data[len(data) - keep :]
+            if len(data) > keep:
+                yield data[: len(data) - keep]
+
+
+class _HeldBody:
+    """A response body that frees its runtime's concurrency slot when done.
+
+    The slot is released once the body has been read to the end, or closed,
+    or when reading it fails.
+    """
+
+    def __init__(self, body: Any, release: Callable[[bool], None]):
+        self._body = body
+        self._release = release
+
+    def read(self, amt: int | None = None) -> bytes:
+        try:
+            data: bytes = self._body.read(amt)
+        except Exception:
+            self._release(False)
+            raise
+        if amt is None or not data:
+            self._release(True)
+        return data
+
+    def iter_lines(self, *args: Any, **kwargs: Any) -> Iterator[bytes]:
+        try:
+            yield from self._body.iter_lines(*args, **kwargs)
+        except Exception:
+            self._release(False)
+            raise
+        finally:
+            self._release(True)
+
+    def close(self) -> None:
+        try:
+            self._body.close()
+        finally:
+            self._release(True)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._body, name)
+
+    def __del__(self) -> None:
+        # A body dropped unread must not keep the slot forever
+        self._release(True)
+
+
+def _hold_until_read(
+    response: dict[str, Any], release: Callable[[bool], None]
+) -> dict[str, Any]:
+    body = response.get("response")
+    if body is None:
+        release(True)
+        return response
+    return {**response, "response": _HeldBody(body, release)}
+
+
+def _discard_response(resp: dict[str, Any]) -> None:
+    """Drop the response of a hedged attempt that lost the race."""
+    body_stream = resp.get("response")
+    if body_stream is not None:
+        body_stream.close()
+
+
+def _scan_reply(body: str) -> Envelope | list[Envelope] | None:
+    """Read the envelope(s) of a response body, parsing fully only as a fallback.
+
+    Raises json.JSONDecodeError if the body is not JSON.
+    """
+    if not body.strip():
+        return None
+    reply: Envelope | list[Envelope] | None = scan(body)
+    if reply is None:
+        reply = scan_batch(body)
+    if reply is None:
+        parsed = jsoncodec.loads(body)
+        if isinstance(parsed, list):
+            return [Envelope.from_message(item) for item in parsed]
+        return Envelope.from_message(parsed)
+    return reply
+
+
+def _needs_handshake_replay(
+    request: Envelope | list[Envelope], reply: Envelope | list[Envelope] | None
+) -> bool:
+    """Detect the uninitialized stdio server case for a request or a batch."""
+    if isinstance(request, Envelope):
+        # Only for non-initialize requests with an error
+        return (
+            request.method != "initialize"
+            and isinstance(reply, Envelope)
+            and reply.error_code == -32602
+        )
+    if isinstance(reply, list):
+        return all(item.method != "initialize" for item in request) and any(
+            item.error_code == -32602 for item in reply
+        )
+    return False
+
+
+def _websocket_request(
+    session: Any, region: str, agent_arn: str, runtime_session_id: str
+) -> tuple[str, dict[str, str]]:
+    """Return the runtime's WebSocket URL and the SigV4-signed handshake headers.
+
+    ``AGENTCORE_WS_URL`` overrides the URL, e.g. ``ws://localhost:8080/ws``
+    for a local bridge. Otherwise it follows ``AGENTCORE_ENDPOINT_URL``.
+    """
+    endpoint = (
+        os.getenv("AGENTCORE_ENDPOINT_URL")
+        or f"https://bedrock-agentcore.{region}.amazonaws.com"
+    )
+    url = os.getenv("AGENTCORE_WS_URL") or (
+        endpoint.rstrip("/")
+        .replace("https://", "wss://", 1)
+        .replace("http://", "ws://", 1)
+        + f"/runtimes/{quote(agent_arn, safe='')}/ws"
+    )
+    headers = {RUNTIME_SESSION_HEADER: runtime_session_id}
+    credentials = session.get_credentials()
+    if credentials is None:
+        return url, headers
+    signed = AWSRequest(
+        method="GET",
+        url=url.replace("wss://", "https://", 1).replace("ws://", "http://", 1),
+        headers=headers,
+    )
+    SigV4Auth(
+        credentials.get_frozen_credentials(), "bedrock-agentcore", region
+    ).add_auth(signed)
+    return url, dict(signed.headers.items())
+
+
+def _is_expired_token_error(exc: ClientError) -> bool:
+    error = exc.response if isinstance(getattr(exc, "response", None), dict) else {}
+    if not isinstance(error, dict):
+        return False
+    code = error.get("Error", {}).get("Code")
+    if not isinstance(code, str):
+        return False
+    return code in {
+        "ExpiredToken",
+        "ExpiredTokenException",
+        "InvalidClientTokenId",
+        "RequestExpired",
+        "UnrecognizedClientException",
+    }
+
+
+class RuntimeClient:
+    """The AgentCore client shared by everything one proxy process serves.
+
+    Owns the AWS session and the boto3 client (and with it the connection
+    pool), and recreates both from a freshly resolved session when the
+    credentials expire. Raises AssumeRoleError if no session can be resolved,
+    and ImportError if the HTTP/2 transport is selected but not installed.
+    """
+
+    def __init__(self, settings: ProxySettings):
+        self._retry = settings.retry
+        # A hedged call holds a second connection
+        self._max_calls = settings.max_concurrency * (2 if settings.retry.hedge else 1)
+        self._limits = settings.limits
+        self._breaker_policy = settings.breaker
+        # Pacing and health of each runtime ARN called
+        self._runtimes: dict[str, tuple[RuntimeLimiter, CircuitBreaker]] = {}
+        self._config = Config(
+            read_timeout=settings.read_timeout,
+            connect_timeout=settings.connect_timeout,
+            # Retries depend on the MCP method, so invoke() makes them
+            retries={"max_attempts": 0},
+            max_pool_connections=self._max_calls,
+        )
+        self._endpoint_url = settings.endpoint_url
+        self._hooks: list[Any] = []
+        if settings.compression_min_bytes is not None:
+            self._hooks.append(ClientCompression(settings.compression_min_bytes))
+        # Shared by every client so recreated clients reuse the same connection
+        self._http2_sender: Http2Sender | None = None
+        if settings.transport == "http2":
+            self._http2_sender = Http2Sender(
+                settings.connect_timeout, settings.read_timeout
+            )
+            self._hooks.append(self._http2_sender)
+        # Serializes credential refreshes across worker threads
+        self._lock = threading.Lock()
+        self.session, self.client = self._create()
+
+    def _create(self) -> tuple[Any, Any]:
+        """Create a fresh AgentCore client from a newly resolved AWS session."""
+        session = resolve_aws_session()
+        try:
+            client = session.client(
+                "bedrock-agentcore",
+                config=self._config,
+                endpoint_url=self._endpoint_url,
+            )
+        except UnauthorizedSSOTokenError as exc:
+            raise AssumeRoleError(format_sso_login_message()) from exc
+        for hook in self._hooks:
+            hook.register(client.meta.events)
+        return session, client
+
+    def invoke(
+        self,
+        agent_arn: str,
+        payload: str,
+        runtime_session_id: str,
+        out: Output,
+        repeatable: bool = False,
+    ) -> dict[str, Any]:
         """Invoke AgentCore and return the raw boto3 response dict.
 
-        The caller decides how to handle streaming vs JSON bodies.
+        The caller decides how to handle streaming vs JSON bodies. Failed
+        calls are retried when AgentCore never accepted them, and also after
+        timeouts and server errors if the call is ``repeatable``.
         """
-        nonlocal session, client
-        next_runtime_session_id = session_manager.next_session_id()
         attempts = 0
+        retries = 0
+        limiter, breaker = self._runtime(agent_arn)
 
         while True:
             attempts += 1
+            current_client = self.client
+            if breaker.before_call():
+                self._probe(agent_arn, runtime_session_id, out, limiter, breaker)
             try:
-                return client.invoke_agent_runtime(
-                    agentRuntimeArn=agent_arn,
-                    payload=payload.encode("utf-8"),
-                    runtimeSessionId=next_runtime_session_id,
-                    mcpSessionId=f"mcp-{next_runtime_session_id}",
-                    contentType=DEFAULT_CONTENT_TYPE,
-                    accept=DEFAULT_ACCEPT,
+                response = limiter.run(
+                    lambda current_client=current_client: (
+                        current_client.invoke_agent_runtime(
+                            agentRuntimeArn=agent_arn,
+                            payload=payload.encode("utf-8"),
+                            runtimeSessionId=runtime_session_id,
+                            mcpSessionId=f"mcp-{runtime_session_id}",
+                            contentType=DEFAULT_CONTENT_TYPE,
+                            accept=DEFAULT_ACCEPT,
+                        )
+                    ),
+                    _hold_until_read,
                 )
+                self._record(agent_arn, breaker, None, out)
+                return response
             except ClientError as exc:
+                self._record(agent_arn, breaker, exc, out)
                 if attempts == 1 and _is_expired_token_error(exc):
                     _debug(
                         "AWS credentials expired; attempting to refresh session and retry"
                     )
-                    _emit_mcp_log(
+                    out.emit_log(
                         "debug",
                         "AWS credentials expired; refreshing assume-role session before retrying request.",
                     )
-                    session, client = _create_client()
+                    with self._lock:
+                        # Another worker may have refreshed while we waited
+                        if self.client is current_client:
+                            self.session, self.client = self._create()
                     continue
-                raise
+                if not self._retry_after(exc, repeatable, retries):
+                    raise
+                retries += 1
             except UnauthorizedSSOTokenError as exc:
                 raise AssumeRoleError(format_sso_login_message()) from exc
+            except BotoCoreError as exc:
+                self._record(agent_arn, breaker, exc, out)
+                if not self._retry_after(exc, repeatable, retries):
+                    raise
+                retries += 1
 
-    for raw_line in sys.stdin:
-        line = raw_line.strip()
-        if not line:
-            continue
+    def _runtime(self, agent_arn: str) -> tuple[RuntimeLimiter, CircuitBreaker]:
+        with self._lock:
+            runtime = self._runtimes.get(agent_arn)
+            if runtime is None:
+                runtime = self._runtimes[agent_arn] = (
+                    RuntimeLimiter(agent_arn, self._limits, self._max_calls),
+                    CircuitBreaker(agent_arn, self._breaker_policy),
+                )
+            return runtime
+
+    def _probe(
+        self,
+        agent_arn: str,
+        runtime_session_id: str,
+        out: Output,
+        limiter: RuntimeLimiter,
+        breaker: CircuitBreaker,
+    ) -> None:
+        """Ping a runtime whose breaker is half-open; raise if it is still down.
 
+        The ping is paced like any other call. Its id is unique to this probe
+        so the reply can never be mistaken for one the IDE is waiting on.
+        """
+        _debug(f"Probing {agent_arn} with ping")
+        probe_id = f"{PROBE_ID_PREFIX}{uuid.uuid4()}"
+        ping = json.dumps({"jsonrpc": "2.0", "id": probe_id, "method": "ping"})
+        current_client = self.client
         try:
-            parsed = json.loads(line)
-        except json.JSONDecodeError as exc:
-            _print_error(None, -32700, f"Parse error: {exc}")
-            continue
+            response = limiter.run(
+                lambda: current_client.invoke_agent_runtime(
+                    agentRuntimeArn=agent_arn,
+                    payload=ping.encode("utf-8"),
+                    runtimeSessionId=runtime_session_id,
+                    mcpSessionId=f"mcp-{runtime_session_id}",
+                    contentType=DEFAULT_CONTENT_TYPE,
+                    accept=DEFAULT_ACCEPT,
+                )
+            )
+        except QueueTimeout:
+            # The ping never left; let the next call probe instead
+            breaker.abandon_probe()
+            raise
+        except Exception as exc:
+            if self._record(agent_arn, breaker, exc, out) != "closed":
+                raise breaker.error() from exc
+            return
+        body_stream = response.get("response")
+        if body_stream is not None:
+            body_stream.close()
+        self._record(agent_arn, breaker, None, out)
+
+    def _record(
+        self,
+        agent_arn: str,
+        breaker: CircuitBreaker,
+        exc: Exception | None,
+        out: Output,
+    ) -> str | None:
+        if isinstance(exc, QueueTimeout):
+            # The call never reached the runtime
+            return None
+        change = breaker.record(exc)
+        if change == "opened":
+            _debug(f"Circuit opened for {agent_arn}: {exc}")
+            out.emit_log(
+                "error",
+                f"AgentCore runtime {agent_arn} is failing ({exc}); requests will "
+                "fail fast until a ping succeeds.",
+            )
+        elif change == "closed":
+            _debug(f"Circuit closed for {agent_arn}")
+            out.emit_log("info", f"AgentCore runtime {agent_arn} is reachable again.")
+        return change
+
+    def _retry_after(self, exc: Exception, repeatable: bool, retries: int) -> bool:
+        """Back off and return True if a call that raised ``exc`` should be resent."""
+        if retries + 1 >= self._retry.attempts or not should_retry(exc, repeatable):
+            return False
+        delay = self._retry.backoff(retries + 1)
+        _debug(f"InvokeAgentRuntime failed ({exc}); retrying in {delay:.2f}s")
+        time.sleep(delay)
+        return True
+
+    def close(self) -> None:
+        if self._http2_sender is not None:
+            self._http2_sender.close()
+
+
+def serve(
+    lines: queue.Queue[str | None],
+    out: Output,
+    runtime: RuntimeClient,
+    agent_arn: str,
+    session_manager: RuntimeSessionManager,
+    session_mode: str,
+    settings: ProxySettings,
+    discovery: DiscoveryCache | None = None,
+    upstream_id: Callable[[str], str] | None = None,
+) -> None:
+    """Relay JSON-RPC messages from ``lines`` to the runtime until ``None``.
+
+    Replies, server messages and proxy errors for the IDE go to ``out``. With
+    ``discovery``, cached discovery answers cover the runtime's cold start.
+    With ``settings.prefetch``, the lists the runtime advertises are fetched
+    as soon as the handshake completes, so the IDE's list calls are answered
+    from memory. ``upstream_id`` maps the ids of requests the proxy sends on
+    its own (prefetches, hedges) when other clients share the runtime session.
+    """
+    _Session(
+        out,
+        runtime,
+        agent_arn,
+        session_manager,
+        session_mode,
+        settings,
+        discovery,
+        upstream_id,
+    ).serve(lines)
+
+
+class _Session:
+    """One IDE's MCP session with a runtime, as relayed by :func:`serve`."""
+
+    def __init__(
+        self,
+        out: Output,
+        runtime: RuntimeClient,
+        agent_arn: str,
+        session_manager: RuntimeSessionManager,
+        session_mode: str,
+        settings: ProxySettings,
+        discovery: DiscoveryCache | None,
+        upstream_id: Callable[[str], str] | None,
+    ):
+        self._out = out
+        self._runtime = runtime
+        self._agent_arn = agent_arn
+        self._sessions = session_manager
+        self._settings = settings
+        self._discovery = discovery
+        self._upstream_id = upstream_id
+        self._prefetch = settings.prefetch
+        # Lists being fetched since the last handshake; None before it completes
+        self._prefetched: _PrefetchedLists | None = None
+        # Lists the runtime advertised, prefetched once the IDE sends initialized
+        self._advertised: list[str] = []
+
+        # Cleared while a warm-started handshake runs in the background;
+        # requests the cache cannot answer wait for it
+        self._ready = threading.Event()
+        self._ready.set()
+        # Hands the IDE's notifications/initialized to that handshake (None at EOF)
+        self._handoff: queue.Queue[str | None] | None = None
+        self._warm_handshake_future: Future[None] | None = None
+        self._refresh_after_initialized = False
 
-        request_id = parsed.get("id") if isinstance(parsed, dict) else None
+        # Cache last initialize payload for potential handshake replay
+        self._last_initialize_payload: str | None = None
+        # Guard to avoid infinite retry loops per process lifetime
+        self._replay_attempted = False
+        self._replay_lock = threading.Lock()
+
+        self._retry = settings.retry
+        self._latency = LatencyTracker()
+        # Duplicates of slow repeatable calls, sent past the method's p95 latency
+        self._hedges = (
+            ThreadPoolExecutor(
+                max_workers=2 * settings.max_concurrency,
+                thread_name_prefix="agentcore-hedge",
+            )
+            if self._retry.hedge
+            else None
+        )
+        self._hedge_ids = itertools.count(1)
+
+        self._channel: WebSocketChannel | None = None
+        if settings.transport == "websocket":
+            if session_mode == "request":
+                print(
+                    "Warning: AGENTCORE_TRANSPORT=websocket needs a stable runtime "
+                    "session; using HTTP with RUNTIME_SESSION_MODE=request",
+                    file=sys.stderr,
+                    flush=True,
+                )
+            else:
+                self._channel = WebSocketChannel(
+                    self._connect_websocket, out.write_line, self._fail_lost_requests
+                )
+                # Discovery calls are answered over the socket like everything else
+                self._discovery = None
+                self._prefetch = False
+
+        # The invoke pool; set while serve() runs
+        self._pool: ThreadPoolExecutor | None = None
+
+    def serve(self, lines: queue.Queue[str | None]) -> None:
+        """Answer messages from ``lines`` until ``None``."""
+        with ThreadPoolExecutor(
+            max_workers=self._settings.max_concurrency,
+            thread_name_prefix="agentcore-invoke",
+        ) as pool:
+            self._pool = pool
+            eof = False
+            while not eof:
+                requests: list[tuple[str, Envelope]] = []
+                for raw_line in self._read_burst(lines):
+                    if raw_line is None:
+                        eof = True
+                        break
+                    line = raw_line.strip()
+                    if line:
+                        self._route(line, requests)
+                self._submit_requests(requests)
+
+            if self._handoff is not None:
+                self._handoff.put(None)
+            if self._warm_handshake_future is not None:
+                # It may still queue the prefetch, which needs the pool open
+                wait([self._warm_handshake_future])
+
+        if self._hedges is not None:
+            self._hedges.shutdown(wait=False, cancel_futures=True)
+        if self._channel is not None:
+            self._channel.close()
+
+    def _submit(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        request: Envelope | list[Envelope] | None = None,
+        split_batch: bool = False,
+    ) -> Future[Any]:
+        """Run ``fn`` on the invoke pool; ``request`` is failed if it raises."""
+        assert self._pool is not None
+        return self._pool.submit(self._guarded, request, split_batch, fn, *args)
+
+    def _guarded(
+        self,
+        request: Envelope | list[Envelope] | None,
+        split_batch: bool,
+        fn: Callable[..., Any],
+        *args: Any,
+    ) -> None:
+        """Call ``fn``, answering ``request`` with an error if anything escapes.
+
+        Without this, an unexpected exception would die unseen in a Future
+        and leave the IDE waiting for a reply forever.
+        """
+        try:
+            fn(*args)
+        except Exception as exc:  # noqa: BLE001 - the IDE must get an answer
+            print(
+                f"Error: unexpected failure in {fn.__name__}: {exc!r}",
+                file=sys.stderr,
+                flush=True,
+            )
+            _debug(traceback.format_exc())
+            message = f"Internal proxy error: {exc}"
+            if isinstance(request, list):
+                self._out.print_batch_error(request, -32603, message, split_batch)
+            elif request is not None and request.id is not None:
+                self._out.print_error(request.id, -32603, message)
+
+    def _read_burst(self, lines: queue.Queue[str | None]) -> list[str | None]:
+        """The next line, plus whatever else the IDE has already written."""
+        burst = [lines.get()]
+        deadline = time.monotonic() + self._settings.batch_window
+        while len(burst) < self._settings.max_batch and burst[-1] is not None:
+            try:
+                burst.append(lines.get(timeout=max(0.0, deadline - time.monotonic())))
+            except queue.Empty:
+                break
+        return burst
+
+    def _submit_requests(self, requests: list[tuple[str, Envelope]]) -> None:
+        """Send queued requests, coalesced into one batch when there are several."""
+        if len(requests) == 1:
+            line, envelope = requests[0]
+            self._submit(
+                self._handle_message,
+                line,
+                envelope,
+                envelope.id,
+                False,
+                request=envelope,
+            )
+        elif requests:
+            _debug(f"Coalescing {len(requests)} queued requests into one batch")
+            batch_line = "[" + ",".join(line for line, _ in requests) + "]"
+            batch = [envelope for _, envelope in requests]
+            self._submit(
+                self._handle_message,
+                batch_line,
+                batch,
+                None,
+                False,
+                True,
+                request=batch,
+                split_batch=True,
+            )
+        requests.clear()
+
+    def _route(self, line: str, requests: list[tuple[str, Envelope]]) -> None:
+        """Answer or forward one line from the IDE; requests may be queued."""
+        # Only the envelope is needed to route a message
+        envelope = scan(line)
+        batch: list[Envelope] | None = None
+        is_object = envelope is not None
+        if envelope is None:
+            try:
+                parsed = jsoncodec.loads(line)
+            except json.JSONDecodeError as exc:
+                self._out.print_error(None, -32700, f"Parse error: {exc}")
+                return
+            if isinstance(parsed, list):
+                batch = [Envelope.from_message(item) for item in parsed]
+            is_object = isinstance(parsed, dict)
+            envelope = Envelope.from_message(parsed)
+
+        request_id = envelope.id
+
+        if self._channel is not None and self._send_over_channel(line, envelope):
+            return
+
+        single = is_object and batch is None
+        if (
+            (self._discovery is not None or self._prefetch)
+            and single
+            and envelope.method == "initialize"
+        ):
+            self._submit_requests(requests)
+            self._initialize(line, request_id)
+            return
+        if single and self._answer_while_warming(line, envelope):
+            return
+        if batch is None and self._answer_from_prefetch(line, envelope):
+            return
 
         # Skip notifications EXCEPT for 'notifications/initialized' which the server needs
         # Notifications don't expect a response, so we won't wait for one
-        is_notification = request_id is None and isinstance(parsed, dict)
+        is_notification = request_id is None and is_object
         is_initialized_notification = (
-            is_notification and parsed.get("method") == "notifications/initialized"
+            is_notification and envelope.method == "notifications/initialized"
         )
 
         # Skip all notifications except notifications/initialized
         if is_notification and not is_initialized_notification:
-            continue
+            return
+
+        if envelope.is_request and envelope.method != "initialize":
+            # Other requests run concurrently so the IDE can answer server
+            # requests (and keep working) while a long call is in flight
+            requests.append((line, envelope))
+            if len(requests) >= self._settings.max_batch:
+                self._submit_requests(requests)
+            return
+
+        # Keep everything else in stdin order relative to queued requests
+        self._submit_requests(requests)
+
+        if batch is not None:
+            # Batch sent by the IDE: forward as-is, answer with an array
+            self._submit(self._handle_message, line, batch, None, False, request=batch)
+            return
 
         # Cache initialize/initialized messages for potential replay
-        if isinstance(parsed, dict) and parsed.get("method") == "initialize":
-            last_initialize_payload = line
+        if envelope.method == "initialize":
+            self._last_initialize_payload = line
         # No need to cache initialized notification; we can safely re-send one
 
+        if is_object and envelope.method is None:
+            # Reply to a server-initiated request (sampling, elicitation, ...)
+            self._send_client_response(line, request_id)
+            return
+
+        # The handshake must reach the server in order
+        self._guarded(
+            envelope,
+            False,
+            self._handle_message,
+            line,
+            envelope,
+            request_id,
+            is_initialized_notification,
+        )
+        if is_initialized_notification:
+            self._after_initialized()
+
+    def _send_over_channel(self, line: str, envelope: Envelope) -> bool:
+        """Send a message over the WebSocket; False if it fell back to HTTP."""
+        assert self._channel is not None
+        if envelope.method == "initialize":
+            self._last_initialize_payload = line
+        try:
+            # Every message, notifications included, is one frame
+            self._channel.send(line)
+            return True
+        except ChannelError as exc:
+            _debug(f"WebSocket unavailable: {exc}")
+            self._out.emit_log(
+                "warning",
+                f"WebSocket transport unavailable ({exc}); falling back to HTTP.",
+            )
+            self._channel.close()
+            self._channel = None
+            return False
+
+    def _connect_websocket(self) -> Any:
         try:
-            resp = _invoke_raw(line)
+            from websockets.sync.client import connect
+        except ImportError as exc:
+            raise ChannelError(
+                "AGENTCORE_TRANSPORT=websocket requires the websockets package "
+                '(pip install "mcp-agentcore-proxy[ws]")'
+            ) from exc
+        url, headers = _websocket_request(
+            self._runtime.session,
+            self._runtime.client.meta.region_name,
+            self._agent_arn,
+            self._sessions.next_session_id(),
+        )
+        _debug(f"Opening WebSocket to {url}")
+        return connect(
+            url,
+            additional_headers=headers,
+            max_size=None,
+            open_timeout=self._settings.connect_timeout,
+        )
+
+    def _fail_lost_requests(self, request_ids: list[Any]) -> None:
+        for lost_id in request_ids:
+            self._out.print_error(
+                lost_id,
+                -32000,
+                "WebSocket connection to the runtime closed before the reply arrived",
+            )
+
+    def _own_id(self, local_id: str) -> str:
+        """The id of a request the proxy sends on its own behalf."""
+        if self._upstream_id is None:
+            return local_id
+        return self._upstream_id(local_id)
+
+    def _invoke_raw(self, payload: str, repeatable: bool = False) -> dict[str, Any]:
+        return self._runtime.invoke(
+            self._agent_arn,
+            payload,
+            self._sessions.next_session_id(),
+            self._out,
+            repeatable,
+        )
+
+    def _invoke_request(
+        self, line: str, request: Envelope | list[Envelope]
+    ) -> dict[str, Any]:
+        """Invoke the runtime for a request, retrying or hedging where safe."""
+        if isinstance(request, list) or not request.is_request:
+            return self._invoke_raw(line)
+        method = str(request.method)
+        if not self._retry.repeatable(method, line):
+            return self._invoke_raw(line)
+        delay = self._latency.percentile(method) if self._hedges is not None else None
+        started = time.monotonic()
+        if delay is None:
+            resp = self._invoke_raw(line, True)
+        else:
+            assert self._hedges is not None
+            resp = hedged(
+                lambda duplicate: self._hedge_attempt(line, request.id, duplicate),
+                delay,
+                self._hedges,
+                _discard_response,
+            )
+        self._latency.observe(method, time.monotonic() - started)
+        return resp
+
+    def _hedge_attempt(
+        self, line: str, request_id: Any, duplicate: bool
+    ) -> dict[str, Any]:
+        if not duplicate:
+            return self._invoke_raw(line, True)
+        # The bridge refuses a second request with an id already in flight
+        hedge_id = self._own_id(f"hedge-{next(self._hedge_ids)}")
+        message = jsoncodec.loads(line)
+        message["id"] = hedge_id
+        _debug(f"Hedging request {request_id!r} as {hedge_id}")
+        resp = self._invoke_raw(jsoncodec.dumps_str(message), True)
+        body_stream = resp.get("response")
+        if body_stream is None:
+            return resp
+        return {**resp, "response": _RestoredId(body_stream, hedge_id, request_id)}
+
+    def _send_client_response(self, line: str, request_id: Any) -> None:
+        """Forward the IDE's reply to a server-initiated request (no output)."""
+        try:
+            resp = self._invoke_raw(line)
+        except AssumeRoleError as exc:
+            self._out.emit_log("error", f"Credential refresh failed: {exc}")
+            return
+        except (BotoCoreError, ClientError) as exc:
+            detail = getattr(exc, "response", None)
+            if (
+                isinstance(detail, dict)
+                and detail.get("ResponseMetadata", {}).get("HTTPStatusCode") == 204
+            ):
+                return
+            _debug(f"Failed to deliver reply {request_id!r} to the server: {exc}")
+            return
+        body_stream = resp.get("response")
+        if body_stream is not None:
+            body_stream.read()
+
+    def _handle_message(
+        self,
+        line: str,
+        request: Envelope | list[Envelope],
+        request_id: Any,
+        is_initialized_notification: bool,
+        split_batch: bool = False,
+        sink: Output | None = None,
+    ) -> None:
+        # Discovery calls made for the warm-start cache write to their own sink
+        # and are part of the handshake, so they must not wait for it
+        target = sink or self._out
+        if sink is None:
+            self._ready.wait()
+
+        def _fail(code: int, message: str) -> None:
+            if isinstance(request, list):
+                target.print_batch_error(request, code, message, split_batch)
+            else:
+                target.print_error(request_id, code, message)
+
+        try:
+            resp = self._invoke_request(line, request)
         except AssumeRoleError as exc:
             _debug(f"Credential refresh failed: {exc}")
-            _emit_mcp_log("error", f"Credential refresh failed: {exc}")
-            _print_error(request_id, -32000, f"Credential refresh failed: {exc}")
-            continue
+            target.emit_log("error", f"Credential refresh failed: {exc}")
+            _fail(-32000, f"Credential refresh failed: {exc}")
+            return
         except (BotoCoreError, ClientError) as exc:
             # HTTP 204 (No Content) is the correct response for notifications
             # Don't treat it as an error when we're sending a notification
@@ -254,127 +1327,443 @@ def main() -> None:
                 and detail.get("ResponseMetadata", {}).get("HTTPStatusCode") == 204
             ):
                 # Silently ignore 204 for notifications - it's expected
-                continue
+                return
+            if is_throttling(exc):
+                code = detail.get("Error", {}).get("Code") if detail else None
+                _fail(
+                    -32000,
+                    f"InvokeAgentRuntime throttled ({code or 'HTTP 429'}) after "
+                    "retrying; AgentCore is over its quota for this runtime, "
+                    "try again shortly",
+                )
+                return
 
             message = (
                 json.dumps(detail, default=str)
                 if isinstance(detail, dict)
                 else str(exc)
             )
-            _print_error(request_id, -32000, f"InvokeAgentRuntime error: {message}")
-            continue
+            _fail(-32000, f"InvokeAgentRuntime error: {message}")
+            return
         # Handle streaming vs JSON body
         body_stream = resp.get("response")
         if body_stream is None:
-            _print_error(
-                request_id, -32001, "Missing response body from InvokeAgentRuntime"
-            )
-            continue
+            _fail(-32001, "Missing response body from InvokeAgentRuntime")
+            return
 
         response_ct = resp.get("contentType", "").lower()
         if "text/event-stream" in response_ct:
-            _emit_event_stream(body_stream)
-            continue
+            target.emit_event_stream(body_stream, split_batch)
+            return
 
-        # JSON body
+        # JSON body: small bodies are inspected whole, large ones are streamed
         try:
-            body = body_stream.read().decode("utf-8", errors="replace")
+            prefix = _read_prefix(body_stream, JSON_CHUNK_SIZE)
+            if len(prefix) >= JSON_CHUNK_SIZE and not split_batch:
+                head = scan(prefix.decode("utf-8", errors="replace"))
+                # A -32602 replay trigger is tiny; anything else goes straight out
+                if head is None or head.error_code != -32602:
+                    target.stream_body(prefix, body_stream)
+                    return
+            body = (prefix + body_stream.read()).decode("utf-8", errors="replace")
         except Exception as exc:
-            _print_error(request_id, -32002, f"Failed to process response body: {exc}")
-            continue
+            _fail(-32002, f"Failed to process response body: {exc}")
+            return
 
         try:
-            parsed_body = json.loads(body) if body and body.strip() else None
+            reply = _scan_reply(body)
         except json.JSONDecodeError as exc:
-            _print_error(request_id, -32002, f"Failed to process response body: {exc}")
-            continue
+            _fail(-32002, f"Failed to process response body: {exc}")
+            return
 
         # Detect uninitialized stdio server case and perform handshake replay once per process
-        should_attempt_replay = (
-            # Only for non-initialize requests with an error
-            isinstance(parsed, dict)
-            and parsed.get("method") != "initialize"
-            and isinstance(parsed_body, dict)
-            and isinstance(parsed_body.get("error"), dict)
-            and parsed_body["error"].get("code") == -32602
-            and last_initialize_payload is not None
-            and not replay_attempted
-        )
+        with self._replay_lock:
+            should_attempt_replay = (
+                _needs_handshake_replay(request, reply)
+                and self._last_initialize_payload is not None
+                and not self._replay_attempted
+            )
+            if should_attempt_replay:
+                self._replay_attempted = True
+
+        if should_attempt_replay and self._replay_handshake(
+            line, target, split_batch, _fail
+        ):
+            return
+
+        # No replay or replay not applicable: print original body (if any)
+        if body and body.strip():
+            target.write_body(body, split_batch)
 
-        if should_attempt_replay:
-            replay_attempted = True
+    def _replay_handshake(
+        self,
+        line: str,
+        target: Output,
+        split_batch: bool,
+        fail: Callable[[int, str], None],
+    ) -> bool:
+        """Re-send the handshake, then ``line``; False if the replay failed."""
+        assert self._last_initialize_payload is not None
+        try:
+            _debug(
+                "Handshake replay triggered due to -32602: sending initialize "
+                "+ notifications/initialized, then retrying original request"
+            )
+            target.emit_log(
+                "debug",
+                "Handshake replay triggered (-32602). Re-sending initialize and initialized, then retrying request.",
+            )
+            # 1) Re-send cached initialize (suppress output)
+            replay_resp = self._invoke_raw(self._last_initialize_payload)
+            replay_stream = replay_resp.get("response")
+            if (
+                replay_stream is not None
+                and "text/event-stream"
+                not in replay_resp.get("contentType", "").lower()
+            ):
+                # Consume without printing
+                replay_stream.read()
+            # 2) Re-send notifications/initialized (suppress output)
+            #    If we never saw it, still send one — it is harmless for servers expecting the handshake
             try:
-                _debug(
-                    "Handshake replay triggered due to -32602: sending initialize "
-                    "+ notifications/initialized, then retrying original request"
-                )
-                _emit_mcp_log(
-                    "debug",
-                    "Handshake replay triggered (-32602). Re-sending initialize and initialized, then retrying request.",
+                notif_resp = self._invoke_raw(
+                    json.dumps(
+                        {"jsonrpc": "2.0", "method": "notifications/initialized"}
+                    )
                 )
-                # 1) Re-send cached initialize (suppress output)
-                replay_resp = _invoke_raw(last_initialize_payload)
-                replay_stream = replay_resp.get("response")
+                notif_stream = notif_resp.get("response")
                 if (
-                    replay_stream is not None
+                    notif_stream is not None
                     and "text/event-stream"
-                    not in replay_resp.get("contentType", "").lower()
+                    not in notif_resp.get("contentType", "").lower()
                 ):
-                    # Consume without printing
-                    replay_stream.read()
-                # 2) Re-send notifications/initialized (suppress output)
-                #    If we never saw it, still send one — it is harmless for servers expecting the handshake
-                try:
-                    notif_resp = _invoke_raw(
-                        json.dumps(
-                            {"jsonrpc": "2.0", "method": "notifications/initialized"}
-                        )
-                    )
-                    notif_stream = notif_resp.get("response")
-                    if (
-                        notif_stream is not None
-                        and "text/event-stream"
-                        not in notif_resp.get("contentType", "").lower()
-                    ):
-                        notif_stream.read()
-                except (BotoCoreError, ClientError):
-                    # Likely 204 No Content; safe to ignore
-                    pass
-                # 3) Retry original request and print its output
-                final_resp = _invoke_raw(line)
-                final_stream = final_resp.get("response")
-                if final_stream is None:
-                    _print_error(
-                        request_id,
-                        -32001,
-                        "Missing response body from InvokeAgentRuntime",
-                    )
+                    notif_stream.read()
+            except (BotoCoreError, ClientError):
+                # Likely 204 No Content; safe to ignore
+                pass
+            # 3) Retry original request and print its output
+            final_resp = self._invoke_raw(line)
+            final_stream = final_resp.get("response")
+            if final_stream is None:
+                fail(-32001, "Missing response body from InvokeAgentRuntime")
+            else:
+                final_ct = final_resp.get("contentType", "").lower()
+                if "text/event-stream" in final_ct:
+                    target.emit_event_stream(final_stream, split_batch)
                 else:
-                    final_ct = final_resp.get("contentType", "").lower()
-                    if "text/event-stream" in final_ct:
-                        _emit_event_stream(final_stream)
-                    else:
-                        final_body = final_stream.read().decode(
-                            "utf-8", errors="replace"
-                        )
-                        if final_body.strip():
-                            print(final_body, flush=True)
-                _debug(
-                    "Handshake replay succeeded; original request retried successfully"
+                    target.emit_json_body(final_stream, split_batch)
+            _debug("Handshake replay succeeded; original request retried successfully")
+            target.emit_log(
+                "debug",
+                "Handshake replay succeeded; original request retried successfully.",
+            )
+            return True
+        except (BotoCoreError, ClientError) as exc:
+            # Fall back to original error if replay fails
+            _debug(f"Handshake replay failed: {exc}")
+            target.emit_log("warning", f"Handshake replay failed: {exc}")
+            return False
+
+    def _discover(self, line: str) -> _CapturedOutput:
+        """Send a discovery request without showing the IDE its reply."""
+        envelope = scan(line) or Envelope.from_message(jsoncodec.loads(line))
+        captured = _CapturedOutput()
+        self._handle_message(line, envelope, envelope.id, False, sink=captured)
+        return captured
+
+    def _initialize(self, line: str, request_id: Any) -> None:
+        """Run the IDE's initialize, answering from the warm-start cache if it can."""
+        self._last_initialize_payload = line
+        # A new handshake makes earlier prefetched lists stale
+        self._prefetched = None
+        self._advertised = []
+        if self._discovery is not None:
+            cached = self._discovery.initialize_reply(jsoncodec.loads(line))
+            if cached is not None:
+                # Answer now; the runtime hears the handshake meanwhile
+                self._out.write_line(cached)
+                self._ready.clear()
+                self._handoff = queue.Queue()
+                self._warm_handshake_future = self._submit(
+                    self._warm_handshake, line, request_id, self._handoff
                 )
-                _emit_mcp_log(
-                    "debug",
-                    "Handshake replay succeeded; original request retried successfully.",
+                return
+        captured = self._discover(line)
+        for text in captured.lines:
+            self._out.write_line(text)
+        result = captured.result(request_id)
+        if isinstance(result, dict):
+            if self._discovery is not None:
+                self._discovery.record("initialize", result)
+                self._refresh_after_initialized = True
+            if self._prefetch:
+                self._advertised = advertised_lists(result)
+
+    def _after_initialized(self) -> None:
+        """Start the work the IDE's notifications/initialized was waiting for."""
+        if self._advertised:
+            self._start_prefetch(self._advertised)
+            self._advertised = []
+        if self._refresh_after_initialized:
+            # First run for this runtime: fill the cache for the next one
+            self._refresh_after_initialized = False
+            self._submit(self._refresh_discovery)
+
+    def _answer_while_warming(self, line: str, envelope: Envelope) -> bool:
+        """Cover a warm-started handshake; True if ``line`` needs nothing more."""
+        if self._discovery is None or self._ready.is_set():
+            return False
+        if envelope.method == "notifications/initialized":
+            assert self._handoff is not None
+            self._handoff.put(line)
+            return True
+        if envelope.method in LIST_CHANGED:
+            cached = self._discovery.list_reply(jsoncodec.loads(line))
+            if cached is not None:
+                self._out.write_line(cached)
+                return True
+        return False
+
+    def _warm_handshake(
+        self, line: str, request_id: Any, initialized: queue.Queue[str | None]
+    ) -> None:
+        """Run the real handshake after the IDE was answered from the cache."""
+        assert self._discovery is not None
+        try:
+            result = self._discover(line).result(request_id)
+            if isinstance(result, dict):
+                self._discovery.record("initialize", result)
+            else:
+                result = None
+            try:
+                notification = initialized.get(timeout=WARM_HANDSHAKE_TIMEOUT)
+            except queue.Empty:
+                _debug("No notifications/initialized from the IDE; continuing")
+                notification = ""
+            if notification is None:
+                # The IDE went away before finishing the handshake
+                return
+            if notification:
+                self._handle_message(
+                    notification,
+                    Envelope(method="notifications/initialized"),
+                    None,
+                    True,
+                    sink=_CapturedOutput(),
                 )
-                continue
-            except (BotoCoreError, ClientError) as exc:
-                # Fall back to original error if replay fails
-                _debug(f"Handshake replay failed: {exc}")
-                _emit_mcp_log("warning", f"Handshake replay failed: {exc}")
+        finally:
+            self._ready.set()
+        if self._prefetch:
+            self._start_prefetch(advertised_lists(result))
+            # Queued behind the prefetch, whose first pages it reuses
+            self._submit(self._refresh_discovery)
+        else:
+            self._refresh_discovery()
 
-        # No replay or replay not applicable: print original body (if any)
-        if body and body.strip():
-            print(body, flush=True)
+    def _refresh_discovery(self) -> None:
+        """List again, and tell the IDE about lists that changed since last run."""
+        discovery = self._discovery
+        assert discovery is not None
+        changed: set[str] = set()
+        pages = self._prefetched
+        for number, method in enumerate(discovery.list_methods()):
+            page = pages.peek(method, None) if pages is not None else None
+            if page is not None:
+                result = page.result()
+            else:
+                request_id = self._own_id(f"warm-start-{number}")
+                result = self._discover(
+                    json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method})
+                ).result(request_id)
+            if isinstance(result, dict) and discovery.record(method, result):
+                changed.add(LIST_CHANGED[method])
+        for notification in sorted(changed):
+            _debug(f"Live discovery differs from the cache: {notification}")
+            self._out.write_line(json.dumps({"jsonrpc": "2.0", "method": notification}))
+
+    def _start_prefetch(self, methods: list[str]) -> None:
+        if not methods:
+            return
+        pages = _PrefetchedLists()
+        for method in methods:
+            pages.expect(method, None)
+        self._prefetched = pages
+        _debug(f"Prefetching {', '.join(methods)}")
+        for method in methods:
+            self._submit(self._list_pages, pages, method)
+
+    def _list_pages(self, pages: _PrefetchedLists, method: str) -> None:
+        """Fetch every page of ``method`` ahead of the IDE's calls."""
+        cursor: str | None = None
+        try:
+            for number in range(MAX_PAGES):
+                request_id = self._own_id(f"prefetch-{method}-{number}")
+                message: dict[str, Any] = {
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "method": method,
+                }
+                if cursor is not None:
+                    message["params"] = {"cursor": cursor}
+                result = self._discover(json.dumps(message)).result(request_id)
+                pages.resolve(method, cursor, result)
+                if not isinstance(result, dict) or not result.get("nextCursor"):
+                    break
+                cursor = str(result["nextCursor"])
+                pages.expect(method, cursor)
+        finally:
+            pages.abandon(method)
+
+    def _answer_from_prefetch(self, line: str, envelope: Envelope) -> bool:
+        """Answer a list call from the prefetched pages; False if it has none."""
+        pages = self._prefetched
+        if (
+            pages is None
+            or not envelope.is_request
+            or envelope.method not in LIST_FIELDS
+        ):
+            return False
+        params = jsoncodec.loads(line).get("params") or {}
+        cursor = params.get("cursor") if isinstance(params, dict) else None
+        page = pages.take(envelope.method, None if cursor is None else str(cursor))
+        if page is None:
+            return False
+        self._submit(self._answer_prefetched, line, envelope, page, request=envelope)
+        return True
+
+    def _answer_prefetched(
+        self, line: str, request: Envelope, page: Future[Any]
+    ) -> None:
+        result = page.result()
+        if result is None:
+            # The prefetch failed; let the IDE's own call try
+            self._handle_message(line, request, request.id, False)
+            return
+        self._out.write_line(
+            jsoncodec.dumps_str({"jsonrpc": "2.0", "id": request.id, "result": result})
+        )
+
+
+def _read_lines(stream: Any) -> queue.Queue[str | None]:
+    """Read ``stream`` on a background thread; ``None`` marks end of input."""
+    lines: queue.Queue[str | None] = queue.Queue()
+
+    def _read() -> None:
+        for raw_line in stream:
+            lines.put(raw_line)
+        lines.put(None)
+
+    threading.Thread(target=_read, name="stdin-reader", daemon=True).start()
+    return lines
+
+
+def _runtime_client(settings: ProxySettings) -> RuntimeClient:
+    try:
+        return RuntimeClient(settings)
+    except ImportError:
+        print(
+            "Error: AGENTCORE_TRANSPORT=http2 requires httpx with HTTP/2 support "
+            '(pip install "mcp-agentcore-proxy[http2]")',
+            file=sys.stderr,
+            flush=True,
+        )
+        sys.exit(2)
+    except AssumeRoleError as exc:
+        print(f"Error: {exc}", file=sys.stderr, flush=True)
+        sys.exit(2)
+
+
+def _aggregate_main(agent_arns: str, config: RuntimeSessionConfig) -> None:
+    from mcp_agentcore_proxy.aggregate import Aggregator, parse_members
+
+    try:
+        members = parse_members(agent_arns)
+    except ValueError as exc:
+        print(f"Error: {exc}", file=sys.stderr, flush=True)
+        sys.exit(2)
+
+    settings = resolve_settings()
+    if settings.transport == "websocket":
+        print(
+            "Warning: AGENTCORE_TRANSPORT=websocket is not supported with "
+            "AGENTCORE_AGENT_ARNS; using http",
+            file=sys.stderr,
+            flush=True,
+        )
+    runtime = _runtime_client(settings)
+    try:
+        aggregator = Aggregator(
+            members, runtime, config, _STDOUT, settings.max_concurrency
+        )
+    except RuntimeSessionError as exc:
+        runtime.close()
+        print(f"Error: {exc}", file=sys.stderr, flush=True)
+        sys.exit(2)
+
+    try:
+        aggregator.serve(_read_lines(sys.stdin))
+    finally:
+        aggregator.close()
+        runtime.close()
+
+
+def main(argv: list[str] | None = None) -> None:
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] == ["daemon"]:
+        from mcp_agentcore_proxy.daemon import run_daemon
+
+        run_daemon()
+        return
+
+    agent_arns = os.getenv("AGENTCORE_AGENT_ARNS", "").strip()
+    agent_arn = os.getenv("AGENTCORE_AGENT_ARN") or os.getenv("AGENT_ARN")
+    if not agent_arn and not agent_arns:
+        print(
+            "Error: Set AGENTCORE_AGENT_ARN (or AGENT_ARN, or AGENTCORE_AGENT_ARNS)",
+            file=sys.stderr,
+            flush=True,
+        )
+        sys.exit(2)
+
+    config = _resolve_runtime_session_config()
+
+    if agent_arns:
+        # The daemon relays one runtime per window, so aggregation runs here
+        _aggregate_main(agent_arns, config)
+        return
+
+    daemon_socket = os.getenv("AGENTCORE_DAEMON_SOCKET")
+    if daemon_socket:
+        from mcp_agentcore_proxy.daemon import attach
+
+        # A shim relays stdio to the shared daemon; fall through if it can't
+        if attach(daemon_socket, agent_arn, config.mode):
+            return
+
+    try:
+        session_manager = RuntimeSessionManager(config)
+    except RuntimeSessionError as exc:
+        print(f"Error: {exc}", file=sys.stderr, flush=True)
+        sys.exit(2)
+
+    settings = resolve_settings()
+    runtime = _runtime_client(settings)
+    cache_dir = resolve_cache_dir(os.getenv("AGENTCORE_WARM_START"))
+
+    try:
+        serve(
+            _read_lines(sys.stdin),
+            _STDOUT,
+            runtime,
+            agent_arn,
+            session_manager,
+            config.mode,
+            settings,
+            DiscoveryCache(cache_dir, agent_arn) if cache_dir else None,
+        )
+    finally:
+        runtime.close()
 
 
 if __name__ == "__main__":
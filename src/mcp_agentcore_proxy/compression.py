@@ -0,0 +1,250 @@
+"""Negotiated gzip/zstd compression between the proxy and the bridge.
+
+Tool results that carry source files, logs or base64 blobs shrink 5–10x
+when compressed, which matters far more than CPU time on slow links. The
+proxy advertises ``Accept-Encoding`` on every call and the bridge compresses
+responses above a size threshold. The bridge in turn lists the encodings it
+can read in an ``Accept-Encoding`` response header (RFC 7694); only after
+seeing it does the proxy start compressing large request bodies, so a bridge
+that predates compression never receives a body it cannot read.
+
+gzip is always available. zstd is preferred when the ``zstandard`` package is
+installed (``pip install mcp-agentcore-proxy[zstd]``).
+"""
+
+from __future__ import annotations
+
+import zlib
+from collections.abc import Iterator
+from typing import Any
+
+__all__ = [
+    "ACCEPT_ENCODING",
+    "ENCODINGS",
+    "ClientCompression",
+    "Compressor",
+    "DecodingStream",
+    "Decompressor",
+    "SizeLimitExceeded",
+    "compress",
+    "decompress",
+    "negotiate",
+]
+
+try:  # pragma: no cover - depends on the environment
+    import zstandard
+except ImportError:  # pragma: no cover - depends on the environment
+    zstandard = None
+
+DEFAULT_MIN_SIZE = 1024
+CHUNK_SIZE = 64 * 1024
+_GZIP_WBITS = 16 + zlib.MAX_WBITS
+
+# Most preferred first
+ENCODINGS: tuple[str, ...] = ("zstd", "gzip") if zstandard is not None else ("gzip",)
+ACCEPT_ENCODING = ", ".join(ENCODINGS)
+
+
+def _check(encoding: str) -> str:
+    name = encoding.strip().lower()
+    if name not in ENCODINGS:
+        raise ValueError(f"Unsupported content encoding: {encoding!r}")
+    return name
+
+
+def negotiate(accept_encoding: str | None) -> str | None:
+    """Pick the encoding to use for a peer's ``Accept-Encoding`` header."""
+    if not accept_encoding:
+        return None
+    weights: dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        name, _, params = item.partition(";")
+        name = name.strip().lower()
+        weight = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                weight = float(params[2:])
+            except ValueError:
+                weight = 0.0
+        if name:
+            weights[name] = weight
+
+    best: str | None = None
+    best_weight = 0.0
+    for name in ENCODINGS:
+        weight = weights.get(name, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = name, weight
+    return best
+
+
+class Compressor:
+    """Incremental compressor whose flushed output is decodable right away."""
+
+    def __init__(self, encoding: str):
+        self.encoding = _check(encoding)
+        if self.encoding == "zstd":
+            self._zstd = zstandard.ZstdCompressor().compressobj()
+        else:
+            self._zlib = zlib.compressobj(6, zlib.DEFLATED, _GZIP_WBITS)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "zstd":
+            return self._zstd.compress(data)
+        return self._zlib.compress(data)
+
+    def flush(self) -> bytes:
+        """Emit everything compressed so far without ending the stream."""
+        if self.encoding == "zstd":
+            return self._zstd.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+        return self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "zstd":
+            return self._zstd.flush()
+        return self._zlib.flush()
+
+
+class Decompressor:
+    """Incremental decompressor; raises ValueError on corrupt input."""
+
+    def __init__(self, encoding: str):
+        self.encoding = _check(encoding)
+        if self.encoding == "zstd":
+            self._zstd = zstandard.ZstdDecompressor().decompressobj()
+        else:
+            self._zlib = zlib.decompressobj(_GZIP_WBITS)
+
+    def decompress(self, data: bytes) -> bytes:
+        try:
+            if self.encoding == "zstd":
+                return self._zstd.decompress(data)
+            return self._zlib.decompress(data)
+        except (zlib.error, getattr(zstandard, "ZstdError", zlib.error)) as exc:
+            raise ValueError(f"Invalid {self.encoding} data: {exc}") from exc
+
+    def flush(self) -> bytes:
+        if self.encoding == "zstd":
+            return b""
+        return self._zlib.flush()
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    compressor = Compressor(encoding)
+    return compressor.compress(data) + compressor.finish()
+
+
+class SizeLimitExceeded(ValueError):
+    """Raised when data decompresses to more than the allowed size."""
+
+
+def decompress(data: bytes, encoding: str, max_size: int | None = None) -> bytes:
+    """Decompress ``data`` in chunks, giving up once it exceeds ``max_size``.
+
+    A small body can expand to gigabytes, so the output is never produced in
+    one call. Raises SizeLimitExceeded past the limit and ValueError on
+    corrupt input.
+    """
+    output = bytearray()
+    try:
+        for chunk in _decompressed_chunks(data, _check(encoding)):
+            output += chunk
+            if max_size is not None and len(output) > max_size:
+                raise SizeLimitExceeded(
+                    f"{encoding} body decompresses to more than {max_size} bytes"
+                )
+    except (zlib.error, getattr(zstandard, "ZstdError", zlib.error)) as exc:
+        raise ValueError(f"Invalid {encoding} data: {exc}") from exc
+    return bytes(output)
+
+
+def _decompressed_chunks(data: bytes, encoding: str) -> Iterator[bytes]:
+    if encoding == "zstd":
+        reader = zstandard.ZstdDecompressor().stream_reader(data)
+        while chunk := reader.read(CHUNK_SIZE):
+            yield chunk
+        return
+    decoder = zlib.decompressobj(_GZIP_WBITS)
+    pending = data
+    while pending and not decoder.eof:
+        yield decoder.decompress(pending, CHUNK_SIZE)
+        pending = decoder.unconsumed_tail
+    yield decoder.flush()
+
+
+class DecodingStream:
+    """Wrap a compressed body stream with the ``read``/``iter_lines`` API of
+    botocore's ``StreamingBody``."""
+
+    def __init__(self, raw: Any, encoding: str):
+        self._raw = raw
+        self._decoder = Decompressor(encoding)
+        self._buffer = bytearray()
+        self._eof = False
+
+    def _fill(self, size: int | None) -> None:
+        while not self._eof and (size is None or len(self._buffer) < size):
+            chunk = self._raw.read(CHUNK_SIZE)
+            if chunk:
+                self._buffer += self._decoder.decompress(chunk)
+            else:
+                self._buffer += self._decoder.flush()
+                self._eof = True
+
+    def read(self, amt: int | None = None) -> bytes:
+        self._fill(amt)
+        if amt is None:
+            amt = len(self._buffer)
+        data = bytes(self._buffer[:amt])
+        del self._buffer[:amt]
+        return data
+
+    def iter_lines(
+        self, chunk_size: int = CHUNK_SIZE, keepends: bool = False
+    ) -> Iterator[bytes]:
+        pending = b""
+        while chunk := self.read(chunk_size):
+            lines = (pending + chunk).splitlines(True)
+            for line in lines[:-1]:
+                yield line.splitlines(keepends)[0]
+            pending = lines[-1]
+        if pending:
+            yield pending.splitlines(keepends)[0]
+
+    def close(self) -> None:
+        self._raw.close()
+
+
+class ClientCompression:
+    """botocore hooks that compress InvokeAgentRuntime calls for one runtime."""
+
+    EVENT_SUFFIX = "bedrock-agentcore.InvokeAgentRuntime"
+
+    def __init__(self, min_size: int = DEFAULT_MIN_SIZE):
+        self.min_size = min_size
+        # Learned from the bridge's Accept-Encoding response header
+        self.request_encoding: str | None = None
+
+    def register(self, events: Any) -> None:
+        events.register(f"before-call.{self.EVENT_SUFFIX}", self.before_call)
+        events.register(f"after-call.{self.EVENT_SUFFIX}", self.after_call)
+
+    def before_call(self, params: dict[str, Any], **_: Any) -> None:
+        headers = params.setdefault("headers", {})
+        headers["Accept-Encoding"] = ACCEPT_ENCODING
+        body = params.get("body")
+        encoding = self.request_encoding
+        if encoding and isinstance(body, bytes) and len(body) >= self.min_size:
+            params["body"] = compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+
+    def after_call(self, http_response: Any, parsed: dict[str, Any], **_: Any) -> None:
+        headers = getattr(http_response, "headers", None) or {}
+        advertised = headers.get("accept-encoding")
+        if advertised is not None:
+            self.request_encoding = negotiate(advertised)
+        encoding = (headers.get("content-encoding") or "").strip().lower()
+        body = parsed.get("response")
+        if encoding and encoding != "identity" and body is not None:
+            parsed["response"] = DecodingStream(body, encoding)
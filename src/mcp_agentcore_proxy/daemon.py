@@ -0,0 +1,758 @@
+"""Local daemon that lets many IDE windows share one proxy process.
+
+Each IDE window normally starts its own ``mcp-agentcore-proxy``. Every one of
+them resolves credentials (often an STS assume-role call), builds a boto3
+client with its own TLS connection pool, and in ``identity`` mode calls
+``sts:GetCallerIdentity`` before the first message. With
+``AGENTCORE_DAEMON_SOCKET`` set, the proxy becomes a thin shim instead. It
+attaches to a daemon listening on that Unix socket, starting one if none is
+running, and relays its stdio over the socket.
+
+The daemon serves every shim with one ``RuntimeClient``, so credentials,
+refreshes and the connection pool are shared. It also caches ``*/list``
+replies per runtime for ``AGENTCORE_DAEMON_LIST_TTL`` seconds, and drops them
+when the server sends a ``list_changed`` notification.
+
+Shims share a runtime session when they resolve to the same one. That is
+always the case in ``identity`` mode, and in ``session`` mode when
+``AGENTCORE_DAEMON_SHARE_SESSIONS=1``. Request ids from those shims are
+remapped to daemon-unique ids, so concurrent windows never receive each
+other's replies. Windows that join later get the cached ``initialize``
+result instead of re-initializing the server.
+
+A shim only attaches to a daemon started with the same AWS and transport
+settings, and run by the same user. Otherwise it runs the proxy in-process as
+before. The default socket lives in a directory only the user can enter.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import fcntl
+import hashlib
+import itertools
+import json
+import os
+import queue
+import socket
+import stat
+import struct
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from mcp_agentcore_proxy import jsoncodec
+from mcp_agentcore_proxy.aws_session import AssumeRoleError
+from mcp_agentcore_proxy.client import (
+    Output,
+    ProxySettings,
+    RuntimeClient,
+    _body_chunks,
+    _positive_int_env,
+    resolve_settings,
+    serve,
+)
+from mcp_agentcore_proxy.envelope import scan, scan_batch
+from mcp_agentcore_proxy.session_manager import (
+    RuntimeSessionConfig,
+    RuntimeSessionError,
+    RuntimeSessionManager,
+)
+
+__all__ = ["Daemon", "ListCache", "attach", "run_daemon"]
+
+PROTOCOL_VERSION = 1
+DEFAULT_LIST_TTL = 300
+DEFAULT_IDLE_TIMEOUT = 900
+# How long a shim waits for a daemon it started to accept connections
+START_TIMEOUT = 5.0
+
+CACHEABLE_METHODS = frozenset(
+    {"tools/list", "prompts/list", "resources/list", "resources/templates/list"}
+)
+_LIST_CHANGED = {
+    "notifications/tools/list_changed": ("tools/list",),
+    "notifications/prompts/list_changed": ("prompts/list",),
+    "notifications/resources/list_changed": (
+        "resources/list",
+        "resources/templates/list",
+    ),
+}
+# struct ucred: pid, uid, gid
+_PEERCRED = struct.Struct("3i")
+# Every setting that changes how a proxy talks to AgentCore; a shim only
+# attaches to a daemon started with the same values
+_ENVIRONMENT_KEYS = (
+    # Credentials and endpoint
+    "AWS_PROFILE",
+    "AWS_REGION",
+    "AWS_DEFAULT_REGION",
+    "AWS_ACCESS_KEY_ID",
+    "AWS_SESSION_TOKEN",
+    "AGENTCORE_ASSUME_ROLE_ARN",
+    "AGENTCORE_ASSUME_ROLE_SESSION_NAME",
+    "AGENTCORE_ENDPOINT_URL",
+    # resolve_settings()
+    "AGENTCORE_TRANSPORT",
+    "AGENTCORE_COMPRESSION",
+    "AGENTCORE_COMPRESSION_MIN_BYTES",
+    "AGENTCORE_MAX_CONCURRENCY",
+    "AGENTCORE_MAX_BATCH",
+    "AGENTCORE_BATCH_WINDOW_MS",
+    "AGENTCORE_CONNECT_TIMEOUT",
+    "AGENTCORE_READ_TIMEOUT",
+    "AGENTCORE_PREFETCH",
+    "AGENTCORE_RETRY_ATTEMPTS",
+    "AGENTCORE_RETRY_TOOLS",
+    "AGENTCORE_HEDGE",
+    "AGENTCORE_ADAPTIVE_CONCURRENCY",
+    "AGENTCORE_RATE_LIMIT",
+    "AGENTCORE_RATE_BURST",
+    "AGENTCORE_QUEUE_TIMEOUT",
+    "AGENTCORE_BREAKER_FAILURES",
+    "AGENTCORE_BREAKER_COOLDOWN",
+    # Sessions and startup
+    "RUNTIME_SESSION_MODE",
+    "AGENTCORE_WARM_START",
+    "AGENTCORE_DAEMON_SHARE_SESSIONS",
+    "AGENTCORE_DAEMON_LIST_TTL",
+)
+
+
+def default_socket_path() -> str:
+    return os.path.join(_private_directory(), "mcp-agentcore-proxy.sock")
+
+
+def _private_directory() -> str:
+    """A directory only the current user can enter, to hold the socket.
+
+    ``$XDG_RUNTIME_DIR`` if set, otherwise a per-user directory under the
+    system temp directory. Raises PermissionError if someone else owns it or
+    can enter it.
+    """
+    directory = os.getenv("XDG_RUNTIME_DIR")
+    if not directory:
+        directory = os.path.join(
+            tempfile.gettempdir(), f"mcp-agentcore-proxy-{os.getuid()}"
+        )
+        with contextlib.suppress(FileExistsError):
+            os.mkdir(directory, 0o700)
+    info = os.lstat(directory)
+    if (
+        not stat.S_ISDIR(info.st_mode)
+        or info.st_uid != os.getuid()
+        or stat.S_IMODE(info.st_mode) & 0o077
+    ):
+        raise PermissionError(
+            f"{directory} must be a directory owned by this user with mode 0700"
+        )
+    return directory
+
+
+def resolve_socket_path(value: str | None) -> str:
+    """Map ``AGENTCORE_DAEMON_SOCKET`` to a path; ``1``/``auto`` pick the default."""
+    if not value or value.strip().lower() in {"1", "auto", "true"}:
+        return default_socket_path()
+    return os.path.expanduser(value.strip())
+
+
+def environment_key() -> str:
+    """Fingerprint of the settings a shim and its daemon must agree on."""
+    values = [os.getenv(name) or "" for name in _ENVIRONMENT_KEYS]
+    return hashlib.sha256(json.dumps(values).encode("utf-8")).hexdigest()
+
+
+def _reply(request_id: Any, result: Any) -> str:
+    return jsoncodec.dumps_str({"jsonrpc": "2.0", "id": request_id, "result": result})
+
+
+class ListCache:
+    """``*/list`` results per runtime, kept for ``ttl`` seconds."""
+
+    def __init__(self, ttl: float, clock: Callable[[], float] = time.monotonic):
+        self._ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries: dict[tuple[str, str, str], tuple[float, Any]] = {}
+
+    @staticmethod
+    def key(agent_arn: str, method: str, params: Any) -> tuple[str, str, str]:
+        return agent_arn, method, json.dumps(params, sort_keys=True)
+
+    def get(self, key: tuple[str, str, str]) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, result = entry
+            if self._clock() >= expires:
+                del self._entries[key]
+                return None
+            return result
+
+    def put(self, key: tuple[str, str, str], result: Any) -> None:
+        with self._lock:
+            self._entries[key] = (self._clock() + self._ttl, result)
+
+    def invalidate(self, agent_arn: str, methods: tuple[str, ...]) -> None:
+        with self._lock:
+            for key in [
+                key
+                for key in self._entries
+                if key[0] == agent_arn and key[1] in methods
+            ]:
+                del self._entries[key]
+
+
+class _SharedSession:
+    """A runtime session that several shims talk through."""
+
+    def __init__(self, session_manager: RuntimeSessionManager):
+        self.session_manager = session_manager
+        self.initialize_result: Any = None
+        self._ids = itertools.count(1)
+
+    def next_id(self) -> str:
+        return f"daemon-{next(self._ids)}"
+
+
+@dataclass(frozen=True)
+class _Pending:
+    """What to do with the reply to a request forwarded for a shim."""
+
+    id: Any
+    cache_key: tuple[str, str, str] | None
+    is_initialize: bool
+
+
+class _Shim:
+    """One attached IDE window, as seen by the daemon."""
+
+    def __init__(
+        self,
+        connection: socket.socket,
+        agent_arn: str,
+        cache: ListCache,
+        shared: _SharedSession | None,
+    ):
+        self._connection = connection
+        self._write_lock = threading.Lock()
+        self.agent_arn = agent_arn
+        self._cache = cache
+        self._shared = shared
+        # Keyed by the JSON of the id sent upstream
+        self._pending: dict[str, _Pending] = {}
+        self._pending_lock = threading.Lock()
+
+    @property
+    def remaps_ids(self) -> bool:
+        return self._shared is not None
+
+    def send(self, text: str) -> None:
+        self.send_chunks([text.encode("utf-8")])
+
+    def send_chunks(self, chunks: Any) -> None:
+        with self._write_lock:
+            try:
+                for chunk in chunks:
+                    self._connection.sendall(chunk)
+                self._connection.sendall(b"\n")
+            except OSError:
+                # The window went away; its replies have nowhere to go
+                pass
+
+    def inbound(self, line: str) -> str | None:
+        """Prepare a message from the IDE; ``None`` if it was answered here."""
+        envelope = scan(line)
+        if envelope is None:
+            if self._shared is None or scan_batch(line) is None:
+                # Parse errors are reported by the proxy loop
+                return line
+            return jsoncodec.dumps_str(
+                [self._forward(item) for item in jsoncodec.loads(line)]
+            )
+        if not envelope.is_request:
+            return line
+
+        method = envelope.method
+        message: dict[str, Any] | None = None
+        cache_key = None
+        if method in CACHEABLE_METHODS:
+            message = jsoncodec.loads(line)
+            cache_key = ListCache.key(self.agent_arn, method, message.get("params"))
+            cached = self._cache.get(cache_key)
+            if cached is not None:
+                self.send(_reply(envelope.id, cached))
+                return None
+        elif method == "initialize" and self._shared is not None:
+            result = self._shared.initialize_result
+            if result is not None:
+                self.send(_reply(envelope.id, result))
+                return None
+
+        if self._shared is None:
+            if cache_key is not None:
+                self._track(envelope.id, _Pending(envelope.id, cache_key, False))
+            return line
+        if message is None:
+            message = jsoncodec.loads(line)
+        return jsoncodec.dumps_str(self._forward(message, cache_key))
+
+    def _forward(
+        self, message: Any, cache_key: tuple[str, str, str] | None = None
+    ) -> Any:
+        """Give a request a daemon-unique id, remembering the IDE's."""
+        shared = self._shared
+        if shared is None or not isinstance(message, dict):
+            return message
+        if "method" not in message or message.get("id") is None:
+            return message
+        upstream_id = shared.next_id()
+        pending = _Pending(
+            message["id"], cache_key, message.get("method") == "initialize"
+        )
+        self._track(upstream_id, pending)
+        return {**message, "id": upstream_id}
+
+    def _track(self, upstream_id: Any, pending: _Pending) -> None:
+        with self._pending_lock:
+            self._pending[json.dumps(upstream_id)] = pending
+
+    def _settle(self, message: Any) -> Any:
+        """Restore the IDE's id on a reply and feed the caches."""
+        if not isinstance(message, dict) or "method" in message:
+            return message
+        with self._pending_lock:
+            pending = self._pending.pop(json.dumps(message.get("id")), None)
+        if pending is None:
+            return message
+        result = message.get("result")
+        if result is not None and "error" not in message:
+            if pending.cache_key is not None:
+                self._cache.put(pending.cache_key, result)
+            if pending.is_initialize and self._shared is not None:
+                self._shared.initialize_result = result
+        return {**message, "id": pending.id}
+
+    def outbound(self, text: str) -> str:
+        """Prepare a message for the IDE."""
+        envelope = scan(text)
+        if envelope is None:
+            if self._shared is None or scan_batch(text) is None:
+                return text
+            return jsoncodec.dumps_str(
+                [self._settle(item) for item in jsoncodec.loads(text)]
+            )
+        if envelope.method in _LIST_CHANGED:
+            self._cache.invalidate(self.agent_arn, _LIST_CHANGED[envelope.method])
+            return text
+        if envelope.method is not None or not envelope.has_id:
+            return text
+        with self._pending_lock:
+            tracked = json.dumps(envelope.id) in self._pending
+        if not tracked:
+            return text
+        return jsoncodec.dumps_str(self._settle(jsoncodec.loads(text)))
+
+    def upstream_id(self, local_id: str) -> str:
+        """The id for a request the proxy sends on its own in this session."""
+        if self._shared is None:
+            return local_id
+        return self._shared.next_id()
+
+    def forget(self, upstream_id: Any) -> None:
+        with self._pending_lock:
+            self._pending.pop(json.dumps(upstream_id), None)
+
+
+class _ShimOutput(Output):
+    """Write the proxy loop's messages to one shim's socket."""
+
+    def __init__(self, shim: _Shim):
+        super().__init__()
+        self._shim = shim
+
+    def write_line(self, text: str) -> None:
+        self._shim.send(self._shim.outbound(text))
+
+    def stream_body(self, prefix: bytes, body_stream: Any) -> None:
+        if self._shim.remaps_ids:
+            # The IDE's id has to be restored, so the body is read whole
+            body = prefix + body_stream.read()
+            self.write_line(body.decode("utf-8", errors="replace").strip())
+            return
+        # Too large to be worth caching; copy it through chunk by chunk
+        head = scan(prefix.decode("utf-8", errors="replace"))
+        if head is not None:
+            self._shim.forget(head.id)
+        self._shim.send_chunks(_body_chunks(prefix, body_stream))
+
+
+class Daemon:
+    """Serve attached shims on a Unix socket with one shared RuntimeClient."""
+
+    def __init__(
+        self,
+        path: str,
+        runtime: RuntimeClient,
+        settings: ProxySettings,
+        *,
+        list_ttl: float = DEFAULT_LIST_TTL,
+        share_sessions: bool = False,
+        idle_timeout: float = DEFAULT_IDLE_TIMEOUT,
+        environment: str | None = None,
+    ):
+        self.path = path
+        self._runtime = runtime
+        self._settings = settings
+        self._cache = ListCache(list_ttl)
+        self._share_sessions = share_sessions
+        self._idle_timeout = idle_timeout
+        self._environment = environment or environment_key()
+        self._lock = threading.Lock()
+        self._sessions: dict[tuple[str, str], _SharedSession] = {}
+        self._active = 0
+        self._idle_since = time.monotonic()
+        self._stopped = threading.Event()
+        self._listener: socket.socket | None = None
+        self._lock_file: int | None = None
+
+    def bind(self) -> bool:
+        """Start listening; False if another daemon already owns the socket.
+
+        The daemon holds an exclusive lock on ``<socket>.lock`` while it
+        serves, so two daemons starting at once cannot both find the socket
+        stale and unlink each other's.
+        """
+        lock = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o600)
+        try:
+            try:
+                fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(lock)
+                return False
+            live = _connect(self.path)
+            if live is not None:
+                live.close()
+                os.close(lock)
+                return False
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.path)
+            listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            # Only the current user may attach
+            umask = os.umask(0o077)
+            try:
+                listener.bind(self.path)
+            finally:
+                os.umask(umask)
+        except BaseException:
+            os.close(lock)
+            raise
+        listener.listen()
+        listener.settimeout(0.5)
+        self._listener = listener
+        self._lock_file = lock
+        return True
+
+    def serve_forever(self) -> None:
+        assert self._listener is not None, "bind() first"
+        try:
+            while not self._stopped.is_set():
+                try:
+                    connection, _ = self._listener.accept()
+                except TimeoutError:
+                    if self._idle_expired():
+                        break
+                    continue
+                except OSError:
+                    break
+                uid = _peer_uid(connection)
+                if uid is not None and uid != os.getuid():
+                    # The socket's mode should make this impossible
+                    connection.close()
+                    continue
+                connection.settimeout(None)
+                threading.Thread(
+                    target=self._handle,
+                    args=(connection,),
+                    name="daemon-shim",
+                    daemon=True,
+                ).start()
+        finally:
+            self._listener.close()
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(self.path)
+            if self._lock_file is not None:
+                # The lock file stays; unlinking it would let a third daemon
+                # lock a fresh file while a second holds the old one
+                os.close(self._lock_file)
+                self._lock_file = None
+
+    def shutdown(self) -> None:
+        self._stopped.set()
+
+    def _idle_expired(self) -> bool:
+        with self._lock:
+            return (
+                self._active == 0
+                and time.monotonic() - self._idle_since >= self._idle_timeout
+            )
+
+    def _session_for(
+        self, agent_arn: str, mode: str
+    ) -> tuple[_SharedSession | None, RuntimeSessionManager]:
+        if mode == "identity" or (self._share_sessions and mode == "session"):
+            with self._lock:
+                shared = self._sessions.get((agent_arn, mode))
+                if shared is None:
+                    shared = _SharedSession(
+                        RuntimeSessionManager(RuntimeSessionConfig(mode=mode))
+                    )
+                    self._sessions[(agent_arn, mode)] = shared
+            return shared, shared.session_manager
+        return None, RuntimeSessionManager(RuntimeSessionConfig(mode=mode))
+
+    def _welcome(self, reader: Any) -> tuple[str, str] | str:
+        """Read a shim's hello; return (agent ARN, session mode) or an error."""
+        try:
+            hello = json.loads(reader.readline())
+        except ValueError:
+            return "invalid hello"
+        if not isinstance(hello, dict) or hello.get("version") != PROTOCOL_VERSION:
+            return "unsupported shim version"
+        if hello.get("environment") != self._environment:
+            return "daemon was started with different AWS or proxy settings"
+        agent_arn = hello.get("agentArn")
+        mode = hello.get("sessionMode")
+        if not isinstance(agent_arn, str) or not isinstance(mode, str):
+            return "hello is missing agentArn or sessionMode"
+        return agent_arn, mode
+
+    def _handle(self, connection: socket.socket) -> None:
+        with self._lock:
+            self._active += 1
+        reader = connection.makefile("r", encoding="utf-8", newline="\n")
+        try:
+            welcome = self._welcome(reader)
+            if isinstance(welcome, str):
+                _send_json(connection, {"ok": False, "error": welcome})
+                return
+            agent_arn, mode = welcome
+            try:
+                shared, session_manager = self._session_for(agent_arn, mode)
+            except RuntimeSessionError as exc:
+                _send_json(connection, {"ok": False, "error": str(exc)})
+                return
+            _send_json(connection, {"ok": True})
+
+            shim = _Shim(connection, agent_arn, self._cache, shared)
+            lines: queue.Queue[str | None] = queue.Queue()
+
+            def _read() -> None:
+                try:
+                    for raw_line in reader:
+                        line = raw_line.strip()
+                        if line:
+                            forwarded = shim.inbound(line)
+                            if forwarded is not None:
+                                lines.put(forwarded)
+                except (OSError, ValueError):
+                    pass
+                lines.put(None)
+
+            threading.Thread(
+                target=_read, name="daemon-shim-reader", daemon=True
+            ).start()
+            serve(
+                lines,
+                _ShimOutput(shim),
+                self._runtime,
+                agent_arn,
+                session_manager,
+                mode,
+                self._settings,
+                upstream_id=shim.upstream_id,
+            )
+        except OSError:
+            # The shim hung up, possibly before reading its welcome
+            pass
+        finally:
+            with contextlib.suppress(OSError):
+                connection.shutdown(socket.SHUT_RDWR)
+            reader.close()
+            connection.close()
+            with self._lock:
+                self._active -= 1
+                self._idle_since = time.monotonic()
+
+
+def _send_json(connection: socket.socket, payload: dict[str, Any]) -> None:
+    connection.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+
+
+def _peer_uid(connection: socket.socket) -> int | None:
+    """The uid of the process at the other end, where the platform reports it."""
+    if not hasattr(socket, "SO_PEERCRED"):
+        return None
+    credentials = connection.getsockopt(
+        socket.SOL_SOCKET, socket.SO_PEERCRED, _PEERCRED.size
+    )
+    _, uid, _ = _PEERCRED.unpack(credentials)
+    return uid
+
+
+def _connect(path: str) -> socket.socket | None:
+    """Connect to the daemon at ``path``; None if nothing is listening.
+
+    Raises PermissionError if the listener belongs to another user.
+    """
+    connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        connection.connect(path)
+    except OSError:
+        connection.close()
+        return None
+    uid = _peer_uid(connection)
+    if uid is not None and uid != os.getuid():
+        connection.close()
+        raise PermissionError(f"{path} is served by uid {uid}, not this user")
+    return connection
+
+
+def _start_daemon(path: str) -> socket.socket | None:
+    """Start a detached daemon on ``path`` and wait for it to accept."""
+    subprocess.Popen(
+        [sys.executable, "-m", "mcp_agentcore_proxy.daemon"],
+        env={**os.environ, "AGENTCORE_DAEMON_SOCKET": path},
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True,
+    )
+    deadline = time.monotonic() + START_TIMEOUT
+    while time.monotonic() < deadline:
+        connection = _connect(path)
+        if connection is not None:
+            return connection
+        time.sleep(0.05)
+    return None
+
+
+def _pump_stdin(connection: socket.socket) -> None:
+    try:
+        for line in sys.stdin.buffer:
+            connection.sendall(line)
+    except OSError:
+        pass
+    with contextlib.suppress(OSError):
+        connection.shutdown(socket.SHUT_WR)
+
+
+def attach(socket_path: str, agent_arn: str, session_mode: str) -> bool:
+    """Relay stdio through the daemon at ``socket_path``.
+
+    Returns False, having read nothing from stdin, when no daemon can be
+    reached or it refuses this shim; the caller then runs the proxy itself.
+    """
+    try:
+        path = resolve_socket_path(socket_path)
+        connection = _connect(path)
+        autostart = os.getenv("AGENTCORE_DAEMON_AUTOSTART", "1") != "0"
+        if connection is None and autostart:
+            connection = _start_daemon(path)
+    except PermissionError as exc:
+        print(
+            f"Warning: not attaching to the proxy daemon ({exc}); running in-process",
+            file=sys.stderr,
+            flush=True,
+        )
+        return False
+    if connection is None:
+        print(
+            f"Warning: no proxy daemon at {path}; running in-process",
+            file=sys.stderr,
+            flush=True,
+        )
+        return False
+
+    with connection:
+        _send_json(
+            connection,
+            {
+                "version": PROTOCOL_VERSION,
+                "agentArn": agent_arn,
+                "sessionMode": session_mode,
+                "environment": environment_key(),
+            },
+        )
+        reader = connection.makefile("rb")
+        try:
+            welcome = json.loads(reader.readline() or b"{}")
+        except ValueError:
+            welcome = {}
+        if not welcome.get("ok"):
+            print(
+                f"Warning: proxy daemon at {path} refused this window "
+                f"({welcome.get('error', 'no reply')}); running in-process",
+                file=sys.stderr,
+                flush=True,
+            )
+            return False
+
+        threading.Thread(
+            target=_pump_stdin, args=(connection,), name="stdin-pump", daemon=True
+        ).start()
+        out = sys.stdout.buffer
+        while chunk := reader.read1(64 * 1024):
+            out.write(chunk)
+            out.flush()
+    return True
+
+
+def run_daemon(path: str | None = None) -> None:
+    """Run the daemon in the foreground until it has been idle long enough."""
+    try:
+        path = path or resolve_socket_path(os.getenv("AGENTCORE_DAEMON_SOCKET"))
+    except PermissionError as exc:
+        print(f"Error: {exc}", file=sys.stderr, flush=True)
+        sys.exit(2)
+    settings = resolve_settings()
+    try:
+        runtime = RuntimeClient(settings)
+    except (AssumeRoleError, ImportError) as exc:
+        print(f"Error: {exc}", file=sys.stderr, flush=True)
+        sys.exit(2)
+
+    daemon = Daemon(
+        path,
+        runtime,
+        settings,
+        list_ttl=_positive_int_env("AGENTCORE_DAEMON_LIST_TTL", DEFAULT_LIST_TTL),
+        share_sessions=os.getenv("AGENTCORE_DAEMON_SHARE_SESSIONS") == "1",
+        idle_timeout=_positive_int_env(
+            "AGENTCORE_DAEMON_IDLE_TIMEOUT", DEFAULT_IDLE_TIMEOUT
+        ),
+    )
+    try:
+        try:
+            bound = daemon.bind()
+        except PermissionError as exc:
+            print(f"Error: {exc}", file=sys.stderr, flush=True)
+            sys.exit(2)
+        if not bound:
+            print(f"A proxy daemon is already listening on {path}", file=sys.stderr)
+            return
+        print(f"Proxy daemon listening on {path}", file=sys.stderr, flush=True)
+        with contextlib.suppress(KeyboardInterrupt):
+            daemon.serve_forever()
+    finally:
+        runtime.close()
+
+
+if __name__ == "__main__":
+    run_daemon()
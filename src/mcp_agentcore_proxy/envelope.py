@@ -0,0 +1,332 @@
+"""Read a JSON-RPC message's envelope without parsing the whole message.
+
+Routing decisions only need ``id``, ``method`` and ``error.code``. For a
+``tools/call`` with large arguments or a multi-megabyte result, building the
+full object graph just to read those fields is the dominant cost. The scanner
+walks the top-level keys, decodes only the small values it needs, and stops as
+soon as the envelope is known. MCP clients and servers write ``id`` and
+``method``/``result``/``error`` before ``params`` or the result body, so the
+large value is normally never touched.
+
+Nested values are skipped, not validated: a message whose envelope scans may
+still be malformed deeper down, and the receiving side reports that. Anything
+the scanner cannot read returns ``None`` so callers can fall back to a full
+parse.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+__all__ = ["Envelope", "scan", "scan_batch", "scan_buffer", "split_array"]
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_STRING = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_SCALAR = re.compile(
+    r"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?|true|false|null"
+)
+_STRUCTURAL = re.compile(r'["{}\[\]]')
+
+_FIELDS = frozenset({"id", "method", "error", "result"})
+_ERROR_FIELDS = frozenset({"code"})
+_KINDS = frozenset({"method", "error", "result"})
+
+
+def _envelope_complete(spans: dict[str, tuple[int, int]]) -> bool:
+    return "id" in spans and not _KINDS.isdisjoint(spans)
+
+
+def _code_found(spans: dict[str, tuple[int, int]]) -> bool:
+    return "code" in spans
+
+
+class _ScanError(ValueError):
+    pass
+
+
+@dataclass(frozen=True)
+class Envelope:
+    """The routing fields of one JSON-RPC message."""
+
+    id: Any = None
+    method: str | None = None
+    error_code: int | None = None
+    has_id: bool = False
+    has_result: bool = False
+
+    @property
+    def is_request(self) -> bool:
+        return self.method is not None and self.id is not None
+
+    @property
+    def is_notification(self) -> bool:
+        return self.method is not None and self.id is None
+
+    @property
+    def is_response(self) -> bool:
+        return self.method is None and (self.has_result or self.error_code is not None)
+
+    @classmethod
+    def from_message(cls, message: Any) -> Envelope:
+        """Build an envelope from an already-parsed message."""
+        if not isinstance(message, dict):
+            return cls()
+        error = message.get("error")
+        code = error.get("code") if isinstance(error, dict) else None
+        method = message.get("method")
+        return cls(
+            id=message.get("id"),
+            method=method if isinstance(method, str) else None,
+            error_code=code if isinstance(code, int) else None,
+            has_id="id" in message,
+            has_result="result" in message,
+        )
+
+
+def _skip_whitespace(text: str, pos: int) -> int:
+    return _WHITESPACE.match(text, pos).end()  # type: ignore[union-attr]
+
+
+def _skip_value(text: str, pos: int) -> int:
+    """Return the index just past the JSON value starting at ``pos``."""
+    if pos >= len(text):
+        raise _ScanError("unexpected end of input")
+    char = text[pos]
+    if char == '"':
+        match = _STRING.match(text, pos)
+        if match is None:
+            raise _ScanError("unterminated string")
+        return match.end()
+    if char in "{[":
+        depth = 0
+        while True:
+            match = _STRUCTURAL.search(text, pos)
+            if match is None:
+                raise _ScanError("unterminated container")
+            token = match.group()
+            if token == '"':
+                string = _STRING.match(text, match.start())
+                if string is None:
+                    raise _ScanError("unterminated string")
+                pos = string.end()
+                continue
+            depth += 1 if token in "{[" else -1
+            pos = match.end()
+            if depth == 0:
+                return pos
+    match = _SCALAR.match(text, pos)
+    if match is None:
+        raise _ScanError(f"unexpected character at {pos}")
+    return match.end()
+
+
+def _scan_object(
+    text: str,
+    pos: int,
+    fields: frozenset[str] = _FIELDS,
+    complete: Callable[[dict[str, tuple[int, int]]], bool] = _envelope_complete,
+) -> tuple[dict[str, tuple[int, int]], int | None]:
+    """Return ``{key: (start, end)}`` spans for ``fields`` and the end index.
+
+    Stops early, with an end index of None, once ``complete(spans)`` holds.
+    """
+    pos = _skip_whitespace(text, pos)
+    if pos >= len(text) or text[pos] != "{":
+        raise _ScanError("not a JSON object")
+    pos = _skip_whitespace(text, pos + 1)
+    spans: dict[str, tuple[int, int]] = {}
+    if pos < len(text) and text[pos] == "}":
+        return spans, pos + 1
+
+    while True:
+        key_match = _STRING.match(text, pos)
+        if key_match is None:
+            raise _ScanError("expected a key")
+        raw_key = key_match.group()
+        key = json.loads(raw_key) if "\\" in raw_key else raw_key[1:-1]
+        pos = _skip_whitespace(text, key_match.end())
+        if pos >= len(text) or text[pos] != ":":
+            raise _ScanError("expected ':'")
+        start = _skip_whitespace(text, pos + 1)
+        if key == "result" and key in fields:
+            # Only its presence matters; never walk a result body we can avoid
+            spans[key] = (start, start)
+            if complete(spans):
+                return spans, None
+        end = _skip_value(text, start)
+        if key in fields:
+            spans[key] = (start, end)
+            if complete(spans):
+                return spans, None
+        pos = _skip_whitespace(text, end)
+        if pos < len(text) and text[pos] == ",":
+            pos = _skip_whitespace(text, pos + 1)
+            continue
+        if pos < len(text) and text[pos] == "}":
+            return spans, pos + 1
+        raise _ScanError("expected ',' or '}'")
+
+
+def _envelope(text: str, spans: dict[str, tuple[int, int]]) -> Envelope:
+    def value(key: str, spans: dict[str, tuple[int, int]] = spans) -> Any:
+        start, end = spans[key]
+        return json.loads(text[start:end])
+
+    method = value("method") if "method" in spans else None
+    error_code = None
+    if "error" in spans and text[spans["error"][0]] == "{":
+        # Only the top-level code; error.data may be large or hold its own "code"
+        error_spans, _ = _scan_object(
+            text, spans["error"][0], _ERROR_FIELDS, _code_found
+        )
+        if "code" in error_spans:
+            code = value("code", error_spans)
+            error_code = code if isinstance(code, int) else None
+    return Envelope(
+        id=value("id") if "id" in spans else None,
+        method=method if isinstance(method, str) else None,
+        error_code=error_code,
+        has_id="id" in spans,
+        has_result="result" in spans,
+    )
+
+
+def scan(text: str) -> Envelope | None:
+    """Return the envelope of a JSON-RPC object, or None if it cannot be read."""
+    try:
+        spans, end = _scan_object(text, 0)
+        if end is not None and _skip_whitespace(text, end) != len(text):
+            return None
+        return _envelope(text, spans)
+    except (_ScanError, json.JSONDecodeError):
+        return None
+
+
+# The same grammar over bytes, for replies too large to decode
+_BYTES_WHITESPACE = re.compile(rb"[ \t\n\r]*")
+_BYTES_STRING = re.compile(rb'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+_BYTES_SCALAR = re.compile(
+    rb"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?|true|false|null"
+)
+_BYTES_STRUCTURAL = re.compile(rb'["{}\[\]]')
+
+
+def _skip_bytes_value(buffer: Any, pos: int) -> int:
+    """Return the offset just past the JSON value starting at ``pos``."""
+    char = buffer[pos : pos + 1]
+    if char == b'"':
+        match = _BYTES_STRING.match(buffer, pos)
+        if match is None:
+            raise _ScanError("unterminated string")
+        return match.end()
+    if char in (b"{", b"["):
+        depth = 0
+        while True:
+            match = _BYTES_STRUCTURAL.search(buffer, pos)
+            if match is None:
+                raise _ScanError("unterminated container")
+            token = match.group()
+            if token == b'"':
+                string = _BYTES_STRING.match(buffer, match.start())
+                if string is None:
+                    raise _ScanError("unterminated string")
+                pos = string.end()
+                continue
+            depth += 1 if token in (b"{", b"[") else -1
+            pos = match.end()
+            if depth == 0:
+                return pos
+    match = _BYTES_SCALAR.match(buffer, pos)
+    if match is None:
+        raise _ScanError(f"unexpected byte at {pos}")
+    return match.end()
+
+
+def scan_buffer(buffer: Any) -> Envelope | None:
+    """Like :func:`scan`, for a bytes-like ``buffer`` such as an ``mmap``.
+
+    Only the envelope fields are decoded. Other values are skipped by regex
+    over the raw bytes, so a reply whose large result comes before its id is
+    scanned without being loaded into memory.
+    """
+
+    def skip_whitespace(pos: int) -> int:
+        return _BYTES_WHITESPACE.match(buffer, pos).end()  # type: ignore[union-attr]
+
+    try:
+        pos = skip_whitespace(0)
+        if buffer[pos : pos + 1] != b"{":
+            return None
+        pos = skip_whitespace(pos + 1)
+        fields: dict[str, Any] = {}
+        while buffer[pos : pos + 1] != b"}":
+            key_match = _BYTES_STRING.match(buffer, pos)
+            if key_match is None:
+                return None
+            key = json.loads(key_match.group())
+            pos = skip_whitespace(key_match.end())
+            if buffer[pos : pos + 1] != b":":
+                return None
+            start = skip_whitespace(pos + 1)
+            end = _skip_bytes_value(buffer, start)
+            if key == "result":
+                fields[key] = None
+            elif key in _FIELDS:
+                fields[key] = json.loads(buffer[start:end])
+            pos = skip_whitespace(end)
+            if buffer[pos : pos + 1] == b",":
+                pos = skip_whitespace(pos + 1)
+            elif buffer[pos : pos + 1] != b"}":
+                return None
+        if skip_whitespace(pos + 1) != len(buffer):
+            return None
+    except (_ScanError, json.JSONDecodeError, UnicodeDecodeError):
+        return None
+    return Envelope.from_message(fields)
+
+
+def split_array(text: str) -> list[str] | None:
+    """Return the raw text of each element of a JSON array, or None."""
+    try:
+        pos = _skip_whitespace(text, 0)
+        if pos >= len(text) or text[pos] != "[":
+            return None
+        pos = _skip_whitespace(text, pos + 1)
+        elements: list[str] = []
+        if pos < len(text) and text[pos] == "]":
+            end = pos + 1
+        else:
+            while True:
+                end = _skip_value(text, pos)
+                elements.append(text[pos:end])
+                pos = _skip_whitespace(text, end)
+                if pos < len(text) and text[pos] == ",":
+                    pos = _skip_whitespace(text, pos + 1)
+                    continue
+                if pos < len(text) and text[pos] == "]":
+                    end = pos + 1
+                    break
+                return None
+        if _skip_whitespace(text, end) != len(text):
+            return None
+        return elements
+    except _ScanError:
+        return None
+
+
+def scan_batch(text: str) -> list[Envelope] | None:
+    """Return the envelopes of a JSON-RPC batch, or None if it cannot be read."""
+    elements = split_array(text)
+    if elements is None:
+        return None
+    envelopes = []
+    for element in elements:
+        envelope = scan(element)
+        if envelope is None:
+            return None
+        envelopes.append(envelope)
+    return envelopes
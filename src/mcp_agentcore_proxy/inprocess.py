@@ -0,0 +1,225 @@
+"""Run a Python MCP server inside the bridge process instead of over stdio.
+
+``MCP_SERVER_MODULE=pkg.module:mcp`` imports a FastMCP (or low-level
+``mcp.server.lowlevel.Server``) instance and connects it to the bridge with
+in-memory streams. Requests are validated straight into MCP message models
+and replies are serialized once, so no pipe copies or extra JSON round trips
+happen per call, and tools share the bridge's event loop.
+
+The runtime session id is not put in the environment, which the whole bridge
+shares. Tools read it with :func:`current_session_id` instead.
+
+Requires the ``mcp`` package, which the server module imports anyway.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import importlib
+import json
+import logging
+import os
+import sys
+from contextvars import ContextVar
+from typing import Any
+
+import anyio
+from mcp import types
+from mcp.shared.message import SessionMessage
+from pydantic import ValidationError
+
+from mcp_agentcore_proxy.server import (
+    MCPServerError,
+    MessageListener,
+    RecyclePolicy,
+    _MessageRouter,
+)
+
+logger = logging.getLogger("mcp_agentcore_proxy.inprocess")
+
+_STREAM_BUFFER = 64
+
+# Set inside each server's task, so every handler it spawns sees its own
+_SESSION_ID: ContextVar[str | None] = ContextVar("mcp_session_id", default=None)
+
+
+def current_session_id() -> str | None:
+    """The runtime session id of the in-process server handling this call."""
+    return _SESSION_ID.get()
+
+
+def load_server(target: str, cwd: str | None = None) -> Any:
+    """Import ``module[:attribute]`` and return the low-level MCP server."""
+    module_name, _, attribute = target.partition(":")
+    module_name = module_name.strip()
+    attribute = attribute.strip() or "mcp"
+    if not module_name:
+        raise MCPServerError(f"Invalid MCP_SERVER_MODULE: {target!r}")
+
+    search_path = cwd or os.getcwd()
+    if search_path not in sys.path:
+        sys.path.insert(0, search_path)
+    try:
+        module = importlib.import_module(module_name)
+    except ImportError as exc:
+        raise MCPServerError(f"Unable to import {module_name}: {exc}") from exc
+
+    instance = getattr(module, attribute, None)
+    if instance is None:
+        raise MCPServerError(f"{module_name} has no attribute {attribute!r}")
+
+    # FastMCP wraps the low-level server that speaks MCP messages
+    server = getattr(instance, "_mcp_server", instance)
+    if not hasattr(server, "run") or not hasattr(
+        server, "create_initialization_options"
+    ):
+        raise MCPServerError(
+            f"{target} is not a FastMCP or mcp.server.lowlevel.Server instance"
+        )
+    return server
+
+
+class InProcessServer(_MessageRouter):
+    """Drive an MCP server over in-memory streams.
+
+    Messages are routed like :class:`~mcp_agentcore_proxy.server.MCPSubprocess`
+    traffic, so concurrent requests and server-initiated requests work the
+    same way in both modes.
+    """
+
+    def __init__(self, target: str, session_id: str | None, cwd: str | None = None):
+        super().__init__()
+        self._target = target
+        self._session_id = session_id
+        self._cwd = cwd
+        self._task: asyncio.Task[None] | None = None
+        self._to_server: Any = None
+        self._from_server: Any = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    @property
+    def returncode(self) -> int | None:
+        if self._task is None or not self._task.done():
+            return None
+        if self._task.cancelled() or self._task.exception() is not None:
+            return 1
+        return 0
+
+    def recycle_reason(self, policy: RecyclePolicy) -> str | None:
+        # The server shares the bridge process; there is nothing to replace.
+        return None
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+
+        server = load_server(self._target, self._cwd)
+
+        to_server_send, to_server_recv = anyio.create_memory_object_stream[
+            SessionMessage | Exception
+        ](_STREAM_BUFFER)
+        from_server_send, from_server_recv = anyio.create_memory_object_stream[
+            SessionMessage
+        ](_STREAM_BUFFER)
+        self._to_server = to_server_send
+        self._from_server = from_server_recv
+
+        logger.info("Starting in-process MCP server: %s", self._target)
+        self._task = asyncio.create_task(
+            self._run(server, self._session_id, to_server_recv, from_server_send)
+        )
+
+    @staticmethod
+    async def _run(
+        server: Any, session_id: str | None, read_stream: Any, write_stream: Any
+    ) -> None:
+        _SESSION_ID.set(session_id)
+        try:
+            await server.run(
+                read_stream, write_stream, server.create_initialization_options()
+            )
+        except Exception:
+            logger.exception("In-process MCP server stopped with an error")
+            raise
+
+    async def shutdown(self) -> None:
+        task = self._task
+        if task is None:
+            return
+
+        logger.info("Stopping in-process MCP server")
+        await self._stop_reader()
+        with contextlib.suppress(Exception):
+            await self._to_server.aclose()
+        done, _ = await asyncio.wait({task}, timeout=5)
+        if not done:
+            task.cancel()
+        with contextlib.suppress(BaseException):
+            # A server error was already logged by _run
+            await task
+        with contextlib.suppress(Exception):
+            await self._from_server.aclose()
+        self._task = None
+
+    async def invoke(
+        self, payload: str, on_message: MessageListener | None = None
+    ) -> str:
+        message = self._parse(payload)
+        self._check_ready()
+        if isinstance(message, str):
+            return message
+        root = message.root
+        meta = (getattr(root, "params", None) or {}).get("_meta")
+        if not isinstance(meta, dict):
+            meta = {}
+        return await self._exchange(
+            getattr(root, "id", None), message, on_message, meta.get("progressToken")
+        )
+
+    async def send(self, payload: str) -> None:
+        """Send a notification or a reply to a server request without waiting."""
+        message = self._parse(payload)
+        self._check_ready()
+        if isinstance(message, str):
+            return
+        if isinstance(message.root, (types.JSONRPCResponse, types.JSONRPCError)):
+            self._answered(message.root.id)
+        await self._post(message)
+
+    def _check_ready(self) -> None:
+        if not self.is_running:
+            raise MCPServerError("MCP server is not running")
+
+    async def _write_message(self, message: types.JSONRPCMessage) -> None:
+        await self._to_server.send(SessionMessage(message))
+
+    async def _read_message(self) -> str:
+        try:
+            reply: SessionMessage = await self._from_server.receive()
+        except (anyio.EndOfStream, anyio.ClosedResourceError) as exc:
+            raise MCPServerError("MCP server terminated while reading output") from exc
+        return reply.message.model_dump_json(by_alias=True, exclude_none=True)
+
+    @staticmethod
+    def _parse(payload: str) -> types.JSONRPCMessage | str:
+        """Validate ``payload``; return a JSON-RPC error string if it is invalid."""
+        try:
+            return types.JSONRPCMessage.model_validate_json(payload)
+        except ValidationError as exc:
+            request_id = None
+            with contextlib.suppress(ValueError, AttributeError):
+                request_id = json.loads(payload).get("id")
+            return json.dumps(
+                {
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "error": {
+                        "code": types.INVALID_REQUEST,
+                        "message": f"Invalid JSON-RPC message: {exc.errors()[0]['msg']}",
+                    },
+                }
+            )
@@ -0,0 +1,115 @@
+"""JSON encoding and decoding with an optional fast backend.
+
+The proxy parses and re-serializes every MCP message, and for large tool
+results the stdlib ``json`` module is the dominant CPU cost. This module
+uses ``orjson`` (``pip install mcp-agentcore-proxy[fast]``) or ``msgspec``
+when either is installed and falls back to ``json`` otherwise.
+
+All backends emit the same compact form that Starlette's ``JSONResponse``
+produces (``separators=(",", ":")``, non-ASCII kept as UTF-8), so switching
+backends does not change the bytes written for MCP payloads. Two edge cases
+differ: the fast backends write exponent floats as ``1e16`` instead of
+``1e+16``, and orjson reads integers wider than 64 bits as floats. Set
+``MCP_JSON_BACKEND=json`` (or ``orjson`` / ``msgspec``) to force a backend.
+
+Decode errors are always raised as :class:`json.JSONDecodeError`, so callers
+keep catching the stdlib exception.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections.abc import Callable
+from typing import Any, NamedTuple
+
+__all__ = ["BACKEND", "Codec", "dumps", "dumps_str", "load_codec", "loads"]
+
+BACKENDS = ("orjson", "msgspec", "json")
+
+
+class Codec(NamedTuple):
+    name: str
+    loads: Callable[[str | bytes], Any]
+    dumps: Callable[[Any], bytes]
+
+
+def _stdlib_dumps(obj: Any) -> bytes:
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _stdlib_codec() -> Codec:
+    return Codec("json", json.loads, _stdlib_dumps)
+
+
+def _orjson_codec() -> Codec:
+    import orjson
+
+    def dumps(obj: Any) -> bytes:
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            # Integers beyond 64 bits, non-str keys, ...: stdlib handles them
+            return _stdlib_dumps(obj)
+
+    # orjson.JSONDecodeError subclasses json.JSONDecodeError already
+    return Codec("orjson", orjson.loads, dumps)
+
+
+def _msgspec_codec() -> Codec:
+    import msgspec
+
+    decoder = msgspec.json.Decoder()
+    encoder = msgspec.json.Encoder()
+
+    def loads(data: str | bytes) -> Any:
+        try:
+            return decoder.decode(data)
+        except msgspec.DecodeError as exc:
+            doc = data if isinstance(data, str) else data.decode("utf-8", "replace")
+            raise json.JSONDecodeError(str(exc), doc, 0) from exc
+
+    def dumps(obj: Any) -> bytes:
+        try:
+            return encoder.encode(obj)
+        except (TypeError, msgspec.EncodeError):
+            return _stdlib_dumps(obj)
+
+    return Codec("msgspec", loads, dumps)
+
+
+_FACTORIES: dict[str, Callable[[], Codec]] = {
+    "orjson": _orjson_codec,
+    "msgspec": _msgspec_codec,
+    "json": _stdlib_codec,
+}
+
+
+def load_codec(preferred: str | None = None) -> Codec:
+    """Return the requested backend, or the fastest one that is installed."""
+    if preferred:
+        name = preferred.strip().lower()
+        if name not in _FACTORIES:
+            raise ValueError(
+                f"Unknown JSON backend {preferred!r}; expected one of {BACKENDS}"
+            )
+        return _FACTORIES[name]()
+
+    for name in BACKENDS:
+        try:
+            return _FACTORIES[name]()
+        except ImportError:
+            continue
+    return _stdlib_codec()
+
+
+_codec = load_codec(os.getenv("MCP_JSON_BACKEND"))
+
+BACKEND = _codec.name
+loads = _codec.loads
+dumps = _codec.dumps
+
+
+def dumps_str(obj: Any) -> str:
+    """Serialize ``obj`` to a compact JSON string."""
+    return dumps(obj).decode("utf-8")
@@ -0,0 +1,216 @@
+"""Keep the proxy's calls to each runtime under AgentCore's throttling limits.
+
+Every runtime ARN gets an adaptive concurrency limit. It starts at
+``AGENTCORE_MAX_CONCURRENCY`` and halves when AgentCore answers with
+``ThrottlingException``, at most once per round of calls already in flight.
+It then grows back by one for every limit's worth of calls that succeed
+(additive increase, multiplicative decrease). With ``AGENTCORE_RATE_LIMIT``
+set, a token bucket also caps each runtime at that many calls per second,
+with bursts of up to ``AGENTCORE_RATE_BURST``.
+
+A call that finds no free slot or token waits up to
+``AGENTCORE_QUEUE_TIMEOUT`` seconds, then fails with :class:`QueueTimeout`.
+A call whose reply is streamed keeps its slot until the body has been read
+or closed, since the runtime is still working until then.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import TypeVar
+
+from botocore.exceptions import BotoCoreError, ClientError
+
+__all__ = [
+    "DEFAULT_QUEUE_TIMEOUT",
+    "AdaptiveLimit",
+    "LimitPolicy",
+    "QueueTimeout",
+    "RuntimeLimiter",
+    "TokenBucket",
+    "is_throttling",
+]
+
+DEFAULT_QUEUE_TIMEOUT = 30.0
+
+_THROTTLING_CODES = frozenset({"ThrottlingException", "TooManyRequestsException"})
+
+T = TypeVar("T")
+
+
+class QueueTimeout(BotoCoreError):
+    """Raised when a call waited too long for the runtime's capacity."""
+
+    fmt = (
+        "Waited {timeout:g}s for capacity to call {agent_arn}; "
+        "AgentCore is throttling this runtime"
+    )
+
+
+def is_throttling(exc: Exception) -> bool:
+    """Whether AgentCore rejected a call for exceeding a rate or quota."""
+    if not isinstance(exc, ClientError):
+        return False
+    status = exc.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+    code = exc.response.get("Error", {}).get("Code")
+    return status == 429 or code in _THROTTLING_CODES
+
+
+@dataclass(frozen=True)
+class LimitPolicy:
+    """How calls to one runtime are paced."""
+
+    adaptive: bool = True
+    # Calls per second per runtime; None for no rate limit
+    rate: float | None = None
+    burst: int | None = None
+    queue_timeout: float = DEFAULT_QUEUE_TIMEOUT
+
+
+class TokenBucket:
+    """Allows ``rate`` calls per second on average, ``burst`` at once."""
+
+    def __init__(
+        self, rate: float, burst: int, clock: Callable[[], float] = time.monotonic
+    ):
+        self._rate = rate
+        self._burst = burst
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._tokens = float(burst)
+        self._updated = clock()
+
+    def take(self, deadline: float) -> bool:
+        """Take a token, waiting for one until ``deadline`` at most."""
+        while True:
+            with self._lock:
+                now = self._clock()
+                self._tokens = min(
+                    self._burst, self._tokens + (now - self._updated) * self._rate
+                )
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self._rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+class AdaptiveLimit:
+    """A concurrency limit that halves on throttling and creeps back up."""
+
+    def __init__(
+        self,
+        maximum: int,
+        minimum: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._maximum = maximum
+        self._minimum = minimum
+        self._clock = clock
+        self._condition = threading.Condition()
+        self._limit = float(maximum)
+        self._inflight = 0
+        # Calls started before the last decrease do not cause another one
+        self._decreased_at = float("-inf")
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def acquire(self, deadline: float) -> float | None:
+        """Wait for a free slot until ``deadline``; return the start time or None."""
+        with self._condition:
+            while self._inflight >= int(self._limit):
+                remaining = deadline - self._clock()
+                if remaining <= 0:
+                    return None
+                self._condition.wait(remaining)
+            self._inflight += 1
+            return self._clock()
+
+    def release(self, started: float, succeeded: bool, throttled: bool = False) -> None:
+        """Free the slot taken at ``started`` and adapt the limit to the outcome."""
+        with self._condition:
+            self._inflight -= 1
+            if succeeded:
+                self._limit = min(self._maximum, self._limit + 1 / self._limit)
+            elif throttled and started >= self._decreased_at:
+                self._limit = max(self._minimum, self._limit / 2)
+                self._decreased_at = self._clock()
+            self._condition.notify_all()
+
+
+class RuntimeLimiter:
+    """The concurrency limit and token bucket of one runtime ARN."""
+
+    def __init__(
+        self,
+        agent_arn: str,
+        policy: LimitPolicy,
+        max_concurrency: int,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._agent_arn = agent_arn
+        self._timeout = policy.queue_timeout
+        self._clock = clock
+        self.concurrency = (
+            AdaptiveLimit(max_concurrency, clock=clock) if policy.adaptive else None
+        )
+        self._bucket = (
+            TokenBucket(
+                policy.rate, policy.burst or max(1, int(policy.rate)), clock=clock
+            )
+            if policy.rate
+            else None
+        )
+
+    def run(
+        self,
+        call: Callable[[], T],
+        hold: Callable[[T, Callable[[bool], None]], T] | None = None,
+    ) -> T:
+        """Run ``call`` once the runtime has capacity for it.
+
+        With ``hold``, the slot outlives the call: ``hold(result, release)``
+        returns what run() returns, and must arrange for ``release(succeeded)``
+        to be called once the result has been consumed. Raises QueueTimeout
+        if no capacity frees up within the queue timeout.
+        """
+        deadline = self._clock() + self._timeout
+        if self._bucket is not None and not self._bucket.take(deadline):
+            raise QueueTimeout(timeout=self._timeout, agent_arn=self._agent_arn)
+        if self.concurrency is None:
+            return call()
+        started = self.concurrency.acquire(deadline)
+        if started is None:
+            raise QueueTimeout(timeout=self._timeout, agent_arn=self._agent_arn)
+        try:
+            result = call()
+        except Exception as exc:
+            self.concurrency.release(started, False, is_throttling(exc))
+            raise
+        if hold is None:
+            self.concurrency.release(started, True)
+            return result
+        return hold(result, _Release(self.concurrency, started))
+
+
+class _Release:
+    """Frees one slot of an AdaptiveLimit; only the first call counts."""
+
+    def __init__(self, limit: AdaptiveLimit, started: float):
+        self._limit: AdaptiveLimit | None = limit
+        self._started = started
+        self._lock = threading.Lock()
+
+    def __call__(self, succeeded: bool) -> None:
+        with self._lock:
+            limit, self._limit = self._limit, None
+        if limit is not None:
+            limit.release(self._started, succeeded)
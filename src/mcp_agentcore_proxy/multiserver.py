@@ -0,0 +1,289 @@
+"""Serve several stdio MCP servers from one bridge.
+
+``MCP_SERVER_CMDS`` holds a JSON object of named commands, for example
+``{"docs": "python -m docs_server", "tickets": "npx tickets-mcp"}``. The
+servers start concurrently. Each one sits behind its own supervisor, with its
+own pipes, write lock and recycle policy, so a slow server never holds up the
+others. The bridge answers as one MCP server: ``initialize`` and the
+``*/list`` calls go to every server at once and are merged, tool and prompt
+names are namespaced as ``<name>__<tool>``, and calls are routed through a
+:class:`~mcp_agentcore_proxy.routing.RouteIndex`.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from mcp_agentcore_proxy import jsoncodec
+from mcp_agentcore_proxy.routing import (
+    LIST_FIELDS,
+    MAX_PAGES,
+    NAMESPACE_SEPARATOR,
+    RouteIndex,
+    UnknownTarget,
+    error_reply,
+    merge_initialize,
+    result_reply,
+)
+from mcp_agentcore_proxy.server import (
+    MCPRunner,
+    MCPServerError,
+    Message,
+    MessageListener,
+    RecyclePolicy,
+    SpooledMessage,
+    _error_payload,
+    _id_key,
+)
+
+logger = logging.getLogger("mcp_agentcore_proxy.multiserver")
+
+
+class MultiServer:
+    """Drive several named MCP runners as one :class:`MCPRunner`."""
+
+    def __init__(self, backends: dict[str, MCPRunner]):
+        self._backends = backends
+        self._index: RouteIndex[str] = RouteIndex(list(backends))
+        self._index_ids = itertools.count(1)
+        # Server request ids as relayed to the client -> (server, original id)
+        self._server_requests: dict[str, tuple[str, Any]] = {}
+
+    @property
+    def is_running(self) -> bool:
+        return all(backend.is_running for backend in self._backends.values())
+
+    @property
+    def returncode(self) -> int | None:
+        return next(
+            (
+                backend.returncode
+                for backend in self._backends.values()
+                if backend.returncode is not None
+            ),
+            None,
+        )
+
+    @property
+    def inflight(self) -> int:
+        return sum(backend.inflight for backend in self._backends.values())
+
+    async def start(self) -> None:
+        results = await asyncio.gather(
+            *(backend.start() for backend in self._backends.values()),
+            return_exceptions=True,
+        )
+        for name, result in zip(self._backends, results):
+            if isinstance(result, BaseException):
+                await self.shutdown()
+                raise MCPServerError(
+                    f"MCP server {name!r} failed to start: {result}"
+                ) from result
+
+    async def shutdown(self) -> None:
+        await asyncio.gather(
+            *(backend.shutdown() for backend in self._backends.values())
+        )
+
+    async def drain(self, timeout: float) -> bool:
+        results = await asyncio.gather(
+            *(backend.drain(timeout) for backend in self._backends.values())
+        )
+        return all(results)
+
+    def owns_server_request(self, request_id: Any) -> bool:
+        return _id_key(request_id) in self._server_requests
+
+    def recycle_reason(self, policy: RecyclePolicy) -> str | None:
+        # Every server is recycled by its own supervisor
+        return None
+
+    async def invoke(
+        self, payload: str, on_message: MessageListener | None = None
+    ) -> Message:
+        try:
+            message = jsoncodec.loads(payload)
+        except json.JSONDecodeError as exc:
+            return _error_payload(None, -32700, f"Parse error: {exc}")
+        if not isinstance(message, dict):
+            return _error_payload(None, -32600, "Invalid Request")
+        method = message.get("method")
+        request_id = message.get("id")
+        if method == "initialize":
+            return await self._initialize(message, on_message)
+        if method == "ping":
+            return jsoncodec.dumps_str(result_reply(request_id, {}))
+        if method in LIST_FIELDS:
+            return await self._list(message, on_message)
+        if method == "logging/setLevel":
+            await self._fan_out(lambda name: self._call(name, message, on_message))
+            return jsoncodec.dumps_str(result_reply(request_id, {}))
+        if not RouteIndex.routes(method):
+            return _error_payload(request_id, -32601, f"Method not found: {method}")
+
+        list_method = self._index.listing_for(message)
+        if list_method is not None:
+            # Called before the client listed anything; build the index once
+            index_id = f"multiserver-index-{next(self._index_ids)}"
+            await self._list(
+                {"jsonrpc": "2.0", "id": index_id, "method": list_method}, None
+            )
+        try:
+            name, forwarded = self._index.route(message)
+        except UnknownTarget as exc:
+            return _error_payload(request_id, -32602, str(exc))
+        return await self._backends[name].invoke(
+            jsoncodec.dumps_str(forwarded), on_message=self._relay(name, on_message)
+        )
+
+    async def send(self, payload: str) -> None:
+        try:
+            message = jsoncodec.loads(payload)
+        except json.JSONDecodeError:
+            logger.warning("Dropping non-JSON client message: %s", payload[:200])
+            return
+        if isinstance(message, dict) and message.get("method") is None:
+            # A reply to a server request goes back to the server that asked
+            origin = self._server_requests.pop(_id_key(message.get("id")), None)
+            if origin is None:
+                logger.debug("Dropping unmatched client reply: %.200s", payload)
+                return
+            name, original_id = origin
+            await self._backends[name].send(
+                jsoncodec.dumps_str({**message, "id": original_id})
+            )
+            return
+        await asyncio.gather(
+            *(backend.send(payload) for backend in self._backends.values())
+        )
+
+    def _relay(
+        self, name: str, on_message: MessageListener | None
+    ) -> MessageListener | None:
+        """Pass server messages on, namespacing request ids so servers can't collide."""
+        if on_message is None:
+            return None
+
+        def relay(text: str) -> None:
+            try:
+                message = jsoncodec.loads(text)
+            except json.JSONDecodeError:
+                on_message(text)
+                return
+            if isinstance(message, dict) and message.get("id") is not None:
+                relayed_id = f"{name}{NAMESPACE_SEPARATOR}{message['id']}"
+                self._server_requests[_id_key(relayed_id)] = (name, message["id"])
+                text = jsoncodec.dumps_str({**message, "id": relayed_id})
+            on_message(text)
+
+        return relay
+
+    async def _fan_out(
+        self, call: Callable[[str], Awaitable[dict[str, Any]]]
+    ) -> list[tuple[str, dict[str, Any]]]:
+        replies = await asyncio.gather(*(call(name) for name in self._backends))
+        return list(zip(self._backends, replies))
+
+    async def _call(
+        self,
+        name: str,
+        message: dict[str, Any],
+        on_message: MessageListener | None,
+    ) -> dict[str, Any]:
+        """Send one request to server ``name`` and return its parsed reply."""
+        try:
+            reply = await self._backends[name].invoke(
+                jsoncodec.dumps_str(message), on_message=self._relay(name, on_message)
+            )
+        except MCPServerError as exc:
+            return error_reply(message.get("id"), -32603, str(exc))
+        if isinstance(reply, SpooledMessage):
+            try:
+                reply = reply.read_text()
+            finally:
+                reply.close()
+        try:
+            parsed = jsoncodec.loads(reply)
+        except json.JSONDecodeError as exc:
+            return error_reply(message.get("id"), -32603, f"Invalid reply: {exc}")
+        if not isinstance(parsed, dict):
+            return error_reply(message.get("id"), -32603, "Invalid reply")
+        return parsed
+
+    async def _initialize(
+        self, message: dict[str, Any], on_message: MessageListener | None
+    ) -> str:
+        results = []
+        first_error: dict[str, Any] | None = None
+        for name, reply in await self._fan_out(
+            lambda name: self._call(name, message, on_message)
+        ):
+            if isinstance(reply.get("result"), dict):
+                results.append((name, reply["result"]))
+                continue
+            first_error = first_error or reply
+            logger.warning(
+                "MCP server %r failed initialize: %s", name, reply.get("error")
+            )
+        if not results:
+            assert first_error is not None
+            return jsoncodec.dumps_str({**first_error, "id": message.get("id")})
+        return jsoncodec.dumps_str(
+            result_reply(message.get("id"), merge_initialize(results))
+        )
+
+    async def _list(
+        self, message: dict[str, Any], on_message: MessageListener | None
+    ) -> str:
+        method = message["method"]
+        field = LIST_FIELDS[method]
+        listings = []
+        first_error: dict[str, Any] | None = None
+        for name, reply in await self._fan_out(
+            lambda name: self._list_all(name, message, field, on_message)
+        ):
+            if "error" in reply:
+                first_error = first_error or reply
+                logger.warning(
+                    "MCP server %r failed %s: %s", name, method, reply.get("error")
+                )
+                continue
+            listings.append((name, name, reply["result"]))
+        if not listings:
+            assert first_error is not None
+            return jsoncodec.dumps_str({**first_error, "id": message.get("id")})
+        entries = self._index.merge(field, listings)
+        return jsoncodec.dumps_str(result_reply(message.get("id"), {field: entries}))
+
+    async def _list_all(
+        self,
+        name: str,
+        message: dict[str, Any],
+        field: str,
+        on_message: MessageListener | None,
+    ) -> dict[str, Any]:
+        """Fetch every page of a listing from server ``name``."""
+        params = {
+            key: value
+            for key, value in (message.get("params") or {}).items()
+            if key != "cursor"
+        }
+        entries: list[Any] = []
+        for _ in range(MAX_PAGES):
+            reply = await self._call(name, {**message, "params": params}, on_message)
+            result = reply.get("result")
+            if not isinstance(result, dict):
+                if "error" in reply:
+                    return reply
+                return error_reply(message.get("id"), -32603, "Invalid list result")
+            entries.extend(result.get(field) or [])
+            cursor = result.get("nextCursor")
+            if not cursor:
+                break
+            params = {**params, "cursor": cursor}
+        return {"result": entries}
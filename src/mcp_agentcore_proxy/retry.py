@@ -0,0 +1,167 @@
+"""Retry and hedge calls to the runtime that are safe to send twice.
+
+Any call is retried after errors that mean AgentCore never accepted it:
+connection failures and throttling. ``ping``, the ``*/list`` calls and
+``resources/read`` are also retried after read timeouts, dropped connections
+and 5xx errors, as are ``tools/call`` requests for the tools named in
+``AGENTCORE_RETRY_TOOLS``. Other tool calls are never sent twice. Up to
+``AGENTCORE_RETRY_ATTEMPTS`` attempts are made, with full-jitter exponential
+backoff between them.
+
+With ``AGENTCORE_HEDGE=1`` those repeatable calls are also hedged: if no reply
+has arrived after the p95 latency recently observed for the method, a
+duplicate is sent and whichever answers first is used.
+"""
+
+from __future__ import annotations
+
+import json
+import random
+import threading
+from collections import deque
+from collections.abc import Callable
+from concurrent.futures import FIRST_COMPLETED, Executor, Future, wait
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from botocore.exceptions import (
+    ClientError,
+    ConnectionClosedError,
+    ConnectionError,
+    ReadTimeoutError,
+)
+
+from mcp_agentcore_proxy import jsoncodec
+from mcp_agentcore_proxy.limiter import is_throttling
+from mcp_agentcore_proxy.routing import LIST_FIELDS
+
+__all__ = [
+    "DEFAULT_ATTEMPTS",
+    "IDEMPOTENT_METHODS",
+    "LatencyTracker",
+    "RetryPolicy",
+    "hedged",
+    "should_retry",
+]
+
+IDEMPOTENT_METHODS = frozenset({"ping", "resources/read", *LIST_FIELDS})
+DEFAULT_ATTEMPTS = 3
+BASE_DELAY = 0.2
+MAX_DELAY = 5.0
+# Latencies kept per method, and how many are needed before hedging starts
+LATENCY_WINDOW = 200
+HEDGE_MIN_SAMPLES = 20
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Which requests may be sent more than once, and how often."""
+
+    attempts: int = DEFAULT_ATTEMPTS
+    hedge: bool = False
+    # tools/call is only repeated for these tools
+    retry_tools: frozenset[str] = frozenset()
+
+    def repeatable(self, method: str | None, line: str) -> bool:
+        """Whether the request in ``line`` may be sent twice without harm."""
+        if method in IDEMPOTENT_METHODS:
+            return True
+        if method != "tools/call" or not self.retry_tools:
+            return False
+        try:
+            params = jsoncodec.loads(line).get("params")
+        except (json.JSONDecodeError, AttributeError):
+            return False
+        return isinstance(params, dict) and params.get("name") in self.retry_tools
+
+    def backoff(self, retry: int) -> float:
+        """Full-jitter delay before retry number ``retry`` (from 1)."""
+        return random.uniform(0, min(MAX_DELAY, BASE_DELAY * 2 ** (retry - 1)))
+
+
+def should_retry(exc: Exception, repeatable: bool) -> bool:
+    """Whether an invocation that raised ``exc`` may be sent again."""
+    if isinstance(exc, ConnectionError):
+        # Failed while connecting, so the request never left
+        return True
+    if is_throttling(exc):
+        return True
+    if isinstance(exc, ClientError):
+        status = exc.response.get("ResponseMetadata", {}).get("HTTPStatusCode")
+        return repeatable and isinstance(status, int) and status >= 500
+    return repeatable and isinstance(exc, (ReadTimeoutError, ConnectionClosedError))
+
+
+class LatencyTracker:
+    """Recent time-to-reply of each method, for picking the hedge delay."""
+
+    def __init__(
+        self, window: int = LATENCY_WINDOW, min_samples: int = HEDGE_MIN_SAMPLES
+    ):
+        self._window = window
+        self._min_samples = min_samples
+        self._lock = threading.Lock()
+        self._samples: dict[str, deque[float]] = {}
+
+    def observe(self, method: str, seconds: float) -> None:
+        with self._lock:
+            samples = self._samples.get(method)
+            if samples is None:
+                samples = self._samples[method] = deque(maxlen=self._window)
+            samples.append(seconds)
+
+    def percentile(self, method: str, fraction: float = 0.95) -> float | None:
+        """The ``fraction`` latency of ``method``; None until enough were seen."""
+        with self._lock:
+            samples = self._samples.get(method)
+            if samples is None or len(samples) < self._min_samples:
+                return None
+            ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def hedged(
+    attempt: Callable[[bool], T],
+    delay: float,
+    executor: Executor,
+    discard: Callable[[T], None],
+) -> T:
+    """Run ``attempt(False)``, then ``attempt(True)`` if it takes over ``delay``.
+
+    The first attempt to succeed wins. The loser is cancelled if it has not
+    started, and otherwise its result is passed to ``discard`` when it
+    arrives. If both fail, the first attempt's error is raised.
+    """
+    primary = executor.submit(attempt, False)
+    done, _ = wait([primary], timeout=delay)
+    if done:
+        return primary.result()
+    hedge = executor.submit(attempt, True)
+    attempts = (primary, hedge)
+    pending: set[Future[T]] = set(attempts)
+    while pending:
+        _, pending = wait(pending, return_when=FIRST_COMPLETED)
+        winner = next(
+            (
+                future
+                for future in attempts
+                if future.done() and future.exception() is None
+            ),
+            None,
+        )
+        if winner is not None:
+            loser = hedge if winner is primary else primary
+            if not loser.cancel():
+                loser.add_done_callback(_discarding(discard))
+            return winner.result()
+    return primary.result()
+
+
+def _discarding(discard: Callable[[Any], None]) -> Callable[[Future[Any]], None]:
+    def callback(future: Future[Any]) -> None:
+        if future.exception() is None:
+            discard(future.result())
+
+    return callback
@@ -0,0 +1,223 @@
+"""Merge MCP listings from several servers and route calls back to them.
+
+Shared by the proxy's multi-runtime mode (:mod:`mcp_agentcore_proxy.aggregate`)
+and the bridge's multi-server mode (:mod:`mcp_agentcore_proxy.multiserver`).
+Tool and prompt names are prefixed with their server's name, as in
+``docs__search``. Resource URIs are left alone and routed by exact match,
+then by the longest matching URI template prefix.
+"""
+
+from __future__ import annotations
+
+import threading
+from typing import Any, Generic, TypeVar
+
+__all__ = [
+    "LIST_FIELDS",
+    "MAX_PAGES",
+    "NAMESPACE_SEPARATOR",
+    "RouteIndex",
+    "UnknownTarget",
+    "advertised_lists",
+    "error_reply",
+    "merge_initialize",
+    "result_reply",
+]
+
+NAMESPACE_SEPARATOR = "__"
+# Upper bound on pages fetched from one server for one listing
+MAX_PAGES = 100
+
+# List method -> the result field holding its entries
+LIST_FIELDS = {
+    "tools/list": "tools",
+    "prompts/list": "prompts",
+    "resources/list": "resources",
+    "resources/templates/list": "resourceTemplates",
+}
+# Server capability -> the list methods it makes available
+_LISTS_BY_CAPABILITY = {
+    "tools": ("tools/list",),
+    "prompts": ("prompts/list",),
+    "resources": ("resources/list", "resources/templates/list"),
+}
+_BY_NAME = {"tools/call": "tools", "prompts/get": "prompts"}
+_BY_URI = ("resources/read", "resources/subscribe", "resources/unsubscribe")
+
+T = TypeVar("T")
+
+
+class UnknownTarget(LookupError):
+    """Raised when no server owns the tool, prompt or resource in a request."""
+
+
+def result_reply(request_id: Any, result: Any) -> dict[str, Any]:
+    """A JSON-RPC success reply."""
+    return {"jsonrpc": "2.0", "id": request_id, "result": result}
+
+
+def error_reply(request_id: Any, code: int, message: str) -> dict[str, Any]:
+    """A JSON-RPC error reply."""
+    return {
+        "jsonrpc": "2.0",
+        "id": request_id,
+        "error": {"code": code, "message": message},
+    }
+
+
+def advertised_lists(initialize_result: Any) -> list[str]:
+    """The list methods an ``initialize`` result's capabilities make available."""
+    capabilities = {}
+    if isinstance(initialize_result, dict):
+        capabilities = initialize_result.get("capabilities") or {}
+    return [
+        method
+        for capability, methods in _LISTS_BY_CAPABILITY.items()
+        if capability in capabilities
+        for method in methods
+    ]
+
+
+def _merge_capabilities(results: list[dict[str, Any]]) -> dict[str, Any]:
+    merged: dict[str, Any] = {}
+    for result in results:
+        for name, value in (result.get("capabilities") or {}).items():
+            if isinstance(value, dict) and isinstance(merged.get(name), dict):
+                merged[name] = {**merged[name], **value}
+            else:
+                merged.setdefault(name, value)
+    return merged
+
+
+def merge_initialize(results: list[tuple[str, dict[str, Any]]]) -> dict[str, Any]:
+    """Combine ``(namespace, initialize result)`` pairs into one result."""
+    instructions = [
+        f"[{namespace}] {result['instructions']}"
+        for namespace, result in results
+        if result.get("instructions")
+    ]
+    merged: dict[str, Any] = {
+        "protocolVersion": results[0][1].get("protocolVersion"),
+        "capabilities": _merge_capabilities([result for _, result in results]),
+        "serverInfo": {"name": "mcp-agentcore-proxy", "version": "aggregate"},
+    }
+    if instructions:
+        merged["instructions"] = "\n\n".join(instructions)
+    return merged
+
+
+class RouteIndex(Generic[T]):
+    """Namespaced names and resource URIs, mapped to the server that owns them.
+
+    Each listing replaces the index for its kind in one step, so lookups never
+    see a half-built index.
+    """
+
+    def __init__(self, owners: list[T]):
+        self._owners = owners
+        self._lock = threading.Lock()
+        self._names: dict[str, dict[str, tuple[T, str]]] = {
+            "tools": {},
+            "prompts": {},
+        }
+        self._resources: dict[str, T] = {}
+        # URI template prefixes, longest first
+        self._templates: list[tuple[str, T]] = []
+        self._listed: set[str] = set()
+
+    def merge(self, field: str, listings: list[tuple[str, T, list[Any]]]) -> list[Any]:
+        """Index ``(namespace, owner, entries)`` listings; return the merged entries."""
+        entries: list[Any] = []
+        names: dict[str, tuple[T, str]] = {}
+        resources: dict[str, T] = {}
+        templates: list[tuple[str, T]] = []
+        for namespace, owner, listed in listings:
+            for entry in listed:
+                if not isinstance(entry, dict):
+                    continue
+                if field in self._names:
+                    name = f"{namespace}{NAMESPACE_SEPARATOR}{entry.get('name')}"
+                    names[name] = (owner, entry.get("name"))
+                    entry = {**entry, "name": name}
+                elif field == "resources":
+                    resources[entry.get("uri")] = owner
+                else:
+                    prefix = str(entry.get("uriTemplate", "")).split("{", 1)[0]
+                    templates.append((prefix, owner))
+                entries.append(entry)
+        with self._lock:
+            if field in self._names:
+                self._names[field] = names
+            elif field == "resources":
+                self._resources = resources
+            else:
+                self._templates = sorted(templates, key=lambda item: -len(item[0]))
+            self._listed.add(field)
+        return entries
+
+    def listing_for(self, message: dict[str, Any]) -> str | None:
+        """The list method to run first when ``message`` arrives before any listing."""
+        method = message.get("method")
+        if method == "completion/complete":
+            ref = (message.get("params") or {}).get("ref") or {}
+            method = "prompts/get" if ref.get("type") == "ref/prompt" else None
+        field = _BY_NAME.get(method or "")
+        with self._lock:
+            if field is None or field in self._listed:
+                return None
+        return "tools/list" if field == "tools" else "prompts/list"
+
+    def route(self, message: dict[str, Any]) -> tuple[T, dict[str, Any]]:
+        """Return the owner of a request and the request as that owner expects it.
+
+        Raises UnknownTarget when no server owns the name or URI.
+        """
+        method = message.get("method")
+        params = message.get("params") or {}
+        if method in _BY_NAME:
+            owner, name = self._by_name(_BY_NAME[method], params.get("name"))
+            return owner, {**message, "params": {**params, "name": name}}
+        if method in _BY_URI:
+            return self._by_uri(params.get("uri")), message
+        if method == "completion/complete":
+            ref = params.get("ref") or {}
+            if ref.get("type") == "ref/prompt":
+                owner, name = self._by_name("prompts", ref.get("name"))
+                forwarded = {**params, "ref": {**ref, "name": name}}
+                return owner, {**message, "params": forwarded}
+            if ref.get("type") == "ref/resource":
+                return self._by_uri(ref.get("uri")), message
+            raise UnknownTarget("Unknown completion reference")
+        raise UnknownTarget(f"Method not found: {method}")
+
+    @staticmethod
+    def routes(method: str) -> bool:
+        return (
+            method in _BY_NAME or method in _BY_URI or method == "completion/complete"
+        )
+
+    def _by_name(self, field: str, name: Any) -> tuple[T, str]:
+        with self._lock:
+            target = self._names[field].get(name)
+        if target is None:
+            kind = "tool" if field == "tools" else "prompt"
+            raise UnknownTarget(f"Unknown {kind}: {name}")
+        return target
+
+    def _by_uri(self, uri: Any) -> T:
+        if len(self._owners) == 1:
+            return self._owners[0]
+        with self._lock:
+            owner = self._resources.get(uri) if isinstance(uri, str) else None
+            if owner is None and isinstance(uri, str):
+                owner = next(
+                    (
+                        candidate
+                        for prefix, candidate in self._templates
+                        if uri.startswith(prefix)
+                    ),
+                    None,
+                )
+        if owner is None:
+            raise UnknownTarget(f"Unknown resource: {uri}")
+        return owner
@@ -2,20 +2,40 @@
 
 from __future__ import annotations
 
+import abc
 import asyncio
 import contextlib
 import json
 import logging
+import mmap
 import os
+import re
 import shlex
 import signal
 import sys
-from dataclasses import dataclass
+import tempfile
+import time
+from collections import OrderedDict
+from collections.abc import AsyncIterator, Awaitable, Callable, Iterator
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Protocol
 
-from fastapi import Depends, FastAPI, HTTPException, Request
-from fastapi.responses import JSONResponse, Response
 import uvicorn
+from fastapi import (
+    Depends,
+    FastAPI,
+    HTTPException,
+    Request,
+    WebSocket,
+    WebSocketDisconnect,
+)
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from starlette.datastructures import Headers, MutableHeaders
 
+from mcp_agentcore_proxy import compression, jsoncodec
+from mcp_agentcore_proxy.envelope import Envelope, scan, scan_buffer
+from mcp_agentcore_proxy.toolcache import DEFAULT_TTL, ToolCache, parse_tool_ttls
+from mcp_agentcore_proxy.zygote import ZygoteClient, ZygoteError
 
 LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
 logging.basicConfig(
@@ -43,41 +63,543 @@ class MCPServerError(Exception):
     """Raised when the MCP subprocess cannot be used."""
 
 
+class SessionCapacityError(MCPServerError):
+    """Raised when every live session subprocess is busy and none can be evicted."""
+
+
+SESSION_HEADER = "x-amzn-bedrock-agentcore-runtime-session-id"
+
+
 @dataclass
 class SubprocessConfig:
     command: list[str]
     cwd: str | None
     env: dict[str, str]
+    # "ndjson" (one message per line) or "content-length" (LSP-style headers)
+    framing: str = "ndjson"
+    # "stdio", or "unix" for a socket the server connects to (MCP_SERVER_SOCKET)
+    transport: str = "stdio"
+
+
+# Starts the MCP server for a config and returns a Process-like handle.
+Spawner = Callable[[SubprocessConfig], Awaitable[Any]]
+
+
+@dataclass(frozen=True)
+class RecyclePolicy:
+    """Thresholds after which a subprocess is replaced by a fresh one."""
+
+    max_requests: int | None = None
+    max_age: float | None = None
+    max_rss_bytes: int | None = None
+    drain_timeout: float = 30.0
+
+    @property
+    def enabled(self) -> bool:
+        return any(
+            limit is not None
+            for limit in (self.max_requests, self.max_age, self.max_rss_bytes)
+        )
+
+
+def _read_rss_bytes(pid: int) -> int | None:
+    """Return the resident set size of ``pid`` from /proc, if available."""
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii", errors="replace") as fh:
+            for line in fh:
+                if line.startswith("VmRSS:"):
+                    # Format: "VmRSS:\t  123456 kB"
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        return None
+    return None
+
+
+class _RequestTracker:
+    """Count requests served and in flight so a runner can be drained."""
+
+    def __init__(self) -> None:
+        self._request_count = 0
+        self._inflight = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+
+    @property
+    def request_count(self) -> int:
+        return self._request_count
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    @contextlib.contextmanager
+    def _track_request(self):
+        self._request_count += 1
+        self._inflight += 1
+        self._idle.clear()
+        try:
+            yield
+        finally:
+            self._inflight -= 1
+            if self._inflight == 0:
+                self._idle.set()
+
+    async def drain(self, timeout: float) -> bool:
+        """Wait until no requests are in flight; return False on timeout."""
+        try:
+            await asyncio.wait_for(self._idle.wait(), timeout=timeout)
+        except TimeoutError:
+            return False
+        return True
+
+
+DEFAULT_SPOOL_THRESHOLD = 1024 * 1024
+SPOOL_CHUNK_SIZE = 64 * 1024
+# Largest request body a compressed request may expand to
+DEFAULT_MAX_DECOMPRESSED = 100 * 1024 * 1024
+# How long a server on the unix transport has to connect back to the bridge
+SOCKET_CONNECT_TIMEOUT = 30.0
+
+
+class SpooledMessage:
+    """A server reply too large to hold in memory, kept in a temporary file.
+
+    The file is deleted when the message is closed; :meth:`iter_bytes` closes
+    it once the last chunk has been read.
+    """
+
+    def __init__(self, file: Any, size: int, envelope: Envelope | None):
+        self._file = file
+        self.size = size
+        self.envelope = envelope
+
+    def __repr__(self) -> str:
+        return f"<SpooledMessage {self.size} bytes>"
+
+    def iter_bytes(self, chunk_size: int = SPOOL_CHUNK_SIZE) -> Iterator[bytes]:
+        try:
+            self._file.seek(0)
+            while chunk := self._file.read(chunk_size):
+                yield chunk
+        finally:
+            self.close()
+
+    def read_text(self) -> str:
+        return b"".join(self.iter_bytes()).decode("utf-8", errors="replace").strip()
+
+    def scan(self) -> Envelope | None:
+        """Scan the whole file for the envelope, without reading it into memory."""
+        self._file.flush()
+        with mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) as view:
+            return scan_buffer(view)
+
+    def close(self) -> None:
+        self._file.close()
+
+
+# A reply is either the message text or, above the spool threshold, a file
+Message = str | SpooledMessage
+
+# Receives server-initiated requests and notifications for an in-flight call.
+MessageListener = Callable[[str], None]
+
+
+@dataclass
+class _PendingCall:
+    future: asyncio.Future[Message]
+    on_message: MessageListener | None
+    # The request's params._meta.progressToken, as an _id_key
+    progress_token: str | None = None
+
+
+def _id_key(request_id: Any) -> str:
+    """Return a hashable key that keeps 1 and "1" distinct."""
+    return json.dumps(request_id)
+
+
+# Where a server request names the client request it was made for
+RELATED_REQUEST_META = "io.modelcontextprotocol/related-request-id"
+
+
+def _meta(message: Any) -> tuple[dict[str, Any], dict[str, Any]]:
+    """Return the ``params`` of a parsed message and their ``_meta``."""
+    params = message.get("params") if isinstance(message, dict) else None
+    if not isinstance(params, dict):
+        return {}, {}
+    meta = params.get("_meta")
+    return params, meta if isinstance(meta, dict) else {}
+
+
+def _request_route(payload: str) -> tuple[Any, Any]:
+    """Return the id and progress token of the request in ``payload``."""
+    try:
+        parsed = jsoncodec.loads(payload)
+    except json.JSONDecodeError:
+        return None, None
+    if not isinstance(parsed, dict):
+        return None, None
+    _, meta = _meta(parsed)
+    return parsed.get("id"), meta.get("progressToken")
+
+
+class _MessageRouter(_RequestTracker, abc.ABC):
+    """Route JSON-RPC traffic between bridge callers and an MCP server.
+
+    One reader task consumes everything the server emits. :meth:`_exchange`
+    writes a request and waits on a future keyed by its JSON-RPC id, which
+    the reader resolves when the reply arrives, so several requests can be
+    in flight at once. Server-initiated requests and notifications go to the
+    call named by a related request id in ``_meta`` or by its progress
+    token, else to the oldest call that listens. The client's reply to a
+    server request comes back through :meth:`send`, which marks it answered.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._lock = asyncio.Lock()
+        self._pending: dict[str, _PendingCall] = {}
+        self._server_requests: set[str] = set()
+        self._reader_task: asyncio.Task[None] | None = None
+        self._reader_error: MCPServerError | None = None
+
+    @abc.abstractmethod
+    async def _write_message(self, message: Any) -> None:
+        """Send one message to the server."""
+
+    @abc.abstractmethod
+    async def _read_message(self) -> Message:
+        """Wait for the server's next message."""
+
+    def _check_ready(self) -> None:
+        """Raise MCPServerError if messages cannot be exchanged right now."""
+
+    async def invoke(
+        self, payload: str, on_message: MessageListener | None = None
+    ) -> Message:
+        request_id, progress_token = _request_route(payload)
+        return await self._exchange(request_id, payload, on_message, progress_token)
+
+    async def _exchange(
+        self,
+        request_id: Any,
+        message: Any,
+        on_message: MessageListener | None,
+        progress_token: Any = None,
+    ) -> Message:
+        """Write ``message`` and wait for the reply to ``request_id``.
+
+        ``message`` is whatever :meth:`_write_message` takes; the JSON text
+        unless a subclass parsed it already.
+        """
+        self._check_ready()
+        if self._reader_error is not None:
+            raise self._reader_error
+
+        key = _id_key(request_id)
+        if key in self._pending:
+            raise MCPServerError(f"Request id {request_id!r} is already in flight")
+
+        future: asyncio.Future[Message] = asyncio.get_running_loop().create_future()
+        self._pending[key] = _PendingCall(
+            future,
+            on_message,
+            None if progress_token is None else _id_key(progress_token),
+        )
+        with self._track_request():
+            try:
+                await self._post(message)
+                self._ensure_reader()
+                response = await future
+            finally:
+                self._pending.pop(key, None)
+        if isinstance(response, SpooledMessage):
+            logger.debug("← subprocess response spooled to disk: %s", response)
+        else:
+            logger.debug("← subprocess response: %s", response[:200])
+        return response
+
+    async def send(self, payload: str) -> None:
+        """Send a notification or a reply to a server request without waiting."""
+        self._check_ready()
+        if _json_rpc_method(payload) is None:
+            self._answered(_json_rpc_id(payload))
+        await self._post(payload)
+
+    async def _post(self, message: Any) -> None:
+        async with self._lock:
+            await self._write_message(message)
+
+    def _answered(self, request_id: Any) -> None:
+        """Forget a server request once the client's reply is on its way."""
+        self._server_requests.discard(_id_key(request_id))
+
+    def owns_server_request(self, request_id: Any) -> bool:
+        return _id_key(request_id) in self._server_requests
+
+    def _ensure_reader(self) -> None:
+        if self._reader_task is None or self._reader_task.done():
+            self._reader_task = asyncio.create_task(self._read_loop())
+
+    async def _stop_reader(self) -> None:
+        task, self._reader_task = self._reader_task, None
+        if task is not None and not task.done():
+            task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await task
+
+    async def _read_loop(self) -> None:
+        try:
+            while True:
+                message = await self._read_message()
+                if isinstance(message, SpooledMessage):
+                    self._dispatch_spooled(message)
+                else:
+                    self._dispatch(message)
+        except asyncio.CancelledError:
+            raise
+        except MCPServerError as exc:
+            self._fail_pending(exc)
+        except Exception as exc:
+            logger.exception("Failed to read from MCP server")
+            self._fail_pending(
+                MCPServerError(f"Failed to read MCP server output: {exc}")
+            )
+
+    def _fail_pending(self, error: MCPServerError) -> None:
+        self._reader_error = error
+        for pending in self._pending.values():
+            if not pending.future.done():
+                pending.future.set_exception(error)
+
+    def _dispatch(self, message: str) -> None:
+        envelope = scan(message)
+        if envelope is None:
+            try:
+                parsed = jsoncodec.loads(message)
+            except json.JSONDecodeError:
+                logger.warning(
+                    "Dropping non-JSON output from MCP server: %s", message[:200]
+                )
+                return
+            if not isinstance(parsed, dict):
+                logger.warning(
+                    "Dropping unexpected MCP server message: %s", message[:200]
+                )
+                return
+            envelope = Envelope.from_message(parsed)
 
+        if envelope.method is not None:
+            self._dispatch_server_message(message, envelope)
+            return
+        self._resolve(envelope, message)
+
+    def _dispatch_spooled(self, message: SpooledMessage) -> None:
+        # The head scan fails when a large value comes before the id
+        envelope = message.envelope or message.scan()
+        if envelope is None:
+            logger.warning(
+                "Dropping unreadable MCP server output of %d bytes", message.size
+            )
+            message.close()
+            return
+        if envelope.method is not None:
+            # Large server requests are rare; route them like any other message
+            self._dispatch(message.read_text())
+            return
+        if not self._resolve(envelope, message):
+            message.close()
+
+    def _resolve(self, envelope: Envelope, message: Message) -> bool:
+        pending = self._pending.get(_id_key(envelope.id))
+        if pending is None or pending.future.done():
+            logger.debug("Dropping unmatched MCP server reply: %.200s", message)
+            return False
+        pending.future.set_result(message)
+        return True
+
+    def _listener_for(self, message: str) -> MessageListener | None:
+        """Return the listener of the call a server message belongs to."""
+        listening = [p for p in self._pending.values() if p.on_message is not None]
+        if not listening:
+            return None
+        if len(listening) > 1:
+            try:
+                params, meta = _meta(jsoncodec.loads(message))
+            except json.JSONDecodeError:
+                params, meta = {}, {}
+            related = meta.get(RELATED_REQUEST_META)
+            if related is not None:
+                pending = self._pending.get(_id_key(related))
+                if pending is not None and pending.on_message is not None:
+                    return pending.on_message
+            # notifications/progress carries the token in params, requests in _meta
+            token = params.get("progressToken", meta.get("progressToken"))
+            if token is not None:
+                key = _id_key(token)
+                for pending in listening:
+                    if pending.progress_token == key:
+                        return pending.on_message
+        # Nothing names a call; the oldest one is the likeliest
+        return listening[0].on_message
+
+    def _dispatch_server_message(self, message: str, envelope: Envelope) -> None:
+        is_request = envelope.has_id
+        if is_request:
+            self._server_requests.add(_id_key(envelope.id))
+
+        listener = self._listener_for(message)
+        if listener is not None:
+            logger.debug("← server-initiated message: %s", message[:200])
+            listener(message)
+            return
 
-class MCPSubprocess:
+        if is_request:
+            # Nobody can answer; fail fast instead of leaving the server waiting
+            logger.warning(
+                "No client is waiting for server request %s; rejecting it",
+                envelope.method,
+            )
+            self._server_requests.discard(_id_key(envelope.id))
+            reply = _error_payload(
+                envelope.id,
+                -32603,
+                f"No client connection is available to handle {envelope.method}",
+            )
+            asyncio.create_task(self.send(reply))
+        else:
+            logger.debug("Dropping server notification: %s", message[:200])
+
+
+class MCPSubprocess(_MessageRouter):
     """Manage a long-lived MCP server subprocess over stdio."""
 
-    def __init__(self, config: SubprocessConfig):
+    def __init__(
+        self,
+        config: SubprocessConfig,
+        spawner: Spawner | None = None,
+        spool_threshold: int = DEFAULT_SPOOL_THRESHOLD,
+    ):
+        super().__init__()
         self._config = config
+        self._spawner = spawner
+        self._spool_threshold = spool_threshold
         self._process: asyncio.subprocess.Process | None = None
-        self._lock = asyncio.Lock()
         self._stderr_task: asyncio.Task[None] | None = None
+        self._stdout_task: asyncio.Task[None] | None = None
+        self._started_at: float | None = None
+        # Set for the unix transport; stdio uses the process pipes
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+
+    @property
+    def is_running(self) -> bool:
+        return self._process is not None and self._process.returncode is None
+
+    @property
+    def returncode(self) -> int | None:
+        return self._process.returncode if self._process is not None else None
+
+    def rss_bytes(self) -> int | None:
+        process = self._process
+        if process is None or not isinstance(getattr(process, "pid", None), int):
+            return None
+        return _read_rss_bytes(process.pid)
+
+    def recycle_reason(self, policy: RecyclePolicy) -> str | None:
+        """Return why this subprocess should be recycled, or None if it is healthy."""
+        if self._process is None or self._started_at is None:
+            return None
+        if policy.max_requests is not None and (
+            self._request_count >= policy.max_requests
+        ):
+            return f"served {self._request_count} requests"
+        if policy.max_age is not None:
+            age = time.monotonic() - self._started_at
+            if age >= policy.max_age:
+                return f"running for {age:.0f}s"
+        if policy.max_rss_bytes is not None:
+            rss = self.rss_bytes()
+            if rss is not None and rss >= policy.max_rss_bytes:
+                return f"RSS {rss // (1024 * 1024)} MiB"
+        return None
 
     async def start(self) -> None:
         if self._process is not None:
             return
 
         logger.info("Starting MCP subprocess: %s", " ".join(self._config.command))
-        try:
-            self._process = await asyncio.create_subprocess_exec(
-                *self._config.command,
-                stdin=asyncio.subprocess.PIPE,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE,
-                cwd=self._config.cwd,
-                env=self._config.env,
-            )
-        except FileNotFoundError as exc:
-            raise MCPServerError(f"Unable to launch MCP server: {exc}") from exc
+        if self._config.transport == "unix":
+            await self._start_with_socket()
+            return
+        await self._launch(self._config)
+
+    async def _launch(self, config: SubprocessConfig) -> None:
+        if self._spawner is not None:
+            try:
+                self._process = await self._spawner(config)
+            except (ZygoteError, OSError) as exc:
+                raise MCPServerError(f"Unable to launch MCP server: {exc}") from exc
+        else:
+            try:
+                self._process = await asyncio.create_subprocess_exec(
+                    *config.command,
+                    stdin=asyncio.subprocess.PIPE,
+                    stdout=asyncio.subprocess.PIPE,
+                    stderr=asyncio.subprocess.PIPE,
+                    cwd=config.cwd,
+                    env=config.env,
+                )
+            except FileNotFoundError as exc:
+                raise MCPServerError(f"Unable to launch MCP server: {exc}") from exc
 
+        self._started_at = time.monotonic()
         assert self._process.stderr is not None
-        self._stderr_task = asyncio.create_task(self._drain_stderr())
+        self._stderr_task = asyncio.create_task(
+            self._drain_output(self._process.stderr, "subprocess-stderr")
+        )
+
+    async def _start_with_socket(self) -> None:
+        """Launch the server and wait for it to connect to a private unix socket."""
+        directory = tempfile.mkdtemp(prefix="mcp-socket-")
+        path = os.path.join(directory, "server.sock")
+        connected: asyncio.Future[tuple[asyncio.StreamReader, asyncio.StreamWriter]]
+        connected = asyncio.get_running_loop().create_future()
+
+        def on_connect(
+            reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+        ) -> None:
+            if connected.done():
+                writer.close()
+            else:
+                connected.set_result((reader, writer))
+
+        listener = await asyncio.start_unix_server(
+            on_connect, path, limit=SPOOL_CHUNK_SIZE
+        )
+        try:
+            os.chmod(path, 0o600)
+            env = {**self._config.env, "MCP_SERVER_SOCKET": path}
+            await self._launch(replace(self._config, env=env))
+            assert self._process is not None and self._process.stdout is not None
+            # Anything the server prints is only logged; it cannot corrupt messages
+            self._stdout_task = asyncio.create_task(
+                self._drain_output(self._process.stdout, "subprocess-stdout")
+            )
+            try:
+                self._reader, self._writer = await asyncio.wait_for(
+                    connected, timeout=SOCKET_CONNECT_TIMEOUT
+                )
+            except TimeoutError as exc:
+                await self.shutdown()
+                raise MCPServerError(
+                    "MCP server did not connect to MCP_SERVER_SOCKET within "
+                    f"{SOCKET_CONNECT_TIMEOUT:.0f}s"
+                ) from exc
+        finally:
+            listener.close()
+            with contextlib.suppress(OSError):
+                os.unlink(path)
+                os.rmdir(directory)
 
     async def shutdown(self) -> None:
         process = self._process
@@ -90,58 +612,135 @@ class MCPSubprocess:
                 process.send_signal(signal.SIGTERM)
             try:
                 await asyncio.wait_for(process.wait(), timeout=5)
-            except asyncio.TimeoutError:
+            except TimeoutError:
                 logger.warning("Subprocess did not exit on SIGTERM; killing")
                 with contextlib.suppress(ProcessLookupError):
                     process.kill()
                 await process.wait()
 
-        if self._stderr_task:
-            self._stderr_task.cancel()
+        await self._stop_reader()
+        for task in (self._stderr_task, self._stdout_task):
+            if task:
+                task.cancel()
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
         self._process = None
 
-    async def invoke(self, payload: str) -> str:
+    def _check_ready(self) -> None:
         process = self._process
         if process is None:
             raise MCPServerError("MCP subprocess is not running")
 
-        if process.stdin is None or process.stdout is None:
+        if self._config.transport == "unix":
+            if self._reader is None or self._writer is None:
+                raise MCPServerError("MCP server socket is not connected")
+        elif process.stdin is None or process.stdout is None:
             raise MCPServerError("Subprocess stdio is unavailable")
 
-        async with self._lock:
-            await self._write(payload, process)
-            response = await self._read_json(stream=process.stdout)
-            logger.debug("← subprocess response: %s", response[:200])
-            return response
-
-    async def send(self, payload: str) -> None:
-        """Send a JSON-RPC notification to the subprocess without waiting for a reply."""
-        process = self._process
-        if process is None:
-            raise MCPServerError("MCP subprocess is not running")
-
-        if process.stdin is None:
-            raise MCPServerError("Subprocess stdio is unavailable")
+    async def _write_message(self, payload: str) -> None:
+        assert self._process is not None
+        await self._write(payload, self._process)
 
-        async with self._lock:
-            await self._write(payload, process)
+    async def _read_message(self) -> Message:
+        assert self._process is not None
+        stream = self._reader or self._process.stdout
+        assert stream is not None
+        if self._config.framing == "content-length":
+            return await self._read_framed(stream)
+        return await self._read_json(stream=stream)
 
     async def _write(self, payload: str, process: asyncio.subprocess.Process) -> None:
-        if not payload.endswith("\n"):
-            payload = payload + "\n"
-
         preview = payload.strip().replace("\n", " ")[:200]
         logger.debug("→ subprocess payload: %s", preview)
-        assert process.stdin is not None
-        process.stdin.write(payload.encode("utf-8"))
-        await process.stdin.drain()
+        if self._config.framing == "content-length":
+            body = payload.encode("utf-8")
+            data = b"Content-Length: %d\r\n\r\n" % len(body) + body
+        else:
+            if not payload.endswith("\n"):
+                payload = payload + "\n"
+            data = payload.encode("utf-8")
+        writer = self._writer or process.stdin
+        assert writer is not None
+        writer.write(data)
+        try:
+            await writer.drain()
+        except ConnectionError as exc:
+            raise MCPServerError(f"MCP server connection lost: {exc}") from exc
 
-    async def _read_json(self, stream: asyncio.StreamReader) -> str:
+    async def _read_framed(self, stream: asyncio.StreamReader) -> Message:
+        """Read one ``Content-Length`` framed message.
+
+        The body is read with exactly one length-bounded read: no scanning for
+        boundaries and no trial parses, whatever the message looks like.
+        """
+        length: int | None = None
+        while True:
+            try:
+                line = await stream.readuntil(b"\n")
+            except asyncio.IncompleteReadError as exc:
+                line = exc.partial
+                if not line:
+                    raise MCPServerError(
+                        "MCP subprocess terminated while reading output"
+                    ) from exc
+            except asyncio.LimitOverrunError as exc:
+                # Far too long to be a header; discard it
+                await stream.readexactly(exc.consumed)
+                continue
+            header = line.strip()
+            if not header:
+                if length is not None:
+                    break
+                continue
+            name, separator, value = header.decode("ascii", "replace").partition(":")
+            if not separator:
+                logger.debug("Ignoring stray MCP server output: %.200s", header)
+                continue
+            if name.strip().lower() == "content-length":
+                try:
+                    length = int(value.strip())
+                except ValueError:
+                    raise MCPServerError(
+                        f"Invalid Content-Length header: {value.strip()!r}"
+                    ) from None
+
+        try:
+            if length <= self._spool_threshold:
+                body = await stream.readexactly(length)
+                return body.decode("utf-8", errors="replace")
+            with contextlib.ExitStack() as cleanup:
+                spool = cleanup.enter_context(
+                    tempfile.TemporaryFile(prefix="mcp-spool-")
+                )
+                head = b""
+                remaining = length
+                while remaining:
+                    chunk = await stream.readexactly(min(SPOOL_CHUNK_SIZE, remaining))
+                    head = head or chunk
+                    spool.write(chunk)
+                    remaining -= len(chunk)
+                # Complete; the SpooledMessage closes it from here
+                cleanup.pop_all()
+        except asyncio.IncompleteReadError as exc:
+            raise MCPServerError(
+                "MCP subprocess terminated while reading output"
+            ) from exc
+        # Replies carry their id ahead of the result body, so the head suffices
+        envelope = scan(head.decode("utf-8", errors="replace").strip())
+        return SpooledMessage(spool, length, envelope)
+
+    async def _read_json(self, stream: asyncio.StreamReader) -> Message:
         """Read newline-delimited JSON from the subprocess, tolerating blank lines."""
 
         chunks: list[str] = []
         while True:
-            line = await stream.readline()
+            line = await self._read_line(stream)
+            if isinstance(line, SpooledMessage):
+                if not chunks:
+                    return line
+                # One huge line inside a pretty-printed message; keep going in memory
+                line = line.read_text().encode("utf-8")
             if not line:
                 raise MCPServerError("MCP subprocess terminated while reading output")
 
@@ -152,27 +751,612 @@ class MCPSubprocess:
             chunks.append(text)
             candidate = "".join(chunks).strip()
             try:
-                json.loads(candidate)
+                jsoncodec.loads(candidate)
                 return candidate
             except json.JSONDecodeError:
                 continue
 
-    async def _drain_stderr(self) -> None:
-        assert self._process is not None
-        assert self._process.stderr is not None
-        reader = self._process.stderr
+    async def _read_line(self, stream: asyncio.StreamReader) -> bytes | SpooledMessage:
+        """Read one line, spilling it to a temporary file past the spool threshold.
+
+        Unlike ``readline`` this has no length limit, and memory use stays
+        bounded by the threshold however large the line is.
+        """
+        buffered: list[bytes] = []
+        size = 0
+        spool: Any = None
+        head = b""
+        with contextlib.ExitStack() as cleanup:
+            while True:
+                complete = True
+                try:
+                    piece = await stream.readuntil(b"\n")
+                except asyncio.IncompleteReadError as exc:
+                    piece = exc.partial
+                except asyncio.LimitOverrunError as exc:
+                    piece = await stream.readexactly(exc.consumed)
+                    complete = False
+
+                size += len(piece)
+                if spool is None and size > self._spool_threshold:
+                    spool = cleanup.enter_context(
+                        tempfile.TemporaryFile(prefix="mcp-spool-")
+                    )
+                    buffered.append(piece)
+                    head = b"".join(buffered)[:SPOOL_CHUNK_SIZE]
+                    spool.writelines(buffered)
+                    buffered.clear()
+                elif spool is not None:
+                    spool.write(piece)
+                else:
+                    buffered.append(piece)
+                if complete:
+                    break
+            # Complete; the SpooledMessage closes it from here
+            cleanup.pop_all()
+
+        if spool is None:
+            return b"".join(buffered)
+        # Replies carry their id ahead of the result body, so the head suffices
+        envelope = scan(head.decode("utf-8", errors="replace").strip())
+        return SpooledMessage(spool, size, envelope)
+
+    async def _drain_output(self, reader: asyncio.StreamReader, label: str) -> None:
         while True:
-            line = await reader.readline()
+            try:
+                line = await reader.readline()
+            except ValueError:
+                # Longer than the stream limit; logging a prefix is enough
+                line = await reader.read(SPOOL_CHUNK_SIZE)
             if not line:
                 return
             logger.debug(
-                "[subprocess-stderr] %s",
-                line.decode("utf-8", errors="replace").rstrip(),
+                "[%s] %s", label, line.decode("utf-8", errors="replace").rstrip()
+            )
+
+
+class MCPRunner(Protocol):
+    """What the supervisor needs from something that runs an MCP server."""
+
+    @property
+    def is_running(self) -> bool: ...
+
+    @property
+    def returncode(self) -> int | None: ...
+
+    @property
+    def inflight(self) -> int: ...
+
+    async def start(self) -> None: ...
+
+    async def shutdown(self) -> None: ...
+
+    async def invoke(
+        self, payload: str, on_message: MessageListener | None = None
+    ) -> Message: ...
+
+    async def send(self, payload: str) -> None: ...
+
+    async def drain(self, timeout: float) -> bool: ...
+
+    def owns_server_request(self, request_id: Any) -> bool: ...
+
+    def recycle_reason(self, policy: RecyclePolicy) -> str | None: ...
+
+
+class SubprocessSupervisor:
+    """Front an MCP subprocess and swap it for a fresh one when a policy triggers.
+
+    The replacement is started and re-initialized in the background with the
+    handshake captured from the client. New requests are routed to it once it
+    is ready, while the old subprocess finishes its in-flight requests before
+    being terminated. With a ``cache``, calls to memoized tools are answered
+    from it when possible and never reach the subprocess. With a ``snapshot``,
+    the first subprocess starts in the background while discovery calls are
+    answered from the snapshot.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], MCPRunner],
+        policy: RecyclePolicy | None = None,
+        cache: ToolCache | None = None,
+        snapshot: Any = None,
+    ):
+        self._factory = factory
+        self._policy = policy or RecyclePolicy()
+        self._cache = cache
+        self._snapshot = snapshot
+        self._current: MCPRunner | None = None
+        self._initialize_payload: str | None = None
+        self._initialized_payload: str | None = None
+        self._recycle_task: asyncio.Task[None] | None = None
+        self._retired: set[asyncio.Task[None]] = set()
+        self._draining: list[MCPRunner] = []
+        self._recycle_count = 0
+
+    @property
+    def current(self) -> MCPRunner | None:
+        return self._current
+
+    @property
+    def is_running(self) -> bool:
+        return self._current is not None and self._current.is_running
+
+    @property
+    def returncode(self) -> int | None:
+        return self._current.returncode if self._current is not None else None
+
+    @property
+    def recycle_count(self) -> int:
+        return self._recycle_count
+
+    @property
+    def inflight(self) -> int:
+        return self._current.inflight if self._current is not None else 0
+
+    async def start(self) -> None:
+        if self._current is not None:
+            return
+        runner = self._factory()
+        if self._snapshot is not None:
+            from mcp_agentcore_proxy.snapshot import SnapshotServer
+
+            runner = SnapshotServer(runner, self._snapshot)
+        await runner.start()
+        self._current = runner
+
+    async def shutdown(self) -> None:
+        if self._recycle_task is not None:
+            self._recycle_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._recycle_task
+            self._recycle_task = None
+        retiring = list(self._retired)
+        for task in retiring:
+            task.cancel()
+        await asyncio.gather(*retiring, return_exceptions=True)
+        # Runners still draining were cut short and must be stopped here
+        runners = [self._current, *self._draining]
+        self._current = None
+        self._draining.clear()
+        for runner in runners:
+            if runner is not None:
+                await runner.shutdown()
+
+    async def invoke(
+        self, payload: str, on_message: MessageListener | None = None
+    ) -> Message:
+        runner = self._require_runner()
+        method = _json_rpc_method(payload)
+        cache_key: tuple[str, str] | None = None
+        if method == "initialize":
+            self._initialize_payload = payload
+        elif method == "tools/call" and self._cache is not None:
+            cache_key, cached = self._cache_lookup(payload)
+            if cached is not None:
+                return cached
+
+        interactive = False
+
+        def relay(text: str) -> None:
+            # A call that talks back (progress, elicitation) is not a pure one
+            nonlocal interactive
+            interactive = True
+            assert on_message is not None
+            on_message(text)
+
+        if cache_key is not None and on_message is not None:
+            listener: MessageListener | None = relay
+        else:
+            listener = on_message
+        try:
+            reply = await runner.invoke(payload, on_message=listener)
+        finally:
+            self._maybe_recycle(runner)
+        if cache_key is not None and isinstance(reply, str) and not interactive:
+            assert self._cache is not None
+            self._cache.put(cache_key, reply)
+        return reply
+
+    def _cache_lookup(self, payload: str) -> tuple[tuple[str, str] | None, str | None]:
+        """Return the cache key for a ``tools/call`` and its cached reply, if any."""
+        assert self._cache is not None
+        try:
+            message = jsoncodec.loads(payload)
+        except json.JSONDecodeError:
+            return None, None
+        key = self._cache.key(message) if isinstance(message, dict) else None
+        if key is None:
+            return None, None
+        return key, self._cache.get(key, message.get("id"))
+
+    async def send(self, payload: str) -> None:
+        runner = self._require_runner()
+        method = _json_rpc_method(payload)
+        if method == "notifications/initialized":
+            self._initialized_payload = payload
+        elif method is None:
+            # A reply to a server request goes back to the subprocess that asked,
+            # which may be one being drained after a recycle.
+            request_id = _json_rpc_id(payload)
+            runner = next(
+                (
+                    candidate
+                    for candidate in (runner, *self._draining)
+                    if candidate.owns_server_request(request_id)
+                ),
+                runner,
             )
+        await runner.send(payload)
 
+    def owns_server_request(self, request_id: Any) -> bool:
+        return any(
+            candidate.owns_server_request(request_id)
+            for candidate in (self._current, *self._draining)
+            if candidate is not None
+        )
+
+    def _require_runner(self) -> MCPRunner:
+        if self._current is None:
+            raise MCPServerError("MCP subprocess is not running")
+        return self._current
+
+    def _maybe_recycle(self, runner: MCPRunner) -> None:
+        if not self._policy.enabled or runner is not self._current:
+            return
+        if self._recycle_task is not None and not self._recycle_task.done():
+            return
+        reason = runner.recycle_reason(self._policy)
+        if reason is None:
+            return
+        logger.info("Recycling MCP subprocess: %s", reason)
+        self._recycle_task = asyncio.create_task(self._recycle(runner))
 
-def _resolve_subprocess_config(session_id: str | None = None) -> SubprocessConfig:
-    cmd_env = os.getenv("MCP_SERVER_CMD")
+    async def _recycle(self, old: MCPRunner) -> None:
+        replacement = self._factory()
+        promoted = False
+        try:
+            await replacement.start()
+            if self._initialize_payload is not None:
+                await replacement.invoke(self._initialize_payload)
+            if self._initialized_payload is not None:
+                await replacement.send(self._initialized_payload)
+            if self._current is old:
+                self._current = replacement
+                promoted = True
+        except (MCPServerError, OSError) as exc:
+            logger.warning("Replacement MCP subprocess failed to start: %s", exc)
+        finally:
+            # Also reached when the recycle is cancelled part way through
+            if not promoted:
+                await replacement.shutdown()
+        if not promoted:
+            return
+        self._recycle_count += 1
+        # Tracked from here, so shutdown() stops it even if retiring never starts
+        self._draining.append(old)
+        retire = asyncio.create_task(self._retire(old))
+        self._retired.add(retire)
+        retire.add_done_callback(self._retired.discard)
+
+    async def _retire(self, old: MCPRunner) -> None:
+        if not await old.drain(self._policy.drain_timeout):
+            logger.warning(
+                "Retired MCP subprocess still busy after %.0fs; terminating",
+                self._policy.drain_timeout,
+            )
+        await old.shutdown()
+        self._draining.remove(old)
+
+
+_NO_SESSION = object()
+
+
+@dataclass
+class SessionPoolMetrics:
+    created: int = 0
+    reused: int = 0
+    evicted: int = 0
+    expired: int = 0
+    rejected: int = 0
+
+
+@dataclass
+class _SessionEntry:
+    runner: SubprocessSupervisor
+    last_used: float
+    active: int = 0
+    requests: int = 0
+
+
+class SessionPool:
+    """Keep one supervised MCP subprocess per AgentCore runtime session.
+
+    Sessions are evicted least-recently-used first once ``max_live`` is
+    reached, and reaped after ``idle_timeout`` seconds without traffic. A
+    session with requests in flight is never evicted.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[str | None], SubprocessSupervisor],
+        max_live: int,
+        idle_timeout: float | None,
+    ):
+        self._factory = factory
+        self._max_live = max_live
+        self._idle_timeout = idle_timeout
+        self._entries: OrderedDict[str | None, _SessionEntry] = OrderedDict()
+        self._locks: dict[str | None, asyncio.Lock] = {}
+        self._reaper_task: asyncio.Task[None] | None = None
+        self._starting = 0
+        self.metrics = SessionPoolMetrics()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "live": len(self._entries),
+            "max_live": self._max_live,
+            "idle_timeout": self._idle_timeout,
+            **asdict(self.metrics),
+            "sessions": {
+                str(session_id): {
+                    "requests": entry.requests,
+                    "active": entry.active,
+                    "idle_seconds": round(time.monotonic() - entry.last_used, 3),
+                    "recycled": entry.runner.recycle_count,
+                }
+                for session_id, entry in self._entries.items()
+            },
+        }
+
+    @contextlib.asynccontextmanager
+    async def lease(self, session_id: str | None):
+        """Yield the subprocess for ``session_id``, starting it if needed."""
+        entry = await self._acquire(session_id)
+        entry.active += 1
+        entry.requests += 1
+        try:
+            yield entry.runner
+        finally:
+            entry.active -= 1
+            entry.last_used = time.monotonic()
+
+    async def _acquire(self, session_id: str | None) -> _SessionEntry:
+        self._ensure_reaper()
+        await self._expire_idle()
+
+        entry = self._entries.get(session_id)
+        if entry is not None and entry.runner.is_running:
+            self._entries.move_to_end(session_id)
+            self.metrics.reused += 1
+            return entry
+
+        lock = self._locks.setdefault(session_id, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(session_id)
+            if entry is not None and entry.runner.is_running:
+                self._entries.move_to_end(session_id)
+                self.metrics.reused += 1
+                return entry
+            if entry is not None:
+                logger.warning("Session %s subprocess exited; restarting", session_id)
+                self._entries.pop(session_id, None)
+                await entry.runner.shutdown()
+
+            await self._make_room()
+            self._starting += 1
+            try:
+                runner = self._factory(session_id)
+                await runner.start()
+            finally:
+                self._starting -= 1
+            entry = _SessionEntry(runner=runner, last_used=time.monotonic())
+            self._entries[session_id] = entry
+            self.metrics.created += 1
+            logger.info(
+                "Started subprocess for session %s (%d live)",
+                session_id,
+                len(self._entries),
+            )
+            return entry
+
+    async def _make_room(self) -> None:
+        while len(self._entries) + self._starting >= self._max_live:
+            victim = next(
+                (
+                    session_id
+                    for session_id, entry in self._entries.items()
+                    if entry.active == 0 and entry.runner.inflight == 0
+                ),
+                _NO_SESSION,
+            )
+            if victim is _NO_SESSION:
+                self.metrics.rejected += 1
+                raise SessionCapacityError(
+                    f"All {self._max_live} session subprocesses are busy"
+                )
+            logger.info("Evicting least recently used session %s", victim)
+            await self._close(victim)
+            self.metrics.evicted += 1
+
+    async def _expire_idle(self) -> None:
+        if self._idle_timeout is None:
+            return
+        deadline = time.monotonic() - self._idle_timeout
+        expired = [
+            session_id
+            for session_id, entry in self._entries.items()
+            if entry.active == 0
+            and entry.runner.inflight == 0
+            and entry.last_used <= deadline
+        ]
+        for session_id in expired:
+            logger.info("Reaping idle session %s", session_id)
+            await self._close(session_id)
+            self.metrics.expired += 1
+
+    async def _close(self, session_id: str | None) -> None:
+        entry = self._entries.pop(session_id, None)
+        lock = self._locks.get(session_id)
+        if lock is not None and not lock.locked():
+            self._locks.pop(session_id, None)
+        if entry is not None:
+            await entry.runner.shutdown()
+
+    def _ensure_reaper(self) -> None:
+        if self._idle_timeout is None:
+            return
+        if self._reaper_task is None or self._reaper_task.done():
+            self._reaper_task = asyncio.create_task(self._reap_forever())
+
+    async def _reap_forever(self) -> None:
+        assert self._idle_timeout is not None
+        interval = min(max(self._idle_timeout / 2, 1.0), 60.0)
+        while True:
+            await asyncio.sleep(interval)
+            await self._expire_idle()
+
+    async def shutdown(self) -> None:
+        if self._reaper_task is not None:
+            self._reaper_task.cancel()
+            self._reaper_task = None
+        for session_id in list(self._entries):
+            await self._close(session_id)
+
+
+def _error_payload(request_id: Any, code: int, message: str) -> str:
+    return json.dumps(
+        {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "error": {"code": code, "message": message},
+        }
+    )
+
+
+def _is_request(message: Any) -> bool:
+    """True for JSON-RPC requests, which expect a reply (not notifications or replies)."""
+    return (
+        isinstance(message, dict)
+        and "method" in message
+        and message.get("id") is not None
+    )
+
+
+def _json_rpc_id(payload: str) -> Any:
+    """Return the JSON-RPC id of ``payload`` (None for notifications)."""
+    try:
+        parsed = jsoncodec.loads(payload)
+    except json.JSONDecodeError:
+        return None
+    return parsed.get("id") if isinstance(parsed, dict) else None
+
+
+def _json_rpc_method(payload: str) -> str | None:
+    """Return the JSON-RPC method of ``payload`` if it is a single message."""
+    if '"method"' not in payload:
+        return None
+    try:
+        parsed = jsoncodec.loads(payload)
+    except json.JSONDecodeError:
+        return None
+    if isinstance(parsed, dict) and isinstance(parsed.get("method"), str):
+        return parsed["method"]
+    return None
+
+
+def _env_number(name: str, cast: Callable[[str], float]) -> float | None:
+    raw = (os.getenv(name) or "").strip()
+    if not raw:
+        return None
+    try:
+        value = cast(raw)
+    except ValueError as exc:
+        raise MCPServerError(f"{name} must be a number, got {raw!r}") from exc
+    if value <= 0:
+        raise MCPServerError(f"{name} must be positive, got {raw!r}")
+    return value
+
+
+def _resolve_spool_threshold() -> int:
+    threshold_mb = _env_number("MCP_SPOOL_THRESHOLD_MB", float)
+    if threshold_mb is None:
+        return DEFAULT_SPOOL_THRESHOLD
+    return int(threshold_mb * 1024 * 1024)
+
+
+def _resolve_recycle_policy() -> RecyclePolicy:
+    max_requests = _env_number("MCP_RECYCLE_MAX_REQUESTS", int)
+    max_rss_mb = _env_number("MCP_RECYCLE_MAX_RSS_MB", float)
+    drain_timeout = _env_number("MCP_RECYCLE_DRAIN_TIMEOUT", float)
+    return RecyclePolicy(
+        max_requests=int(max_requests) if max_requests is not None else None,
+        max_age=_env_number("MCP_RECYCLE_MAX_AGE", float),
+        max_rss_bytes=(
+            int(max_rss_mb * 1024 * 1024) if max_rss_mb is not None else None
+        ),
+        drain_timeout=drain_timeout if drain_timeout is not None else 30.0,
+    )
+
+
+def _resolve_tool_cache() -> ToolCache | None:
+    tools = (os.getenv("MCP_CACHE_TOOLS") or "").strip()
+    if not tools:
+        return None
+    default_ttl = _env_number("MCP_CACHE_TTL", float)
+    max_mb = _env_number("MCP_CACHE_MAX_MB", float)
+    try:
+        ttls = parse_tool_ttls(tools, default_ttl or DEFAULT_TTL)
+    except ValueError as exc:
+        raise MCPServerError(f"Invalid MCP_CACHE_TOOLS: {exc}") from exc
+    if max_mb is None:
+        return ToolCache(ttls)
+    return ToolCache(ttls, max_bytes=int(max_mb * 1024 * 1024))
+
+
+@dataclass(frozen=True)
+class SessionModeConfig:
+    mode: str
+    max_live: int = 16
+    idle_timeout: float | None = 900.0
+
+
+def _resolve_session_mode() -> SessionModeConfig:
+    mode = (os.getenv("MCP_SESSION_MODE") or "shared").strip().lower()
+    if mode not in {"shared", "per-session"}:
+        raise MCPServerError(
+            f"Unsupported MCP_SESSION_MODE: {mode} (expected shared or per-session)"
+        )
+    max_live = _env_number("MCP_SESSION_MAX_LIVE", int)
+    idle_raw = (os.getenv("MCP_SESSION_IDLE_TIMEOUT") or "").strip()
+    idle_timeout: float | None = 900.0
+    if idle_raw in {"0", "none", "off"}:
+        idle_timeout = None
+    elif idle_raw:
+        idle_timeout = _env_number("MCP_SESSION_IDLE_TIMEOUT", float)
+    return SessionModeConfig(
+        mode=mode,
+        max_live=int(max_live) if max_live is not None else 16,
+        idle_timeout=idle_timeout,
+    )
+
+
+def _resolve_zygote_module() -> str | None:
+    return (os.getenv("MCP_SERVER_ZYGOTE_MODULE") or "").strip() or None
+
+
+def _resolve_subprocess_config(
+    session_id: str | None = None, command: str | None = None
+) -> SubprocessConfig:
+    cmd_env = command or os.getenv("MCP_SERVER_CMD")
+    zygote_module = _resolve_zygote_module()
+    if not cmd_env and zygote_module:
+        # Zygote children behave like `python -u -m <module>`
+        cmd_env = shlex.join([sys.executable, "-u", "-m", zygote_module])
     if not cmd_env:
         raise MCPServerError("Set MCP_SERVER_CMD to launch the stdio MCP server")
 
@@ -189,29 +1373,207 @@ def _resolve_subprocess_config(session_id: str | None = None) -> SubprocessConfi
     # Ensure the MCP subprocess writes immediately to stdout/stderr
     env.setdefault("PYTHONUNBUFFERED", "1")
     env.setdefault("PYTHONIOENCODING", "UTF-8")
-    return SubprocessConfig(command=command, cwd=cwd, env=env)
+    return SubprocessConfig(
+        command=command,
+        cwd=cwd,
+        env=env,
+        framing=_resolve_choice("MCP_SERVER_FRAMING", ("ndjson", "content-length")),
+        transport=_resolve_choice("MCP_SERVER_TRANSPORT", ("stdio", "unix")),
+    )
+
+
+def _resolve_choice(name: str, choices: tuple[str, ...]) -> str:
+    """Read an enumerated setting; the first choice is the default."""
+    value = (os.getenv(name) or "").strip().lower() or choices[0]
+    if value not in choices:
+        raise MCPServerError(f"{name} must be one of: {', '.join(choices)}")
+    return value
+
+
+def _resolve_server_commands() -> dict[str, str] | None:
+    """Parse ``MCP_SERVER_CMDS``, a JSON object of server name -> command."""
+    raw = (os.getenv("MCP_SERVER_CMDS") or "").strip()
+    if not raw:
+        return None
+    try:
+        commands = json.loads(raw)
+    except json.JSONDecodeError as exc:
+        raise MCPServerError(f"MCP_SERVER_CMDS must be a JSON object: {exc}") from exc
+    if (
+        not isinstance(commands, dict)
+        or not commands
+        or not all(
+            isinstance(command, str) and command.strip()
+            for command in commands.values()
+        )
+    ):
+        raise MCPServerError("MCP_SERVER_CMDS must map server names to commands")
+    for name in commands:
+        # Names prefix tool names, so keep them to characters MCP clients accept
+        if not re.fullmatch(r"[A-Za-z0-9_-]+", name):
+            raise MCPServerError(f"Invalid server name in MCP_SERVER_CMDS: {name!r}")
+    return commands
+
+
+def _resolve_server_module() -> str | None:
+    return (os.getenv("MCP_SERVER_MODULE") or "").strip() or None
+
+
+def _resolve_upstream_url() -> str | None:
+    return (os.getenv("MCP_SERVER_URL") or "").strip() or None
+
+
+def _make_upstream(url: str) -> Any:
+    try:
+        from mcp_agentcore_proxy.upstream import UpstreamClient
+    except ImportError as exc:
+        raise MCPServerError(f"MCP_SERVER_URL requires httpx: {exc}") from exc
+    max_connections = _env_number("MCP_UPSTREAM_MAX_CONNECTIONS", int)
+    if max_connections is None:
+        return UpstreamClient(url)
+    return UpstreamClient(url, max_connections=int(max_connections))
+
+
+def _make_supervisor(
+    session_id: str | None,
+    spawner: Spawner | None = None,
+    upstream: Any = None,
+    cache: ToolCache | None = None,
+    snapshot: Any = None,
+) -> SubprocessSupervisor:
+    server_module = _resolve_server_module()
+    if server_module:
+        try:
+            from mcp_agentcore_proxy.inprocess import InProcessServer
+        except ImportError as exc:
+            raise MCPServerError(
+                f"MCP_SERVER_MODULE requires the mcp package: {exc}"
+            ) from exc
+        cwd = os.getenv("MCP_SERVER_CWD") or None
+        return SubprocessSupervisor(
+            lambda: InProcessServer(server_module, session_id, cwd),
+            cache=cache,
+            snapshot=snapshot,
+        )
+
+    if upstream is not None:
+        # One upstream MCP session per runtime session, over the shared pool
+        return SubprocessSupervisor(
+            lambda: upstream.session(session_id), cache=cache, snapshot=snapshot
+        )
+
+    commands = _resolve_server_commands()
+    if commands:
+        from mcp_agentcore_proxy.multiserver import MultiServer
+
+        configs = {
+            name: _resolve_subprocess_config(session_id, command)
+            for name, command in commands.items()
+        }
+        policy = _resolve_recycle_policy()
+        spool_threshold = _resolve_spool_threshold()
+
+        def _servers() -> MultiServer:
+            # One supervisor per server, so each recycles and locks on its own.
+            # The zygote forks a single module, so it does not apply here.
+            return MultiServer(
+                {
+                    name: SubprocessSupervisor(
+                        lambda config=config: MCPSubprocess(
+                            config, None, spool_threshold
+                        ),
+                        policy,
+                    )
+                    for name, config in configs.items()
+                }
+            )
+
+        return SubprocessSupervisor(_servers, cache=cache, snapshot=snapshot)
+
+    config = _resolve_subprocess_config(session_id)
+    policy = _resolve_recycle_policy()
+    spool_threshold = _resolve_spool_threshold()
+    return SubprocessSupervisor(
+        lambda: MCPSubprocess(config, spawner, spool_threshold),
+        policy,
+        cache,
+        snapshot,
+    )
+
+
+def _load_snapshot() -> Any:
+    path = (os.getenv("MCP_SNAPSHOT_FILE") or "").strip()
+    if not path:
+        return None
+    from mcp_agentcore_proxy.snapshot import Snapshot
+
+    try:
+        snapshot = Snapshot.load(path)
+    except (OSError, TypeError, ValueError) as exc:
+        # A cold start without the snapshot is slower but still correct
+        logger.warning("Ignoring MCP_SNAPSHOT_FILE: %s", exc)
+        return None
+    logger.info("Loaded capability snapshot from %s", path)
+    return snapshot
 
 
 def _build_app() -> FastAPI:
-    runner: MCPSubprocess | None = None
+    session_mode = _resolve_session_mode()
+
+    zygote: ZygoteClient | None = None
+    spawner: Spawner | None = None
+    zygote_module = _resolve_zygote_module()
+    if zygote_module:
+
+        async def spawner(config: SubprocessConfig) -> Any:
+            nonlocal zygote
+            if zygote is None:
+                zygote = ZygoteClient(zygote_module, config.cwd, config.env)
+            return await zygote.spawn(config.env)
+
+    upstream_url = _resolve_upstream_url()
+    upstream = _make_upstream(upstream_url) if upstream_url else None
+    # Shared by every session: cached tools depend on nothing but their arguments
+    cache = _resolve_tool_cache()
+    snapshot = _load_snapshot()
+
+    def _new_supervisor(request_session_id: str | None) -> SubprocessSupervisor:
+        return _make_supervisor(request_session_id, spawner, upstream, cache, snapshot)
+
+    pool: SessionPool | None = None
+    if session_mode.mode == "per-session":
+        pool = SessionPool(
+            _new_supervisor,
+            max_live=session_mode.max_live,
+            idle_timeout=session_mode.idle_timeout,
+        )
+
+    runner: SubprocessSupervisor | None = None
     runner_lock = asyncio.Lock()
 
     session_id: str | None = None
 
-    async def _ensure_runner() -> MCPSubprocess:
+    async def _ensure_runner() -> SubprocessSupervisor:
         nonlocal runner
         if runner is not None:
             return runner
 
         async with runner_lock:
             if runner is None:
-                config = _resolve_subprocess_config(session_id)
-                new_runner = MCPSubprocess(config)
+                new_runner = _new_supervisor(session_id)
                 await new_runner.start()
                 runner = new_runner
         assert runner is not None
         return runner
 
+    @contextlib.asynccontextmanager
+    async def _lease_runner(request_session_id: str | None):
+        if pool is not None:
+            async with pool.lease(request_session_id) as leased:
+                yield leased
+        else:
+            yield await _ensure_runner()
+
     @contextlib.asynccontextmanager
     async def _lifespan(app: FastAPI):  # pragma: no cover - FastAPI hook
         try:
@@ -220,30 +1582,71 @@ def _build_app() -> FastAPI:
             async with runner_lock:
                 if runner is not None:
                     await runner.shutdown()
+            if pool is not None:
+                await pool.shutdown()
+            if zygote is not None:
+                await zygote.shutdown()
+            if upstream is not None:
+                await upstream.aclose()
 
     app = FastAPI(lifespan=_lifespan)
+    min_size = _env_number("MCP_COMPRESSION_MIN_BYTES", int)
+    max_decompressed_mb = _env_number("MCP_MAX_DECOMPRESSED_MB", float)
+    max_decompressed = (
+        int(max_decompressed_mb * 1024 * 1024)
+        if max_decompressed_mb
+        else DEFAULT_MAX_DECOMPRESSED
+    )
+    app.add_middleware(
+        _CompressionMiddleware,
+        minimum_size=int(min_size) if min_size else compression.DEFAULT_MIN_SIZE,
+    )
 
     @app.get("/ping")
     async def health() -> dict[str, str]:
         nonlocal runner
 
         # If subprocess has been started, verify it's still running
-        if runner is not None:
-            process = runner._process
-            if process is None or process.returncode is not None:
-                logger.warning(
-                    "Health check failed: subprocess exit code %s",
-                    process.returncode if process else "N/A",
-                )
-                raise HTTPException(
-                    status_code=503, detail="MCP subprocess not running"
-                )
+        if runner is not None and not runner.is_running:
+            returncode = runner.returncode
+            logger.warning(
+                "Health check failed: subprocess exit code %s",
+                returncode if returncode is not None else "N/A",
+            )
+            raise HTTPException(status_code=503, detail="MCP subprocess not running")
 
         # If runner is None, we haven't started yet (lazy init) - that's OK
         return {"status": "ok"}
 
+    @app.get("/metrics")
+    async def metrics() -> dict[str, Any]:
+        if pool is not None:
+            snapshot = {"mode": session_mode.mode, "sessions": pool.snapshot()}
+        else:
+            snapshot = {
+                "mode": session_mode.mode,
+                "running": runner is not None and runner.is_running,
+                "recycled": runner.recycle_count if runner is not None else 0,
+            }
+        if cache is not None:
+            snapshot["cache"] = cache.snapshot()
+        return snapshot
+
     async def _read_payload(request: Request) -> str:
         body = await request.body()
+        encoding = (request.headers.get("content-encoding") or "").strip().lower()
+        if encoding and encoding != "identity":
+            if encoding not in compression.ENCODINGS:
+                raise HTTPException(
+                    status_code=415,
+                    detail=f"Unsupported Content-Encoding: {encoding}",
+                )
+            try:
+                body = compression.decompress(body, encoding, max_decompressed)
+            except compression.SizeLimitExceeded as exc:
+                raise HTTPException(status_code=413, detail=str(exc)) from exc
+            except ValueError as exc:
+                raise HTTPException(status_code=400, detail=str(exc)) from exc
         if not body:
             raise HTTPException(status_code=400, detail="Request body is empty")
         # Log a minimal set of headers for debugging (avoid sensitive ones)
@@ -252,9 +1655,7 @@ def _build_app() -> FastAPI:
             "host": hdr.get("host"),
             "content-length": hdr.get("content-length"),
             "content-type": hdr.get("content-type"),
-            "x-amzn-bedrock-agentcore-runtime-session-id": hdr.get(
-                "x-amzn-bedrock-agentcore-runtime-session-id"
-            ),
+            SESSION_HEADER: hdr.get(SESSION_HEADER),
         }
         logger.debug(
             "HTTP %s %s headers: %s", request.method, request.url.path, interesting
@@ -265,12 +1666,12 @@ def _build_app() -> FastAPI:
             raise HTTPException(status_code=400, detail="Body must be UTF-8") from exc
         nonlocal session_id
         if session_id is None:
-            session_id = interesting.get("x-amzn-bedrock-agentcore-runtime-session-id")
+            session_id = interesting.get(SESSION_HEADER)
         payload = payload.strip()
 
         if payload:
             try:
-                parsed = json.loads(payload)
+                parsed = jsoncodec.loads(payload)
             except json.JSONDecodeError:
                 parsed = None
             if (
@@ -289,36 +1690,392 @@ def _build_app() -> FastAPI:
 
         return payload
 
+    # The AgentCore data-plane path lets a proxy with AGENTCORE_ENDPOINT_URL
+    # pointed at a local bridge send exactly what it would send to AWS
     @app.post("/invocations")
-    async def handle_invocation(payload: str = Depends(_read_payload)) -> JSONResponse:
-        # Determine if this is a JSON-RPC notification (no id -> no response)
+    @app.post("/runtimes/{runtime_arn:path}/invocations", include_in_schema=False)
+    async def handle_invocation(
+        request: Request, payload: str = Depends(_read_payload)
+    ) -> Response:
+        # Notifications and replies to server requests get no JSON-RPC response
         expect_response = True
+        parsed: Any = None
         try:
-            parsed = json.loads(payload)
-            if isinstance(parsed, dict) and parsed.get("id") is None:
+            parsed = jsoncodec.loads(payload)
+            if isinstance(parsed, dict) and not _is_request(parsed):
                 expect_response = False
         except json.JSONDecodeError:
             # If not JSON, treat as expecting a response to avoid losing errors silently
             expect_response = True
 
+        is_batch = isinstance(parsed, list)
+        if is_batch and not parsed:
+            return _CompactJSONResponse(
+                content=jsoncodec.loads(
+                    _error_payload(None, -32600, "Invalid Request: empty batch")
+                )
+            )
+
+        stack = contextlib.AsyncExitStack()
+        call: asyncio.Task[Message | list[Message] | None] | None = None
+        # Set once _stream_call owns the lease; until then it is ours to release
+        handed_off = False
         try:
-            bridge_runner = await _ensure_runner()
-            if expect_response:
-                response = await bridge_runner.invoke(payload)
-                return JSONResponse(content=json.loads(response))
-            else:
+            bridge_runner = await stack.enter_async_context(
+                _lease_runner(request.headers.get(SESSION_HEADER))
+            )
+            if not expect_response:
                 await bridge_runner.send(payload)
                 return Response(status_code=204)
+
+            messages: asyncio.Queue[str] = asyncio.Queue()
+            call = asyncio.create_task(
+                _invoke_batch(bridge_runner, parsed, messages.put_nowait)
+                if is_batch
+                else bridge_runner.invoke(payload, on_message=messages.put_nowait)
+            )
+            first_message = asyncio.create_task(messages.get())
+            await asyncio.wait(
+                {call, first_message}, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not first_message.done():
+                first_message.cancel()
+                response = call.result()
+                if response is None:
+                    return Response(status_code=204)
+                if isinstance(response, str):
+                    return _CompactJSONResponse(content=jsoncodec.loads(response))
+                if isinstance(response, list) and all(
+                    isinstance(reply, str) for reply in response
+                ):
+                    # Elements are already JSON; skip a parse/serialize round trip
+                    return Response(
+                        content="[" + ",".join(response) + "]",
+                        media_type="application/json",
+                    )
+                # Spooled replies are served from disk as written by the server
+                return StreamingResponse(
+                    _body_chunks(response), media_type="application/json"
+                )
+            messages.put_nowait(first_message.result())
+            # The server is talking back (sampling, elicitation, progress); stream
+            # its messages ahead of the final reply and keep the lease until then.
+            streamed = StreamingResponse(
+                _stream_call(call, messages, stack, _error_id(parsed)),
+                media_type="text/event-stream",
+            )
+            handed_off = True
+            return streamed
+        except SessionCapacityError as exc:
+            logger.warning("Invocation rejected: %s", exc)
+            raise HTTPException(status_code=503, detail=str(exc))
         except MCPServerError as exc:
             logger.error("Invocation failed: %s", exc)
             raise HTTPException(status_code=500, detail=str(exc))
+        finally:
+            if not handed_off:
+                # Cancelled or failed mid-call: do not leave the bridge busy
+                if call is not None and not call.done():
+                    call.cancel()
+                    with contextlib.suppress(asyncio.CancelledError, MCPServerError):
+                        await call
+                await stack.aclose()
+
+    @app.websocket("/ws")
+    @app.websocket("/runtimes/{runtime_arn:path}/ws")
+    async def handle_websocket(websocket: WebSocket) -> None:
+        """Carry JSON-RPC messages both ways over one long-lived socket."""
+        await websocket.accept()
+        nonlocal session_id
+        request_session_id = websocket.headers.get(SESSION_HEADER)
+        if session_id is None:
+            session_id = request_session_id
+
+        send_lock = asyncio.Lock()
+        calls: set[asyncio.Task[None]] = set()
+
+        async def send_text(message: str) -> None:
+            async with send_lock:
+                await websocket.send_text(message)
+
+        def spawn(coro: Awaitable[None]) -> None:
+            task = asyncio.create_task(coro)
+            calls.add(task)
+            task.add_done_callback(calls.discard)
+
+        def on_message(message: str) -> None:
+            # Server-initiated traffic goes out as soon as the server writes it
+            spawn(send_text(message))
+
+        async def answer(ws_runner: MCPRunner, payload: str, parsed: Any) -> None:
+            try:
+                if isinstance(parsed, list):
+                    response = await _invoke_batch(ws_runner, parsed, on_message)
+                else:
+                    response = await ws_runner.invoke(payload, on_message=on_message)
+            except MCPServerError as exc:
+                logger.error("WebSocket invocation failed: %s", exc)
+                response = _error_payload(_error_id(parsed), -32603, str(exc))
+            if response is not None:
+                await send_text(_message_text(response))
+
+        try:
+            async with _lease_runner(request_session_id) as ws_runner:
+                while True:
+                    payload = (await websocket.receive_text()).strip()
+                    if not payload:
+                        continue
+                    try:
+                        parsed = jsoncodec.loads(payload)
+                    except json.JSONDecodeError as exc:
+                        await send_text(
+                            _error_payload(None, -32700, f"Parse error: {exc}")
+                        )
+                        continue
+                    if isinstance(parsed, list) and not parsed:
+                        await send_text(
+                            _error_payload(None, -32600, "Invalid Request: empty batch")
+                        )
+                    elif isinstance(parsed, dict) and not _is_request(parsed):
+                        await ws_runner.send(payload)
+                    else:
+                        spawn(answer(ws_runner, payload, parsed))
+        except WebSocketDisconnect:
+            logger.debug("WebSocket client disconnected")
+        except SessionCapacityError as exc:
+            logger.warning("WebSocket rejected: %s", exc)
+            await websocket.close(code=1013, reason=str(exc)[:120])
+        except MCPServerError as exc:
+            logger.error("WebSocket session failed: %s", exc)
+            await websocket.close(code=1011, reason=str(exc)[:120])
+        finally:
+            for task in list(calls):
+                task.cancel()
 
     return app
 
 
+SSE_KEEPALIVE_SECONDS = 15.0
+
+
+class _CompactJSONResponse(JSONResponse):
+    """JSONResponse rendered by :mod:`jsoncodec`; same bytes, faster backend."""
+
+    def render(self, content: Any) -> bytes:
+        return jsoncodec.dumps(content)
+
+
+class _CompressionMiddleware:
+    """Compress responses with the best encoding the client accepts.
+
+    Bodies under ``minimum_size`` are sent as-is; streamed bodies are
+    compressed chunk by chunk and flushed so the client can decode each one as
+    it arrives. Server-Sent Events are left alone. Every response advertises
+    the encodings the bridge accepts for request bodies.
+    """
+
+    def __init__(self, app: Any, minimum_size: int = compression.DEFAULT_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Any, receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = compression.negotiate(Headers(scope=scope).get("accept-encoding"))
+        start: dict[str, Any] | None = None
+        compressor: compression.Compressor | None = None
+
+        async def send_compressed(message: dict[str, Any]) -> None:
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(raw=message["headers"])
+                headers["Accept-Encoding"] = compression.ACCEPT_ENCODING
+                media_type = headers.get("content-type", "").partition(";")[0]
+                if (
+                    encoding is None
+                    or "content-encoding" in headers
+                    or media_type.strip() == "text/event-stream"
+                ):
+                    await send(message)
+                    return
+                headers.add_vary_header("Accept-Encoding")
+                # Hold the headers until the first chunk shows whether to compress
+                start = message
+                return
+            if message["type"] != "http.response.body" or (
+                start is None and compressor is None
+            ):
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if start is not None:
+                held, start = start, None
+                if not more_body and len(body) < self.minimum_size:
+                    await send(held)
+                    await send(message)
+                    return
+                assert encoding is not None
+                compressor = compression.Compressor(encoding)
+                headers = MutableHeaders(raw=held["headers"])
+                headers["Content-Encoding"] = encoding
+                del headers["Content-Length"]
+                body = compressor.compress(body)
+                body += compressor.flush() if more_body else compressor.finish()
+                if not more_body:
+                    headers["Content-Length"] = str(len(body))
+                await send(held)
+                await send({**message, "body": body})
+                return
+
+            assert compressor is not None
+            body = compressor.compress(body)
+            body += compressor.flush() if more_body else compressor.finish()
+            await send({**message, "body": body})
+
+        await self.app(scope, receive, send_compressed)
+
+
+def _sse_event(message: str) -> str:
+    return f"event: message\ndata: {message}\n\n"
+
+
+def _error_id(parsed: Any) -> Any:
+    return parsed.get("id") if isinstance(parsed, dict) else None
+
+
+def _message_text(response: Message | list[Message]) -> str:
+    """Return a reply, or a batch of replies, as one string."""
+    if isinstance(response, list):
+        return "[" + ",".join(_message_text(reply) for reply in response) + "]"
+    if isinstance(response, SpooledMessage):
+        return response.read_text()
+    return response
+
+
+def _body_chunks(response: Message | list[Message]) -> Iterator[str | bytes]:
+    """Yield a reply, or a batch of replies as a JSON array, without joining it."""
+    if isinstance(response, list):
+        yield "["
+        for index, reply in enumerate(response):
+            if index:
+                yield ","
+            yield from _body_chunks(reply)
+        yield "]"
+    elif isinstance(response, SpooledMessage):
+        yield from response.iter_bytes()
+    else:
+        yield response
+
+
+async def _invoke_batch(
+    runner: MCPRunner, batch: list[Any], on_message: MessageListener
+) -> list[Message] | None:
+    """Dispatch a JSON-RPC batch concurrently and collect the replies.
+
+    Returns None when the batch holds only notifications and replies.
+    """
+
+    async def dispatch(message: Any) -> Message | None:
+        if not isinstance(message, dict):
+            return _error_payload(None, -32600, "Invalid Request")
+        encoded = jsoncodec.dumps_str(message)
+        if not _is_request(message):
+            await runner.send(encoded)
+            return None
+        try:
+            return await runner.invoke(encoded, on_message=on_message)
+        except MCPServerError as exc:
+            logger.error("Batch element %r failed: %s", message.get("id"), exc)
+            return _error_payload(message.get("id"), -32603, str(exc))
+
+    results = await asyncio.gather(*(dispatch(message) for message in batch))
+    replies = [result for result in results if result is not None]
+    return replies or None
+
+
+async def _stream_call(
+    call: asyncio.Task[Message | list[Message] | None],
+    messages: asyncio.Queue[str],
+    stack: contextlib.AsyncExitStack,
+    request_id: Any,
+) -> AsyncIterator[str | bytes]:
+    """Yield server-initiated messages as SSE events, then the call's reply."""
+    try:
+        while True:
+            next_message = asyncio.create_task(messages.get())
+            done, _ = await asyncio.wait(
+                {call, next_message},
+                timeout=SSE_KEEPALIVE_SECONDS,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if next_message in done:
+                yield _sse_event(next_message.result())
+                continue
+            next_message.cancel()
+            if not done:
+                yield ": keepalive\n\n"
+                continue
+            break
+
+        while not messages.empty():
+            yield _sse_event(messages.get_nowait())
+        try:
+            response = call.result()
+        except MCPServerError as exc:
+            logger.error("Invocation failed: %s", exc)
+            response = _error_payload(request_id, -32603, str(exc))
+        if isinstance(response, str):
+            yield _sse_event(response)
+        elif response is not None:
+            yield "event: message\ndata: "
+            for chunk in _body_chunks(response):
+                yield chunk
+            yield "\n\n"
+    finally:
+        # Client went away mid-stream: stop waiting for the reply
+        if not call.done():
+            call.cancel()
+            with contextlib.suppress(asyncio.CancelledError, MCPServerError):
+                await call
+        await stack.aclose()
+
+
+async def _write_snapshot(path: str) -> None:
+    from mcp_agentcore_proxy.snapshot import take_snapshot
+
+    supervisor = _make_supervisor(None)
+    await supervisor.start()
+    try:
+        snapshot = await take_snapshot(supervisor)
+    finally:
+        await supervisor.shutdown()
+    snapshot.save(path)
+    counts = ", ".join(
+        f"{len(entries)} {field}"
+        for result in snapshot.lists.values()
+        for field, entries in result.items()
+    )
+    print(f"Wrote {path} ({counts or 'no listings'})", file=sys.stderr)
+
+
 def main(argv: list[str] | None = None) -> None:
     if argv is None:
         argv = sys.argv[1:]
+    if argv[:1] == ["snapshot"]:
+        # Run at image build time, e.g. `RUN mcp-agentcore-server snapshot`
+        from mcp_agentcore_proxy.snapshot import DEFAULT_PATH
+
+        path = argv[1] if len(argv) > 1 else os.getenv("MCP_SNAPSHOT_FILE")
+        try:
+            asyncio.run(_write_snapshot(path or DEFAULT_PATH))
+        except (MCPServerError, OSError) as exc:
+            print(f"Error: {exc}", file=sys.stderr, flush=True)
+            sys.exit(1)
+        return
 
     app = _build_app()
 
@@ -0,0 +1,281 @@
+"""Answer MCP discovery calls from a snapshot taken when the image was built.
+
+``mcp-agentcore-server snapshot [PATH]`` starts the configured server once,
+runs ``initialize`` and every ``*/list`` call its capabilities advertise, and
+writes the results to ``PATH`` (``MCP_SNAPSHOT_FILE``, or
+``mcp-snapshot.json``). With ``MCP_SNAPSHOT_FILE`` set at runtime, a fresh
+server is started in the background and, until it is ready, ``initialize``
+and first-page ``*/list`` requests are answered from the snapshot. The
+client's real ``initialize`` and ``notifications/initialized`` are replayed to
+the server as soon as it is up, and every other request waits for that.
+The snapshotted listings are then fetched from the live server, and a
+``notifications/*/list_changed`` is sent with the next reply for each one
+that differs.
+
+A snapshot is only used for clients asking for the protocol version it was
+taken with.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from mcp_agentcore_proxy import jsoncodec
+from mcp_agentcore_proxy.routing import LIST_FIELDS, MAX_PAGES, advertised_lists
+from mcp_agentcore_proxy.server import (
+    MCPRunner,
+    MCPServerError,
+    Message,
+    MessageListener,
+    RecyclePolicy,
+    SpooledMessage,
+    _json_rpc_method,
+)
+from mcp_agentcore_proxy.warmstart import LIST_CHANGED
+
+logger = logging.getLogger("mcp_agentcore_proxy.snapshot")
+
+PROTOCOL_VERSION = "2025-06-18"
+DEFAULT_PATH = "mcp-snapshot.json"
+FORMAT_VERSION = 1
+
+
+@dataclass
+class Snapshot:
+    """The ``initialize`` result and complete ``*/list`` results of a server."""
+
+    initialize: dict[str, Any]
+    lists: dict[str, dict[str, Any]] = field(default_factory=dict)
+
+    @classmethod
+    def load(cls, path: str) -> Snapshot:
+        """Read a snapshot file; raises ValueError or TypeError if it is not one."""
+        with open(path, encoding="utf-8") as handle:
+            data = json.load(handle)
+        if not isinstance(data, dict) or data.get("version") != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} snapshot")
+        initialize, lists = data.get("initialize"), data.get("lists") or {}
+        if not isinstance(initialize, dict) or not isinstance(lists, dict):
+            raise TypeError(f"{path} is missing the initialize result")
+        return cls(initialize, lists)
+
+    def save(self, path: str) -> None:
+        data = {
+            "version": FORMAT_VERSION,
+            "initialize": self.initialize,
+            "lists": self.lists,
+        }
+        with open(path, "w", encoding="utf-8") as handle:
+            json.dump(data, handle, indent=2, sort_keys=True)
+            handle.write("\n")
+
+    def reply(self, message: dict[str, Any]) -> str | None:
+        """The snapshot's answer to ``message``, or None if it has none."""
+        method = message.get("method")
+        params = message.get("params") or {}
+        if method == "initialize":
+            if params.get("protocolVersion") != self.initialize.get("protocolVersion"):
+                return None
+            result = self.initialize
+        elif method in self.lists and not params.get("cursor"):
+            result = self.lists[method]
+        else:
+            return None
+        return jsoncodec.dumps_str(
+            {"jsonrpc": "2.0", "id": message.get("id"), "result": result}
+        )
+
+
+def _result(method: str, reply: Message) -> dict[str, Any]:
+    if isinstance(reply, SpooledMessage):
+        try:
+            reply = reply.read_text()
+        finally:
+            reply.close()
+    try:
+        message = jsoncodec.loads(reply)
+    except json.JSONDecodeError as exc:
+        raise MCPServerError(f"{method} failed: {exc}") from exc
+    if not isinstance(message, dict) or not isinstance(message.get("result"), dict):
+        error = message.get("error") if isinstance(message, dict) else message
+        raise MCPServerError(f"{method} failed: {error}")
+    return message["result"]
+
+
+async def _request(runner: MCPRunner, request_id: str, method: str, params: Any) -> Any:
+    payload = {"jsonrpc": "2.0", "id": request_id, "method": method}
+    if params:
+        payload["params"] = params
+    return _result(method, await runner.invoke(jsoncodec.dumps_str(payload)))
+
+
+async def _list_all(runner: MCPRunner, prefix: str, method: str) -> dict[str, Any]:
+    """Every page of ``method``, merged into one result."""
+    entries: list[Any] = []
+    params: dict[str, Any] = {}
+    for page in range(MAX_PAGES):
+        result = await _request(runner, f"{prefix}-{method}-{page}", method, params)
+        entries.extend(result.get(LIST_FIELDS[method]) or [])
+        if not result.get("nextCursor"):
+            break
+        params = {"cursor": result["nextCursor"]}
+    return {LIST_FIELDS[method]: entries}
+
+
+async def take_snapshot(runner: MCPRunner) -> Snapshot:
+    """Initialize a started ``runner`` and collect every listing it offers."""
+    initialize = await _request(
+        runner,
+        "snapshot-initialize",
+        "initialize",
+        {
+            "protocolVersion": PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": {"name": "mcp-agentcore-snapshot", "version": "1"},
+        },
+    )
+    await runner.send(
+        jsoncodec.dumps_str({"jsonrpc": "2.0", "method": "notifications/initialized"})
+    )
+    snapshot = Snapshot(initialize)
+    for method in advertised_lists(initialize):
+        snapshot.lists[method] = await _list_all(runner, "snapshot", method)
+    return snapshot
+
+
+class SnapshotServer:
+    """An :class:`MCPRunner` that covers a runner's startup with a snapshot."""
+
+    def __init__(self, runner: MCPRunner, snapshot: Snapshot):
+        self._runner = runner
+        self._snapshot = snapshot
+        # Startup, then any handshake replayed to it, in order
+        self._warmup: asyncio.Task[None] | None = None
+        # The server's own answer to the replayed initialize
+        self._live_initialize: dict[str, Any] | None = None
+        # list_changed notifications owed to the client for snapshot answers
+        self._changed: list[str] = []
+
+    @property
+    def is_running(self) -> bool:
+        warmup = self._warmup
+        return warmup is not None and (not warmup.done() or self._runner.is_running)
+
+    @property
+    def returncode(self) -> int | None:
+        return self._runner.returncode
+
+    @property
+    def inflight(self) -> int:
+        return self._runner.inflight
+
+    @property
+    def _warming(self) -> bool:
+        return self._warmup is not None and not self._warmup.done()
+
+    async def start(self) -> None:
+        if self._warmup is None:
+            self._warmup = asyncio.create_task(self._runner.start())
+
+    async def shutdown(self) -> None:
+        if self._warming:
+            assert self._warmup is not None
+            self._warmup.cancel()
+        await self._runner.shutdown()
+
+    async def invoke(
+        self, payload: str, on_message: MessageListener | None = None
+    ) -> Message:
+        method = _json_rpc_method(payload)
+        if self._warming and (method == "initialize" or method in LIST_FIELDS):
+            try:
+                message = jsoncodec.loads(payload)
+            except json.JSONDecodeError:
+                message = None
+            reply = self._snapshot.reply(message) if isinstance(message, dict) else None
+            if reply is not None:
+                if method == "initialize":
+                    logger.info("Answered initialize from snapshot; server warming up")
+                    self._then(lambda: self._replay_initialize(payload))
+                return reply
+        await self._ready()
+        if self._changed and on_message is not None:
+            changed, self._changed = self._changed, []
+            for notification in changed:
+                on_message(notification)
+        return await self._runner.invoke(payload, on_message=on_message)
+
+    async def send(self, payload: str) -> None:
+        if self._warming:
+            # Keep the handshake ahead of anything sent after it
+            self._then(lambda: self._runner.send(payload))
+            if _json_rpc_method(payload) == "notifications/initialized":
+                self._then(self._check_lists)
+            return
+        await self._ready()
+        await self._runner.send(payload)
+
+    async def drain(self, timeout: float) -> bool:
+        return await self._runner.drain(timeout)
+
+    def owns_server_request(self, request_id: Any) -> bool:
+        return self._runner.owns_server_request(request_id)
+
+    def recycle_reason(self, policy: RecyclePolicy) -> str | None:
+        return self._runner.recycle_reason(policy)
+
+    async def _replay_initialize(self, payload: str) -> None:
+        reply = await self._runner.invoke(payload)
+        try:
+            self._live_initialize = _result("initialize", reply)
+        except MCPServerError as exc:
+            logger.warning("Replayed initialize failed: %s", exc)
+
+    async def _check_lists(self) -> None:
+        """Compare the snapshotted listings with the live server's."""
+        live = self._live_initialize
+        if live is None:
+            return
+        if live != self._snapshot.initialize:
+            logger.warning("Live initialize result differs from the snapshot")
+        advertised = advertised_lists(live)
+        changed: set[str] = set()
+        for method, snapshotted in self._snapshot.lists.items():
+            try:
+                result = (
+                    await _list_all(self._runner, "snapshot-check", method)
+                    if method in advertised
+                    else None
+                )
+            except MCPServerError as exc:
+                logger.warning(
+                    "Could not check %s against the snapshot: %s", method, exc
+                )
+                continue
+            if result != snapshotted:
+                changed.add(LIST_CHANGED[method])
+        for notification in sorted(changed):
+            logger.info("Live discovery differs from the snapshot: %s", notification)
+            self._changed.append(
+                jsoncodec.dumps_str({"jsonrpc": "2.0", "method": notification})
+            )
+
+    async def _ready(self) -> None:
+        if self._warmup is None:
+            raise MCPServerError("MCP server is not running")
+        await asyncio.shield(self._warmup)
+
+    def _then(self, step: Callable[[], Awaitable[Any]]) -> None:
+        previous = self._warmup
+        assert previous is not None
+
+        async def run() -> None:
+            await previous
+            await step()
+
+        self._warmup = asyncio.create_task(run())
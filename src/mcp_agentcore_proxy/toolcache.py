@@ -0,0 +1,152 @@
+"""Memoize ``tools/call`` results for tools declared deterministic.
+
+``MCP_CACHE_TOOLS=get_weather=60,convert_units`` lists the tools whose result
+depends only on their arguments, each with an optional TTL in seconds
+(``MCP_CACHE_TTL`` otherwise). A call is keyed by the tool name and its
+canonicalized arguments. A hit is answered from memory with the caller's
+JSON-RPC id spliced in, so the cached result is never re-encoded. Entries are
+evicted least recently used first once ``MCP_CACHE_MAX_MB`` is exceeded.
+
+Only successful results are stored; errors and results with ``isError`` set
+always go to the server.
+"""
+
+from __future__ import annotations
+
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Any
+
+from mcp_agentcore_proxy import jsoncodec
+
+__all__ = ["DEFAULT_MAX_BYTES", "DEFAULT_TTL", "ToolCache", "parse_tool_ttls"]
+
+DEFAULT_TTL = 300.0
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+def parse_tool_ttls(value: str, default_ttl: float) -> dict[str, float]:
+    """Parse ``name[=ttl]`` entries separated by commas.
+
+    Raises ValueError on an empty list, an empty name or a bad TTL.
+    """
+    ttls: dict[str, float] = {}
+    for item in value.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        name, separator, raw_ttl = item.partition("=")
+        name = name.strip()
+        if not name:
+            raise ValueError(f"missing tool name in {item!r}")
+        ttl = default_ttl
+        if separator:
+            try:
+                ttl = float(raw_ttl)
+            except ValueError:
+                raise ValueError(f"invalid TTL for {name}: {raw_ttl!r}") from None
+            if ttl <= 0:
+                raise ValueError(f"TTL for {name} must be positive")
+        ttls[name] = ttl
+    if not ttls:
+        raise ValueError("no tools listed")
+    return ttls
+
+
+class ToolCache:
+    """An LRU of serialized ``tools/call`` results, bounded in bytes."""
+
+    def __init__(
+        self,
+        ttls: dict[str, float],
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._ttls = ttls
+        self._max_bytes = max_bytes
+        self._clock = clock
+        self._lock = threading.Lock()
+        # key -> (expires, serialized result)
+        self._entries: OrderedDict[tuple[str, str], tuple[float, str]] = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, message: dict[str, Any]) -> tuple[str, str] | None:
+        """The cache key for a request, or None if it is not a cacheable call."""
+        if message.get("method") != "tools/call":
+            return None
+        params = message.get("params")
+        if not isinstance(params, dict) or params.get("name") not in self._ttls:
+            return None
+        try:
+            arguments = json.dumps(
+                params.get("arguments") or {}, sort_keys=True, separators=(",", ":")
+            )
+        except (TypeError, ValueError):
+            return None
+        return params["name"], arguments
+
+    def get(self, key: tuple[str, str], request_id: Any) -> str | None:
+        """Return the cached reply for ``key`` addressed to ``request_id``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._clock() >= entry[0]:
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            result = entry[1]
+        return (
+            '{"jsonrpc":"2.0","id":'
+            + jsoncodec.dumps_str(request_id)
+            + ',"result":'
+            + result
+            + "}"
+        )
+
+    def put(self, key: tuple[str, str], reply: str) -> None:
+        """Store the result of ``reply`` if it is a successful one."""
+        try:
+            message = jsoncodec.loads(reply)
+        except json.JSONDecodeError:
+            return
+        if not isinstance(message, dict):
+            return
+        result = message.get("result")
+        if not isinstance(result, dict) or result.get("isError"):
+            return
+        serialized = jsoncodec.dumps_str(result)
+        size = len(serialized)
+        if size > self._max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (self._clock() + self._ttls[key[0]], serialized)
+            self._bytes += size
+            while self._bytes > self._max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def snapshot(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+    def _remove(self, key: tuple[str, str]) -> None:
+        _, serialized = self._entries.pop(key)
+        self._bytes -= len(serialized)
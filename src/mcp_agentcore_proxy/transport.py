@@ -0,0 +1,118 @@
+"""Send ``InvokeAgentRuntime`` calls over a multiplexed HTTP/2 connection.
+
+botocore's urllib3 pool speaks HTTP/1.1, so every concurrent call holds its
+own TCP+TLS connection. With ``AGENTCORE_TRANSPORT=http2`` the proxy keeps
+using botocore to serialize, sign, retry and parse each call, but hands the
+prepared request to an ``httpx`` client with HTTP/2 enabled (``pip install
+mcp-agentcore-proxy[http2]``). All in-flight calls share one connection.
+
+The swap happens in botocore's ``before-send`` event, which lets a handler
+return the response itself. Bodies are passed through undecoded, exactly as
+urllib3 would return them, so streaming, SSE and the compression hooks
+behave the same on both transports.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from typing import Any
+
+from botocore.awsrequest import AWSResponse
+from botocore.exceptions import (
+    ConnectTimeoutError,
+    EndpointConnectionError,
+    HTTPClientError,
+    ReadTimeoutError,
+)
+
+__all__ = ["Http2Sender"]
+
+CHUNK_SIZE = 64 * 1024
+
+
+class _RawStream:
+    """The slice of urllib3's response API that botocore reads bodies through."""
+
+    def __init__(self, response: Any):
+        self._response = response
+        self._chunks = response.iter_raw(CHUNK_SIZE)
+        self._buffer = bytearray()
+
+    def read(self, amt: int | None = None) -> bytes:
+        while amt is None or len(self._buffer) < amt:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                # Release the HTTP/2 stream as soon as the body is consumed
+                self._response.close()
+                break
+            self._buffer += chunk
+        if amt is None:
+            amt = len(self._buffer)
+        data = bytes(self._buffer[:amt])
+        del self._buffer[:amt]
+        return data
+
+    def stream(
+        self, amt: int = CHUNK_SIZE, decode_content: bool = False
+    ) -> Iterator[bytes]:
+        while chunk := self.read(amt):
+            yield chunk
+
+    def close(self) -> None:
+        self._response.close()
+
+
+class Http2Sender:
+    """botocore ``before-send`` hook that sends requests with ``httpx``."""
+
+    EVENT = "before-send.bedrock-agentcore.InvokeAgentRuntime"
+
+    def __init__(
+        self,
+        connect_timeout: float = 10,
+        read_timeout: float = 300,
+        client: Any = None,
+    ):
+        import httpx
+
+        self._httpx = httpx
+        if client is None:
+            client = httpx.Client(
+                http2=True,
+                timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            )
+        self._client = client
+
+    def register(self, events: Any) -> None:
+        events.register(self.EVENT, self.send)
+
+    def send(self, request: Any, **_: Any) -> AWSResponse:
+        headers = {
+            name: value.decode("utf-8") if isinstance(value, bytes) else value
+            for name, value in request.headers.items()
+        }
+        # httpx would otherwise ask for gzip and decode nothing for botocore
+        headers.setdefault("Accept-Encoding", "identity")
+        httpx = self._httpx
+        outgoing = self._client.build_request(
+            request.method, request.url, headers=headers, content=request.body
+        )
+        try:
+            response = self._client.send(outgoing, stream=True)
+        except httpx.ConnectTimeout as exc:
+            raise ConnectTimeoutError(endpoint_url=request.url, error=exc) from exc
+        except httpx.ConnectError as exc:
+            raise EndpointConnectionError(endpoint_url=request.url, error=exc) from exc
+        except httpx.ReadTimeout as exc:
+            raise ReadTimeoutError(endpoint_url=request.url, error=exc) from exc
+        except httpx.HTTPError as exc:
+            raise HTTPClientError(error=exc) from exc
+        return AWSResponse(
+            str(response.url),
+            response.status_code,
+            dict(response.headers.multi_items()),
+            _RawStream(response),
+        )
+
+    def close(self) -> None:
+        self._client.close()
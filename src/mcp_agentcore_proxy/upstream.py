@@ -0,0 +1,278 @@
+"""Forward bridge traffic to an MCP server that already speaks streamable HTTP.
+
+``MCP_SERVER_URL=http://127.0.0.1:8000/mcp`` points the bridge at a local or
+sidecar server instead of starting a stdio subprocess. Every runtime session
+is mapped to one upstream MCP session: the ``Mcp-Session-Id`` the server
+returns from ``initialize`` is remembered and sent on every later message,
+and the session is deleted when the bridge lets go of it. All sessions share
+one pool of keep-alive connections (``MCP_UPSTREAM_MAX_CONNECTIONS``).
+
+Upstream SSE responses are relayed as they arrive: server requests and
+notifications go to the caller's listener, like subprocess traffic, and the
+reply ends the call. Requires ``httpx``, which the ``server`` extra installs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from typing import Any
+
+import httpx
+
+from mcp_agentcore_proxy import jsoncodec
+from mcp_agentcore_proxy.envelope import Envelope, scan
+from mcp_agentcore_proxy.server import (
+    SESSION_HEADER,
+    MCPServerError,
+    MessageListener,
+    RecyclePolicy,
+    _error_payload,
+    _id_key,
+    _json_rpc_id,
+    _json_rpc_method,
+    _RequestTracker,
+)
+
+logger = logging.getLogger("mcp_agentcore_proxy.upstream")
+
+MCP_SESSION_HEADER = "mcp-session-id"
+MCP_PROTOCOL_HEADER = "mcp-protocol-version"
+DEFAULT_MAX_CONNECTIONS = 32
+
+
+class UpstreamClient:
+    """The upstream URL and the connection pool shared by every session."""
+
+    def __init__(
+        self,
+        url: str,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        read_timeout: float = 300.0,
+        transport: httpx.AsyncBaseTransport | None = None,
+    ):
+        self.url = url
+        self._client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+            timeout=httpx.Timeout(read_timeout, connect=10.0),
+            transport=transport,
+        )
+
+    def session(self, session_id: str | None) -> UpstreamSession:
+        return UpstreamSession(self, session_id)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
+
+    async def post(self, payload: str, headers: dict[str, str]) -> httpx.Response:
+        request = self._client.build_request(
+            "POST",
+            self.url,
+            content=payload.encode("utf-8"),
+            headers={
+                "content-type": "application/json",
+                "accept": "application/json, text/event-stream",
+                **headers,
+            },
+        )
+        try:
+            return await self._client.send(request, stream=True)
+        except httpx.HTTPError as exc:
+            raise MCPServerError(f"Upstream MCP server unreachable: {exc}") from exc
+
+    async def delete(self, headers: dict[str, str]) -> None:
+        try:
+            await self._client.delete(self.url, headers=headers)
+        except httpx.HTTPError as exc:
+            logger.debug("Failed to close upstream MCP session: %s", exc)
+
+
+class UpstreamSession(_RequestTracker):
+    """One upstream MCP session, driven like an MCP subprocess."""
+
+    def __init__(self, upstream: UpstreamClient, session_id: str | None):
+        super().__init__()
+        self._upstream = upstream
+        self._session_id = session_id
+        self._running = False
+        self._mcp_session_id: str | None = None
+        self._protocol_version: str | None = None
+        self._initialize_payload: str | None = None
+        self._initialized_payload: str | None = None
+        self._server_requests: set[str] = set()
+
+    @property
+    def is_running(self) -> bool:
+        return self._running
+
+    @property
+    def returncode(self) -> int | None:
+        return None
+
+    async def start(self) -> None:
+        # Connections are opened by the first request
+        self._running = True
+
+    async def shutdown(self) -> None:
+        self._running = False
+        if self._mcp_session_id is not None:
+            await self._upstream.delete(self._headers())
+            self._mcp_session_id = None
+
+    def owns_server_request(self, request_id: Any) -> bool:
+        return _id_key(request_id) in self._server_requests
+
+    def recycle_reason(self, policy: RecyclePolicy) -> str | None:
+        return None
+
+    async def invoke(
+        self, payload: str, on_message: MessageListener | None = None
+    ) -> str:
+        if not self._running:
+            raise MCPServerError("Upstream MCP session is closed")
+        if _json_rpc_method(payload) == "initialize":
+            self._initialize_payload = payload
+        with self._track_request():
+            reply = await self._exchange(payload, on_message)
+        if reply is None:
+            raise MCPServerError("Upstream MCP server sent no reply")
+        return reply
+
+    async def send(self, payload: str) -> None:
+        if not self._running:
+            raise MCPServerError("Upstream MCP session is closed")
+        method = _json_rpc_method(payload)
+        if method == "notifications/initialized":
+            self._initialized_payload = payload
+        elif method is None:
+            self._server_requests.discard(_id_key(_json_rpc_id(payload)))
+        await self._exchange(payload, None)
+
+    def _headers(self) -> dict[str, str]:
+        headers = {}
+        if self._session_id is not None:
+            # Lets upstream logs be correlated with the AgentCore session
+            headers[SESSION_HEADER] = self._session_id
+        if self._mcp_session_id is not None:
+            headers[MCP_SESSION_HEADER] = self._mcp_session_id
+        if self._protocol_version is not None:
+            headers[MCP_PROTOCOL_HEADER] = self._protocol_version
+        return headers
+
+    async def _exchange(
+        self, payload: str, on_message: MessageListener | None
+    ) -> str | None:
+        response = await self._upstream.post(payload, self._headers())
+        if (
+            response.status_code == 404
+            and self._mcp_session_id is not None
+            and self._initialize_payload is not None
+            and _json_rpc_method(payload) != "initialize"
+        ):
+            # The server forgot the session (e.g. it restarted): start a new one
+            await response.aclose()
+            logger.info("Upstream MCP session expired; re-initializing")
+            self._mcp_session_id = None
+            await self._reinitialize()
+            response = await self._upstream.post(payload, self._headers())
+        try:
+            return await self._read(response, payload, on_message)
+        finally:
+            await response.aclose()
+
+    async def _reinitialize(self) -> None:
+        assert self._initialize_payload is not None
+        response = await self._upstream.post(self._initialize_payload, self._headers())
+        try:
+            await self._read(response, self._initialize_payload, None)
+        finally:
+            await response.aclose()
+        if self._initialized_payload is not None:
+            response = await self._upstream.post(
+                self._initialized_payload, self._headers()
+            )
+            await response.aclose()
+
+    async def _read(
+        self,
+        response: httpx.Response,
+        payload: str,
+        on_message: MessageListener | None,
+    ) -> str | None:
+        if response.status_code >= 400:
+            body = (await response.aread()).decode("utf-8", errors="replace")
+            raise MCPServerError(
+                f"Upstream MCP server returned HTTP {response.status_code}: "
+                f"{body[:200]}"
+            )
+        session = response.headers.get(MCP_SESSION_HEADER)
+        if session:
+            self._mcp_session_id = session
+        if response.status_code == 202:
+            return None
+
+        request_id = _json_rpc_id(payload)
+        content_type = response.headers.get("content-type", "").lower()
+        if "text/event-stream" not in content_type:
+            reply = (await response.aread()).decode("utf-8", errors="replace").strip()
+            self._remember_protocol(payload, reply)
+            return reply or None
+
+        data: list[str] = []
+        async for line in response.aiter_lines():
+            if line.startswith("data:"):
+                data.append(line[5:].lstrip())
+                continue
+            if line or not data:
+                continue
+            message, data = "\n".join(data), []
+            envelope = scan(message)
+            if envelope is None:
+                try:
+                    envelope = Envelope.from_message(jsoncodec.loads(message))
+                except (json.JSONDecodeError, AttributeError):
+                    logger.warning(
+                        "Dropping non-JSON upstream event: %s", message[:200]
+                    )
+                    continue
+            if envelope.method is None and envelope.id == request_id:
+                self._remember_protocol(payload, message)
+                return message
+            self._relay(message, envelope, on_message)
+        return None
+
+    def _relay(
+        self, message: str, envelope: Envelope, on_message: MessageListener | None
+    ) -> None:
+        if envelope.method is not None and envelope.has_id:
+            self._server_requests.add(_id_key(envelope.id))
+        if on_message is not None:
+            on_message(message)
+        elif envelope.method is not None and envelope.has_id:
+            # Nobody can answer; tell the server instead of leaving it waiting
+            logger.warning(
+                "No client is waiting for server request %s; rejecting it",
+                envelope.method,
+            )
+            self._server_requests.discard(_id_key(envelope.id))
+            reply = _error_payload(
+                envelope.id,
+                -32603,
+                f"No client connection is available to handle {envelope.method}",
+            )
+            asyncio.create_task(self.send(reply))
+
+    def _remember_protocol(self, payload: str, reply: str) -> None:
+        if _json_rpc_method(payload) != "initialize":
+            return
+        try:
+            result = jsoncodec.loads(reply).get("result") or {}
+        except (json.JSONDecodeError, AttributeError):
+            return
+        version = result.get("protocolVersion")
+        if isinstance(version, str):
+            self._protocol_version = version
@@ -0,0 +1,146 @@
+"""Remember a runtime's discovery answers on disk between proxy runs.
+
+With ``AGENTCORE_WARM_START=1`` (or a directory), the proxy stores the last
+``initialize`` result and first-page ``*/list`` results per agent ARN under
+``$XDG_CACHE_HOME/mcp-agentcore-proxy``. On the next start the IDE's
+``initialize`` and list calls are answered from that file at once, while the
+real handshake runs against the runtime in the background. The lists are
+then fetched again, and ``notifications/*/list_changed`` tells the IDE when
+the live answer differs from what it was shown.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any
+
+from mcp_agentcore_proxy import jsoncodec
+from mcp_agentcore_proxy.routing import advertised_lists
+
+__all__ = [
+    "LIST_CHANGED",
+    "DiscoveryCache",
+    "default_cache_dir",
+    "resolve_cache_dir",
+]
+
+# List method -> the notification that tells the IDE to list again
+LIST_CHANGED = {
+    "tools/list": "notifications/tools/list_changed",
+    "prompts/list": "notifications/prompts/list_changed",
+    "resources/list": "notifications/resources/list_changed",
+    "resources/templates/list": "notifications/resources/list_changed",
+}
+
+
+def default_cache_dir() -> str:
+    base = os.getenv("XDG_CACHE_HOME") or os.path.join(
+        os.path.expanduser("~"), ".cache"
+    )
+    return os.path.join(base, "mcp-agentcore-proxy")
+
+
+def resolve_cache_dir(value: str | None) -> str | None:
+    """Map ``AGENTCORE_WARM_START`` to a directory; None when it is off."""
+    value = (value or "").strip()
+    if value.lower() in {"", "0", "off", "false"}:
+        return None
+    if value.lower() in {"1", "on", "true", "auto"}:
+        return default_cache_dir()
+    return os.path.expanduser(value)
+
+
+def _reply(request_id: Any, result: Any) -> str:
+    return jsoncodec.dumps_str({"jsonrpc": "2.0", "id": request_id, "result": result})
+
+
+class DiscoveryCache:
+    """The cached discovery answers of one agent runtime."""
+
+    def __init__(self, directory: str, agent_arn: str):
+        digest = hashlib.sha256(agent_arn.encode("utf-8")).hexdigest()[:16]
+        self.path = Path(directory) / f"{digest}.json"
+        self._agent_arn = agent_arn
+        self._lock = threading.Lock()
+        self._initialize: dict[str, Any] | None = None
+        self._lists: dict[str, Any] = {}
+        self._load()
+
+    def initialize_reply(self, message: dict[str, Any]) -> str | None:
+        """The cached answer to ``initialize``, if taken with the same protocol."""
+        params = message.get("params") or {}
+        with self._lock:
+            initialize = self._initialize
+        if initialize is None or params.get("protocolVersion") != initialize.get(
+            "protocolVersion"
+        ):
+            return None
+        return _reply(message.get("id"), initialize)
+
+    def list_reply(self, message: dict[str, Any]) -> str | None:
+        """The cached first page of a ``*/list`` call."""
+        if (message.get("params") or {}).get("cursor"):
+            return None
+        with self._lock:
+            result = self._lists.get(str(message.get("method")))
+        return None if result is None else _reply(message.get("id"), result)
+
+    def list_methods(self) -> list[str]:
+        """The list methods the cached ``initialize`` result advertises."""
+        with self._lock:
+            return advertised_lists(self._initialize)
+
+    def record(self, method: str, result: Any) -> bool:
+        """Store a live result; True if it replaced a different cached one."""
+        with self._lock:
+            if method == "initialize":
+                previous, self._initialize = self._initialize, result
+            else:
+                previous = self._lists.get(method)
+                self._lists[method] = result
+            if previous == result:
+                return False
+            self._save()
+        return previous is not None
+
+    def _load(self) -> None:
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return
+        if not isinstance(data, dict) or data.get("agent_arn") != self._agent_arn:
+            return
+        if isinstance(data.get("initialize"), dict):
+            self._initialize = data["initialize"]
+        if isinstance(data.get("lists"), dict):
+            self._lists = data["lists"]
+
+    def _save(self) -> None:
+        data = {
+            "agent_arn": self._agent_arn,
+            "initialize": self._initialize,
+            "lists": self._lists,
+        }
+        try:
+            self.path.parent.mkdir(mode=0o700, parents=True, exist_ok=True)
+            # Write then rename, so another window never reads half a file
+            fd, temp = tempfile.mkstemp(dir=self.path.parent, suffix=".tmp")
+        except OSError:
+            # A cache that cannot be written only costs the next start its speed
+            return
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as handle:
+                json.dump(data, handle)
+            os.replace(temp, self.path)
+        except OSError:
+            return
+        finally:
+            # Left behind only if the write or the rename failed
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(temp)
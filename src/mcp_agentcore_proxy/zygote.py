@@ -0,0 +1,388 @@
+"""Pre-fork zygote for spawning Python stdio MCP servers in milliseconds.
+
+The zygote is a helper process that imports a Python MCP server module once
+and then forks a child for every spawn request. Children inherit the warm
+interpreter (pydantic, mcp, FastMCP and the server's own imports), so only
+``fork()`` and the module body run per spawn.
+
+The bridge talks to the zygote over a Unix socket. Each spawn uses its own
+connection: the bridge sends the child's environment together with the
+child's stdin/stdout/stderr pipe ends (``SCM_RIGHTS``), the zygote replies
+with the child's pid and, once the child exits, with its return code.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import importlib
+import json
+import logging
+import os
+import runpy
+import selectors
+import signal
+import socket
+import sys
+import tempfile
+import traceback
+from typing import Any
+
+logger = logging.getLogger("mcp_agentcore_proxy.zygote")
+
+_READY_LINE = b"zygote-ready\n"
+_STREAM_LIMIT = 2**16
+
+
+class ZygoteError(Exception):
+    """Raised when the zygote cannot spawn a child."""
+
+
+def _run_child(
+    module: str, env: dict[str, str], fds: list[int], inherited: list[int]
+) -> None:
+    """Turn a freshly forked process into an MCP server child. Never returns."""
+    code = 0
+    try:
+        for fd in inherited:
+            with contextlib.suppress(OSError):
+                os.close(fd)
+        for target, fd in enumerate(fds):
+            os.dup2(fd, target)
+            os.close(fd)
+        os.setsid()
+        for signum in (signal.SIGCHLD, signal.SIGTERM, signal.SIGINT):
+            signal.signal(signum, signal.SIG_DFL)
+        signal.set_wakeup_fd(-1)
+        os.environ.clear()
+        os.environ.update(env)
+        runpy.run_module(module, run_name="__main__", alter_sys=True)
+    except SystemExit as exc:
+        if isinstance(exc.code, int):
+            code = exc.code
+        elif exc.code is not None:
+            print(exc.code, file=sys.stderr)
+            code = 1
+    except BaseException:  # noqa: BLE001 - report everything, then exit the child
+        traceback.print_exc()
+        code = 1
+    finally:
+        with contextlib.suppress(Exception):
+            sys.stdout.flush()
+            sys.stderr.flush()
+    os._exit(code)
+
+
+def serve(module: str, socket_path: str) -> None:
+    """Preimport ``module`` and fork a child per spawn request until stdin closes."""
+    importlib.import_module(module)
+
+    listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(socket_path)
+    listener.bind(socket_path)
+    os.chmod(socket_path, 0o600)
+    listener.listen()
+    listener.setblocking(False)
+
+    wakeup_r, wakeup_w = os.pipe()
+    os.set_blocking(wakeup_r, False)
+    os.set_blocking(wakeup_w, False)
+    signal.set_wakeup_fd(wakeup_w)
+    signal.signal(signal.SIGCHLD, lambda *_: None)
+    signal.signal(signal.SIGTERM, lambda *_: None)
+
+    selector = selectors.DefaultSelector()
+    selector.register(listener, selectors.EVENT_READ, "accept")
+    selector.register(wakeup_r, selectors.EVENT_READ, "signal")
+    # The bridge keeps our stdin open; EOF means the bridge went away.
+    selector.register(sys.stdin.fileno(), selectors.EVENT_READ, "parent")
+
+    children: dict[int, socket.socket] = {}
+    sys.stdout.buffer.write(_READY_LINE)
+    sys.stdout.flush()
+
+    running = True
+    while running:
+        for key, _ in selector.select():
+            if key.data == "accept":
+                with contextlib.suppress(BlockingIOError):
+                    conn, _ = listener.accept()
+                    inherited = [
+                        listener.fileno(),
+                        wakeup_r,
+                        wakeup_w,
+                        selector.fileno() if hasattr(selector, "fileno") else -1,
+                        *(other.fileno() for other in children.values()),
+                    ]
+                    _handle_spawn(conn, module, inherited, children)
+            elif key.data == "signal":
+                signals = os.read(wakeup_r, 512)
+                _reap(children)
+                if signal.SIGTERM in signals:
+                    running = False
+            elif key.data == "parent" and not os.read(sys.stdin.fileno(), 512):
+                running = False
+
+    for pid in list(children):
+        with contextlib.suppress(ProcessLookupError):
+            os.kill(pid, signal.SIGTERM)
+    listener.close()
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(socket_path)
+
+
+def _handle_spawn(
+    conn: socket.socket,
+    module: str,
+    inherited: list[int],
+    children: dict[int, socket.socket],
+) -> None:
+    conn.setblocking(True)
+    try:
+        data, fds, _, _ = socket.recv_fds(conn, 1 << 20, 3)
+        request = json.loads(data.decode("utf-8"))
+        if len(fds) != 3:
+            raise ZygoteError(f"expected 3 descriptors, received {len(fds)}")
+    except (OSError, ValueError, ZygoteError) as exc:
+        with contextlib.suppress(OSError):
+            conn.sendall(json.dumps({"error": str(exc)}).encode("utf-8") + b"\n")
+        conn.close()
+        return
+
+    pid = os.fork()
+    if pid == 0:
+        inherited = [*inherited, conn.fileno()]
+        _run_child(module, request.get("env") or {}, fds, inherited)
+
+    for fd in fds:
+        os.close(fd)
+    children[pid] = conn
+    with contextlib.suppress(OSError):
+        conn.sendall(json.dumps({"pid": pid}).encode("utf-8") + b"\n")
+
+
+def _reap(children: dict[int, socket.socket]) -> None:
+    while True:
+        try:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+        except ChildProcessError:
+            return
+        if pid == 0:
+            return
+        conn = children.pop(pid, None)
+        if conn is None:
+            continue
+        message = {"pid": pid, "returncode": os.waitstatus_to_exitcode(status)}
+        with contextlib.suppress(OSError):
+            conn.sendall(json.dumps(message).encode("utf-8") + b"\n")
+        conn.close()
+
+
+class ZygoteProcess:
+    """A zygote child exposed with the subset of ``asyncio.subprocess.Process``
+    that :class:`~mcp_agentcore_proxy.server.MCPSubprocess` relies on."""
+
+    def __init__(
+        self,
+        pid: int,
+        stdin: asyncio.StreamWriter,
+        stdout: asyncio.StreamReader,
+        stderr: asyncio.StreamReader,
+        control: socket.socket,
+    ):
+        self.pid = pid
+        self.stdin = stdin
+        self.stdout = stdout
+        self.stderr = stderr
+        self.returncode: int | None = None
+        self._control = control
+        self._exited = asyncio.get_running_loop().create_future()
+        self._monitor = asyncio.create_task(self._watch_exit(control))
+
+    async def _watch_exit(self, control: socket.socket) -> None:
+        loop = asyncio.get_running_loop()
+        buffer = b""
+        returncode = -signal.SIGKILL
+        try:
+            while b"\n" not in buffer:
+                chunk = await loop.sock_recv(control, 4096)
+                if not chunk:
+                    break
+                buffer += chunk
+            if buffer.strip():
+                message = json.loads(buffer.split(b"\n", 1)[0])
+                returncode = int(message.get("returncode", returncode))
+        except (OSError, ValueError) as exc:
+            logger.debug("Lost zygote control channel for pid %s: %s", self.pid, exc)
+        finally:
+            control.close()
+        self.returncode = returncode
+        self.stdin.close()
+        if not self._exited.done():
+            self._exited.set_result(returncode)
+
+    async def wait(self) -> int:
+        return await asyncio.shield(self._exited)
+
+    def send_signal(self, signum: int) -> None:
+        if self.returncode is not None:
+            raise ProcessLookupError(self.pid)
+        os.kill(self.pid, signum)
+
+    def terminate(self) -> None:
+        self.send_signal(signal.SIGTERM)
+
+    def kill(self) -> None:
+        self.send_signal(signal.SIGKILL)
+
+
+class ZygoteClient:
+    """Start a zygote for ``module`` and fork MCP server children from it."""
+
+    def __init__(self, module: str, cwd: str | None, env: dict[str, str]):
+        self._module = module
+        self._cwd = cwd
+        self._env = env
+        self._process: asyncio.subprocess.Process | None = None
+        self._socket_dir: tempfile.TemporaryDirectory[str] | None = None
+        self._socket_path: str | None = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def module(self) -> str:
+        return self._module
+
+    async def start(self, timeout: float = 60.0) -> None:
+        async with self._lock:
+            if self._process is not None and self._process.returncode is None:
+                return
+            await self._start_locked(timeout)
+
+    async def _start_locked(self, timeout: float) -> None:
+        self._cleanup_socket()
+        self._socket_dir = tempfile.TemporaryDirectory(prefix="mcp-zygote-")
+        self._socket_path = os.path.join(self._socket_dir.name, "zygote.sock")
+        logger.info("Starting MCP zygote for module %s", self._module)
+        self._process = await asyncio.create_subprocess_exec(
+            sys.executable,
+            "-m",
+            "mcp_agentcore_proxy.zygote",
+            self._module,
+            self._socket_path,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            cwd=self._cwd,
+            env=self._env,
+        )
+        assert self._process.stdout is not None
+        try:
+            ready = await asyncio.wait_for(
+                self._process.stdout.readline(), timeout=timeout
+            )
+        except TimeoutError:
+            ready = b""
+        if ready != _READY_LINE:
+            await self.shutdown()
+            raise ZygoteError(
+                f"Zygote for module {self._module} failed to start; see stderr"
+            )
+
+    async def spawn(self, env: dict[str, str]) -> ZygoteProcess:
+        """Fork a child with fresh stdio pipes and ``env`` as its environment."""
+        await self.start()
+        assert self._socket_path is not None
+        loop = asyncio.get_running_loop()
+
+        stdin_r, stdin_w = os.pipe()
+        stdout_r, stdout_w = os.pipe()
+        stderr_r, stderr_w = os.pipe()
+        child_fds = [stdin_r, stdout_w, stderr_w]
+        control = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            control.setblocking(False)
+            await loop.sock_connect(control, self._socket_path)
+            request = json.dumps({"env": env}).encode("utf-8")
+            control.setblocking(True)
+            socket.send_fds(control, [request], child_fds)
+            control.setblocking(False)
+            reply = await self._read_line(control)
+        except (OSError, ValueError) as exc:
+            control.close()
+            for fd in (stdin_w, stdout_r, stderr_r):
+                os.close(fd)
+            raise ZygoteError(f"Zygote spawn failed: {exc}") from exc
+        finally:
+            for fd in child_fds:
+                os.close(fd)
+
+        if "pid" not in reply:
+            control.close()
+            for fd in (stdin_w, stdout_r, stderr_r):
+                os.close(fd)
+            raise ZygoteError(f"Zygote spawn failed: {reply.get('error', reply)}")
+
+        stdout = await _connect_reader(stdout_r)
+        stderr = await _connect_reader(stderr_r)
+        transport, protocol = await loop.connect_write_pipe(
+            lambda: asyncio.streams.FlowControlMixin(loop=loop),
+            os.fdopen(stdin_w, "wb", buffering=0),
+        )
+        stdin = asyncio.StreamWriter(transport, protocol, None, loop)
+        return ZygoteProcess(int(reply["pid"]), stdin, stdout, stderr, control)
+
+    @staticmethod
+    async def _read_line(control: socket.socket) -> dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        buffer = b""
+        while b"\n" not in buffer:
+            chunk = await loop.sock_recv(control, 4096)
+            if not chunk:
+                raise OSError("zygote closed the connection")
+            buffer += chunk
+        return json.loads(buffer.split(b"\n", 1)[0])
+
+    async def shutdown(self) -> None:
+        process, self._process = self._process, None
+        if process is not None and process.returncode is None:
+            if process.stdin is not None:
+                process.stdin.close()
+            try:
+                await asyncio.wait_for(process.wait(), timeout=5)
+            except TimeoutError:
+                with contextlib.suppress(ProcessLookupError):
+                    process.kill()
+                await process.wait()
+        self._cleanup_socket()
+
+    def _cleanup_socket(self) -> None:
+        if self._socket_dir is not None:
+            self._socket_dir.cleanup()
+        self._socket_dir = None
+        self._socket_path = None
+
+
+async def _connect_reader(fd: int) -> asyncio.StreamReader:
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=_STREAM_LIMIT, loop=loop)
+    await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader, loop=loop),
+        os.fdopen(fd, "rb", buffering=0),
+    )
+    return reader
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = sys.argv[1:] if argv is None else argv
+    if len(args) != 2:
+        print(
+            "usage: python -m mcp_agentcore_proxy.zygote MODULE SOCKET",
+            file=sys.stderr,
+        )
+        sys.exit(2)
+    sys.path.insert(0, os.getcwd())
+    serve(args[0], args[1])
+
+
+if __name__ == "__main__":
+    main()
@@ -18,7 +18,7 @@ def mock_subprocess():
 
     # Create async mock for stdout
     stdout = AsyncMock()
-    stdout.readline = AsyncMock()
+    stdout.readuntil = AsyncMock()
     process.stdout = stdout
 
     # Create async mock for stderr that returns empty bytes to terminate _drain_stderr
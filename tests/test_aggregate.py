@@ -0,0 +1,239 @@
+"""Tests for mcp_agentcore_proxy.aggregate module."""
+
+import io
+import json
+import queue
+import threading
+
+import pytest
+
+from mcp_agentcore_proxy.aggregate import Aggregator, Member, parse_members
+from mcp_agentcore_proxy.client import Output
+from mcp_agentcore_proxy.session_manager import RuntimeSessionConfig
+
+DOCS = "arn:aws:bedrock-agentcore:us-east-1:123456789012:runtime/docs-abc"
+TICKETS = "arn:aws:bedrock-agentcore:us-east-1:123456789012:runtime/tickets-def"
+
+
+class _Capture(Output):
+    def __init__(self):
+        super().__init__()
+        self.lines: list[dict] = []
+
+    def write_line(self, text):
+        with self._lock:
+            self.lines.append(json.loads(text))
+
+
+class _FakeRuntime:
+    """Each runtime serves one tool; ``barrier`` proves the fan-out is parallel."""
+
+    def __init__(self, barrier=None, failing=()):
+        self.barrier = barrier
+        self.failing = set(failing)
+        self.calls: list[tuple[str, dict]] = []
+        self.lock = threading.Lock()
+
+    def invoke(self, agent_arn, payload, runtime_session_id, out, repeatable=False):
+        message = json.loads(payload)
+        with self.lock:
+            self.calls.append((agent_arn, message))
+        name = agent_arn.rsplit("/", 1)[-1].split("-")[0]
+        method = message.get("method")
+        if method == "initialize" and self.barrier is not None:
+            self.barrier.wait(timeout=5)
+        if "id" not in message:
+            body = b""
+        elif agent_arn in self.failing:
+            body = json.dumps(
+                {
+                    "jsonrpc": "2.0",
+                    "id": message["id"],
+                    "error": {"code": -32000, "message": "down"},
+                }
+            ).encode()
+        else:
+            result = {"runtime": name, "params": message.get("params")}
+            if method == "initialize":
+                result = {
+                    "protocolVersion": "2025-06-18",
+                    "capabilities": {"tools": {"listChanged": True}},
+                    "serverInfo": {"name": name},
+                    "instructions": f"Use {name}.",
+                }
+            elif method == "tools/list":
+                result = {"tools": [{"name": "search", "description": name}]}
+            body = json.dumps(
+                {"jsonrpc": "2.0", "id": message["id"], "result": result}
+            ).encode()
+        return {"response": io.BytesIO(body), "contentType": "application/json"}
+
+
+def _serve(runtime, *messages, members=None):
+    members = members or [Member("docs", DOCS), Member("tickets", TICKETS)]
+    out = _Capture()
+    aggregator = Aggregator(
+        members, runtime, RuntimeSessionConfig(mode="session"), out, 4
+    )
+    lines: queue.Queue[str | None] = queue.Queue()
+    for message in messages:
+        lines.put(json.dumps(message))
+    lines.put(None)
+    try:
+        aggregator.serve(lines)
+    finally:
+        aggregator.close()
+    return out.lines
+
+
+def _call(request_id, method, **params):
+    message = {"jsonrpc": "2.0", "id": request_id, "method": method}
+    if params:
+        message["params"] = params
+    return message
+
+
+def test_parse_members_uses_names_or_runtime_ids():
+    """Test entries may be named, and otherwise take the ARN's runtime id."""
+    members = parse_members(f"docs={DOCS}, {TICKETS}")
+
+    assert members == [Member("docs", DOCS), Member("tickets-def", TICKETS)]
+    with pytest.raises(ValueError, match="Duplicate"):
+        parse_members(f"a={DOCS},a={TICKETS}")
+    with pytest.raises(ValueError, match="Invalid"):
+        parse_members("docs=not-an-arn")
+
+
+def test_initialize_fans_out_in_parallel_and_merges():
+    """Test every runtime is initialized at once and the results are merged."""
+    # Sequential calls would leave the barrier short of parties and time out
+    runtime = _FakeRuntime(barrier=threading.Barrier(2))
+
+    [reply] = _serve(runtime, _call(0, "initialize"))
+
+    result = reply["result"]
+    assert reply["id"] == 0
+    assert result["protocolVersion"] == "2025-06-18"
+    assert result["capabilities"] == {"tools": {"listChanged": True}}
+    assert result["instructions"] == "[docs] Use docs.\n\n[tickets] Use tickets."
+
+
+def test_tools_are_namespaced_and_calls_routed():
+    """Test tool names carry their runtime and calls reach the owner."""
+    runtime = _FakeRuntime()
+
+    replies = _serve(
+        runtime,
+        _call(1, "tools/list"),
+        _call(2, "tools/call", name="tickets__search", arguments={"q": "x"}),
+        _call(3, "tools/call", name="search"),
+    )
+
+    # Requests are answered concurrently, so replies may arrive in any order
+    listed, called, unknown = sorted(replies, key=lambda reply: reply["id"])
+
+    assert [tool["name"] for tool in listed["result"]["tools"]] == [
+        "docs__search",
+        "tickets__search",
+    ]
+    assert called["result"]["runtime"] == "tickets"
+    assert called["result"]["params"] == {"name": "search", "arguments": {"q": "x"}}
+    assert unknown["error"]["code"] == -32602
+    assert [arn for arn, message in runtime.calls if message["id"] == 2] == [TICKETS]
+
+
+def test_call_before_listing_builds_the_index():
+    """Test a tools/call arriving first still finds its runtime."""
+    runtime = _FakeRuntime()
+
+    [called] = _serve(runtime, _call(5, "tools/call", name="docs__search"))
+
+    assert called["id"] == 5
+    assert called["result"]["runtime"] == "docs"
+
+
+def test_failing_runtime_is_reported_and_skipped():
+    """Test one runtime's failure leaves the others' tools available."""
+    runtime = _FakeRuntime(failing={TICKETS})
+
+    lines = _serve(runtime, _call(1, "tools/list"))
+
+    [warning] = [line for line in lines if "method" in line]
+    [listed] = [line for line in lines if "id" in line]
+    assert warning["params"]["level"] == "warning"
+    assert "tickets" in warning["params"]["data"]
+    assert [tool["name"] for tool in listed["result"]["tools"]] == ["docs__search"]
+
+
+class _ElicitingRuntime(_FakeRuntime):
+    """A tools/call that waits for the IDE to answer an elicitation."""
+
+    def __init__(self):
+        super().__init__()
+        self.answer: queue.Queue[dict] = queue.Queue()
+
+    def invoke(self, agent_arn, payload, runtime_session_id, out, repeatable=False):
+        message = json.loads(payload)
+        if message.get("method") is None:
+            self.answer.put(message)
+            return {"response": io.BytesIO(b""), "contentType": "application/json"}
+        if message.get("method") != "tools/call":
+            return super().invoke(agent_arn, payload, runtime_session_id, out)
+        request_id = message["id"]
+
+        class _Events:
+            def iter_lines(inner):
+                elicit = {
+                    "jsonrpc": "2.0",
+                    "id": 7,
+                    "method": "elicitation/create",
+                    "params": {"message": "Which ticket?"},
+                }
+                yield f"data: {json.dumps(elicit)}".encode()
+                yield b""
+                # The stream stays open until the IDE has answered
+                answer = self.answer.get(timeout=5)
+                reply = {
+                    "jsonrpc": "2.0",
+                    "id": request_id,
+                    "result": {"answer": answer["result"], "answer_id": answer["id"]},
+                }
+                yield f"data: {json.dumps(reply)}".encode()
+                yield b""
+
+        return {"response": _Events(), "contentType": "text/event-stream"}
+
+
+def test_elicitation_round_trips_while_the_call_streams():
+    """Test a server request reaches the IDE before the member's stream ends."""
+    runtime = _ElicitingRuntime()
+    lines: queue.Queue[str | None] = queue.Queue()
+
+    class _Ide(_Capture):
+        def write_line(self, text):
+            super().write_line(text)
+            message = json.loads(text)
+            if message.get("method") == "elicitation/create":
+                reply = {"jsonrpc": "2.0", "id": message["id"], "result": "T-1"}
+                lines.put(json.dumps(reply))
+            elif "result" in message:
+                lines.put(None)
+
+    out = _Ide()
+    aggregator = Aggregator(
+        [Member("docs", DOCS), Member("tickets", TICKETS)],
+        runtime,
+        RuntimeSessionConfig(mode="session"),
+        out,
+        4,
+    )
+    lines.put(json.dumps(_call(1, "tools/call", name="tickets__search")))
+    try:
+        aggregator.serve(lines)
+    finally:
+        aggregator.close()
+
+    elicit, called = out.lines
+    assert elicit["id"] == "tickets__7"
+    assert called["id"] == 1
+    assert called["result"] == {"answer": "T-1", "answer_id": 7}
@@ -0,0 +1,97 @@
+"""Tests for mcp_agentcore_proxy.breaker module."""
+
+import pytest
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+from mcp_agentcore_proxy.breaker import (
+    BreakerPolicy,
+    CircuitBreaker,
+    CircuitOpen,
+    is_failure,
+)
+
+ARN = "arn:aws:bedrock-agentcore:us-east-1:123456789012:runtime/demo"
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _client_error(code, status):
+    return ClientError(
+        {"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": status}},
+        "InvokeAgentRuntime",
+    )
+
+
+DOWN = EndpointConnectionError(endpoint_url="https://example.com")
+
+
+def test_only_runtime_health_errors_are_failures():
+    """Test request errors and throttling leave the breaker alone."""
+    assert is_failure(DOWN)
+    assert is_failure(_client_error("InternalServerException", 500))
+    assert is_failure(_client_error("AccessDeniedException", 403))
+    assert not is_failure(_client_error("ValidationException", 400))
+    assert not is_failure(_client_error("ThrottlingException", 429))
+    assert not is_failure(_client_error("ExpiredTokenException", 403))
+
+
+def test_opens_after_consecutive_failures():
+    """Test a success in between resets the count."""
+    breaker = CircuitBreaker(ARN, BreakerPolicy(failures=2))
+
+    assert breaker.record(DOWN) is None
+    assert breaker.record(None) is None
+    assert breaker.record(DOWN) is None
+    assert breaker.record(DOWN) == "opened"
+    with pytest.raises(CircuitOpen, match="unavailable after 2 consecutive"):
+        breaker.before_call()
+
+
+def test_half_open_lets_one_probe_through():
+    """Test only one caller probes after the cooldown; its outcome decides."""
+    clock = _Clock()
+    breaker = CircuitBreaker(ARN, BreakerPolicy(failures=1, cooldown=10), clock)
+    breaker.record(DOWN)
+
+    clock.now = 10
+    assert breaker.before_call()
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+    # A failed probe opens the breaker for another cooldown, without a new report
+    assert breaker.record(DOWN) is None
+    with pytest.raises(CircuitOpen):
+        breaker.before_call()
+
+    clock.now = 20
+    assert breaker.before_call()
+    assert breaker.record(None) == "closed"
+    assert not breaker.before_call()
+
+
+def test_abandoned_probe_lets_the_next_call_probe():
+    """Test a probe that never reached the runtime does not wedge the breaker."""
+    clock = _Clock()
+    breaker = CircuitBreaker(ARN, BreakerPolicy(failures=1, cooldown=10), clock)
+    breaker.record(DOWN)
+
+    clock.now = 10
+    assert breaker.before_call()
+    breaker.abandon_probe()
+    assert breaker.before_call()
+    assert breaker.record(None) == "closed"
+
+
+def test_disabled_breaker_never_opens():
+    """Test AGENTCORE_BREAKER_FAILURES=0 turns the breaker off."""
+    breaker = CircuitBreaker(ARN, BreakerPolicy(failures=0))
+
+    for _ in range(10):
+        breaker.record(DOWN)
+
+    assert not breaker.before_call()
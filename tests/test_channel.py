@@ -0,0 +1,120 @@
+"""Tests for mcp_agentcore_proxy.channel module."""
+
+import json
+import queue
+import threading
+
+import pytest
+
+from mcp_agentcore_proxy.channel import ChannelError, WebSocketChannel
+
+
+class _FakeConnection:
+    """In-memory socket; ``reply`` decides what the fake bridge sends back."""
+
+    def __init__(self, reply=None):
+        self.sent: list[str] = []
+        self.frames: queue.Queue = queue.Queue()
+        self.reply = reply or (lambda message: [])
+
+    def send(self, message):
+        self.sent.append(message)
+        for frame in self.reply(json.loads(message)):
+            self.frames.put(json.dumps(frame))
+
+    def recv(self):
+        frame = self.frames.get(timeout=5)
+        if frame is None:
+            raise ConnectionError("closed")
+        return frame
+
+    def close(self):
+        self.frames.put(None)
+
+
+def _result(message):
+    if "id" not in message or "method" not in message:
+        return []
+    return [{"jsonrpc": "2.0", "id": message["id"], "result": message["method"]}]
+
+
+class _Harness:
+    def __init__(self, *connections):
+        self.connections = list(connections)
+        self.opened: list[_FakeConnection] = []
+        self.received: queue.Queue = queue.Queue()
+        self.lost: list = []
+        self.lost_event = threading.Event()
+        self.channel = WebSocketChannel(self.connect, self.received.put, self.on_lost)
+
+    def connect(self):
+        if not self.connections:
+            raise OSError("refused")
+        connection = self.connections.pop(0)
+        self.opened.append(connection)
+        return connection
+
+    def on_lost(self, ids):
+        self.lost.extend(ids)
+        self.lost_event.set()
+
+    def next_message(self):
+        return json.loads(self.received.get(timeout=5))
+
+
+def test_messages_flow_both_ways():
+    """Test requests go out as frames and every frame received is delivered."""
+
+    def reply(message):
+        if message.get("method") != "tools/call":
+            return []
+        return [
+            {"jsonrpc": "2.0", "method": "notifications/progress", "params": {}},
+            {"jsonrpc": "2.0", "id": message["id"], "result": {}},
+        ]
+
+    harness = _Harness(_FakeConnection(reply))
+    harness.channel.send('{"jsonrpc": "2.0", "method": "notifications/initialized"}')
+    harness.channel.send('{"jsonrpc": "2.0", "id": 1, "method": "tools/call"}')
+
+    assert harness.next_message()["method"] == "notifications/progress"
+    assert harness.next_message()["id"] == 1
+    assert len(harness.opened) == 1
+    assert len(harness.opened[0].sent) == 2
+    harness.channel.close()
+
+
+def test_dropped_socket_fails_pending_and_reconnects_with_handshake():
+    """Test unanswered requests are reported and a new socket replays initialize."""
+    first = _FakeConnection()
+    second = _FakeConnection(_result)
+    harness = _Harness(first, second)
+    initialize = '{"jsonrpc": "2.0", "id": 0, "method": "initialize"}'
+    harness.channel.send(initialize)
+    first.frames.put(json.dumps({"jsonrpc": "2.0", "id": 0, "result": {}}))
+    assert harness.next_message()["id"] == 0
+
+    harness.channel.send('{"jsonrpc": "2.0", "id": "slow", "method": "tools/call"}')
+    first.close()
+    assert harness.lost_event.wait(5)
+    assert harness.lost == ["slow"]
+
+    harness.channel.send('{"jsonrpc": "2.0", "id": 2, "method": "tools/list"}')
+
+    # The replayed initialize is answered on the wire but not delivered again
+    assert [json.loads(m).get("method") for m in second.sent] == [
+        "initialize",
+        "notifications/initialized",
+        "tools/list",
+    ]
+    assert harness.next_message() == {"jsonrpc": "2.0", "id": 2, "result": "tools/list"}
+    assert harness.received.empty()
+    harness.channel.close()
+
+
+def test_connect_failure_raises_channel_error():
+    """Test an unreachable endpoint surfaces as ChannelError for HTTP fallback."""
+    harness = _Harness()
+
+    with pytest.raises(ChannelError, match="Unable to open WebSocket"):
+        harness.channel.send('{"jsonrpc": "2.0", "id": 1, "method": "ping"}')
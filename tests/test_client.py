@@ -2,6 +2,8 @@
 
 import io
 import json
+import threading
+from typing import ClassVar
 from unittest.mock import MagicMock
 
 import pytest
@@ -16,6 +18,13 @@ def _clear_debug_env(monkeypatch):
     monkeypatch.delenv("LOG_LEVEL", raising=False)
     monkeypatch.delenv("MCP_PROXY_DEBUG", raising=False)
     monkeypatch.delenv("AWS_PROFILE", raising=False)
+    monkeypatch.delenv("AGENTCORE_DAEMON_SOCKET", raising=False)
+    monkeypatch.delenv("AGENTCORE_AGENT_ARNS", raising=False)
+    monkeypatch.delenv("AGENTCORE_WARM_START", raising=False)
+    monkeypatch.delenv("AGENTCORE_PREFETCH", raising=False)
+    monkeypatch.delenv("AGENTCORE_HEDGE", raising=False)
+    monkeypatch.delenv("AGENTCORE_BREAKER_FAILURES", raising=False)
+    monkeypatch.delenv("AGENTCORE_RETRY_ATTEMPTS", raising=False)
 
 
 def _expired_token_error() -> ClientError:
@@ -129,3 +138,849 @@ def test_main_prompts_for_sso_login_during_request(monkeypatch, capsys):
     captured = capsys.readouterr()
     stdout_lines = [line for line in captured.out.splitlines() if line]
     assert any("aws sso login --profile dev-profile" in line for line in stdout_lines)
+
+
+def test_main_forwards_replies_while_request_in_flight(monkeypatch, capsys):
+    """IDE replies to server requests must not wait behind the call that asked."""
+
+    monkeypatch.setenv(
+        "AGENTCORE_AGENT_ARN", "arn:aws:bedrock:us-east-1:123456789012:agent/test"
+    )
+
+    session_manager = MagicMock()
+    session_manager.next_session_id.return_value = "session-1"
+    monkeypatch.setattr(
+        client_module, "RuntimeSessionManager", MagicMock(return_value=session_manager)
+    )
+
+    reply_delivered = threading.Event()
+
+    def invoke_agent_runtime(**kwargs):
+        message = json.loads(kwargs["payload"])
+        if "method" not in message:
+            reply_delivered.set()
+            return {"response": io.BytesIO(b""), "contentType": "application/json"}
+        # The bridge only finishes the call once the elicitation reply arrives
+        assert reply_delivered.wait(timeout=5)
+        return {
+            "response": io.BytesIO(b'{"jsonrpc":"2.0","id":1,"result":"ok"}'),
+            "contentType": "application/json",
+        }
+
+    session = MagicMock()
+    session.client.return_value.invoke_agent_runtime.side_effect = invoke_agent_runtime
+    monkeypatch.setattr(
+        client_module, "resolve_aws_session", MagicMock(return_value=session)
+    )
+
+    lines = [
+        json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/call"}),
+        json.dumps({"jsonrpc": "2.0", "id": "s-1", "result": {"action": "accept"}}),
+    ]
+    monkeypatch.setattr(
+        client_module.sys, "stdin", io.StringIO("\n".join(lines) + "\n")
+    )
+
+    client_module.main()
+
+    stdout_lines = [line for line in capsys.readouterr().out.splitlines() if line]
+    assert stdout_lines == ['{"jsonrpc":"2.0","id":1,"result":"ok"}']
+
+
+def _patch_single_client(monkeypatch, invoke_agent_runtime):
+    monkeypatch.setenv(
+        "AGENTCORE_AGENT_ARN", "arn:aws:bedrock:us-east-1:123456789012:agent/test"
+    )
+    session_manager = MagicMock()
+    session_manager.next_session_id.return_value = "session-1"
+    monkeypatch.setattr(
+        client_module, "RuntimeSessionManager", MagicMock(return_value=session_manager)
+    )
+    session = MagicMock()
+    session.client.return_value.invoke_agent_runtime.side_effect = invoke_agent_runtime
+    monkeypatch.setattr(
+        client_module, "resolve_aws_session", MagicMock(return_value=session)
+    )
+    return session.client.return_value
+
+
+def _batch_echo(**kwargs):
+    messages = json.loads(kwargs["payload"])
+    replies = [
+        {"jsonrpc": "2.0", "id": message["id"], "result": message["method"]}
+        for message in messages
+    ]
+    return {
+        "response": io.BytesIO(json.dumps(replies).encode("utf-8")),
+        "contentType": "application/json",
+    }
+
+
+def test_main_coalesces_queued_requests(monkeypatch, capsys):
+    """Requests already waiting on stdin go out as one batch and come back split."""
+    monkeypatch.setenv("AGENTCORE_MAX_BATCH", "16")
+    monkeypatch.setenv("AGENTCORE_BATCH_WINDOW_MS", "500")
+    agentcore = _patch_single_client(monkeypatch, _batch_echo)
+    lines = [
+        json.dumps({"jsonrpc": "2.0", "id": n, "method": method})
+        for n, method in enumerate(["tools/list", "prompts/list", "resources/list"])
+    ]
+    monkeypatch.setattr(
+        client_module.sys, "stdin", io.StringIO("\n".join(lines) + "\n")
+    )
+
+    client_module.main()
+
+    assert agentcore.invoke_agent_runtime.call_count == 1
+    stdout_lines = [line for line in capsys.readouterr().out.splitlines() if line]
+    assert [json.loads(line) for line in stdout_lines] == [
+        {"jsonrpc": "2.0", "id": 0, "result": "tools/list"},
+        {"jsonrpc": "2.0", "id": 1, "result": "prompts/list"},
+        {"jsonrpc": "2.0", "id": 2, "result": "resources/list"},
+    ]
+
+
+def test_main_forwards_ide_batch(monkeypatch, capsys):
+    """A batch written by the IDE is answered with a single array."""
+    monkeypatch.setenv("AGENTCORE_MAX_BATCH", "1")
+    agentcore = _patch_single_client(monkeypatch, _batch_echo)
+    batch = [
+        {"jsonrpc": "2.0", "id": 1, "method": "tools/list"},
+        {"jsonrpc": "2.0", "id": 2, "method": "prompts/list"},
+    ]
+    monkeypatch.setattr(
+        client_module.sys, "stdin", io.StringIO(json.dumps(batch) + "\n")
+    )
+
+    client_module.main()
+
+    assert agentcore.invoke_agent_runtime.call_count == 1
+    stdout_lines = [line for line in capsys.readouterr().out.splitlines() if line]
+    assert len(stdout_lines) == 1
+    assert [reply["id"] for reply in json.loads(stdout_lines[0])] == [1, 2]
+
+
+def test_main_replays_handshake_on_uninitialized_error(monkeypatch, capsys):
+    """A -32602 reply re-sends the cached handshake and retries the request."""
+    uninitialized = (
+        b'{"jsonrpc":"2.0","id":2,"error":{"code":-32602,'
+        b'"message":"Invalid request parameters","data":{"code":1}}}'
+    )
+    replies = iter(
+        [
+            b'{"jsonrpc":"2.0","id":1,"result":{}}',
+            uninitialized,
+            b'{"jsonrpc":"2.0","id":1,"result":{}}',
+            b"",
+            b'{"jsonrpc":"2.0","id":2,"result":"retried"}',
+        ]
+    )
+    sent = []
+
+    def invoke_agent_runtime(**kwargs):
+        sent.append(json.loads(kwargs["payload"]).get("method"))
+        return {
+            "response": io.BytesIO(next(replies)),
+            "contentType": "application/json",
+        }
+
+    _patch_single_client(monkeypatch, invoke_agent_runtime)
+    lines = [
+        json.dumps({"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}}),
+        json.dumps({"jsonrpc": "2.0", "id": 2, "method": "tools/list"}),
+    ]
+    monkeypatch.setattr(
+        client_module.sys, "stdin", io.StringIO("\n".join(lines) + "\n")
+    )
+
+    client_module.main()
+
+    assert sent == [
+        "initialize",
+        "tools/list",
+        "initialize",
+        "notifications/initialized",
+        "tools/list",
+    ]
+    replies_out = [
+        line
+        for line in capsys.readouterr().out.splitlines()
+        if line and "notifications/message" not in line
+    ]
+    assert replies_out == [
+        '{"jsonrpc":"2.0","id":1,"result":{}}',
+        '{"jsonrpc":"2.0","id":2,"result":"retried"}',
+    ]
+
+
+class _ChunkedBody(io.BytesIO):
+    """StreamingBody stand-in that refuses unbounded reads."""
+
+    def read(self, size=-1):
+        assert size is not None and size > 0, "body must be read in bounded chunks"
+        return super().read(size)
+
+
+def test_main_streams_large_json_body(monkeypatch, capsysbinary):
+    """Large JSON bodies are copied through in chunks and end in one newline."""
+    text = "é" * (3 * client_module.JSON_CHUNK_SIZE)
+    body = json.dumps(
+        {"jsonrpc": "2.0", "id": 1, "result": {"text": text}}, ensure_ascii=False
+    ).encode("utf-8")
+
+    def invoke_agent_runtime(**kwargs):
+        return {
+            "response": _ChunkedBody(body + b"\n\n"),
+            "contentType": "application/json",
+        }
+
+    _patch_single_client(monkeypatch, invoke_agent_runtime)
+    request = json.dumps({"jsonrpc": "2.0", "id": 1, "method": "resources/read"})
+    monkeypatch.setattr(client_module.sys, "stdin", io.StringIO(request + "\n"))
+
+    client_module.main()
+
+    assert capsysbinary.readouterr().out == body + b"\n"
+
+
+def test_main_reports_invoke_errors_for_single_request(monkeypatch, capsys):
+    """An InvokeAgentRuntime failure becomes a JSON-RPC error for that id."""
+
+    def invoke_agent_runtime(**kwargs):
+        raise ClientError(
+            {"Error": {"Code": "ThrottlingException", "Message": "slow down"}},
+            "InvokeAgentRuntime",
+        )
+
+    _patch_single_client(monkeypatch, invoke_agent_runtime)
+    request = json.dumps({"jsonrpc": "2.0", "id": 9, "method": "tools/list"})
+    monkeypatch.setattr(client_module.sys, "stdin", io.StringIO(request + "\n"))
+
+    client_module.main()
+
+    reply = json.loads(capsys.readouterr().out)
+    assert reply["id"] == 9
+    assert reply["error"]["code"] == -32000
+    assert "ThrottlingException" in reply["error"]["message"]
+
+
+def test_main_answers_requests_that_fail_unexpectedly(monkeypatch, capsys):
+    """A bug while handling a request still gets the IDE an error reply."""
+
+    def invoke_agent_runtime(**kwargs):
+        raise RuntimeError("unexpected")
+
+    _patch_single_client(monkeypatch, invoke_agent_runtime)
+    request = json.dumps({"jsonrpc": "2.0", "id": 9, "method": "tools/list"})
+    monkeypatch.setattr(client_module.sys, "stdin", io.StringIO(request + "\n"))
+
+    client_module.main()
+
+    captured = capsys.readouterr()
+    reply = json.loads(captured.out)
+    assert reply["id"] == 9
+    assert reply["error"]["code"] == -32603
+    assert "unexpected" in captured.err
+
+
+class _FakeChannel:
+    """WebSocketChannel stand-in that answers requests inline."""
+
+    instances: ClassVar[list["_FakeChannel"]] = []
+
+    def __init__(self, connect, on_message, on_lost, fail=False):
+        self.on_message = on_message
+        self.sent: list[str] = []
+        self.fail = fail
+        self.closed = False
+        _FakeChannel.instances.append(self)
+
+    def send(self, message):
+        if self.fail:
+            raise client_module.ChannelError("no websockets here")
+        self.sent.append(message)
+        parsed = json.loads(message)
+        if "id" in parsed and "method" in parsed:
+            self.on_message(
+                json.dumps({"jsonrpc": "2.0", "id": parsed["id"], "result": {}})
+            )
+
+    def close(self):
+        self.closed = True
+
+
+def test_main_sends_everything_over_websocket(monkeypatch, capsys):
+    """With the WebSocket transport every line is one frame, notifications too."""
+    monkeypatch.setenv("AGENTCORE_TRANSPORT", "websocket")
+    monkeypatch.setattr(_FakeChannel, "instances", [])
+    monkeypatch.setattr(client_module, "WebSocketChannel", _FakeChannel)
+    agentcore = _patch_single_client(monkeypatch, _batch_echo)
+    lines = [
+        {"jsonrpc": "2.0", "id": 1, "method": "initialize", "params": {}},
+        {"jsonrpc": "2.0", "method": "notifications/initialized"},
+        {"jsonrpc": "2.0", "method": "notifications/cancelled", "params": {}},
+        {"jsonrpc": "2.0", "id": 2, "method": "tools/list"},
+    ]
+    monkeypatch.setattr(
+        client_module.sys,
+        "stdin",
+        io.StringIO("".join(json.dumps(line) + "\n" for line in lines)),
+    )
+
+    client_module.main()
+
+    channel = _FakeChannel.instances[0]
+    assert [json.loads(message) for message in channel.sent] == lines
+    assert channel.closed
+    agentcore.invoke_agent_runtime.assert_not_called()
+    replies = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [reply["id"] for reply in replies] == [1, 2]
+
+
+def test_main_falls_back_to_http_without_websocket(monkeypatch, capsys):
+    """An unusable WebSocket switches the session to HTTP with a warning."""
+    monkeypatch.setenv("AGENTCORE_TRANSPORT", "websocket")
+    monkeypatch.setattr(
+        client_module,
+        "WebSocketChannel",
+        lambda *args: _FakeChannel(*args, fail=True),
+    )
+
+    def invoke_agent_runtime(**kwargs):
+        return {
+            "response": io.BytesIO(b'{"jsonrpc":"2.0","id":1,"result":{}}'),
+            "contentType": "application/json",
+        }
+
+    agentcore = _patch_single_client(monkeypatch, invoke_agent_runtime)
+    request = json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/list"})
+    monkeypatch.setattr(client_module.sys, "stdin", io.StringIO(request + "\n"))
+
+    client_module.main()
+
+    assert agentcore.invoke_agent_runtime.call_count == 1
+    messages = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert messages[0]["method"] == "notifications/message"
+    assert "falling back to HTTP" in messages[0]["params"]["data"]
+    assert messages[1] == {"jsonrpc": "2.0", "id": 1, "result": {}}
+
+
+def test_websocket_request_is_signed(monkeypatch):
+    """The WebSocket handshake carries SigV4 headers and the session id."""
+    from botocore.credentials import Credentials
+
+    monkeypatch.delenv("AGENTCORE_WS_URL", raising=False)
+    monkeypatch.delenv("AGENTCORE_ENDPOINT_URL", raising=False)
+    session = MagicMock()
+    session.get_credentials.return_value = Credentials("AKID", "secret")
+    arn = "arn:aws:bedrock-agentcore:us-east-1:123456789012:runtime/demo"
+
+    url, headers = client_module._websocket_request(
+        session, "us-east-1", arn, "session-1"
+    )
+
+    assert url == (
+        "wss://bedrock-agentcore.us-east-1.amazonaws.com/runtimes/"
+        "arn%3Aaws%3Abedrock-agentcore%3Aus-east-1%3A123456789012%3Aruntime%2Fdemo/ws"
+    )
+    assert headers["X-Amzn-Bedrock-AgentCore-Runtime-Session-Id"] == "session-1"
+    assert headers["Authorization"].startswith("AWS4-HMAC-SHA256 Credential=AKID/")
+
+    monkeypatch.setenv("AGENTCORE_ENDPOINT_URL", "http://localhost:8080/")
+    assert client_module._websocket_request(session, "us-east-1", arn, "s")[0] == (
+        "ws://localhost:8080/runtimes/"
+        "arn%3Aaws%3Abedrock-agentcore%3Aus-east-1%3A123456789012%3Aruntime%2Fdemo/ws"
+    )
+
+    monkeypatch.setenv("AGENTCORE_WS_URL", "ws://localhost:8080/ws")
+    assert client_module._websocket_request(session, "us-east-1", arn, "s")[0] == (
+        "ws://localhost:8080/ws"
+    )
+
+
+def test_main_uses_http2_sender_and_endpoint_override(monkeypatch, capsys):
+    """AGENTCORE_TRANSPORT=http2 hooks one shared sender into the AgentCore client."""
+    monkeypatch.setenv("AGENTCORE_TRANSPORT", "http2")
+    monkeypatch.setenv("AGENTCORE_ENDPOINT_URL", "http://localhost:8080")
+    sender = MagicMock()
+    monkeypatch.setattr(client_module, "Http2Sender", MagicMock(return_value=sender))
+    agentcore = _patch_single_client(monkeypatch, _batch_echo)
+    session = client_module.resolve_aws_session.return_value
+    monkeypatch.setattr(client_module.sys, "stdin", io.StringIO(""))
+
+    client_module.main()
+
+    assert session.client.call_args.kwargs["endpoint_url"] == "http://localhost:8080"
+    sender.register.assert_called_once_with(agentcore.meta.events)
+    sender.close.assert_called_once()
+
+
+def test_main_attaches_to_daemon_without_building_a_client(monkeypatch):
+    """With AGENTCORE_DAEMON_SOCKET the process is only a shim."""
+    from mcp_agentcore_proxy import daemon
+
+    monkeypatch.setenv("AGENTCORE_DAEMON_SOCKET", "/tmp/proxy.sock")
+    monkeypatch.setenv("RUNTIME_SESSION_MODE", "identity")
+    monkeypatch.setenv(
+        "AGENTCORE_AGENT_ARN", "arn:aws:bedrock:us-east-1:123456789012:agent/test"
+    )
+    attach = MagicMock(return_value=True)
+    monkeypatch.setattr(daemon, "attach", attach)
+    resolve = MagicMock()
+    monkeypatch.setattr(client_module, "resolve_aws_session", resolve)
+    manager = MagicMock()
+    monkeypatch.setattr(client_module, "RuntimeSessionManager", manager)
+
+    client_module.main([])
+
+    attach.assert_called_once_with(
+        "/tmp/proxy.sock",
+        "arn:aws:bedrock:us-east-1:123456789012:agent/test",
+        "identity",
+    )
+    resolve.assert_not_called()
+    manager.assert_not_called()
+
+
+def test_main_aggregates_when_several_arns_are_listed(monkeypatch):
+    """With AGENTCORE_AGENT_ARNS the runtimes are served as one MCP server."""
+    from mcp_agentcore_proxy import aggregate
+
+    docs = "arn:aws:bedrock-agentcore:us-east-1:123456789012:runtime/docs"
+    tickets = "arn:aws:bedrock-agentcore:us-east-1:123456789012:runtime/tickets"
+    monkeypatch.delenv("AGENTCORE_AGENT_ARN", raising=False)
+    monkeypatch.delenv("AGENT_ARN", raising=False)
+    monkeypatch.setenv("AGENTCORE_AGENT_ARNS", f"{docs},{tickets}")
+    monkeypatch.setenv("AGENTCORE_DAEMON_SOCKET", "/tmp/proxy.sock")
+    aggregator = MagicMock()
+    monkeypatch.setattr(aggregate, "Aggregator", aggregator)
+    monkeypatch.setattr(client_module, "RuntimeClient", MagicMock())
+    monkeypatch.setattr(client_module, "_read_lines", MagicMock())
+    serve = MagicMock()
+    monkeypatch.setattr(client_module, "serve", serve)
+
+    client_module.main([])
+
+    members = aggregator.call_args.args[0]
+    assert [member.namespace for member in members] == ["docs", "tickets"]
+    aggregator.return_value.serve.assert_called_once()
+    serve.assert_not_called()
+
+
+def _discovery_runtime(tools, sent, gate=None):
+    """A runtime answering the handshake, tools/list with ``tools`` and calls.
+
+    With ``gate``, ``initialize`` is held until the event is set.
+    """
+
+    def invoke_agent_runtime(**kwargs):
+        message = json.loads(kwargs["payload"])
+        method = message.get("method")
+        sent.append(method)
+        if gate is not None and method == "initialize":
+            assert gate.wait(timeout=5)
+        if "id" not in message:
+            return {"response": io.BytesIO(b""), "contentType": "application/json"}
+        if method == "initialize":
+            result = {"protocolVersion": "2025-06-18", "capabilities": {"tools": {}}}
+        elif method == "tools/list":
+            result = {"tools": tools}
+        else:
+            result = {"called": True}
+        reply = {"jsonrpc": "2.0", "id": message["id"], "result": result}
+        return {
+            "response": io.BytesIO(json.dumps(reply).encode("utf-8")),
+            "contentType": "application/json",
+        }
+
+    return invoke_agent_runtime
+
+
+_HANDSHAKE = [
+    json.dumps(
+        {
+            "jsonrpc": "2.0",
+            "id": 0,
+            "method": "initialize",
+            "params": {"protocolVersion": "2025-06-18"},
+        }
+    ),
+    json.dumps({"jsonrpc": "2.0", "method": "notifications/initialized"}),
+]
+
+
+def test_main_fills_warm_start_cache_on_first_run(monkeypatch, capsys, tmp_path):
+    """Without a cache, discovery goes live and is stored for the next start."""
+    from mcp_agentcore_proxy.warmstart import DiscoveryCache
+
+    monkeypatch.setenv("AGENTCORE_WARM_START", str(tmp_path))
+    sent: list = []
+    _patch_single_client(monkeypatch, _discovery_runtime([{"name": "a"}], sent))
+    monkeypatch.setattr(
+        client_module.sys, "stdin", io.StringIO("\n".join(_HANDSHAKE) + "\n")
+    )
+
+    client_module.main([])
+
+    stdout_lines = [line for line in capsys.readouterr().out.splitlines() if line]
+    assert [json.loads(line)["id"] for line in stdout_lines] == [0]
+    assert sent == ["initialize", "notifications/initialized", "tools/list"]
+    cache = DiscoveryCache(
+        str(tmp_path), "arn:aws:bedrock:us-east-1:123456789012:agent/test"
+    )
+    listed = cache.list_reply({"id": 9, "method": "tools/list"})
+    assert json.loads(listed)["result"] == {"tools": [{"name": "a"}]}
+
+
+def test_warm_start_cache_leaves_no_temp_file_on_failure(monkeypatch, tmp_path):
+    """A cache write that fails is cleaned up instead of left as a .tmp file."""
+    from mcp_agentcore_proxy import warmstart
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(warmstart.os, "replace", fail)
+    cache = warmstart.DiscoveryCache(str(tmp_path), "arn")
+    cache.record("tools/list", {"tools": []})
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_main_answers_discovery_from_warm_start_cache(monkeypatch, capsys, tmp_path):
+    """Cached answers go out first; a changed live list is announced."""
+    from mcp_agentcore_proxy.warmstart import DiscoveryCache
+
+    cache = DiscoveryCache(
+        str(tmp_path), "arn:aws:bedrock:us-east-1:123456789012:agent/test"
+    )
+    cache.record(
+        "initialize",
+        {"protocolVersion": "2025-06-18", "capabilities": {"tools": {}}, "cached": 1},
+    )
+    cache.record("tools/list", {"tools": [{"name": "old"}]})
+    monkeypatch.setenv("AGENTCORE_WARM_START", str(tmp_path))
+    listed = threading.Event()
+
+    class _Stdout(client_module.Output):
+        def write_line(self, text):
+            super().write_line(text)
+            if json.loads(text).get("id") == 1:
+                listed.set()
+
+    # The runtime is still cold while the IDE lists tools
+    monkeypatch.setattr(client_module, "_STDOUT", _Stdout())
+    sent: list = []
+    _patch_single_client(
+        monkeypatch, _discovery_runtime([{"name": "new"}], sent, listed)
+    )
+    lines = [
+        *_HANDSHAKE,
+        json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/list"}),
+        json.dumps({"jsonrpc": "2.0", "id": 2, "method": "tools/call"}),
+    ]
+    monkeypatch.setattr(
+        client_module.sys, "stdin", io.StringIO("\n".join(lines) + "\n")
+    )
+
+    client_module.main([])
+
+    out = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line]
+    assert out[0]["result"]["cached"] == 1
+    assert out[1] == {"jsonrpc": "2.0", "id": 1, "result": {"tools": [{"name": "old"}]}}
+    assert {"jsonrpc": "2.0", "id": 2, "result": {"called": True}} in out
+    assert {"jsonrpc": "2.0", "method": "notifications/tools/list_changed"} in out
+    # Nothing but the handshake reaches the runtime before it completes
+    assert sent[:2] == ["initialize", "notifications/initialized"]
+    assert sorted(sent[2:]) == ["tools/call", "tools/list"]
+
+
+def _paged_runtime(sent, listed):
+    """A runtime with two pages of tools; ``listed`` is set once both were sent."""
+
+    def invoke_agent_runtime(**kwargs):
+        message = json.loads(kwargs["payload"])
+        method = message.get("method")
+        cursor = (message.get("params") or {}).get("cursor")
+        sent.append(method if cursor is None else f"{method} {cursor}")
+        if "id" not in message:
+            return {"response": io.BytesIO(b""), "contentType": "application/json"}
+        if method == "initialize":
+            result = {"protocolVersion": "2025-06-18", "capabilities": {"tools": {}}}
+        elif cursor is None:
+            result = {"tools": [{"name": "first"}], "nextCursor": "2"}
+        else:
+            result = {"tools": [{"name": "second"}]}
+            listed.set()
+        reply = {"jsonrpc": "2.0", "id": message["id"], "result": result}
+        return {
+            "response": io.BytesIO(json.dumps(reply).encode("utf-8")),
+            "contentType": "application/json",
+        }
+
+    return invoke_agent_runtime
+
+
+def test_main_prefetches_advertised_lists(monkeypatch, capsys):
+    """Every page of an advertised list is fetched before the IDE asks for it."""
+    monkeypatch.setenv("AGENTCORE_PREFETCH", "1")
+    sent: list = []
+    listed = threading.Event()
+    _patch_single_client(monkeypatch, _paged_runtime(sent, listed))
+
+    def stdin():
+        yield from (line + "\n" for line in _HANDSHAKE)
+        # The IDE lists only after the prefetch has finished
+        assert listed.wait(timeout=5)
+        yield json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/list"}) + "\n"
+        request = {"jsonrpc": "2.0", "id": 2, "method": "tools/list"}
+        request["params"] = {"cursor": "2"}
+        yield json.dumps(request) + "\n"
+
+    monkeypatch.setattr(client_module.sys, "stdin", stdin())
+
+    client_module.main([])
+
+    out = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line]
+    replies = {message["id"]: message["result"] for message in out}
+    assert replies[1] == {"tools": [{"name": "first"}], "nextCursor": "2"}
+    assert replies[2] == {"tools": [{"name": "second"}]}
+    assert sent == [
+        "initialize",
+        "notifications/initialized",
+        "tools/list",
+        "tools/list 2",
+    ]
+
+
+def test_main_lists_live_without_prefetch(monkeypatch, capsys):
+    """By default lists are fetched only when the IDE asks."""
+    sent: list = []
+    _patch_single_client(monkeypatch, _paged_runtime(sent, threading.Event()))
+    monkeypatch.setattr(
+        client_module.sys, "stdin", io.StringIO("\n".join(_HANDSHAKE) + "\n")
+    )
+
+    client_module.main([])
+
+    assert sent == ["initialize", "notifications/initialized"]
+
+
+def test_runtime_client_retries_only_repeatable_calls(monkeypatch):
+    """Timeouts are retried for tools/list but never for tools/call."""
+    from botocore.exceptions import ReadTimeoutError
+
+    monkeypatch.setattr(client_module.RetryPolicy, "backoff", lambda self, retry: 0)
+    agent = _patch_single_client(
+        monkeypatch,
+        MagicMock(
+            side_effect=[
+                ReadTimeoutError(endpoint_url="https://example.com"),
+                {"response": io.BytesIO(b"{}"), "contentType": "application/json"},
+                ReadTimeoutError(endpoint_url="https://example.com"),
+            ]
+        ),
+    )
+    runtime = client_module.RuntimeClient(client_module.resolve_settings())
+    out = client_module.Output()
+
+    runtime.invoke("arn", "{}", "session-1", out, repeatable=True)
+    with pytest.raises(ReadTimeoutError):
+        runtime.invoke("arn", "{}", "session-1", out)
+
+    assert agent.invoke_agent_runtime.call_count == 3
+
+
+def test_main_hedges_slow_list_calls(monkeypatch, capsys):
+    """A duplicate answers a list call slower than its p95, under the IDE's id."""
+    from mcp_agentcore_proxy.retry import LatencyTracker
+
+    monkeypatch.setenv("AGENTCORE_HEDGE", "1")
+    monkeypatch.setenv("AGENTCORE_MAX_BATCH", "1")
+    monkeypatch.setattr(
+        client_module, "LatencyTracker", lambda: LatencyTracker(min_samples=1)
+    )
+    answered = threading.Event()
+    # The first copy of the second call is stuck until the hedge has answered
+    hedge_answered = threading.Event()
+
+    class _Stdout(client_module.Output):
+        def write_line(self, text):
+            super().write_line(text)
+            answered.set()
+            if json.loads(text).get("id") == 2:
+                hedge_answered.set()
+
+    def invoke_agent_runtime(**kwargs):
+        message = json.loads(kwargs["payload"])
+        if message["id"] == 2:
+            assert hedge_answered.wait(timeout=5)
+        reply = {"jsonrpc": "2.0", "id": message["id"], "result": message["id"]}
+        return {
+            "response": io.BytesIO(json.dumps(reply).encode("utf-8")),
+            "contentType": "application/json",
+        }
+
+    monkeypatch.setattr(client_module, "_STDOUT", _Stdout())
+    _patch_single_client(monkeypatch, invoke_agent_runtime)
+
+    def stdin():
+        yield json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/list"}) + "\n"
+        # The second call goes out once the first one's latency is known
+        assert answered.wait(timeout=5)
+        yield json.dumps({"jsonrpc": "2.0", "id": 2, "method": "tools/list"}) + "\n"
+
+    monkeypatch.setattr(client_module.sys, "stdin", stdin())
+
+    client_module.main([])
+
+    out = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line]
+    assert out == [
+        {"jsonrpc": "2.0", "id": 1, "result": 1},
+        {"jsonrpc": "2.0", "id": 2, "result": "hedge-1"},
+    ]
+
+
+class _EventStream(io.BytesIO):
+    """An SSE response body, as botocore's StreamingBody reads it."""
+
+    def iter_lines(self):
+        yield from self.getvalue().split(b"\n")
+
+
+def test_main_hedged_event_stream_reply_keeps_the_ide_id(monkeypatch, capsys):
+    """A duplicate that answers with SSE is streamed under the IDE's id."""
+    from mcp_agentcore_proxy.retry import LatencyTracker
+
+    monkeypatch.setenv("AGENTCORE_HEDGE", "1")
+    monkeypatch.setattr(
+        client_module, "LatencyTracker", lambda: LatencyTracker(min_samples=1)
+    )
+    answered = threading.Event()
+    # The first copy of the second call is stuck until the hedge has answered
+    hedge_answered = threading.Event()
+
+    class _Stdout(client_module.Output):
+        def write_line(self, text):
+            super().write_line(text)
+            answered.set()
+            if json.loads(text).get("id") == 2:
+                hedge_answered.set()
+
+    def invoke_agent_runtime(**kwargs):
+        message = json.loads(kwargs["payload"])
+        if message["id"] == 2:
+            assert hedge_answered.wait(timeout=5)
+        if not str(message["id"]).startswith("hedge-"):
+            reply = {"jsonrpc": "2.0", "id": message["id"], "result": {}}
+            return {
+                "response": io.BytesIO(json.dumps(reply).encode("utf-8")),
+                "contentType": "application/json",
+            }
+        progress = {"jsonrpc": "2.0", "method": "notifications/progress"}
+        reply = {"jsonrpc": "2.0", "id": message["id"], "result": {"tools": []}}
+        events = f"data: {json.dumps(progress)}\n\ndata: {json.dumps(reply)}\n\n"
+        return {
+            "response": _EventStream(events.encode("utf-8")),
+            "contentType": "text/event-stream",
+        }
+
+    monkeypatch.setattr(client_module, "_STDOUT", _Stdout())
+    _patch_single_client(monkeypatch, invoke_agent_runtime)
+
+    def stdin():
+        yield json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/list"}) + "\n"
+        assert answered.wait(timeout=5)
+        yield json.dumps({"jsonrpc": "2.0", "id": 2, "method": "tools/list"}) + "\n"
+
+    monkeypatch.setattr(client_module.sys, "stdin", stdin())
+
+    client_module.main([])
+
+    out = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line]
+    assert out[1:] == [
+        {"jsonrpc": "2.0", "method": "notifications/progress"},
+        {"jsonrpc": "2.0", "id": 2, "result": {"tools": []}},
+    ]
+
+
+def test_hedged_json_reply_is_restored_while_streaming():
+    """The hedge's id is put back in a large JSON reply read in small chunks."""
+    reply = b'{"jsonrpc": "2.0", "id": "hedge-1", "result": "' + b"x" * 200_000 + b'"}'
+    stream = client_module._RestoredId(io.BytesIO(reply), "hedge-1", 7)
+
+    chunks = iter(lambda: stream.read(1000), b"")
+
+    assert json.loads(b"".join(chunks))["id"] == 7
+
+
+def test_runtime_client_fails_fast_while_runtime_is_down(monkeypatch):
+    """After repeated failures calls fail at once until a ping gets through."""
+    from botocore.exceptions import EndpointConnectionError
+
+    from mcp_agentcore_proxy.breaker import CircuitBreaker, CircuitOpen
+
+    monkeypatch.setenv("AGENTCORE_BREAKER_FAILURES", "2")
+    monkeypatch.setenv("AGENTCORE_RETRY_ATTEMPTS", "1")
+    now = [0.0]
+    monkeypatch.setattr(
+        client_module,
+        "CircuitBreaker",
+        lambda arn, policy: CircuitBreaker(arn, policy, clock=lambda: now[0]),
+    )
+    paced = []
+
+    class _CountingLimiter(client_module.RuntimeLimiter):
+        def run(self, call, hold=None):
+            paced.append(call)
+            return super().run(call, hold)
+
+    monkeypatch.setattr(client_module, "RuntimeLimiter", _CountingLimiter)
+    down = EndpointConnectionError(endpoint_url="https://example.com")
+    agent = _patch_single_client(
+        monkeypatch,
+        MagicMock(
+            side_effect=[
+                down,
+                down,
+                {"response": io.BytesIO(b"{}"), "contentType": "application/json"},
+                {"response": io.BytesIO(b"{}"), "contentType": "application/json"},
+            ]
+        ),
+    )
+    runtime = client_module.RuntimeClient(client_module.resolve_settings())
+    out = MagicMock()
+
+    for _ in range(2):
+        with pytest.raises(EndpointConnectionError):
+            runtime.invoke("arn", "{}", "session-1", out)
+    with pytest.raises(CircuitOpen):
+        runtime.invoke("arn", "{}", "session-1", out)
+    assert agent.invoke_agent_runtime.call_count == 2
+
+    now[0] = 30
+    runtime.invoke("arn", "{}", "session-1", out)
+
+    probe = json.loads(agent.invoke_agent_runtime.call_args_list[2].kwargs["payload"])
+    assert probe["method"] == "ping"
+    assert probe["id"].startswith(client_module.PROBE_ID_PREFIX)
+    assert agent.invoke_agent_runtime.call_count == 4
+    # The probe waits for capacity like the calls around it
+    assert len(paced) == 4
+    assert [call.args[0] for call in out.emit_log.call_args_list] == ["error", "info"]
+
+
+def test_held_body_releases_once_consumed():
+    """Test a reply's slot is released by reading to the end or closing."""
+    released = []
+    body = client_module._HeldBody(io.BytesIO(b"abc"), released.append)
+
+    assert body.read(2) == b"ab"
+    assert released == []
+    assert body.read(2) == b"c"
+    assert body.read(2) == b""
+    assert released == [True]
+
+    released.clear()
+    lines = client_module._HeldBody(MagicMock(), released.append)
+    lines.close()
+    assert released == [True]
@@ -0,0 +1,113 @@
+"""Tests for mcp_agentcore_proxy.compression module."""
+
+import io
+from types import SimpleNamespace
+
+import pytest
+
+from mcp_agentcore_proxy.compression import (
+    ENCODINGS,
+    ClientCompression,
+    Compressor,
+    DecodingStream,
+    SizeLimitExceeded,
+    compress,
+    decompress,
+    negotiate,
+)
+
+BODY = (
+    b'{"jsonrpc": "2.0", "id": 1, "result": {"text": "' + b"log line\\n" * 500 + b'"}}'
+)
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_round_trip(encoding):
+    """Test every available encoding round-trips and actually shrinks JSON."""
+    compressed = compress(BODY, encoding)
+
+    assert len(compressed) < len(BODY) / 5
+    assert decompress(compressed, encoding) == BODY
+
+
+def test_corrupt_or_unknown_input_raises_value_error():
+    """Test decoding problems surface as ValueError."""
+    with pytest.raises(ValueError, match="Invalid gzip"):
+        decompress(b"not gzip", "gzip")
+    with pytest.raises(ValueError, match="Unsupported"):
+        decompress(BODY, "br")
+
+
+@pytest.mark.parametrize("encoding", ENCODINGS)
+def test_decompress_stops_at_max_size(encoding):
+    """Test a body that expands past the limit is refused, not inflated whole."""
+    bomb = compress(b"\0" * (4 * 1024 * 1024), encoding)
+
+    assert decompress(bomb, encoding, max_size=4 * 1024 * 1024) == b"\0" * (
+        4 * 1024 * 1024
+    )
+    with pytest.raises(SizeLimitExceeded, match="more than 1024 bytes"):
+        decompress(bomb, encoding, max_size=1024)
+
+
+@pytest.mark.parametrize(
+    ("header", "expected"),
+    [
+        (None, None),
+        ("gzip, deflate", "gzip"),
+        ("GZIP;q=0.5", "gzip"),
+        ("gzip;q=0", None),
+        ("br", None),
+        ("*", ENCODINGS[0]),
+        ("identity", None),
+    ],
+)
+def test_negotiate(header, expected):
+    """Test Accept-Encoding parsing, including q=0 and wildcards."""
+    assert negotiate(header) == expected
+
+
+def test_decoding_stream_reads_flushed_chunks():
+    """Test a streamed body decodes chunk by chunk and line by line."""
+    compressor = Compressor("gzip")
+    events = [b"event: message\ndata: {}\n\n", b"data: " + BODY + b"\n\n"]
+    raw = b"".join(compressor.compress(event) + compressor.flush() for event in events)
+    raw += compressor.finish()
+
+    stream = DecodingStream(io.BytesIO(raw), "gzip")
+    assert stream.read(10) == b"event: mes"
+    assert stream.read() == b"".join(events)[10:]
+    assert stream.read() == b""
+    lines = list(DecodingStream(io.BytesIO(raw), "gzip").iter_lines(chunk_size=7))
+    assert lines == [b"event: message", b"data: {}", b"", b"data: " + BODY, b""]
+
+
+def test_client_compresses_requests_only_after_bridge_advertises():
+    """Test request bodies stay plain until the bridge lists what it accepts."""
+    hooks = ClientCompression(min_size=100)
+    params = {"body": BODY, "headers": {}}
+    hooks.before_call(params)
+
+    assert params["body"] == BODY
+    assert params["headers"] == {"Accept-Encoding": ", ".join(ENCODINGS)}
+
+    response = SimpleNamespace(headers={"accept-encoding": "gzip"})
+    hooks.after_call(http_response=response, parsed={})
+    small = {"body": b"{}", "headers": {}}
+    params = {"body": BODY, "headers": {}}
+    hooks.before_call(small)
+    hooks.before_call(params)
+
+    assert "Content-Encoding" not in small["headers"]
+    assert params["headers"]["Content-Encoding"] == "gzip"
+    assert decompress(params["body"], "gzip") == BODY
+
+
+def test_client_decodes_compressed_responses():
+    """Test a compressed response body is swapped for a decoding stream."""
+    parsed = {"response": io.BytesIO(compress(BODY, "gzip"))}
+    response = SimpleNamespace(headers={"content-encoding": "gzip"})
+
+    ClientCompression().after_call(http_response=response, parsed=parsed)
+
+    assert parsed["response"].read() == BODY
@@ -0,0 +1,299 @@
+"""Tests for mcp_agentcore_proxy.daemon module."""
+
+import io
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+
+import pytest
+
+from mcp_agentcore_proxy import daemon as daemon_module
+from mcp_agentcore_proxy.client import ProxySettings
+from mcp_agentcore_proxy.daemon import Daemon, ListCache, attach, environment_key
+
+SETTINGS = ProxySettings(
+    max_concurrency=4,
+    max_batch=1,
+    batch_window=0,
+    transport="http",
+    endpoint_url=None,
+    connect_timeout=1,
+    read_timeout=1,
+    compression_min_bytes=None,
+    prefetch=True,
+)
+ARN = "arn:aws:bedrock-agentcore:us-east-1:123456789012:runtime/demo"
+
+
+class _FakeRuntime:
+    """Answers every request with its method, id and runtime session."""
+
+    def __init__(self):
+        self.calls: list[tuple[str, dict]] = []
+        self.lock = threading.Lock()
+
+    def invoke(self, agent_arn, payload, runtime_session_id, out, repeatable=False):
+        message = json.loads(payload)
+        with self.lock:
+            self.calls.append((runtime_session_id, message))
+        body = b""
+        if "method" in message and "id" in message:
+            result = {
+                "method": message["method"],
+                "upstreamId": message["id"],
+                "session": runtime_session_id,
+            }
+            if message["method"] == "initialize":
+                result["capabilities"] = {"tools": {}}
+            body = json.dumps({"jsonrpc": "2.0", "id": message["id"], "result": result})
+            body = body.encode("utf-8")
+        return {"response": io.BytesIO(body), "contentType": "application/json"}
+
+
+@pytest.fixture
+def run_daemon():
+    directory = tempfile.mkdtemp(prefix="mcp-daemon-", dir="/tmp")
+    started: list[tuple[Daemon, threading.Thread]] = []
+
+    def _run(**kwargs):
+        runtime = _FakeRuntime()
+        server = Daemon(
+            os.path.join(directory, "proxy.sock"), runtime, SETTINGS, **kwargs
+        )
+        assert server.bind()
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        started.append((server, thread))
+        return server, runtime
+
+    yield _run
+    for server, thread in started:
+        server.shutdown()
+        thread.join(5)
+    shutil.rmtree(directory, ignore_errors=True)
+
+
+class _Window:
+    """A raw shim connection, speaking the daemon's wire protocol."""
+
+    def __init__(self, path, mode="session", environment=None):
+        self.connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.connection.connect(path)
+        self.connection.settimeout(5)
+        self.reader = self.connection.makefile("r", encoding="utf-8")
+        hello = {
+            "version": 1,
+            "agentArn": ARN,
+            "sessionMode": mode,
+            "environment": environment or environment_key(),
+        }
+        self.connection.sendall((json.dumps(hello) + "\n").encode("utf-8"))
+        self.welcome = json.loads(self.reader.readline())
+
+    def request(self, message):
+        self.connection.sendall((json.dumps(message) + "\n").encode("utf-8"))
+        return json.loads(self.reader.readline())
+
+    def close(self):
+        self.reader.close()
+        self.connection.close()
+
+
+def _call(request_id, method, **params):
+    message = {"jsonrpc": "2.0", "id": request_id, "method": method}
+    if params:
+        message["params"] = params
+    return message
+
+
+def test_list_replies_are_shared_between_windows(run_daemon):
+    """Test a */list reply fetched by one window answers the next one locally."""
+    server, runtime = run_daemon()
+    first, second = _Window(server.path), _Window(server.path)
+
+    fetched = first.request(_call(1, "tools/list"))
+    cached = second.request(_call("b", "tools/list"))
+    other_page = second.request(_call("c", "tools/list", cursor="2"))
+    first.close()
+    second.close()
+
+    assert fetched["id"] == 1
+    assert cached == {"jsonrpc": "2.0", "id": "b", "result": fetched["result"]}
+    assert other_page["result"]["upstreamId"] == "c"
+    assert [message["id"] for _, message in runtime.calls] == [1, "c"]
+
+
+def test_windows_get_their_own_sessions_by_default(run_daemon):
+    """Test ids pass through untouched when windows do not share a session."""
+    server, _runtime = run_daemon()
+    first, second = _Window(server.path), _Window(server.path)
+
+    one = first.request(_call(1, "tools/call"))
+    two = second.request(_call(1, "tools/call"))
+    first.close()
+    second.close()
+
+    assert one["result"]["upstreamId"] == two["result"]["upstreamId"] == 1
+    assert one["result"]["session"] != two["result"]["session"]
+
+
+def test_shared_session_remaps_ids_and_reuses_initialize(run_daemon):
+    """Test windows sharing a session never see each other's replies."""
+    server, runtime = run_daemon(share_sessions=True)
+    first, second = _Window(server.path), _Window(server.path)
+
+    init_one = first.request(_call(0, "initialize"))
+    init_two = second.request(_call(0, "initialize"))
+    one = first.request(_call(1, "tools/call"))
+    two = second.request(_call(1, "tools/call"))
+    first.close()
+    second.close()
+
+    assert init_one["id"] == init_two["id"] == 0
+    assert init_two["result"] == init_one["result"]
+    assert one["id"] == two["id"] == 1
+    assert one["result"]["upstreamId"] != two["result"]["upstreamId"]
+    assert one["result"]["session"] == two["result"]["session"]
+    # The second window's initialize was answered by the daemon
+    assert [message["method"] for _, message in runtime.calls].count("initialize") == 1
+
+
+def test_shared_session_remaps_the_proxys_own_requests(run_daemon):
+    """Test prefetches in a shared session get daemon-unique ids too."""
+    server, runtime = run_daemon(share_sessions=True)
+    window = _Window(server.path)
+
+    window.request(_call(0, "initialize"))
+    window.connection.sendall(
+        b'{"jsonrpc": "2.0", "method": "notifications/initialized"}\n'
+    )
+    listed = window.request(_call(1, "tools/list"))
+    window.close()
+
+    assert listed["id"] == 1
+    upstream = [message for _, message in runtime.calls if "id" in message]
+    assert [message["method"] for message in upstream] == ["initialize", "tools/list"]
+    assert all(message["id"].startswith("daemon-") for message in upstream)
+
+
+def test_session_token_is_part_of_the_environment(monkeypatch):
+    """Test a window with other temporary credentials gets another daemon key."""
+    monkeypatch.setenv("AWS_SESSION_TOKEN", "first")
+    first = environment_key()
+    monkeypatch.setenv("AWS_SESSION_TOKEN", "second")
+
+    assert environment_key() != first
+
+
+def test_proxy_tuning_is_part_of_the_environment(monkeypatch):
+    """Test windows with other hedging or session settings get another daemon."""
+    monkeypatch.delenv("AGENTCORE_HEDGE", raising=False)
+    monkeypatch.delenv("RUNTIME_SESSION_MODE", raising=False)
+    first = environment_key()
+    monkeypatch.setenv("AGENTCORE_HEDGE", "on")
+    hedged = environment_key()
+    monkeypatch.setenv("RUNTIME_SESSION_MODE", "request")
+
+    assert len({first, hedged, environment_key()}) == 3
+
+
+def test_window_with_other_settings_is_refused(run_daemon):
+    """Test a shim with different AWS settings does not borrow the credentials."""
+    server, _ = run_daemon()
+
+    window = _Window(server.path, environment="someone-else")
+    window.close()
+
+    assert window.welcome["ok"] is False
+    assert "different AWS or proxy settings" in window.welcome["error"]
+
+
+def test_second_daemon_leaves_a_starting_daemons_socket_alone(run_daemon, monkeypatch):
+    """Test a daemon that loses the start-up race backs off without unlinking."""
+    server, _ = run_daemon()
+    rival = Daemon(server.path, _FakeRuntime(), SETTINGS)
+
+    # Even when the socket looks stale, the lock says it is taken
+    monkeypatch.setattr(daemon_module, "_connect", lambda path: None)
+    assert not rival.bind()
+    monkeypatch.undo()
+
+    window = _Window(server.path)
+    window.close()
+    assert window.welcome["ok"] is True
+
+
+def test_list_cache_expires_and_invalidates():
+    """Test cached lists expire after the TTL and on list_changed."""
+    now = [0.0]
+    cache = ListCache(ttl=10, clock=lambda: now[0])
+    tools = ListCache.key(ARN, "tools/list", None)
+    prompts = ListCache.key(ARN, "prompts/list", None)
+    cache.put(tools, {"tools": []})
+    cache.put(prompts, {"prompts": []})
+
+    cache.invalidate(ARN, ("tools/list",))
+    assert cache.get(tools) is None
+    assert cache.get(prompts) == {"prompts": []}
+
+    now[0] = 10
+    assert cache.get(prompts) is None
+
+
+def test_attach_relays_stdio_through_daemon(run_daemon, monkeypatch):
+    """Test a shim copies stdin to the daemon and replies to stdout."""
+    server, runtime = run_daemon()
+    requests = [_call(1, "tools/list"), _call(2, "tools/call")]
+    stdin = "".join(json.dumps(message) + "\n" for message in requests)
+    stdout = io.TextIOWrapper(io.BytesIO(), encoding="utf-8")
+    monkeypatch.setattr(
+        daemon_module.sys, "stdin", io.TextIOWrapper(io.BytesIO(stdin.encode()))
+    )
+    monkeypatch.setattr(daemon_module.sys, "stdout", stdout)
+
+    assert attach(server.path, ARN, "session") is True
+
+    replies = [json.loads(line) for line in stdout.buffer.getvalue().splitlines()]
+    assert sorted(reply["id"] for reply in replies) == [1, 2]
+    assert len(runtime.calls) == 2
+
+
+def test_attach_without_daemon_falls_back(monkeypatch, capsys):
+    """Test a shim runs in-process when no daemon is listening."""
+    monkeypatch.setenv("AGENTCORE_DAEMON_AUTOSTART", "0")
+
+    def _start_daemon(path):
+        raise AssertionError("autostart is disabled")
+
+    monkeypatch.setattr(daemon_module, "_start_daemon", _start_daemon)
+
+    assert attach("/tmp/mcp-agentcore-proxy-missing.sock", ARN, "session") is False
+    assert "running in-process" in capsys.readouterr().err
+
+
+def test_default_socket_is_in_a_private_directory(monkeypatch, tmp_path):
+    """Test the default socket directory is created 0700 and checked."""
+    monkeypatch.delenv("XDG_RUNTIME_DIR", raising=False)
+    monkeypatch.setattr(daemon_module.tempfile, "tempdir", str(tmp_path))
+
+    path = daemon_module.default_socket_path()
+
+    directory = os.path.dirname(path)
+    assert os.path.dirname(directory) == str(tmp_path)
+    assert os.stat(directory).st_mode & 0o777 == 0o700
+    os.chmod(directory, 0o755)
+    with pytest.raises(PermissionError, match="mode 0700"):
+        daemon_module.default_socket_path()
+
+
+def test_attach_refuses_daemon_of_another_user(run_daemon, monkeypatch, capsys):
+    """Test a shim does not attach to a socket another uid listens on."""
+    server, runtime = run_daemon()
+    monkeypatch.setattr(daemon_module, "_peer_uid", lambda _: os.getuid() + 1)
+
+    assert attach(server.path, ARN, "session") is False
+    assert "not this user" in capsys.readouterr().err
+    assert runtime.calls == []
@@ -0,0 +1,128 @@
+"""Tests for mcp_agentcore_proxy.envelope module."""
+
+import json
+
+import pytest
+
+from mcp_agentcore_proxy.envelope import (
+    Envelope,
+    scan,
+    scan_batch,
+    scan_buffer,
+    split_array,
+)
+
+
+def test_scan_request():
+    """Test id and method are read from a request."""
+    envelope = scan(
+        '{"jsonrpc": "2.0", "id": 7, "method": "tools/call", '
+        '"params": {"name": "x", "arguments": {"blob": "a\\"b}"}}}'
+    )
+
+    assert envelope == Envelope(id=7, method="tools/call", has_id=True)
+    assert envelope.is_request
+
+
+def test_scan_id_after_params():
+    """Test the scanner walks past params when id comes last."""
+    envelope = scan(
+        '{"method": "tools/call", "params": {"a": [1, "]", {"b": null}]}, "id": "x"}'
+    )
+
+    assert envelope.id == "x"
+    assert envelope.method == "tools/call"
+
+
+def test_scan_notification_and_response():
+    """Test notifications and responses are told apart."""
+    notification = scan('{"jsonrpc": "2.0", "method": "notifications/initialized"}')
+    response = scan('{"jsonrpc": "2.0", "id": 1, "result": {"tools": []}}')
+
+    assert notification.is_notification
+    assert response.is_response
+    assert response.has_result
+
+
+def test_scan_error_code_ignores_nested_codes():
+    """Test only error.code is read, not a code inside error.data."""
+    envelope = scan(
+        '{"jsonrpc": "2.0", "id": 1, "error": '
+        '{"data": {"code": 5}, "code": -32602, "message": "uninitialized"}}'
+    )
+
+    assert envelope.error_code == -32602
+    assert envelope.is_response
+
+
+def test_scan_escaped_keys():
+    """Test keys written with escapes still match."""
+    assert scan('{"\\u0069d": 3, "method": "ping"}').id == 3
+
+
+def test_scan_does_not_walk_large_result():
+    """Test the result body is skipped once the envelope is known."""
+    # The trailing garbage would fail a full parse
+    envelope = scan('{"jsonrpc": "2.0", "id": 1, "result": {"x": [1, 2')
+
+    assert envelope.id == 1
+
+
+@pytest.mark.parametrize(
+    "text", ["[1, 2]", '"text"', '{"id": 1', '{"id": 1} trailing', "{id: 1}", ""]
+)
+def test_scan_unreadable(text):
+    """Test anything that is not a readable object returns None."""
+    assert scan(text) is None
+
+
+def test_scan_buffer_finds_id_after_large_result():
+    """Test the bytes scanner skips a result that comes before the id."""
+    text = json.dumps(
+        {"jsonrpc": "2.0", "result": {"text": 'a"}\n' * 1000, "n": [1]}, "id": 3}
+    )
+
+    assert scan_buffer(text.encode("utf-8")) == scan(text)
+    assert scan_buffer(text.encode("utf-8")).id == 3
+    error = b'{"id": 1, "error": {"data": {"code": 2}, "code": -32602}}'
+    assert scan_buffer(error).error_code == -32602
+
+
+@pytest.mark.parametrize("text", [b"[1, 2]", b'{"id": 1', b'{"id": 1} trailing', b""])
+def test_scan_buffer_unreadable(text):
+    """Test bytes that are not a readable object return None."""
+    assert scan_buffer(text) is None
+
+
+def test_split_array_returns_raw_elements():
+    """Test batch elements keep their original bytes."""
+    assert split_array(' [{"id": 1, "result": "é"} , {"id":2,"result":[]}] ') == [
+        '{"id": 1, "result": "é"}',
+        '{"id":2,"result":[]}',
+    ]
+    assert split_array("[]") == []
+    assert split_array('{"id": 1}') is None
+    assert split_array("[1, 2") is None
+
+
+def test_scan_batch():
+    """Test every element of a batch is scanned."""
+    envelopes = scan_batch(
+        json.dumps(
+            [
+                {"jsonrpc": "2.0", "id": 1, "result": {}},
+                {"jsonrpc": "2.0", "id": 2, "error": {"code": -32602, "message": ""}},
+            ]
+        )
+    )
+
+    assert [envelope.error_code for envelope in envelopes] == [None, -32602]
+    assert scan_batch("[1]") is None
+
+
+def test_from_message_matches_scan():
+    """Test envelopes built from parsed messages match scanned ones."""
+    text = '{"jsonrpc": "2.0", "id": "a", "error": {"code": -1, "message": "x"}}'
+
+    assert Envelope.from_message(json.loads(text)) == scan(text)
+    assert Envelope.from_message(5) == Envelope()
@@ -0,0 +1,175 @@
+"""Tests for mcp_agentcore_proxy.inprocess module."""
+
+import json
+import os
+import sys
+import textwrap
+from unittest.mock import patch
+
+import pytest
+
+pytest.importorskip("mcp.server.fastmcp")
+
+from fastapi.testclient import TestClient
+
+from mcp_agentcore_proxy.inprocess import InProcessServer, load_server
+from mcp_agentcore_proxy.server import MCPServerError, _build_app
+
+SERVER_SOURCE = textwrap.dedent(
+    """
+    from mcp.server.fastmcp import FastMCP
+
+    from mcp_agentcore_proxy.inprocess import current_session_id
+
+    mcp = FastMCP("inprocess-test")
+
+
+    @mcp.tool()
+    def whoami() -> dict:
+        return {"sandbox_id": current_session_id()}
+
+
+    @mcp.tool()
+    def add(a: int, b: int) -> int:
+        return a + b
+    """
+)
+
+INITIALIZE = json.dumps(
+    {
+        "jsonrpc": "2.0",
+        "id": 0,
+        "method": "initialize",
+        "params": {
+            "protocolVersion": "2025-06-18",
+            "capabilities": {},
+            "clientInfo": {"name": "pytest", "version": "0"},
+        },
+    }
+)
+INITIALIZED = json.dumps({"jsonrpc": "2.0", "method": "notifications/initialized"})
+WHOAMI = json.dumps(
+    {
+        "jsonrpc": "2.0",
+        "id": 2,
+        "method": "tools/call",
+        "params": {"name": "whoami", "arguments": {}},
+    }
+)
+
+
+@pytest.fixture
+def server_module(tmp_path, monkeypatch):
+    name = f"inprocess_server_{os.getpid()}"
+    (tmp_path / f"{name}.py").write_text(SERVER_SOURCE)
+    yield name, str(tmp_path)
+    sys.modules.pop(name, None)
+    if str(tmp_path) in sys.path:
+        sys.path.remove(str(tmp_path))
+
+
+@pytest.mark.asyncio
+async def test_inprocess_round_trip(server_module):
+    """Test initialize and tools/call are served without a subprocess."""
+    name, cwd = server_module
+    server = InProcessServer(f"{name}:mcp", "session-xyz", cwd)
+    await server.start()
+    try:
+        init = json.loads(await server.invoke(INITIALIZE))
+        assert init["result"]["serverInfo"]["name"] == "inprocess-test"
+
+        await server.send(INITIALIZED)
+
+        call = json.loads(await server.invoke(WHOAMI))
+        assert call["id"] == 2
+        assert json.loads(call["result"]["content"][0]["text"]) == {
+            "sandbox_id": "session-xyz"
+        }
+        assert server.request_count == 2
+    finally:
+        await server.shutdown()
+
+    assert not server.is_running
+
+
+@pytest.mark.asyncio
+async def test_inprocess_session_ids_stay_per_server(server_module):
+    """Test each server's tools see their own session id, not a process-wide one."""
+    name, cwd = server_module
+    servers = [InProcessServer(f"{name}:mcp", f"session-{n}", cwd) for n in (1, 2)]
+    for server in servers:
+        await server.start()
+    try:
+        seen = []
+        for server in servers:
+            await server.invoke(INITIALIZE)
+            await server.send(INITIALIZED)
+            call = json.loads(await server.invoke(WHOAMI))
+            seen.append(json.loads(call["result"]["content"][0]["text"]))
+    finally:
+        for server in servers:
+            await server.shutdown()
+
+    assert seen == [{"sandbox_id": "session-1"}, {"sandbox_id": "session-2"}]
+    assert "MCP_SESSION_ID" not in os.environ
+
+
+@pytest.mark.asyncio
+async def test_inprocess_invalid_message(server_module):
+    """Test invalid JSON-RPC payloads get an error response instead of a crash."""
+    name, cwd = server_module
+    server = InProcessServer(name, None, cwd)
+    await server.start()
+    try:
+        reply = json.loads(await server.invoke('{"jsonrpc": "2.0", "id": 5}'))
+        assert reply["id"] == 5
+        assert reply["error"]["code"] == -32600
+    finally:
+        await server.shutdown()
+
+
+def test_load_server_rejects_non_server(server_module):
+    """Test targets that are not MCP servers are rejected."""
+    name, cwd = server_module
+    with pytest.raises(MCPServerError, match="not a FastMCP"):
+        load_server(f"{name}:current_session_id", cwd)
+
+
+def test_load_server_missing_module(tmp_path):
+    """Test unknown modules raise a configuration error."""
+    with pytest.raises(MCPServerError, match="Unable to import"):
+        load_server("definitely_missing_module:mcp", str(tmp_path))
+
+
+def test_bridge_uses_inprocess_server(server_module):
+    """Test MCP_SERVER_MODULE routes invocations to the in-process server."""
+    name, cwd = server_module
+    with (
+        patch.dict(
+            os.environ, {"MCP_SERVER_MODULE": f"{name}:mcp", "MCP_SERVER_CWD": cwd}
+        ),
+        patch("asyncio.create_subprocess_exec") as mock_create,
+    ):
+        with TestClient(_build_app()) as client:
+            response = client.post("/invocations", content=INITIALIZE)
+            assert response.status_code == 200
+            assert response.json()["result"]["serverInfo"]["name"] == "inprocess-test"
+
+            response = client.post("/invocations", content=INITIALIZED)
+            assert response.status_code == 204
+
+            response = client.post(
+                "/invocations",
+                content=json.dumps(
+                    {
+                        "jsonrpc": "2.0",
+                        "id": 3,
+                        "method": "tools/call",
+                        "params": {"name": "add", "arguments": {"a": 2, "b": 3}},
+                    }
+                ),
+            )
+            assert response.json()["result"]["structuredContent"] == {"result": 5}
+            assert client.get("/ping").status_code == 200
+
+        mock_create.assert_not_called()
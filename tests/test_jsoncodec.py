@@ -0,0 +1,68 @@
+"""Tests for mcp_agentcore_proxy.jsoncodec module."""
+
+import json
+
+import pytest
+
+from mcp_agentcore_proxy import jsoncodec
+from mcp_agentcore_proxy.jsoncodec import BACKENDS, load_codec
+
+
+def _installed_codecs():
+    codecs = []
+    for name in BACKENDS:
+        try:
+            codecs.append(load_codec(name))
+        except ImportError:
+            continue
+    return codecs
+
+
+PAYLOADS = [
+    {"jsonrpc": "2.0", "id": 1, "result": {"tools": []}},
+    {
+        "jsonrpc": "2.0",
+        "id": "abc",
+        "result": {
+            "content": [{"type": "text", "text": 'héllo — ✓ "quoted" \\n\n'}],
+            "structuredContent": {"price": 0.25, "count": 3, "ok": True, "x": None},
+        },
+    },
+    {"jsonrpc": "2.0", "id": 2, "error": {"code": -32602, "message": "bad"}},
+]
+
+
+@pytest.mark.parametrize("codec", _installed_codecs(), ids=lambda codec: codec.name)
+def test_backends_match_starlette_bytes(codec):
+    """Test every backend writes the bytes Starlette's JSONResponse would."""
+    for payload in PAYLOADS:
+        expected = json.dumps(
+            payload, ensure_ascii=False, allow_nan=False, separators=(",", ":")
+        ).encode("utf-8")
+        assert codec.dumps(payload) == expected
+        assert codec.loads(expected) == payload
+
+
+@pytest.mark.parametrize("codec", _installed_codecs(), ids=lambda codec: codec.name)
+def test_decode_errors_are_stdlib_errors(codec):
+    """Test callers can keep catching json.JSONDecodeError."""
+    with pytest.raises(json.JSONDecodeError):
+        codec.loads('{"jsonrpc": ')
+
+
+@pytest.mark.parametrize("codec", _installed_codecs(), ids=lambda codec: codec.name)
+def test_unsupported_values_fall_back_to_stdlib(codec):
+    """Test values a fast backend rejects are still encoded."""
+    assert codec.dumps({"big": 2**70}) == b'{"big":1180591620717411303424}'
+
+
+def test_unknown_backend_rejected():
+    """Test MCP_JSON_BACKEND typos fail loudly."""
+    with pytest.raises(ValueError, match="Unknown JSON backend"):
+        load_codec("simdjson")
+
+
+def test_module_helpers_use_selected_backend():
+    """Test the module-level helpers round-trip through the selected backend."""
+    assert jsoncodec.BACKEND in BACKENDS
+    assert jsoncodec.dumps_str({"a": "é"}) == '{"a":"é"}'
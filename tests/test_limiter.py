@@ -0,0 +1,125 @@
+"""Tests for mcp_agentcore_proxy.limiter module."""
+
+import pytest
+from botocore.exceptions import ClientError
+
+from mcp_agentcore_proxy.limiter import (
+    AdaptiveLimit,
+    LimitPolicy,
+    QueueTimeout,
+    RuntimeLimiter,
+    TokenBucket,
+    is_throttling,
+)
+
+ARN = "arn:aws:bedrock-agentcore:us-east-1:123456789012:runtime/demo"
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _throttled():
+    return ClientError(
+        {
+            "Error": {"Code": "ThrottlingException", "Message": "slow down"},
+            "ResponseMetadata": {"HTTPStatusCode": 429},
+        },
+        "InvokeAgentRuntime",
+    )
+
+
+def test_is_throttling():
+    """Test throttling is recognised by error code or HTTP status."""
+    validation = ClientError(
+        {"Error": {"Code": "ValidationException"}}, "InvokeAgentRuntime"
+    )
+
+    assert is_throttling(_throttled())
+    assert not is_throttling(validation)
+    assert not is_throttling(RuntimeError("boom"))
+
+
+def test_limit_halves_once_per_round_and_grows_back():
+    """Test throttles from calls already in flight cut the limit only once."""
+    clock = _Clock()
+    limit = AdaptiveLimit(8, clock=clock)
+    started = [limit.acquire(deadline=0) for _ in range(4)]
+    clock.now = 1
+
+    for start in started:
+        limit.release(start, False, throttled=True)
+    assert limit.limit == 4
+
+    # About one more slot per limit's worth of successes
+    for _ in range(5):
+        limit.release(limit.acquire(deadline=1), True)
+    assert limit.limit == 5
+    # A call started after the cut may cut again
+    limit.release(limit.acquire(deadline=1), False, throttled=True)
+    assert limit.limit == 2
+
+
+def test_acquire_gives_up_at_the_deadline():
+    """Test a call waits for a slot only until its deadline."""
+    clock = _Clock()
+    limit = AdaptiveLimit(1, clock=clock)
+    limit.acquire(deadline=0)
+
+    assert limit.acquire(deadline=0) is None
+
+
+def test_token_bucket_refills_at_its_rate():
+    """Test bursts are allowed up to the bucket size, then paced."""
+    clock = _Clock()
+    bucket = TokenBucket(rate=2, burst=2, clock=clock)
+
+    assert bucket.take(deadline=0)
+    assert bucket.take(deadline=0)
+    assert not bucket.take(deadline=0.1)
+    clock.now = 0.5
+    assert bucket.take(deadline=0.5)
+
+
+def test_runtime_limiter_times_out_and_adapts():
+    """Test throttled calls lower the limit and a full runtime times out."""
+    clock = _Clock()
+    limiter = RuntimeLimiter(ARN, LimitPolicy(queue_timeout=0), 2, clock=clock)
+
+    with pytest.raises(ClientError):
+        limiter.run(lambda: (_ for _ in ()).throw(_throttled()))
+    assert limiter.concurrency is not None
+    assert limiter.concurrency.limit == 1
+
+    def nested():
+        # The only slot is held while a second call asks for one
+        return limiter.run(lambda: "inner")
+
+    with pytest.raises(QueueTimeout, match="throttling this runtime"):
+        limiter.run(nested)
+    assert limiter.run(lambda: "ok") == "ok"
+
+
+def test_held_slot_is_freed_only_when_released():
+    """Test a streamed reply keeps its slot until its body is consumed."""
+    clock = _Clock()
+    limiter = RuntimeLimiter(ARN, LimitPolicy(queue_timeout=0), 1, clock=clock)
+    held = []
+
+    assert (
+        limiter.run(
+            lambda: "body", lambda result, release: held.append(release) or result
+        )
+        == "body"
+    )
+    with pytest.raises(QueueTimeout):
+        limiter.run(lambda: "second")
+
+    held[0](True)
+    held[0](True)
+    assert limiter.run(lambda: "second") == "second"
+    assert limiter.run(lambda: "third") == "third"
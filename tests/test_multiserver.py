@@ -0,0 +1,186 @@
+"""Tests for mcp_agentcore_proxy.multiserver module."""
+
+import asyncio
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from mcp_agentcore_proxy.multiserver import MultiServer
+from mcp_agentcore_proxy.server import (
+    MCPServerError,
+    SubprocessSupervisor,
+    _make_supervisor,
+    _resolve_server_commands,
+)
+
+
+class _FakeServer:
+    """An MCP runner with one tool named ``search``, answering for ``name``."""
+
+    def __init__(self, name, started=None, delay=0.0):
+        self.name = name
+        self.started = started
+        self.delay = delay
+        self.invoked: list[dict] = []
+        self.sent: list[dict] = []
+        self.is_running = False
+        self.returncode = None
+        self.inflight = 0
+
+    async def start(self):
+        if self.started is not None:
+            # Both servers must be starting at once to get past this point
+            self.started.append(self.name)
+            while len(self.started) < 2:
+                await asyncio.sleep(0)
+        self.is_running = True
+
+    async def shutdown(self):
+        self.is_running = False
+
+    async def drain(self, timeout):
+        return True
+
+    def owns_server_request(self, request_id):
+        return False
+
+    async def send(self, payload):
+        self.sent.append(json.loads(payload))
+
+    async def invoke(self, payload, on_message=None):
+        message = json.loads(payload)
+        self.invoked.append(message)
+        await asyncio.sleep(self.delay)
+        method = message["method"]
+        if method == "initialize":
+            result = {
+                "protocolVersion": "2025-06-18",
+                "capabilities": {"tools": {}},
+                "serverInfo": {"name": self.name},
+            }
+        elif method == "tools/list":
+            result = {"tools": [{"name": "search", "description": self.name}]}
+        else:
+            if on_message is not None:
+                on_message(
+                    json.dumps(
+                        {"jsonrpc": "2.0", "id": 0, "method": "elicitation/create"}
+                    )
+                )
+            result = {"server": self.name, "params": message.get("params")}
+        return json.dumps({"jsonrpc": "2.0", "id": message["id"], "result": result})
+
+
+def _request(request_id, method, **params):
+    message = {"jsonrpc": "2.0", "id": request_id, "method": method}
+    if params:
+        message["params"] = params
+    return json.dumps(message)
+
+
+@pytest.mark.asyncio
+async def test_servers_start_concurrently_and_initialize_is_merged():
+    """Test startup runs in parallel and one merged initialize result is returned."""
+    started: list[str] = []
+    servers = MultiServer(
+        {
+            "docs": _FakeServer("docs", started),
+            "tickets": _FakeServer("tickets", started),
+        }
+    )
+
+    await asyncio.wait_for(servers.start(), timeout=5)
+    reply = json.loads(await servers.invoke(_request(0, "initialize")))
+
+    assert servers.is_running
+    assert reply["id"] == 0
+    assert reply["result"]["capabilities"] == {"tools": {}}
+    assert reply["result"]["serverInfo"]["name"] == "mcp-agentcore-proxy"
+
+
+@pytest.mark.asyncio
+async def test_tools_are_prefixed_and_calls_routed():
+    """Test merged tool names carry the server name and calls reach that server."""
+    docs, tickets = _FakeServer("docs"), _FakeServer("tickets")
+    servers = MultiServer({"docs": docs, "tickets": tickets})
+
+    listed = json.loads(await servers.invoke(_request(1, "tools/list")))
+    called = json.loads(
+        await servers.invoke(_request(2, "tools/call", name="tickets__search"))
+    )
+    unknown = json.loads(await servers.invoke(_request(3, "tools/call", name="nope")))
+
+    assert [tool["name"] for tool in listed["result"]["tools"]] == [
+        "docs__search",
+        "tickets__search",
+    ]
+    assert called["result"] == {"server": "tickets", "params": {"name": "search"}}
+    assert [message["id"] for message in docs.invoked] == [1]
+    assert unknown["error"]["code"] == -32602
+
+
+@pytest.mark.asyncio
+async def test_slow_server_does_not_block_the_others():
+    """Test a call to a fast server finishes while a slow one is still busy."""
+    slow, fast = _FakeServer("slow", delay=5), _FakeServer("fast")
+    servers = MultiServer({"slow": slow, "fast": fast})
+    servers._index.merge(
+        "tools",
+        [
+            ("slow", "slow", [{"name": "search"}]),
+            ("fast", "fast", [{"name": "search"}]),
+        ],
+    )
+
+    pending = asyncio.create_task(
+        servers.invoke(_request(1, "tools/call", name="slow__search"))
+    )
+    await asyncio.sleep(0)
+    reply = await asyncio.wait_for(
+        servers.invoke(_request(2, "tools/call", name="fast__search")), timeout=1
+    )
+    pending.cancel()
+
+    assert json.loads(reply)["result"]["server"] == "fast"
+
+
+@pytest.mark.asyncio
+async def test_server_requests_are_namespaced_and_replies_returned():
+    """Test server request ids from different servers cannot collide."""
+    docs, tickets = _FakeServer("docs"), _FakeServer("tickets")
+    servers = MultiServer({"docs": docs, "tickets": tickets})
+    relayed: list[dict] = []
+
+    await servers.invoke(
+        _request(1, "tools/call", name="tickets__search"),
+        on_message=lambda text: relayed.append(json.loads(text)),
+    )
+    await servers.send(json.dumps({"jsonrpc": "2.0", "id": "tickets__0", "result": {}}))
+    await servers.send(
+        json.dumps({"jsonrpc": "2.0", "method": "notifications/initialized"})
+    )
+
+    assert relayed[0]["id"] == "tickets__0"
+    assert tickets.sent[0] == {"jsonrpc": "2.0", "id": 0, "result": {}}
+    assert docs.sent == [{"jsonrpc": "2.0", "method": "notifications/initialized"}]
+
+
+def test_resolve_server_commands():
+    """Test MCP_SERVER_CMDS must be a JSON object of safe names to commands."""
+    with patch.dict(os.environ, {}, clear=True):
+        assert _resolve_server_commands() is None
+    commands = '{"docs": "python -m docs", "tickets": "npx tickets"}'
+    with patch.dict(os.environ, {"MCP_SERVER_CMDS": commands}, clear=True):
+        assert _resolve_server_commands() == {
+            "docs": "python -m docs",
+            "tickets": "npx tickets",
+        }
+        assert isinstance(_make_supervisor(None), SubprocessSupervisor)
+    for invalid in ('["python -m docs"]', '{"a b": "python"}', '{"docs": ""}', "{"):
+        with (
+            patch.dict(os.environ, {"MCP_SERVER_CMDS": invalid}, clear=True),
+            pytest.raises(MCPServerError, match="MCP_SERVER_CMDS"),
+        ):
+            _resolve_server_commands()
@@ -0,0 +1,109 @@
+"""Tests for mcp_agentcore_proxy.retry module."""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from botocore.exceptions import ClientError, ConnectTimeoutError, ReadTimeoutError
+
+from mcp_agentcore_proxy.retry import (
+    LatencyTracker,
+    RetryPolicy,
+    hedged,
+    should_retry,
+)
+
+
+def _client_error(code, status):
+    return ClientError(
+        {"Error": {"Code": code}, "ResponseMetadata": {"HTTPStatusCode": status}},
+        "InvokeAgentRuntime",
+    )
+
+
+def _call(name):
+    return json.dumps(
+        {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": name}}
+    )
+
+
+def test_only_idempotent_and_allowlisted_calls_are_repeatable():
+    """Test tools/call is repeatable only for allowlisted tools."""
+    policy = RetryPolicy(retry_tools=frozenset({"get_weather"}))
+
+    for method in ("ping", "tools/list", "resources/templates/list", "resources/read"):
+        assert policy.repeatable(method, "{}")
+    assert policy.repeatable("tools/call", _call("get_weather"))
+    assert not policy.repeatable("tools/call", _call("send_email"))
+    assert not RetryPolicy().repeatable("tools/call", _call("get_weather"))
+    assert not policy.repeatable("initialize", "{}")
+
+
+def test_should_retry_depends_on_whether_the_call_was_accepted():
+    """Test unsent and throttled calls always retry, timeouts only if repeatable."""
+    unsent = ConnectTimeoutError(endpoint_url="https://example.com")
+    timed_out = ReadTimeoutError(endpoint_url="https://example.com")
+
+    for repeatable in (True, False):
+        assert should_retry(unsent, repeatable)
+        assert should_retry(_client_error("ThrottlingException", 400), repeatable)
+        assert not should_retry(_client_error("ValidationException", 400), repeatable)
+    assert should_retry(timed_out, True)
+    assert not should_retry(timed_out, False)
+    assert should_retry(_client_error("ServiceUnavailableException", 503), True)
+    assert not should_retry(_client_error("ServiceUnavailableException", 503), False)
+
+
+def test_backoff_is_jittered_and_capped():
+    """Test delays stay within the exponential bound."""
+    policy = RetryPolicy()
+
+    assert all(0 <= policy.backoff(1) <= 0.2 for _ in range(50))
+    assert all(0 <= policy.backoff(10) <= 5.0 for _ in range(50))
+
+
+def test_latency_percentile_needs_enough_samples():
+    """Test no hedge delay is offered until the window has enough samples."""
+    tracker = LatencyTracker(min_samples=10)
+    for seconds in range(9):
+        tracker.observe("tools/list", seconds)
+    assert tracker.percentile("tools/list") is None
+
+    tracker.observe("tools/list", 100)
+
+    assert tracker.percentile("tools/list") == 100
+    assert tracker.percentile("tools/list", 0.5) == 5
+    assert tracker.percentile("ping") is None
+
+
+def test_hedged_takes_the_first_reply_and_discards_the_other():
+    """Test a slow first attempt is overtaken by the duplicate."""
+    release = threading.Event()
+    discarded = []
+
+    def attempt(duplicate):
+        if duplicate:
+            return "duplicate"
+        assert release.wait(timeout=5)
+        return "first"
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        result = hedged(attempt, 0.01, executor, discarded.append)
+        release.set()
+
+    assert result == "duplicate"
+    assert discarded == ["first"]
+
+
+def test_hedged_sends_no_duplicate_for_fast_calls():
+    """Test an attempt that beats the delay is the only one made."""
+    calls = []
+
+    def attempt(duplicate):
+        calls.append(duplicate)
+        return "first"
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        assert hedged(attempt, 5, executor, calls.append) == "first"
+
+    assert calls == [False]
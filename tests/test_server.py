@@ -1,19 +1,63 @@
 """Tests for mcp_agentcore_proxy.server module."""
 
 import asyncio
+import contextlib
+import io
 import json
 import os
-import pytest
+import sys
 from unittest.mock import AsyncMock, patch
+from urllib.parse import quote
 
+import boto3
+import pytest
 from fastapi.testclient import TestClient
+
+from mcp_agentcore_proxy.compression import ClientCompression, compress
 from mcp_agentcore_proxy.server import (
+    RELATED_REQUEST_META,
+    SESSION_HEADER,
     MCPServerError,
     MCPSubprocess,
+    RecyclePolicy,
+    SessionCapacityError,
+    SessionPool,
+    SpooledMessage,
     SubprocessConfig,
+    SubprocessSupervisor,
     _build_app,
+    _PendingCall,
+    _read_rss_bytes,
+    _resolve_recycle_policy,
+    _resolve_session_mode,
     _resolve_subprocess_config,
 )
+from mcp_agentcore_proxy.transport import Http2Sender
+
+
+def _script_stdio(process, handler):
+    """Wire ``process`` so each stdin line is answered by ``handler(message)``.
+
+    ``handler`` returns the list of messages the fake server writes back.
+    """
+    lines: asyncio.Queue[bytes] = asyncio.Queue()
+
+    def write(data):
+        for message in handler(json.loads(data)):
+            lines.put_nowait((json.dumps(message) + "\n").encode("utf-8"))
+
+    async def readuntil(separator):
+        return await lines.get()
+
+    process.stdin.write.side_effect = write
+    process.stdout.readuntil.side_effect = readuntil
+    return lines
+
+
+def _echo_result(message):
+    if "method" not in message:
+        return []
+    return [{"jsonrpc": "2.0", "id": message.get("id"), "result": {}}]
 
 
 @pytest.fixture
@@ -146,17 +190,17 @@ class TestMCPSubprocess:
         ) as mock_create:
             mock_create.return_value = mock_subprocess
 
-            # Mock stdout to return JSON response
-            mock_subprocess.stdout.readline.return_value = (
-                sample_json_rpc_response + "\n"
-            ).encode("utf-8")
+            # Fake server answers every request with the sample response
+            _script_stdio(
+                mock_subprocess, lambda _: [json.loads(sample_json_rpc_response)]
+            )
 
             subprocess = MCPSubprocess(subprocess_config)
             await subprocess.start()
 
             response = await subprocess.invoke(sample_json_rpc_request)
 
-            assert response.strip() == sample_json_rpc_response
+            assert json.loads(response) == json.loads(sample_json_rpc_response)
             mock_subprocess.stdin.write.assert_called_once()
             mock_subprocess.stdin.drain.assert_called_once()
 
@@ -185,8 +229,8 @@ class TestMCPSubprocess:
 
             mock_subprocess.stdin.write.assert_called_once()
             mock_subprocess.stdin.drain.assert_called_once()
-            # Should NOT have called readline
-            mock_subprocess.stdout.readline.assert_not_called()
+            # Should NOT have read stdout
+            mock_subprocess.stdout.readuntil.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_read_json_multiline(
@@ -198,9 +242,9 @@ class TestMCPSubprocess:
         ) as mock_create:
             mock_create.return_value = mock_subprocess
 
-            # Split multi-line JSON into separate readline() calls
+            # Split multi-line JSON into separate readuntil() calls
             lines = multiline_json_response.split("\n")
-            mock_subprocess.stdout.readline.side_effect = [
+            mock_subprocess.stdout.readuntil.side_effect = [
                 (line + "\n").encode("utf-8") for line in lines
             ]
 
@@ -222,7 +266,7 @@ class TestMCPSubprocess:
         ) as mock_create:
             mock_create.return_value = mock_subprocess
 
-            mock_subprocess.stdout.readline.side_effect = [
+            mock_subprocess.stdout.readuntil.side_effect = [
                 b"\n",
                 b"  \n",
                 b'{"jsonrpc": "2.0", "result": "ok", "id": 1}\n',
@@ -247,7 +291,9 @@ class TestMCPSubprocess:
             mock_create.return_value = mock_subprocess
 
             # Simulate subprocess stdout closing
-            mock_subprocess.stdout.readline.return_value = b""
+            mock_subprocess.stdout.readuntil.side_effect = asyncio.IncompleteReadError(
+                b"", None
+            )
 
             subprocess = MCPSubprocess(subprocess_config)
             await subprocess.start()
@@ -256,6 +302,1064 @@ class TestMCPSubprocess:
                 await subprocess._read_json(mock_subprocess.stdout)
 
 
+class TestRecycling:
+    """Test suite for subprocess recycling policies and the supervisor swap."""
+
+    @pytest.mark.asyncio
+    async def test_recycle_reason_max_requests(
+        self, subprocess_config, mock_subprocess
+    ):
+        """Test a subprocess reports recycling once max_requests is reached."""
+        with patch(
+            "asyncio.create_subprocess_exec", new_callable=AsyncMock
+        ) as mock_create:
+            mock_create.return_value = mock_subprocess
+            _script_stdio(mock_subprocess, _echo_result)
+
+            subprocess = MCPSubprocess(subprocess_config)
+            await subprocess.start()
+            policy = RecyclePolicy(max_requests=2)
+
+            await subprocess.invoke('{"jsonrpc": "2.0", "method": "ping", "id": 1}')
+            assert subprocess.recycle_reason(policy) is None
+
+            await subprocess.invoke('{"jsonrpc": "2.0", "method": "ping", "id": 2}')
+            assert subprocess.recycle_reason(policy) == "served 2 requests"
+
+    @pytest.mark.asyncio
+    async def test_recycle_reason_rss(self, subprocess_config, mock_subprocess):
+        """Test the RSS threshold is read from /proc for the subprocess pid."""
+        mock_subprocess.pid = 4242
+        with patch(
+            "asyncio.create_subprocess_exec", new_callable=AsyncMock
+        ) as mock_create:
+            mock_create.return_value = mock_subprocess
+            subprocess = MCPSubprocess(subprocess_config)
+            await subprocess.start()
+
+        policy = RecyclePolicy(max_rss_bytes=100 * 1024 * 1024)
+        with patch(
+            "mcp_agentcore_proxy.server._read_rss_bytes",
+            return_value=200 * 1024 * 1024,
+        ) as mock_rss:
+            assert subprocess.recycle_reason(policy) == "RSS 200 MiB"
+            mock_rss.assert_called_once_with(4242)
+
+    def test_read_rss_bytes_self(self):
+        """Test RSS is parsed from /proc/<pid>/status."""
+        if not os.path.exists(f"/proc/{os.getpid()}/status"):
+            pytest.skip("/proc is not available")
+        rss = _read_rss_bytes(os.getpid())
+        assert rss is not None and rss > 0
+
+    def test_read_rss_bytes_missing_process(self):
+        """Test RSS lookup for an unknown pid returns None."""
+        assert _read_rss_bytes(-1) is None
+
+    def test_resolve_recycle_policy(self):
+        """Test recycling thresholds are read from the environment."""
+        with patch.dict(
+            os.environ,
+            {
+                "MCP_RECYCLE_MAX_REQUESTS": "500",
+                "MCP_RECYCLE_MAX_AGE": "3600",
+                "MCP_RECYCLE_MAX_RSS_MB": "256",
+            },
+            clear=True,
+        ):
+            policy = _resolve_recycle_policy()
+
+        assert policy.enabled
+        assert policy.max_requests == 500
+        assert policy.max_age == 3600
+        assert policy.max_rss_bytes == 256 * 1024 * 1024
+
+    def test_resolve_recycle_policy_disabled_by_default(self):
+        """Test recycling is disabled when no thresholds are configured."""
+        with patch.dict(os.environ, {}, clear=True):
+            assert not _resolve_recycle_policy().enabled
+
+    def test_resolve_recycle_policy_invalid(self):
+        """Test invalid thresholds raise a configuration error."""
+        with (
+            patch.dict(os.environ, {"MCP_RECYCLE_MAX_REQUESTS": "lots"}, clear=True),
+            pytest.raises(MCPServerError, match="MCP_RECYCLE_MAX_REQUESTS"),
+        ):
+            _resolve_recycle_policy()
+
+    @pytest.mark.asyncio
+    async def test_supervisor_swaps_and_replays_handshake(self):
+        """Test the supervisor swaps in an initialized replacement and retires the old one."""
+        runners = []
+
+        def factory():
+            runner = AsyncMock(spec=MCPSubprocess)
+            runner.invoke.return_value = '{"jsonrpc": "2.0", "result": {}, "id": 1}'
+            runner.drain.return_value = True
+            runner.recycle_reason = lambda policy: (
+                "served 1 requests" if runner is runners[0] else None
+            )
+            runners.append(runner)
+            return runner
+
+        supervisor = SubprocessSupervisor(factory, RecyclePolicy(max_requests=1))
+        await supervisor.start()
+
+        initialize = '{"jsonrpc": "2.0", "method": "initialize", "id": 1}'
+        initialized = '{"jsonrpc": "2.0", "method": "notifications/initialized"}'
+        await supervisor.invoke(initialize)
+        await supervisor._recycle_task
+        await asyncio.gather(*supervisor._retired)
+
+        old, replacement = runners
+        assert supervisor.current is replacement
+        assert supervisor.recycle_count == 1
+        replacement.invoke.assert_awaited_once_with(initialize)
+        old.drain.assert_awaited_once()
+        old.shutdown.assert_awaited_once()
+
+        await supervisor.send(initialized)
+        replacement.send.assert_awaited_once_with(initialized)
+
+    @pytest.mark.asyncio
+    async def test_supervisor_keeps_old_runner_when_replacement_fails(self):
+        """Test a failed replacement leaves the current subprocess in service."""
+        runners = []
+
+        def factory():
+            runner = AsyncMock(spec=MCPSubprocess)
+            runner.invoke.return_value = '{"jsonrpc": "2.0", "result": {}, "id": 1}'
+            runner.recycle_reason = lambda policy: "running for 10s"
+            if runners:
+                runner.start.side_effect = MCPServerError("boom")
+            runners.append(runner)
+            return runner
+
+        supervisor = SubprocessSupervisor(factory, RecyclePolicy(max_age=1))
+        await supervisor.start()
+        await supervisor.invoke('{"jsonrpc": "2.0", "method": "ping", "id": 1}')
+        await supervisor._recycle_task
+
+        assert supervisor.current is runners[0]
+        assert supervisor.recycle_count == 0
+        runners[1].shutdown.assert_awaited_once()
+        runners[0].shutdown.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_supervisor_shutdown_stops_draining_runner(self):
+        """Test shutting down mid-drain still stops the retired subprocess."""
+        runners = []
+        draining = asyncio.Event()
+
+        async def drain(timeout):
+            draining.set()
+            await asyncio.sleep(60)
+            return True
+
+        def factory():
+            runner = AsyncMock(spec=MCPSubprocess)
+            runner.invoke.return_value = '{"jsonrpc": "2.0", "result": {}, "id": 1}'
+            runner.drain.side_effect = drain
+            runner.recycle_reason = lambda policy: (
+                "served 1 requests" if runner is runners[0] else None
+            )
+            runners.append(runner)
+            return runner
+
+        supervisor = SubprocessSupervisor(factory, RecyclePolicy(max_requests=1))
+        await supervisor.start()
+        await supervisor.invoke('{"jsonrpc": "2.0", "method": "ping", "id": 1}')
+        await supervisor._recycle_task
+        await draining.wait()
+
+        await supervisor.shutdown()
+
+        old, replacement = runners
+        old.shutdown.assert_awaited_once()
+        replacement.shutdown.assert_awaited_once()
+
+    @pytest.mark.asyncio
+    async def test_supervisor_shutdown_stops_starting_replacement(self):
+        """Test a replacement still starting when the recycle is cancelled is stopped."""
+        runners = []
+        starting = asyncio.Event()
+
+        async def start():
+            starting.set()
+            await asyncio.sleep(60)
+
+        def factory():
+            runner = AsyncMock(spec=MCPSubprocess)
+            runner.invoke.return_value = '{"jsonrpc": "2.0", "result": {}, "id": 1}'
+            runner.recycle_reason = lambda policy: "running for 10s"
+            if runners:
+                runner.start.side_effect = start
+            runners.append(runner)
+            return runner
+
+        supervisor = SubprocessSupervisor(factory, RecyclePolicy(max_age=1))
+        await supervisor.start()
+        await supervisor.invoke('{"jsonrpc": "2.0", "method": "ping", "id": 1}')
+        await starting.wait()
+
+        await supervisor.shutdown()
+
+        for runner in runners:
+            runner.shutdown.assert_awaited_once()
+
+
+def _fake_supervisor(session_id):
+    runner = AsyncMock(spec=SubprocessSupervisor)
+    runner.session_id = session_id
+    runner.is_running = True
+    runner.inflight = 0
+    runner.recycle_count = 0
+    return runner
+
+
+class TestSessionPool:
+    """Test suite for the per-session subprocess map."""
+
+    @pytest.mark.asyncio
+    async def test_one_runner_per_session(self):
+        """Test each session gets its own runner and reuses it afterwards."""
+        pool = SessionPool(_fake_supervisor, max_live=4, idle_timeout=None)
+
+        async with pool.lease("a") as runner_a:
+            pass
+        async with pool.lease("b") as runner_b:
+            pass
+        async with pool.lease("a") as runner_a_again:
+            pass
+
+        assert runner_a is runner_a_again
+        assert runner_a is not runner_b
+        assert runner_a.session_id == "a"
+        assert pool.metrics.created == 2
+        assert pool.metrics.reused == 1
+
+    @pytest.mark.asyncio
+    async def test_lru_eviction(self):
+        """Test the least recently used idle session is evicted at capacity."""
+        pool = SessionPool(_fake_supervisor, max_live=2, idle_timeout=None)
+
+        async with pool.lease("a") as runner_a:
+            pass
+        async with pool.lease("b"):
+            pass
+        async with pool.lease("a"):
+            pass
+        async with pool.lease("c"):
+            pass
+
+        assert set(pool.snapshot()["sessions"]) == {"a", "c"}
+        assert pool.metrics.evicted == 1
+        runner_a.shutdown.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_busy_sessions_are_not_evicted(self):
+        """Test capacity errors are raised when every session is in use."""
+        pool = SessionPool(_fake_supervisor, max_live=1, idle_timeout=None)
+
+        async with pool.lease("a"):
+            with pytest.raises(SessionCapacityError):
+                async with pool.lease("b"):
+                    pass
+
+        assert pool.metrics.rejected == 1
+        assert len(pool) == 1
+
+    @pytest.mark.asyncio
+    async def test_idle_sessions_expire(self):
+        """Test sessions idle beyond the timeout are reaped."""
+        pool = SessionPool(_fake_supervisor, max_live=4, idle_timeout=60)
+
+        async with pool.lease("a") as runner_a:
+            pass
+        pool._entries["a"].last_used -= 120
+
+        async with pool.lease("b"):
+            pass
+
+        assert "a" not in pool.snapshot()["sessions"]
+        assert pool.metrics.expired == 1
+        runner_a.shutdown.assert_awaited_once()
+        await pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_exited_runner_is_restarted(self):
+        """Test a session whose subprocess died gets a fresh one."""
+        pool = SessionPool(_fake_supervisor, max_live=4, idle_timeout=None)
+
+        async with pool.lease("a") as first:
+            pass
+        first.is_running = False
+        async with pool.lease("a") as second:
+            pass
+
+        assert first is not second
+        first.shutdown.assert_awaited_once()
+
+    def test_resolve_session_mode_defaults(self):
+        """Test shared mode is the default."""
+        with patch.dict(os.environ, {}, clear=True):
+            config = _resolve_session_mode()
+        assert config.mode == "shared"
+
+    def test_resolve_session_mode_per_session(self):
+        """Test per-session limits are read from the environment."""
+        with patch.dict(
+            os.environ,
+            {
+                "MCP_SESSION_MODE": "per-session",
+                "MCP_SESSION_MAX_LIVE": "3",
+                "MCP_SESSION_IDLE_TIMEOUT": "off",
+            },
+            clear=True,
+        ):
+            config = _resolve_session_mode()
+        assert config.mode == "per-session"
+        assert config.max_live == 3
+        assert config.idle_timeout is None
+
+    def test_resolve_session_mode_invalid(self):
+        """Test unknown session modes are rejected."""
+        with (
+            patch.dict(os.environ, {"MCP_SESSION_MODE": "pooled"}, clear=True),
+            pytest.raises(MCPServerError, match="MCP_SESSION_MODE"),
+        ):
+            _resolve_session_mode()
+
+
+class TestMessageRouting:
+    """Test suite for id-based routing and server-initiated requests."""
+
+    @pytest.mark.asyncio
+    async def test_concurrent_requests_out_of_order(
+        self, subprocess_config, mock_subprocess
+    ):
+        """Test replies are matched to callers by id, not by arrival order."""
+
+        def handler(message):
+            if message["id"] == 1:
+                return []
+            return [
+                {"jsonrpc": "2.0", "id": 2, "result": {"n": 2}},
+                {"jsonrpc": "2.0", "id": 1, "result": {"n": 1}},
+            ]
+
+        with patch(
+            "asyncio.create_subprocess_exec", new_callable=AsyncMock
+        ) as mock_create:
+            mock_create.return_value = mock_subprocess
+            _script_stdio(mock_subprocess, handler)
+            subprocess = MCPSubprocess(subprocess_config)
+            await subprocess.start()
+
+            first = asyncio.create_task(
+                subprocess.invoke('{"jsonrpc": "2.0", "method": "slow", "id": 1}')
+            )
+            await asyncio.sleep(0)
+            second = await subprocess.invoke(
+                '{"jsonrpc": "2.0", "method": "fast", "id": 2}'
+            )
+
+            assert json.loads(second)["result"] == {"n": 2}
+            assert json.loads(await first)["result"] == {"n": 1}
+            await subprocess.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_server_request_reaches_listener(
+        self, subprocess_config, mock_subprocess
+    ):
+        """Test a sampling request is handed to the caller and answered via send()."""
+
+        def handler(message):
+            if message.get("method") == "tools/call":
+                return [
+                    {
+                        "jsonrpc": "2.0",
+                        "id": "s-1",
+                        "method": "sampling/createMessage",
+                        "params": {},
+                    }
+                ]
+            if message.get("id") == "s-1":
+                return [{"jsonrpc": "2.0", "id": 5, "result": message["result"]}]
+            return []
+
+        with patch(
+            "asyncio.create_subprocess_exec", new_callable=AsyncMock
+        ) as mock_create:
+            mock_create.return_value = mock_subprocess
+            _script_stdio(mock_subprocess, handler)
+            subprocess = MCPSubprocess(subprocess_config)
+            await subprocess.start()
+
+            received: list[str] = []
+            call = asyncio.create_task(
+                subprocess.invoke(
+                    '{"jsonrpc": "2.0", "method": "tools/call", "id": 5}',
+                    on_message=received.append,
+                )
+            )
+            while not received:
+                await asyncio.sleep(0)
+
+            assert json.loads(received[0])["method"] == "sampling/createMessage"
+            assert subprocess.owns_server_request("s-1")
+            await subprocess.send(
+                '{"jsonrpc": "2.0", "id": "s-1", "result": {"text": "hi"}}'
+            )
+
+            assert json.loads(await call)["result"] == {"text": "hi"}
+            assert not subprocess.owns_server_request("s-1")
+            await subprocess.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_server_messages_reach_the_call_they_name(
+        self, subprocess_config, mock_subprocess
+    ):
+        """Test progress and related requests go to their call, not the oldest one."""
+
+        def handler(message):
+            if message.get("id") != 2:
+                return []
+            return [
+                {
+                    "jsonrpc": "2.0",
+                    "method": "notifications/progress",
+                    "params": {"progressToken": "p-2", "progress": 1},
+                },
+                {
+                    "jsonrpc": "2.0",
+                    "id": "s-1",
+                    "method": "elicitation/create",
+                    "params": {"_meta": {RELATED_REQUEST_META: 2}},
+                },
+                {"jsonrpc": "2.0", "method": "notifications/message", "params": {}},
+                {"jsonrpc": "2.0", "id": 2, "result": {}},
+            ]
+
+        with patch(
+            "asyncio.create_subprocess_exec", new_callable=AsyncMock
+        ) as mock_create:
+            mock_create.return_value = mock_subprocess
+            _script_stdio(mock_subprocess, handler)
+            subprocess = MCPSubprocess(subprocess_config)
+            await subprocess.start()
+
+            first: list[str] = []
+            second: list[str] = []
+            slow = asyncio.create_task(
+                subprocess.invoke(
+                    '{"jsonrpc": "2.0", "method": "tools/call", "id": 1}',
+                    on_message=first.append,
+                )
+            )
+            await asyncio.sleep(0)
+            await subprocess.invoke(
+                json.dumps(
+                    {
+                        "jsonrpc": "2.0",
+                        "method": "tools/call",
+                        "id": 2,
+                        "params": {"_meta": {"progressToken": "p-2"}},
+                    }
+                ),
+                on_message=second.append,
+            )
+
+            assert [json.loads(text)["method"] for text in second] == [
+                "notifications/progress",
+                "elicitation/create",
+            ]
+            # Uncorrelated messages still fall back to the oldest call
+            assert [json.loads(text)["method"] for text in first] == [
+                "notifications/message"
+            ]
+            slow.cancel()
+            await subprocess.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_server_request_without_listener_is_rejected(
+        self, subprocess_config, mock_subprocess
+    ):
+        """Test the bridge answers server requests nobody can handle with an error."""
+
+        def handler(message):
+            if message.get("method") == "tools/call":
+                return [{"jsonrpc": "2.0", "id": 9, "method": "roots/list"}]
+            if message.get("id") == 9:
+                return [{"jsonrpc": "2.0", "id": 1, "result": message}]
+            return []
+
+        with patch(
+            "asyncio.create_subprocess_exec", new_callable=AsyncMock
+        ) as mock_create:
+            mock_create.return_value = mock_subprocess
+            _script_stdio(mock_subprocess, handler)
+            subprocess = MCPSubprocess(subprocess_config)
+            await subprocess.start()
+
+            response = json.loads(
+                await subprocess.invoke(
+                    '{"jsonrpc": "2.0", "method": "tools/call", "id": 1}'
+                )
+            )
+
+            assert response["result"]["error"]["code"] == -32603
+            await subprocess.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_reader_failure_fails_pending_calls(
+        self, subprocess_config, mock_subprocess
+    ):
+        """Test in-flight calls fail when the subprocess closes stdout."""
+        with patch(
+            "asyncio.create_subprocess_exec", new_callable=AsyncMock
+        ) as mock_create:
+            mock_create.return_value = mock_subprocess
+            lines = _script_stdio(mock_subprocess, lambda _: [])
+            subprocess = MCPSubprocess(subprocess_config)
+            await subprocess.start()
+
+            call = asyncio.create_task(
+                subprocess.invoke('{"jsonrpc": "2.0", "method": "slow", "id": 1}')
+            )
+            await asyncio.sleep(0)
+            lines.put_nowait(b"")
+
+            with pytest.raises(MCPServerError, match="terminated"):
+                await call
+
+    def test_app_streams_server_messages(self, mock_subprocess):
+        """Test /invocations switches to SSE when the server talks back mid-call."""
+
+        def handler(message):
+            if message.get("method") != "tools/call":
+                return []
+            return [
+                {
+                    "jsonrpc": "2.0",
+                    "method": "notifications/progress",
+                    "params": {"progress": 1},
+                },
+                {"jsonrpc": "2.0", "id": 1, "result": {"done": True}},
+            ]
+
+        with (
+            patch.dict(os.environ, {"MCP_SERVER_CMD": "python -u server.py"}),
+            patch(
+                "asyncio.create_subprocess_exec", new_callable=AsyncMock
+            ) as mock_create,
+        ):
+            mock_create.return_value = mock_subprocess
+            _script_stdio(mock_subprocess, handler)
+            with TestClient(_build_app()) as client:
+                response = client.post(
+                    "/invocations",
+                    content='{"jsonrpc": "2.0", "method": "tools/call", "id": 1}',
+                )
+
+        assert response.headers["content-type"].startswith("text/event-stream")
+        events = [
+            json.loads(line[len("data: ") :])
+            for line in response.text.splitlines()
+            if line.startswith("data: ")
+        ]
+        assert events == [
+            {
+                "jsonrpc": "2.0",
+                "method": "notifications/progress",
+                "params": {"progress": 1},
+            },
+            {"jsonrpc": "2.0", "id": 1, "result": {"done": True}},
+        ]
+
+    def test_app_forwards_client_replies(self, mock_subprocess):
+        """Test replies to server requests are written to the server with a 204."""
+        with (
+            patch.dict(os.environ, {"MCP_SERVER_CMD": "python -u server.py"}),
+            patch(
+                "asyncio.create_subprocess_exec", new_callable=AsyncMock
+            ) as mock_create,
+        ):
+            mock_create.return_value = mock_subprocess
+            with TestClient(_build_app()) as client:
+                response = client.post(
+                    "/invocations",
+                    content='{"jsonrpc": "2.0", "id": "s-1", "result": {}}',
+                )
+
+        assert response.status_code == 204
+        written = mock_subprocess.stdin.write.call_args[0][0]
+        assert json.loads(written) == {"jsonrpc": "2.0", "id": "s-1", "result": {}}
+
+
+class TestBatchInvocations:
+    """Test suite for JSON-RPC batches on /invocations."""
+
+    def _post(self, mock_subprocess, body):
+        with (
+            patch.dict(os.environ, {"MCP_SERVER_CMD": "python -u server.py"}),
+            patch(
+                "asyncio.create_subprocess_exec", new_callable=AsyncMock
+            ) as mock_create,
+        ):
+            mock_create.return_value = mock_subprocess
+            _script_stdio(mock_subprocess, _echo_result)
+            with TestClient(_build_app()) as client:
+                return client.post("/invocations", content=json.dumps(body))
+
+    def test_batch_fans_out_and_joins_replies(self, mock_subprocess):
+        """Test batch requests are answered with an array, notifications skipped."""
+        response = self._post(
+            mock_subprocess,
+            [
+                {"jsonrpc": "2.0", "id": 1, "method": "tools/list"},
+                {"jsonrpc": "2.0", "method": "notifications/initialized"},
+                {"jsonrpc": "2.0", "id": "b", "method": "prompts/list"},
+            ],
+        )
+
+        assert response.status_code == 200
+        assert sorted(str(reply["id"]) for reply in response.json()) == ["1", "b"]
+        assert mock_subprocess.stdin.write.call_count == 3
+
+    def test_batch_of_notifications_returns_no_content(self, mock_subprocess):
+        """Test a batch without requests gets 204 like a single notification."""
+        response = self._post(
+            mock_subprocess,
+            [{"jsonrpc": "2.0", "method": "notifications/initialized"}],
+        )
+
+        assert response.status_code == 204
+
+    def test_empty_batch_is_invalid(self, mock_subprocess):
+        """Test an empty array is rejected per JSON-RPC 2.0."""
+        response = self._post(mock_subprocess, [])
+
+        assert response.json()["error"]["code"] == -32600
+        mock_subprocess.stdin.write.assert_not_called()
+
+
+class TestSpooling:
+    """Test suite for spilling oversized subprocess replies to disk."""
+
+    @staticmethod
+    def _reader(*lines):
+        reader = asyncio.StreamReader(limit=1024)
+        for line in lines:
+            reader.feed_data(line)
+        reader.feed_eof()
+        return reader
+
+    @pytest.mark.asyncio
+    async def test_reply_above_threshold_is_spooled(self, subprocess_config):
+        """Test a large line goes to a temp file and keeps its routing envelope."""
+        line = json.dumps(
+            {"jsonrpc": "2.0", "id": 1, "result": {"text": "x" * 20_000}}
+        ).encode("utf-8")
+        reader = self._reader(
+            line + b"\n", b'{"jsonrpc": "2.0", "id": 2, "result": {}}\n'
+        )
+        subprocess = MCPSubprocess(subprocess_config, spool_threshold=4096)
+
+        spooled = await subprocess._read_json(reader)
+        following = await subprocess._read_json(reader)
+
+        assert isinstance(spooled, SpooledMessage)
+        assert spooled.envelope.id == 1
+        assert spooled.size == len(line) + 1
+        assert b"".join(spooled.iter_bytes()).strip() == line
+        assert json.loads(following)["id"] == 2
+
+    @pytest.mark.asyncio
+    async def test_spooled_reply_with_late_id_is_routed(self, subprocess_config):
+        """Test a spooled reply whose id follows the result still reaches its caller."""
+        line = json.dumps(
+            {"jsonrpc": "2.0", "result": {"text": "x" * 100_000}, "id": 4}
+        ).encode("utf-8")
+        subprocess = MCPSubprocess(subprocess_config, spool_threshold=4096)
+        spooled = await subprocess._read_json(self._reader(line + b"\n"))
+        assert spooled.envelope is None
+
+        future = asyncio.get_running_loop().create_future()
+        subprocess._pending["4"] = _PendingCall(future, None)
+        subprocess._dispatch_spooled(spooled)
+
+        assert future.result() is spooled
+        assert b"".join(spooled.iter_bytes()).strip() == line
+
+    @pytest.mark.asyncio
+    async def test_line_above_stream_limit_is_read(self, subprocess_config):
+        """Test lines longer than the StreamReader limit no longer fail."""
+        line = json.dumps({"jsonrpc": "2.0", "id": 1, "result": "y" * 5000})
+        subprocess = MCPSubprocess(subprocess_config)
+
+        result = await subprocess._read_json(self._reader(line.encode() + b"\n"))
+
+        assert result == line
+
+    @pytest.mark.parametrize("batch", [False, True])
+    def test_app_streams_spooled_reply(self, mock_subprocess, batch):
+        """Test spooled replies reach the HTTP client intact, alone or in a batch."""
+        text = "z" * 50_000
+
+        def handler(message):
+            if "method" not in message:
+                return []
+            return [{"jsonrpc": "2.0", "id": message["id"], "result": {"text": text}}]
+
+        request = {"jsonrpc": "2.0", "id": 7, "method": "tools/call"}
+        env = {
+            "MCP_SERVER_CMD": "python -u server.py",
+            "MCP_SPOOL_THRESHOLD_MB": "0.01",
+        }
+        with (
+            patch.dict(os.environ, env),
+            patch(
+                "asyncio.create_subprocess_exec", new_callable=AsyncMock
+            ) as mock_create,
+        ):
+            mock_create.return_value = mock_subprocess
+            _script_stdio(mock_subprocess, handler)
+            with TestClient(_build_app()) as client:
+                response = client.post(
+                    "/invocations",
+                    content=json.dumps([request] if batch else request),
+                )
+
+        assert response.status_code == 200
+        body = response.json()
+        reply = body[0] if batch else body
+        assert reply["result"]["text"] == text
+
+
+class TestCompression:
+    """Test suite for negotiated compression between the proxy and the bridge."""
+
+    TEXT = "2025-10-21T12:00:00Z INFO served in 12ms\n" * 1000
+
+    def _handler(self, message):
+        if "method" not in message:
+            return []
+        text = self.TEXT if message["method"] == "tools/call" else "ok"
+        return [{"jsonrpc": "2.0", "id": message["id"], "result": {"text": text}}]
+
+    def _call(self, client, hooks, request):
+        params = {"body": json.dumps(request).encode("utf-8"), "headers": {}}
+        hooks.before_call(params)
+        with client.stream(
+            "POST", "/invocations", content=params["body"], headers=params["headers"]
+        ) as response:
+            raw = io.BytesIO(b"".join(response.iter_raw()))
+            parsed = {"response": raw}
+            hooks.after_call(http_response=response, parsed=parsed)
+            return response, params["headers"], json.loads(parsed["response"].read())
+
+    def test_round_trip_with_client_hooks(self, mock_subprocess):
+        """Test the proxy's hooks and the bridge negotiate compression both ways."""
+        hooks = ClientCompression(min_size=512)
+        with (
+            patch.dict(os.environ, {"MCP_SERVER_CMD": "python -u server.py"}),
+            patch(
+                "asyncio.create_subprocess_exec", new_callable=AsyncMock
+            ) as mock_create,
+        ):
+            mock_create.return_value = mock_subprocess
+            _script_stdio(mock_subprocess, self._handler)
+            with TestClient(_build_app()) as client:
+                small, sent, reply = self._call(
+                    client, hooks, {"jsonrpc": "2.0", "id": 1, "method": "ping"}
+                )
+                assert "content-encoding" not in small.headers
+                assert "Content-Encoding" not in sent
+                assert reply["result"]["text"] == "ok"
+                assert hooks.request_encoding is not None
+
+                request = {
+                    "jsonrpc": "2.0",
+                    "id": 2,
+                    "method": "tools/call",
+                    "params": {"arguments": {"source": self.TEXT}},
+                }
+                large, sent, reply = self._call(client, hooks, request)
+
+        assert sent["Content-Encoding"] == hooks.request_encoding
+        assert large.headers["content-encoding"] == hooks.request_encoding
+        assert int(large.headers["content-length"]) < len(self.TEXT) / 5
+        assert reply["result"]["text"] == self.TEXT
+        written = json.loads(mock_subprocess.stdin.write.call_args[0][0])
+        assert written["params"]["arguments"]["source"] == self.TEXT
+
+    def test_unsupported_or_corrupt_request_encoding(self, mock_subprocess):
+        """Test bodies the bridge cannot decode are rejected before dispatch."""
+        body = compress(b'{"jsonrpc": "2.0", "id": 1, "method": "ping"}', "gzip")
+        with (
+            patch.dict(os.environ, {"MCP_SERVER_CMD": "python -u server.py"}),
+            TestClient(_build_app()) as client,
+        ):
+            unsupported = client.post(
+                "/invocations", content=body, headers={"Content-Encoding": "br"}
+            )
+            corrupt = client.post(
+                "/invocations",
+                content=body[:10],
+                headers={"Content-Encoding": "gzip"},
+            )
+
+        assert unsupported.status_code == 415
+        assert corrupt.status_code == 400
+        mock_subprocess.stdin.write.assert_not_called()
+
+    def test_oversized_decompressed_request_is_rejected(self, mock_subprocess):
+        """Test a request expanding past MCP_MAX_DECOMPRESSED_MB gets a 413."""
+        padding = "x" * (2 * 1024 * 1024)
+        body = compress(
+            json.dumps(
+                {"jsonrpc": "2.0", "id": 1, "method": "ping", "params": {"p": padding}}
+            ).encode("utf-8"),
+            "gzip",
+        )
+        env = {"MCP_SERVER_CMD": "python -u server.py", "MCP_MAX_DECOMPRESSED_MB": "1"}
+        with patch.dict(os.environ, env), TestClient(_build_app()) as client:
+            response = client.post(
+                "/invocations", content=body, headers={"Content-Encoding": "gzip"}
+            )
+
+        assert response.status_code == 413
+        mock_subprocess.stdin.write.assert_not_called()
+
+
+class TestWebSocket:
+    """Test suite for the /ws JSON-RPC channel."""
+
+    @staticmethod
+    def _handler(message):
+        if message.get("method") == "tools/call":
+            return [
+                {"jsonrpc": "2.0", "method": "notifications/progress", "params": {}},
+                {"jsonrpc": "2.0", "id": message["id"], "result": {"done": True}},
+            ]
+        return _echo_result(message)
+
+    def _connect(self, mock_subprocess):
+        env = {"MCP_SERVER_CMD": "python -u server.py"}
+        stack = contextlib.ExitStack()
+        stack.enter_context(patch.dict(os.environ, env))
+        mock_create = stack.enter_context(
+            patch("asyncio.create_subprocess_exec", new_callable=AsyncMock)
+        )
+        mock_create.return_value = mock_subprocess
+        _script_stdio(mock_subprocess, self._handler)
+        client = stack.enter_context(TestClient(_build_app()))
+        websocket = stack.enter_context(
+            client.websocket_connect("/ws", headers={SESSION_HEADER: "ws-session"})
+        )
+        return stack, websocket
+
+    def test_requests_and_server_messages_share_the_socket(self, mock_subprocess):
+        """Test replies and server notifications arrive as frames on one socket."""
+        stack, websocket = self._connect(mock_subprocess)
+        with stack:
+            websocket.send_text(
+                json.dumps({"jsonrpc": "2.0", "method": "notifications/initialized"})
+            )
+            websocket.send_text(
+                json.dumps({"jsonrpc": "2.0", "id": 1, "method": "tools/call"})
+            )
+            progress = json.loads(websocket.receive_text())
+            reply = json.loads(websocket.receive_text())
+
+            websocket.send_text(
+                json.dumps(
+                    [
+                        {"jsonrpc": "2.0", "id": 2, "method": "tools/list"},
+                        {"jsonrpc": "2.0", "id": 3, "method": "prompts/list"},
+                    ]
+                )
+            )
+            batch = json.loads(websocket.receive_text())
+
+        assert progress["method"] == "notifications/progress"
+        assert reply == {"jsonrpc": "2.0", "id": 1, "result": {"done": True}}
+        assert sorted(item["id"] for item in batch) == [2, 3]
+        assert mock_subprocess.stdin.write.call_count == 4
+
+    def test_invalid_frames_get_json_rpc_errors(self, mock_subprocess):
+        """Test parse errors and empty batches are answered, not fatal."""
+        stack, websocket = self._connect(mock_subprocess)
+        with stack:
+            websocket.send_text("{not json")
+            parse_error = json.loads(websocket.receive_text())
+            websocket.send_text("[]")
+            empty_batch = json.loads(websocket.receive_text())
+            websocket.send_text(
+                json.dumps({"jsonrpc": "2.0", "id": 1, "method": "ping"})
+            )
+            reply = json.loads(websocket.receive_text())
+
+        assert parse_error["error"]["code"] == -32700
+        assert empty_batch["error"]["code"] == -32600
+        assert reply["id"] == 1
+
+
+class TestAgentCorePaths:
+    """Test suite for the AgentCore-shaped routes used with a local endpoint."""
+
+    ARN = "arn:aws:bedrock-agentcore:us-east-1:123456789012:runtime/demo"
+
+    def test_boto3_client_invokes_local_bridge(self, mock_subprocess):
+        """Test a signed InvokeAgentRuntime call is served by the bridge itself."""
+        handler = TestWebSocket._handler
+        with (
+            patch.dict(os.environ, {"MCP_SERVER_CMD": "python -u server.py"}),
+            patch(
+                "asyncio.create_subprocess_exec", new_callable=AsyncMock
+            ) as mock_create,
+        ):
+            mock_create.return_value = mock_subprocess
+            _script_stdio(mock_subprocess, handler)
+            with TestClient(_build_app()) as bridge:
+                agentcore = boto3.session.Session(
+                    aws_access_key_id="AKIDEXAMPLE",
+                    aws_secret_access_key="secret",
+                    region_name="us-east-1",
+                ).client("bedrock-agentcore", endpoint_url="http://testserver")
+                Http2Sender(client=bridge).register(agentcore.meta.events)
+
+                def invoke(request):
+                    return agentcore.invoke_agent_runtime(
+                        agentRuntimeArn=self.ARN,
+                        payload=json.dumps(request).encode("utf-8"),
+                        runtimeSessionId="local-" + "0" * 30,
+                        contentType="application/json",
+                        accept="application/json, text/event-stream",
+                    )
+
+                plain = invoke({"jsonrpc": "2.0", "id": 1, "method": "ping"})
+                plain_body = json.loads(plain["response"].read())
+                streamed = invoke({"jsonrpc": "2.0", "id": 2, "method": "tools/call"})
+                events = [
+                    json.loads(line[5:])
+                    for line in streamed["response"].iter_lines()
+                    if line.startswith(b"data:")
+                ]
+
+        assert plain["contentType"] == "application/json"
+        assert plain_body == {"jsonrpc": "2.0", "id": 1, "result": {}}
+        assert streamed["contentType"].startswith("text/event-stream")
+        assert [event.get("method") for event in events] == [
+            "notifications/progress",
+            None,
+        ]
+        assert events[1]["result"] == {"done": True}
+
+    def test_websocket_path(self, mock_subprocess):
+        """Test the runtime-scoped WebSocket path reaches the same channel."""
+        with (
+            patch.dict(os.environ, {"MCP_SERVER_CMD": "python -u server.py"}),
+            patch(
+                "asyncio.create_subprocess_exec", new_callable=AsyncMock
+            ) as mock_create,
+        ):
+            mock_create.return_value = mock_subprocess
+            _script_stdio(mock_subprocess, _echo_result)
+            with TestClient(_build_app()) as client:
+                path = f"/runtimes/{quote(self.ARN, safe='')}/ws"
+                with client.websocket_connect(path) as websocket:
+                    websocket.send_text(
+                        json.dumps({"jsonrpc": "2.0", "id": 1, "method": "ping"})
+                    )
+                    reply = json.loads(websocket.receive_text())
+
+        assert reply == {"jsonrpc": "2.0", "id": 1, "result": {}}
+
+
+class TestTransports:
+    """Test suite for Content-Length framing and the unix socket transport."""
+
+    @pytest.fixture
+    def framed_config(self, subprocess_config):
+        subprocess_config.framing = "content-length"
+        return subprocess_config
+
+    @staticmethod
+    def _frame(message):
+        body = json.dumps(message).encode("utf-8")
+        return b"Content-Length: %d\r\n\r\n" % len(body) + body
+
+    @pytest.mark.asyncio
+    async def test_framed_messages_are_read_by_length(self, framed_config):
+        """Test frames are split on their length, skipping stray output."""
+        first = {"jsonrpc": "2.0", "id": 1, "result": {"text": "a\nb"}}
+        second = {"jsonrpc": "2.0", "id": 2, "result": {"text": "x" * 20_000}}
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"starting up\n" + self._frame(first) + self._frame(second))
+        reader.feed_eof()
+        subprocess = MCPSubprocess(framed_config, spool_threshold=4096)
+
+        assert json.loads(await subprocess._read_framed(reader)) == first
+        spooled = await subprocess._read_framed(reader)
+        assert isinstance(spooled, SpooledMessage)
+        assert spooled.envelope.id == 2
+        assert json.loads(spooled.read_text()) == second
+        with pytest.raises(MCPServerError, match="terminated"):
+            await subprocess._read_framed(reader)
+
+    @pytest.mark.asyncio
+    async def test_framed_write(self, framed_config, mock_subprocess):
+        """Test outgoing messages carry a Content-Length header."""
+        with patch(
+            "asyncio.create_subprocess_exec", new_callable=AsyncMock
+        ) as mock_create:
+            mock_create.return_value = mock_subprocess
+            subprocess = MCPSubprocess(framed_config)
+            await subprocess.start()
+            await subprocess.send('{"jsonrpc": "2.0", "method": "ping"}')
+
+        written = mock_subprocess.stdin.write.call_args.args[0]
+        assert (
+            written == b'Content-Length: 36\r\n\r\n{"jsonrpc": "2.0", "method": "ping"}'
+        )
+
+    @pytest.mark.asyncio
+    async def test_unix_socket_round_trip(self, tmp_path):
+        """Test a server that connects to MCP_SERVER_SOCKET is served over it."""
+        script = tmp_path / "server.py"
+        script.write_text(
+            "import json, os, socket\n"
+            "conn = socket.socket(socket.AF_UNIX)\n"
+            "conn.connect(os.environ['MCP_SERVER_SOCKET'])\n"
+            "print('noise on stdout', flush=True)\n"
+            "stream = conn.makefile('rwb')\n"
+            "for line in stream:\n"
+            "    message = json.loads(line)\n"
+            "    reply = {'jsonrpc': '2.0', 'id': message['id'], 'result': {}}\n"
+            "    stream.write(json.dumps(reply).encode() + b'\\n')\n"
+            "    stream.flush()\n"
+        )
+        config = SubprocessConfig(
+            command=[sys.executable, str(script)],
+            cwd=None,
+            env=dict(os.environ),
+            transport="unix",
+        )
+        subprocess = MCPSubprocess(config)
+        await asyncio.wait_for(subprocess.start(), timeout=10)
+        try:
+            reply = await asyncio.wait_for(
+                subprocess.invoke('{"jsonrpc": "2.0", "id": 1, "method": "ping"}'),
+                timeout=10,
+            )
+        finally:
+            await subprocess.shutdown()
+
+        assert json.loads(reply) == {"jsonrpc": "2.0", "id": 1, "result": {}}
+
+
 class TestSubprocessConfig:
     """Test suite for _resolve_subprocess_config function."""
 
@@ -291,6 +1395,23 @@ class TestSubprocessConfig:
 
             assert config.cwd == "/custom/path"
 
+    def test_resolve_config_transport(self):
+        """Test framing and transport are read and validated."""
+        env = {
+            "MCP_SERVER_CMD": "python server.py",
+            "MCP_SERVER_FRAMING": "Content-Length",
+            "MCP_SERVER_TRANSPORT": "unix",
+        }
+        with patch.dict(os.environ, env, clear=True):
+            config = _resolve_subprocess_config()
+
+            assert (config.framing, config.transport) == ("content-length", "unix")
+        with (
+            patch.dict(os.environ, {**env, "MCP_SERVER_FRAMING": "xml"}, clear=True),
+            pytest.raises(MCPServerError, match="MCP_SERVER_FRAMING"),
+        ):
+            _resolve_subprocess_config()
+
     def test_resolve_config_missing_cmd(self):
         """Test error when MCP_SERVER_CMD not set."""
         with patch.dict(os.environ, {}, clear=True):
@@ -480,3 +1601,91 @@ class TestFastAPIApp:
                     call_kwargs = mock_create.call_args.kwargs
                     assert "env" in call_kwargs
                     assert call_kwargs["env"].get("MCP_SESSION_ID") == "session-abc-123"
+
+    def test_per_session_mode_isolates_sessions(self, mock_subprocess):
+        """Test per-session mode starts one subprocess per AgentCore session."""
+        with patch.dict(
+            os.environ,
+            {
+                "MCP_SERVER_CMD": "python -u server.py",
+                "MCP_SESSION_MODE": "per-session",
+            },
+        ):
+            client = TestClient(_build_app())
+            with patch(
+                "asyncio.create_subprocess_exec", new_callable=AsyncMock
+            ) as mock_create:
+                mock_create.return_value = mock_subprocess
+
+                with patch.object(
+                    MCPSubprocess, "invoke", new_callable=AsyncMock
+                ) as mock_invoke:
+                    mock_invoke.return_value = (
+                        '{"jsonrpc": "2.0", "result": "ok", "id": 1}'
+                    )
+                    for session in ("session-a", "session-b", "session-a"):
+                        response = client.post(
+                            "/invocations",
+                            content='{"jsonrpc": "2.0", "method": "test", "id": 1}',
+                            headers={
+                                "x-amzn-bedrock-agentcore-runtime-session-id": session
+                            },
+                        )
+                        assert response.status_code == 200
+
+                session_ids = [
+                    call.kwargs["env"].get("MCP_SESSION_ID")
+                    for call in mock_create.call_args_list
+                ]
+                assert session_ids == ["session-a", "session-b"]
+
+                metrics = client.get("/metrics").json()
+                assert metrics["mode"] == "per-session"
+                assert metrics["sessions"]["live"] == 2
+                assert metrics["sessions"]["sessions"]["session-a"]["requests"] == 2
+
+    def test_per_session_lease_is_released_when_forwarding_fails(self, mock_subprocess):
+        """Test an unexpected failure mid-request still hands the lease back."""
+        lease = SessionPool.lease
+        released_by_request: list[bool] = []
+
+        @contextlib.asynccontextmanager
+        async def tracking_lease(pool, session_id):
+            # A lease dropped by the request is only finalized later by GC,
+            # outside the task that took it
+            task = asyncio.current_task()
+            try:
+                async with lease(pool, session_id) as runner:
+                    yield runner
+            finally:
+                released_by_request.append(asyncio.current_task() is task)
+
+        with (
+            patch.dict(
+                os.environ,
+                {
+                    "MCP_SERVER_CMD": "python -u server.py",
+                    "MCP_SESSION_MODE": "per-session",
+                },
+            ),
+            patch.object(SessionPool, "lease", tracking_lease),
+        ):
+            client = TestClient(_build_app(), raise_server_exceptions=False)
+            with (
+                patch(
+                    "asyncio.create_subprocess_exec", new_callable=AsyncMock
+                ) as mock_create,
+                patch.object(MCPSubprocess, "send", new_callable=AsyncMock) as send,
+            ):
+                mock_create.return_value = mock_subprocess
+                send.side_effect = RuntimeError("pipe vanished")
+                response = client.post(
+                    "/invocations",
+                    content='{"jsonrpc": "2.0", "method": "notifications/x"}',
+                    headers={SESSION_HEADER: "session-a"},
+                )
+                assert response.status_code == 500
+
+            metrics = client.get("/metrics").json()
+            assert metrics["sessions"]["sessions"]["session-a"]["active"] == 0
+            assert released_by_request == [True]
@@ -0,0 +1,195 @@
+"""Tests for mcp_agentcore_proxy.snapshot module."""
+
+import asyncio
+import json
+import os
+import sys
+from unittest.mock import patch
+
+import pytest
+
+from mcp_agentcore_proxy.server import SubprocessSupervisor, main
+from mcp_agentcore_proxy.snapshot import (
+    PROTOCOL_VERSION,
+    Snapshot,
+    SnapshotServer,
+    take_snapshot,
+)
+
+# A stdio MCP server with two pages of tools
+STDIO_SERVER = """
+import json, sys
+for line in sys.stdin:
+    message = json.loads(line)
+    if "id" not in message:
+        continue
+    method = message["method"]
+    if method == "initialize":
+        result = {"protocolVersion": message["params"]["protocolVersion"],
+                  "capabilities": {"tools": {}}, "serverInfo": {"name": "demo"}}
+    elif (message.get("params") or {}).get("cursor"):
+        result = {"tools": [{"name": "second"}]}
+    else:
+        result = {"tools": [{"name": "first"}], "nextCursor": "2"}
+    reply = {"jsonrpc": "2.0", "id": message["id"], "result": result}
+    print(json.dumps(reply), flush=True)
+"""
+
+
+class _SlowServer:
+    """An MCP runner that finishes starting only when ``ready`` is set."""
+
+    def __init__(self):
+        self.ready = asyncio.Event()
+        self.received: list[str] = []
+        self.is_running = False
+        self.returncode = None
+        self.inflight = 0
+
+    async def start(self):
+        await self.ready.wait()
+        self.is_running = True
+
+    async def shutdown(self):
+        self.is_running = False
+
+    async def send(self, payload):
+        self.received.append(json.loads(payload)["method"])
+
+    async def invoke(self, payload, on_message=None):
+        message = json.loads(payload)
+        self.received.append(message["method"])
+        return json.dumps({"jsonrpc": "2.0", "id": message["id"], "result": {}})
+
+
+SNAPSHOT = Snapshot(
+    {"protocolVersion": PROTOCOL_VERSION, "capabilities": {"tools": {}}},
+    {"tools/list": {"tools": [{"name": "get_weather"}]}},
+)
+
+
+def _request(request_id, method, **params):
+    message = {"jsonrpc": "2.0", "id": request_id, "method": method}
+    if params:
+        message["params"] = params
+    return json.dumps(message)
+
+
+def test_snapshot_command_writes_every_page(tmp_path):
+    """Test the snapshot subcommand runs the server and records full listings."""
+    script = tmp_path / "server.py"
+    script.write_text(STDIO_SERVER)
+    path = tmp_path / "snapshot.json"
+    env = {"MCP_SERVER_CMD": f"{sys.executable} -u {script}"}
+
+    with patch.dict(os.environ, env, clear=True):
+        main(["snapshot", str(path)])
+
+    snapshot = Snapshot.load(str(path))
+    assert snapshot.initialize["serverInfo"] == {"name": "demo"}
+    assert snapshot.lists == {
+        "tools/list": {"tools": [{"name": "first"}, {"name": "second"}]}
+    }
+
+
+@pytest.mark.asyncio
+async def test_discovery_is_answered_while_the_server_starts():
+    """Test initialize and tools/list return at once and the handshake is replayed."""
+    server = _SlowServer()
+    runner = SnapshotServer(server, SNAPSHOT)
+    await runner.start()
+
+    initialized = json.loads(
+        await runner.invoke(_request(0, "initialize", protocolVersion=PROTOCOL_VERSION))
+    )
+    await runner.send(
+        json.dumps({"jsonrpc": "2.0", "method": "notifications/initialized"})
+    )
+    listed = json.loads(await runner.invoke(_request(1, "tools/list")))
+    call = asyncio.create_task(runner.invoke(_request(2, "tools/call")))
+    await asyncio.sleep(0)
+
+    assert runner.is_running
+    assert initialized == {"jsonrpc": "2.0", "id": 0, "result": SNAPSHOT.initialize}
+    assert listed["result"]["tools"] == [{"name": "get_weather"}]
+    assert not call.done()
+
+    server.ready.set()
+    await asyncio.wait_for(call, timeout=5)
+    assert server.received == ["initialize", "notifications/initialized", "tools/call"]
+
+
+class _ChangedServer(_SlowServer):
+    """A server whose live tools differ from those in ``SNAPSHOT``."""
+
+    async def invoke(self, payload, on_message=None):
+        message = json.loads(payload)
+        self.received.append(message["method"])
+        result = {
+            "initialize": SNAPSHOT.initialize,
+            "tools/list": {"tools": [{"name": "get_forecast"}]},
+        }.get(message["method"], {})
+        return json.dumps({"jsonrpc": "2.0", "id": message["id"], "result": result})
+
+
+@pytest.mark.asyncio
+async def test_changed_listings_are_announced_with_the_next_reply():
+    """Test a live tools/list unlike the snapshot's sends list_changed once."""
+    server = _ChangedServer()
+    runner = SnapshotServer(server, SNAPSHOT)
+    await runner.start()
+    await runner.invoke(_request(0, "initialize", protocolVersion=PROTOCOL_VERSION))
+    await runner.send(
+        json.dumps({"jsonrpc": "2.0", "method": "notifications/initialized"})
+    )
+    server.ready.set()
+    streamed: list[str] = []
+
+    await runner.invoke(_request(1, "tools/call"), on_message=streamed.append)
+    await runner.invoke(_request(2, "tools/call"), on_message=streamed.append)
+
+    assert [json.loads(message) for message in streamed] == [
+        {"jsonrpc": "2.0", "method": "notifications/tools/list_changed"}
+    ]
+    assert server.received == [
+        "initialize",
+        "notifications/initialized",
+        "tools/list",
+        "tools/call",
+        "tools/call",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_other_protocol_versions_wait_for_the_server():
+    """Test a client on another protocol version is answered by the server."""
+    server = _SlowServer()
+    supervisor = SubprocessSupervisor(lambda: server, snapshot=SNAPSHOT)
+    await supervisor.start()
+
+    pending = asyncio.create_task(
+        supervisor.invoke(_request(0, "initialize", protocolVersion="2024-11-05"))
+    )
+    await asyncio.sleep(0)
+    assert not pending.done()
+    server.ready.set()
+    await asyncio.wait_for(pending, timeout=5)
+
+    assert server.received == ["initialize"]
+    # Once the server is up, listings come from it rather than the snapshot
+    assert (
+        json.loads(await supervisor.invoke(_request(1, "tools/list")))["result"] == {}
+    )
+
+
+@pytest.mark.asyncio
+async def test_take_snapshot_skips_missing_capabilities():
+    """Test only the listings a server advertises are recorded."""
+    server = _SlowServer()
+    server.ready.set()
+    await server.start()
+
+    snapshot = await take_snapshot(server)
+
+    assert snapshot.lists == {}
+    assert server.received == ["initialize", "notifications/initialized"]
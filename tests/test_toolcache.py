@@ -0,0 +1,173 @@
+"""Tests for mcp_agentcore_proxy.toolcache module."""
+
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+
+from mcp_agentcore_proxy.server import (
+    MCPServerError,
+    SubprocessSupervisor,
+    _resolve_tool_cache,
+)
+from mcp_agentcore_proxy.toolcache import ToolCache, parse_tool_ttls
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class _CountingServer:
+    """An MCP runner whose tools echo their arguments."""
+
+    def __init__(self, talk_back=False):
+        self.calls = 0
+        self.talk_back = talk_back
+        self.is_running = False
+        self.returncode = None
+        self.inflight = 0
+
+    async def start(self):
+        self.is_running = True
+
+    async def shutdown(self):
+        self.is_running = False
+
+    async def invoke(self, payload, on_message=None):
+        message = json.loads(payload)
+        self.calls += 1
+        if self.talk_back and on_message is not None:
+            on_message('{"jsonrpc": "2.0", "method": "notifications/progress"}')
+        params = message["params"]
+        result = {
+            "content": [{"type": "text", "text": json.dumps(params["arguments"])}],
+            "isError": params["name"] == "broken",
+        }
+        return json.dumps({"jsonrpc": "2.0", "id": message["id"], "result": result})
+
+    def recycle_reason(self, policy):
+        return None
+
+
+def _call(request_id, name, **arguments):
+    return json.dumps(
+        {
+            "jsonrpc": "2.0",
+            "id": request_id,
+            "method": "tools/call",
+            "params": {"name": name, "arguments": arguments},
+        }
+    )
+
+
+def test_parse_tool_ttls():
+    """Test tools take the default TTL unless they name their own."""
+    assert parse_tool_ttls("get_weather=60, convert", 300) == {
+        "get_weather": 60.0,
+        "convert": 300,
+    }
+    for invalid in ("", "=5", "get_weather=soon", "get_weather=0"):
+        with pytest.raises(ValueError):
+            parse_tool_ttls(invalid, 300)
+
+
+def test_hit_rewrites_id_and_ignores_argument_order():
+    """Test equal arguments in any order hit, with the caller's id in the reply."""
+    cache = ToolCache({"get_weather": 60})
+    first = json.loads(_call(1, "get_weather", city="Oslo", units="metric"))
+    second = json.loads(_call("b", "get_weather", units="metric", city="Oslo"))
+    key = cache.key(first)
+
+    assert cache.get(key, 1) is None
+    cache.put(key, json.dumps({"jsonrpc": "2.0", "id": 1, "result": {"t": 3}}))
+    reply = json.loads(cache.get(cache.key(second), "b"))
+
+    assert reply == {"jsonrpc": "2.0", "id": "b", "result": {"t": 3}}
+    assert cache.key(json.loads(_call(3, "other_tool"))) is None
+    assert cache.snapshot()["hits"] == 1
+    assert cache.snapshot()["misses"] == 1
+
+
+def test_entries_expire_and_evict_by_size():
+    """Test TTL expiry per tool and least-recently-used eviction by bytes."""
+    clock = _Clock()
+    cache = ToolCache({"slow": 100, "fast": 10}, max_bytes=60, clock=clock)
+    reply = json.dumps({"jsonrpc": "2.0", "id": 1, "result": {"text": "x" * 10}})
+    keys = [
+        cache.key(json.loads(_call(1, tool, n=n)))
+        for tool, n in (("fast", 1), ("slow", 1), ("slow", 2))
+    ]
+
+    cache.put(keys[0], reply)
+    cache.put(keys[1], reply)
+    clock.now = 11
+    assert cache.get(keys[0], 1) is None
+    assert cache.get(keys[1], 1) is not None
+    cache.put(keys[0], reply)
+    cache.put(keys[2], reply)
+
+    # keys[1] is the least recently used once keys[0] and keys[2] are added
+    assert cache.snapshot()["entries"] == 2
+    assert cache.snapshot()["evictions"] == 1
+    assert cache.get(keys[1], 1) is None
+
+
+@pytest.mark.asyncio
+async def test_supervisor_answers_repeated_calls_from_cache():
+    """Test only the first of identical calls reaches the server."""
+    server = _CountingServer()
+    supervisor = SubprocessSupervisor(
+        lambda: server, cache=ToolCache({"get_weather": 60, "broken": 60})
+    )
+    await supervisor.start()
+
+    replies = [
+        json.loads(await supervisor.invoke(_call(i, "get_weather", city="Oslo")))
+        for i in range(3)
+    ]
+    await supervisor.invoke(_call(4, "broken"))
+    await supervisor.invoke(_call(5, "broken"))
+
+    assert server.calls == 3
+    assert [reply["id"] for reply in replies] == [0, 1, 2]
+    assert replies[2]["result"] == replies[0]["result"]
+
+
+@pytest.mark.asyncio
+async def test_calls_that_talk_back_are_not_cached():
+    """Test a call that streamed server messages is sent to the server again."""
+    server = _CountingServer(talk_back=True)
+    supervisor = SubprocessSupervisor(
+        lambda: server, cache=ToolCache({"get_weather": 60})
+    )
+    await supervisor.start()
+    relayed: list[str] = []
+
+    for request_id in range(2):
+        await supervisor.invoke(
+            _call(request_id, "get_weather", city="Oslo"), on_message=relayed.append
+        )
+
+    assert server.calls == 2
+    assert len(relayed) == 2
+
+
+def test_resolve_tool_cache():
+    """Test the cache is opt-in and its settings are validated."""
+    with patch.dict(os.environ, {}, clear=True):
+        assert _resolve_tool_cache() is None
+    env = {"MCP_CACHE_TOOLS": "get_weather", "MCP_CACHE_TTL": "5"}
+    with patch.dict(os.environ, env, clear=True):
+        cache = _resolve_tool_cache()
+        assert cache is not None
+        assert cache.key(json.loads(_call(1, "get_weather"))) is not None
+    with (
+        patch.dict(os.environ, {"MCP_CACHE_TOOLS": "x=never"}, clear=True),
+        pytest.raises(MCPServerError, match="MCP_CACHE_TOOLS"),
+    ):
+        _resolve_tool_cache()
@@ -0,0 +1,146 @@
+"""Tests for mcp_agentcore_proxy.transport module."""
+
+import json
+
+import boto3
+import httpx
+import pytest
+from botocore.config import Config
+from botocore.exceptions import ClientError, EndpointConnectionError
+
+from mcp_agentcore_proxy.compression import ClientCompression, compress
+from mcp_agentcore_proxy.transport import Http2Sender
+
+ARN = "arn:aws:bedrock-agentcore:us-east-1:123456789012:runtime/demo"
+
+
+def _client(handler, *hooks):
+    # Handlers return ByteStream bodies; httpx reads content= bodies eagerly
+    session = boto3.session.Session(
+        aws_access_key_id="AKIDEXAMPLE",
+        aws_secret_access_key="secret",
+        region_name="us-east-1",
+    )
+    client = session.client(
+        "bedrock-agentcore",
+        endpoint_url="http://agentcore.local",
+        config=Config(retries={"max_attempts": 0}),
+    )
+    sender = Http2Sender(client=httpx.Client(transport=httpx.MockTransport(handler)))
+    for hook in (sender, *hooks):
+        hook.register(client.meta.events)
+    return client
+
+
+def _invoke(client, payload=b'{"jsonrpc": "2.0", "id": 1, "method": "ping"}'):
+    return client.invoke_agent_runtime(
+        agentRuntimeArn=ARN,
+        payload=payload,
+        runtimeSessionId="s" * 33,
+        contentType="application/json",
+        accept="application/json, text/event-stream",
+    )
+
+
+def test_sends_signed_request_and_streams_sse_body():
+    """Test botocore's signed request goes out as-is and the body streams back."""
+    seen = []
+
+    def handler(request):
+        seen.append(request)
+        events = b'event: message\ndata: {"a": 1}\n\nevent: message\ndata: {"b": 2}\n\n'
+        return httpx.Response(
+            200,
+            headers={"content-type": "text/event-stream"},
+            stream=httpx.ByteStream(events),
+        )
+
+    response = _invoke(_client(handler))
+
+    request = seen[0]
+    # The ARN stays percent-encoded exactly as botocore signed it
+    assert request.url.raw_path.startswith(
+        b"/runtimes/arn%3Aaws%3Abedrock-agentcore%3Aus-east-1%3A123456789012"
+        b"%3Aruntime%2Fdemo/invocations"
+    )
+    assert request.headers["authorization"].startswith("AWS4-HMAC-SHA256")
+    assert request.headers["accept-encoding"] == "identity"
+    assert request.headers["x-amzn-bedrock-agentcore-runtime-session-id"] == "s" * 33
+    assert json.loads(request.content)["method"] == "ping"
+    assert response["contentType"] == "text/event-stream"
+    data = [
+        line for line in response["response"].iter_lines() if line.startswith(b"data:")
+    ]
+    assert data == [b'data: {"a": 1}', b'data: {"b": 2}']
+
+
+class _ChunkedStream(httpx.SyncByteStream):
+    def __init__(self, chunks):
+        self._chunks = chunks
+
+    def __iter__(self):
+        yield from self._chunks
+
+
+def test_body_reassembles_many_small_chunks():
+    """Test partial and full reads see every chunk of a body in order."""
+    body = json.dumps({"jsonrpc": "2.0", "id": 1, "result": "x" * 5000}).encode()
+    chunks = [body[i : i + 7] for i in range(0, len(body), 7)]
+
+    def handler(request):
+        return httpx.Response(
+            200,
+            headers={"content-type": "application/json"},
+            stream=_ChunkedStream(chunks),
+        )
+
+    stream = _invoke(_client(handler))["response"]
+
+    head = stream.read(100)
+    rest = stream.read()
+    assert isinstance(head, bytes) and isinstance(rest, bytes)
+    assert head + rest == body
+    assert stream.read() == b""
+
+
+def test_error_status_becomes_client_error():
+    """Test error responses are parsed by botocore like any other call."""
+
+    def handler(request):
+        return httpx.Response(
+            429,
+            headers={"x-amzn-errortype": "ThrottlingException"},
+            stream=httpx.ByteStream(b'{"message": "slow down"}'),
+        )
+
+    with pytest.raises(ClientError) as excinfo:
+        _invoke(_client(handler))
+
+    assert excinfo.value.response["Error"]["Code"] == "ThrottlingException"
+
+
+def test_connection_failure_maps_to_botocore_error():
+    """Test httpx transport errors surface as botocore connection errors."""
+
+    def handler(request):
+        raise httpx.ConnectError("refused", request=request)
+
+    with pytest.raises(EndpointConnectionError):
+        _invoke(_client(handler))
+
+
+def test_compression_hooks_see_undecoded_body():
+    """Test a compressed response is decoded once, by the compression hooks."""
+    reply = b'{"jsonrpc": "2.0", "id": 1, "result": {}}'
+
+    def handler(request):
+        assert request.headers["accept-encoding"] != "identity"
+        return httpx.Response(
+            200,
+            headers={"content-type": "application/json", "content-encoding": "gzip"},
+            stream=httpx.ByteStream(compress(reply, "gzip")),
+        )
+
+    response = _invoke(_client(handler, ClientCompression()))
+
+    assert response["response"].read() == reply
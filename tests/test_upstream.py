@@ -0,0 +1,185 @@
+"""Tests for mcp_agentcore_proxy.upstream module."""
+
+import json
+import os
+from unittest.mock import patch
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+from mcp_agentcore_proxy.server import SESSION_HEADER, _build_app
+from mcp_agentcore_proxy.upstream import UpstreamClient
+
+URL = "http://sidecar.local/mcp"
+
+
+class _UpstreamServer:
+    """A streamable-HTTP MCP server that can forget its sessions."""
+
+    def __init__(self):
+        self.requests: list[httpx.Request] = []
+        self.sessions = 0
+        self.live: set[str] = set()
+
+    def __call__(self, request):
+        self.requests.append(request)
+        if request.method == "DELETE":
+            self.live.discard(request.headers["mcp-session-id"])
+            return httpx.Response(200)
+        message = json.loads(request.content)
+        headers = {}
+        if message.get("method") == "initialize":
+            self.sessions += 1
+            session = f"mcp-{self.sessions}"
+            self.live.add(session)
+            headers["mcp-session-id"] = session
+            result = {"protocolVersion": "2025-06-18", "capabilities": {}}
+            return self._json(message, result, headers)
+        if request.headers.get("mcp-session-id") not in self.live:
+            return httpx.Response(404)
+        if "id" not in message or "method" not in message:
+            return httpx.Response(202)
+        if message["method"] == "tools/call":
+            events = [
+                {"jsonrpc": "2.0", "method": "notifications/progress"},
+                {"jsonrpc": "2.0", "id": 0, "method": "elicitation/create"},
+                {"jsonrpc": "2.0", "id": message["id"], "result": {"done": True}},
+            ]
+            body = "".join(f"event: message\ndata: {json.dumps(e)}\n\n" for e in events)
+            return httpx.Response(
+                200,
+                headers={"content-type": "text/event-stream"},
+                stream=httpx.ByteStream(body.encode("utf-8")),
+            )
+        return self._json(message, {"session": request.headers["mcp-session-id"]})
+
+    @staticmethod
+    def _json(message, result, headers=None):
+        body = json.dumps({"jsonrpc": "2.0", "id": message["id"], "result": result})
+        return httpx.Response(
+            200,
+            headers={"content-type": "application/json", **(headers or {})},
+            stream=httpx.ByteStream(body.encode("utf-8")),
+        )
+
+
+def _request(request_id, method):
+    return json.dumps({"jsonrpc": "2.0", "id": request_id, "method": method})
+
+
+INITIALIZE = _request(0, "initialize")
+INITIALIZED = json.dumps({"jsonrpc": "2.0", "method": "notifications/initialized"})
+
+
+@pytest.mark.asyncio
+async def test_session_id_is_kept_and_closed():
+    """Test the upstream session id is sent on later calls and deleted on shutdown."""
+    server = _UpstreamServer()
+    upstream = UpstreamClient(URL, transport=httpx.MockTransport(server))
+    session = upstream.session("runtime-session")
+    await session.start()
+
+    await session.invoke(INITIALIZE)
+    await session.send(INITIALIZED)
+    reply = json.loads(await session.invoke(_request(1, "tools/list")))
+    await session.shutdown()
+    await upstream.aclose()
+
+    assert reply["result"] == {"session": "mcp-1"}
+    listed = server.requests[2]
+    assert listed.headers["mcp-protocol-version"] == "2025-06-18"
+    assert listed.headers[SESSION_HEADER] == "runtime-session"
+    assert server.requests[-1].method == "DELETE"
+    assert server.live == set()
+
+
+@pytest.mark.asyncio
+async def test_sse_messages_reach_listener_before_reply():
+    """Test server messages on the SSE stream are relayed and the reply returned."""
+    server = _UpstreamServer()
+    upstream = UpstreamClient(URL, transport=httpx.MockTransport(server))
+    session = upstream.session(None)
+    await session.start()
+    await session.invoke(INITIALIZE)
+    relayed: list[dict] = []
+
+    reply = await session.invoke(
+        _request(1, "tools/call"), on_message=lambda m: relayed.append(json.loads(m))
+    )
+    await upstream.aclose()
+
+    assert json.loads(reply)["result"] == {"done": True}
+    assert [message.get("method") for message in relayed] == [
+        "notifications/progress",
+        "elicitation/create",
+    ]
+    assert session.owns_server_request(0)
+
+
+@pytest.mark.asyncio
+async def test_expired_session_replays_handshake():
+    """Test a 404 for a known session re-initializes and retries the call."""
+    server = _UpstreamServer()
+    upstream = UpstreamClient(URL, transport=httpx.MockTransport(server))
+    session = upstream.session(None)
+    await session.start()
+    await session.invoke(INITIALIZE)
+    await session.send(INITIALIZED)
+    server.live.clear()
+
+    reply = json.loads(await session.invoke(_request(1, "tools/list")))
+    await upstream.aclose()
+
+    assert reply["result"] == {"session": "mcp-2"}
+    methods = [json.loads(r.content).get("method") for r in server.requests]
+    assert methods[-4:] == [
+        "tools/list",
+        "initialize",
+        "notifications/initialized",
+        "tools/list",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_reply_with_invalid_utf8_is_still_returned():
+    """Test undecodable bytes in a JSON reply are replaced rather than raised."""
+    body = b'{"jsonrpc": "2.0", "id": 1, "result": {"text": "caf\xe9"}}'
+
+    def server(request):
+        return httpx.Response(
+            200,
+            headers={"content-type": "application/json"},
+            stream=httpx.ByteStream(body),
+        )
+
+    upstream = UpstreamClient(URL, transport=httpx.MockTransport(server))
+    session = upstream.session(None)
+    await session.start()
+
+    reply = json.loads(await session.invoke(_request(1, "resources/read")))
+    await upstream.aclose()
+
+    assert reply["result"] == {"text": "caf\ufffd"}
+
+
+def test_app_forwards_invocations_upstream():
+    """Test MCP_SERVER_URL serves /invocations from the upstream server."""
+    server = _UpstreamServer()
+
+    def _make_upstream(url):
+        return UpstreamClient(url, transport=httpx.MockTransport(server))
+
+    with (
+        patch.dict(os.environ, {"MCP_SERVER_URL": URL}, clear=True),
+        patch("mcp_agentcore_proxy.server._make_upstream", _make_upstream),
+        TestClient(_build_app()) as client,
+    ):
+        initialized = client.post("/invocations", content=INITIALIZE)
+        notified = client.post("/invocations", content=INITIALIZED)
+        called = client.post("/invocations", content=_request(1, "tools/call"))
+
+    assert initialized.json()["result"]["protocolVersion"] == "2025-06-18"
+    assert notified.status_code == 204
+    assert called.headers["content-type"].startswith("text/event-stream")
+    assert '"done": true' in called.text
@@ -0,0 +1,112 @@
+"""Tests for mcp_agentcore_proxy.zygote module."""
+
+import asyncio
+import json
+import os
+import sys
+import textwrap
+
+import pytest
+
+from mcp_agentcore_proxy.server import MCPSubprocess, SubprocessConfig
+from mcp_agentcore_proxy.zygote import ZygoteClient, ZygoteError
+
+pytestmark = pytest.mark.skipif(
+    not hasattr(os, "fork"), reason="zygote mode requires fork()"
+)
+
+ECHO_SERVER = textwrap.dedent(
+    """
+    import json
+    import os
+    import sys
+
+    IMPORT_PID = os.getpid()
+
+    if __name__ == "__main__":
+        for line in sys.stdin:
+            request = json.loads(line)
+            response = {
+                "jsonrpc": "2.0",
+                "id": request["id"],
+                "result": {
+                    "session": os.environ.get("MCP_SESSION_ID"),
+                    "pid": os.getpid(),
+                },
+            }
+            print(json.dumps(response), flush=True)
+    """
+)
+
+
+@pytest.fixture
+def server_module(tmp_path):
+    (tmp_path / "zygote_echo_server.py").write_text(ECHO_SERVER)
+    return tmp_path
+
+
+def _config(cwd, session_id):
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [*sys.path, str(cwd)]))
+    env["MCP_SESSION_ID"] = session_id
+    return SubprocessConfig(
+        command=[sys.executable, "-m", "zygote_echo_server"], cwd=str(cwd), env=env
+    )
+
+
+@pytest.mark.asyncio
+async def test_zygote_forks_children_with_their_own_session(server_module):
+    """Test forked children get fresh stdio pipes and their own MCP_SESSION_ID."""
+    first = _config(server_module, "session-a")
+    zygote = ZygoteClient("zygote_echo_server", first.cwd, first.env)
+
+    async def spawner(config):
+        return await zygote.spawn(config.env)
+
+    runners = [
+        MCPSubprocess(_config(server_module, session), spawner)
+        for session in ("session-a", "session-b")
+    ]
+    try:
+        for runner in runners:
+            await runner.start()
+
+        responses = [
+            json.loads(await runner.invoke(json.dumps({"jsonrpc": "2.0", "id": 7})))
+            for runner in runners
+        ]
+        assert [r["result"]["session"] for r in responses] == [
+            "session-a",
+            "session-b",
+        ]
+        assert responses[0]["result"]["pid"] != responses[1]["result"]["pid"]
+        assert all(runner.is_running for runner in runners)
+    finally:
+        for runner in runners:
+            await runner.shutdown()
+        await zygote.shutdown()
+
+    assert not any(runner.is_running for runner in runners)
+
+
+@pytest.mark.asyncio
+async def test_zygote_reports_child_exit(server_module):
+    """Test a child's exit status is reported back through the zygote."""
+    config = _config(server_module, "session-exit")
+    zygote = ZygoteClient("zygote_echo_server", config.cwd, config.env)
+    try:
+        process = await zygote.spawn(config.env)
+        process.stdin.close()
+        returncode = await asyncio.wait_for(process.wait(), timeout=10)
+        assert returncode == 0
+        assert process.returncode == 0
+    finally:
+        await zygote.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_zygote_import_failure(tmp_path):
+    """Test a module that cannot be imported surfaces a ZygoteError."""
+    zygote = ZygoteClient("does_not_exist_module", str(tmp_path), dict(os.environ))
+    with pytest.raises(ZygoteError, match="failed to start"):
+        await zygote.start(timeout=30)